@@ -0,0 +1,244 @@
+"""
+Certification course catalog.
+
+Course pages are served from precomposed documents: certifications.course_documents
+holds one JSON document per course (course fields, category and ordered modules),
+rebuilt by database triggers whenever a course, module or category changes. This
+module keeps those documents in an in-process snapshot indexed by status, level
+and category, with a version per course and for the whole catalog so endpoints
+can answer conditional requests with ETags. The snapshot checks for rebuilt
+documents at most every check_interval_seconds and reloads only the documents
+whose version changed.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import logging
+import threading
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from addons.certifications.tables import course_documents
+
+logger = logging.getLogger(__name__)
+
+
+def _format_duration(minutes: Optional[int]) -> Optional[str]:
+    """Format a duration in minutes the way the catalog displays it"""
+    if not minutes:
+        return None
+    if minutes < 60:
+        return f"{minutes} minutes"
+    hours = minutes / 60
+    hours_text = f"{hours:g}" if hours == int(hours) else f"{hours:.1f}"
+    return f"{hours_text} hour" if hours == 1 else f"{hours_text} hours"
+
+
+class CourseDocument:
+    """
+    A course's detail document with its listing summary and version.
+    """
+
+    __slots__ = ("course_id", "detail", "summary", "version")
+
+    def __init__(self, course_id: int, document: Dict[str, Any], version: str):
+        """
+        Prepare the detail and summary representations
+
+        Args:
+            course_id: The ID of the course
+            document: Document as built by certifications.build_course_document
+            version: Content hash of the document
+        """
+        detail = dict(document)
+        detail["modules_count"] = len(detail.get("modules") or [])
+        detail["estimated_duration"] = _format_duration(detail.get("duration_minutes"))
+
+        self.course_id = course_id
+        self.detail = detail
+        self.summary = {field: value for field, value in detail.items() if field != "modules"}
+        self.version = version
+
+
+class CourseCatalogSnapshot:
+    """
+    Immutable, indexed view of the course documents at a point in time.
+    """
+
+    def __init__(self, documents: Dict[int, CourseDocument]):
+        """
+        Build the snapshot indexes
+
+        Args:
+            documents: Course documents by course ID
+        """
+        self.documents = documents
+        ordered = sorted(documents.values(), key=lambda document: (document.detail.get("level") or 0, document.course_id))
+        self.summaries = [document.summary for document in ordered]
+
+        self.by_status: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_level: Dict[int, List[Dict[str, Any]]] = {}
+        self.by_category: Dict[str, List[Dict[str, Any]]] = {}
+        for summary in self.summaries:
+            self.by_status.setdefault(summary.get("status"), []).append(summary)
+            self.by_level.setdefault(summary.get("level"), []).append(summary)
+            self.by_category.setdefault(summary.get("category"), []).append(summary)
+
+        digest = hashlib.sha256()
+        for document in ordered:
+            digest.update(f"{document.course_id}:{document.version}|".encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+
+    def get(self, course_id: int) -> Optional[CourseDocument]:
+        """Get a course's document"""
+        return self.documents.get(course_id)
+
+    def filter(
+        self,
+        status: Optional[str] = None,
+        level: Optional[int] = None,
+        category: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Filter course summaries using the narrowest available index
+
+        Args:
+            status: Optional status filter (active, archived)
+            level: Optional level filter
+            category: Optional category filter (case-insensitive)
+
+        Returns:
+            List of course summaries in catalog order
+        """
+        category = category.lower() if category else None
+        candidates = [
+            index.get(value, [])
+            for index, value in (
+                (self.by_status, status),
+                (self.by_level, level),
+                (self.by_category, category)
+            )
+            if value
+        ]
+        source = min(candidates, key=len) if candidates else self.summaries
+
+        if len(candidates) > 1:
+            source = [
+                summary for summary in source
+                if (not status or summary.get("status") == status)
+                and (not level or summary.get("level") == level)
+                and (not category or summary.get("category") == category)
+            ]
+
+        return list(source)
+
+
+class CourseCatalog:
+    """
+    Holder for the current course catalog snapshot with incremental refreshes.
+    """
+
+    def __init__(self, check_interval_seconds: int = 30):
+        """
+        Initialize the catalog holder
+
+        Args:
+            check_interval_seconds: Seconds between checks for rebuilt documents
+        """
+        self.check_interval_seconds = check_interval_seconds
+        self._lock = threading.Lock()
+        # (snapshot, source signature, checked_at) swapped as a single reference
+        self._current: Optional[Tuple[CourseCatalogSnapshot, tuple, float]] = None
+
+    def get(self, db: Session) -> CourseCatalogSnapshot:
+        """
+        Get the current snapshot, loading rebuilt documents when due
+
+        Args:
+            db: Database session
+
+        Returns:
+            Current catalog snapshot
+        """
+        current = self._current
+        if current is not None and time.monotonic() - current[2] < self.check_interval_seconds:
+            return current[0]
+
+        with self._lock:
+            current = self._current
+            now = time.monotonic()
+            if current is not None and now - current[2] < self.check_interval_seconds:
+                return current[0]
+
+            # Versions are content hashes, so the sum changes whenever any document does
+            source = tuple(db.execute(
+                select(func.count(), func.sum(func.hashtext(course_documents.c.version))).select_from(course_documents)
+            ).one())
+
+            if current is not None and current[1] == source:
+                snapshot = current[0]
+            elif current is not None:
+                snapshot = self._load_changes(db, current[0])
+            else:
+                snapshot = self._load_all(db)
+
+            self._current = (snapshot, source, now)
+            return snapshot
+
+    def rebuild(self, db: Session, course_id: int) -> None:
+        """
+        Rebuild a course's document now (the triggers normally do this) and refresh
+
+        Args:
+            db: Database session
+            course_id: The ID of the course
+        """
+        db.execute(text("SELECT certifications.build_course_document(:course_id)"), {"course_id": course_id})
+        db.commit()
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Force a check for rebuilt documents on the next read"""
+        current = self._current
+        if current is not None:
+            self._current = (current[0], current[1], float("-inf"))
+
+    def _load_all(self, db: Session) -> CourseCatalogSnapshot:
+        """Load every course document"""
+        rows = db.execute(
+            select(course_documents.c.course_id, course_documents.c.document, course_documents.c.version)
+        ).all()
+        snapshot = CourseCatalogSnapshot({
+            row.course_id: CourseDocument(row.course_id, row.document, row.version) for row in rows
+        })
+        logger.info("Loaded course catalog %s with %d courses", snapshot.version, len(rows))
+        return snapshot
+
+    def _load_changes(self, db: Session, snapshot: CourseCatalogSnapshot) -> CourseCatalogSnapshot:
+        """Reload only the documents whose version changed, dropping removed courses"""
+        versions = dict(db.execute(select(course_documents.c.course_id, course_documents.c.version)).all())
+        changed = [
+            course_id for course_id, version in versions.items()
+            if course_id not in snapshot.documents or snapshot.documents[course_id].version != version
+        ]
+
+        documents = {
+            course_id: document for course_id, document in snapshot.documents.items()
+            if course_id in versions
+        }
+        if changed:
+            rows = db.execute(
+                select(course_documents.c.course_id, course_documents.c.document, course_documents.c.version)
+                .where(course_documents.c.course_id.in_(changed))
+            ).all()
+            for row in rows:
+                documents[row.course_id] = CourseDocument(row.course_id, row.document, row.version)
+
+        updated = CourseCatalogSnapshot(documents)
+        logger.info("Refreshed %d course documents (catalog %s)", len(changed), updated.version)
+        return updated
+
+
+# Shared catalog instance for the certification endpoints
+course_catalog = CourseCatalog()
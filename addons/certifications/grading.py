@@ -0,0 +1,461 @@
+"""
+Certification exam grading for Local Lift.
+
+Each course's answer key is compiled once into parallel arrays: the bitmask of
+correct options per question and its weight, in question order. A submission
+is encoded into the same layout and graded in one pass that compares masks
+element-wise and sums the weights of the matches, with no per-question
+database access. Attempts are stored with their answers and the version of
+the key they were graded against, so when a key changes every attempt graded
+against an older version can be regraded in one batch.
+"""
+from array import array
+from datetime import datetime, timedelta, timezone
+from itertools import compress
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import logging
+import threading
+import time
+
+from sqlalchemy import bindparam, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from addons.certifications.tables import courses, enrollments, exam_attempts, exam_questions
+from addons.gamification.achievements import achievement_engine
+from addons.gamification.points import INSERT_CHUNK_SIZE, points_ledger
+
+logger = logging.getLogger(__name__)
+
+# Options are stored as bits of a 64-bit mask
+MAX_OPTIONS = 64
+
+# How long an issued certification remains valid
+CERTIFICATION_VALIDITY = timedelta(days=365)
+
+# Points awarded for a certification when the course does not set its own
+DEFAULT_CERTIFICATION_POINTS = 100
+
+
+def option_mask(selected: Any) -> int:
+    """
+    Encode selected option indexes as a bitmask.
+
+    Args:
+        selected: An option index or a list of option indexes
+
+    Returns:
+        int: Bitmask with one bit per selected option
+
+    Raises:
+        ValueError: If an option is not an index in range
+    """
+    if selected is None:
+        return 0
+    indexes = selected if isinstance(selected, (list, tuple, set)) else [selected]
+
+    mask = 0
+    for index in indexes:
+        if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < MAX_OPTIONS:
+            raise ValueError(f"Invalid option {index!r}")
+        mask |= 1 << index
+    return mask
+
+
+class CompiledAnswerKey:
+    """
+    A course's answer key as parallel mask and weight arrays.
+    """
+
+    def __init__(self, course_id: int, questions: Iterable[Any], pass_score: float):
+        """
+        Compile the key
+
+        Args:
+            course_id: The ID of the course
+            questions: Rows with id, correct_options, weight and topic, in exam order
+            pass_score: Minimum percentage needed to pass
+        """
+        self.course_id = course_id
+        self.pass_score = float(pass_score)
+
+        question_ids = []
+        topics = []
+        self.masks = array("Q")
+        self.weights = array("d")
+        for question in questions:
+            question_ids.append(question.id)
+            topics.append(question.topic)
+            self.masks.append(option_mask(list(question.correct_options or [])))
+            self.weights.append(float(question.weight))
+
+        self.question_ids = tuple(question_ids)
+        self.topics = tuple(topics)
+        self.positions: Dict[int, int] = {question_id: position for position, question_id in enumerate(question_ids)}
+        self.total_weight = sum(self.weights)
+
+        digest = hashlib.sha256(repr((self.question_ids, self.masks.tolist(), self.weights.tolist(), self.pass_score)).encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+
+    def __len__(self) -> int:
+        return len(self.question_ids)
+
+    def encode(self, answers: Dict[Any, Any]) -> array:
+        """
+        Encode a submission into masks aligned with the key.
+
+        Args:
+            answers: Selected option index(es) per question ID (string or int keys)
+
+        Returns:
+            array: Submitted mask per question (0 for unanswered)
+
+        Raises:
+            ValueError: If an answer references an unknown question or invalid option
+        """
+        submitted = array("Q", bytes(8 * len(self.question_ids)))
+        for question_id, selected in answers.items():
+            try:
+                position = self.positions[int(question_id)]
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Unknown question {question_id!r}")
+            submitted[position] = option_mask(selected)
+        return submitted
+
+    def grade(self, answers: Dict[Any, Any]) -> Dict[str, Any]:
+        """
+        Grade a submission.
+
+        Args:
+            answers: Selected option index(es) per question ID
+
+        Returns:
+            dict: Score (percentage), correct count, pass flag and topics to review
+
+        Raises:
+            ValueError: If an answer references an unknown question or invalid option
+        """
+        submitted = self.encode(answers)
+        correct = [key == given for key, given in zip(self.masks, submitted)]
+        earned = sum(compress(self.weights, correct))
+
+        score = round(earned / self.total_weight * 100, 2) if self.total_weight else 0.0
+        missed = {}
+        for topic, weight, hit in zip(self.topics, self.weights, correct):
+            if not hit and topic:
+                missed[topic] = missed.get(topic, 0.0) + weight
+
+        return {
+            "score": score,
+            "correct_answers": sum(correct),
+            "total_questions": len(self.question_ids),
+            "passed": score >= self.pass_score,
+            "areas_for_improvement": sorted(missed, key=lambda topic: -missed[topic]),
+            "answer_key_version": self.version
+        }
+
+
+class ExamGrader:
+    """
+    Cache of compiled answer keys with single-submission and batch grading.
+    """
+
+    def __init__(self, check_interval_seconds: int = 60):
+        """
+        Initialize the grader
+
+        Args:
+            check_interval_seconds: Seconds between checks for answer key changes
+        """
+        self.check_interval_seconds = check_interval_seconds
+        self._lock = threading.Lock()
+        # course_id -> (key, source version, checked_at)
+        self._keys: Dict[int, Tuple[Optional[CompiledAnswerKey], tuple, float]] = {}
+
+    def get_key(self, db: Session, course_id: int) -> Optional[CompiledAnswerKey]:
+        """
+        Get a course's compiled answer key, recompiling it if the questions changed.
+
+        Args:
+            db: Database session
+            course_id: The ID of the course
+
+        Returns:
+            CompiledAnswerKey: The key, or None if the course has no active questions
+        """
+        now = time.monotonic()
+        cached = self._keys.get(course_id)
+        if cached is not None and now - cached[2] < self.check_interval_seconds:
+            return cached[0]
+
+        with self._lock:
+            cached = self._keys.get(course_id)
+            if cached is not None and now - cached[2] < self.check_interval_seconds:
+                return cached[0]
+
+            version = self._source_version(db, course_id)
+            if cached is not None and cached[1] == version:
+                key = cached[0]
+            else:
+                key = self._compile(db, course_id, version[2])
+                if key is not None:
+                    logger.info("Compiled answer key %s for course %s (%d questions)", key.version, course_id, len(key))
+
+            self._keys[course_id] = (key, version, now)
+            return key
+
+    def submit(self, db: Session, user_id: str, course: Any, answers: Dict[Any, Any]) -> Dict[str, Any]:
+        """
+        Grade and record an exam attempt, certifying the user on their first pass.
+
+        Args:
+            db: Database session
+            user_id: The ID of the user
+            course: Course row (id, title, points_awarded)
+            answers: Selected option index(es) per question ID
+
+        Returns:
+            dict: Grading result with attempt ID and certification details if newly certified
+
+        Raises:
+            LookupError: If the course has no exam questions or the user is not enrolled
+            ValueError: If the answers are invalid
+        """
+        key = self.get_key(db, course.id)
+        if key is None:
+            raise LookupError("This course has no certification exam")
+
+        result = key.grade(answers)
+        now = datetime.now(timezone.utc)
+        user_id = str(user_id)
+
+        # Serializes a user's submissions for the course so only one can be their first pass
+        enrollment = db.execute(
+            select(enrollments.c.id)
+            .where(enrollments.c.user_id == user_id)
+            .where(enrollments.c.course_id == course.id)
+            .with_for_update()
+        ).first()
+        if enrollment is None:
+            raise LookupError("Not enrolled in this course")
+
+        already_passed = db.execute(
+            select(exam_attempts.c.id)
+            .where(exam_attempts.c.user_id == user_id)
+            .where(exam_attempts.c.course_id == course.id)
+            .where(exam_attempts.c.passed == True)
+            .limit(1)
+        ).first() is not None
+
+        result["attempt_id"] = db.execute(
+            exam_attempts.insert().values(
+                user_id=user_id,
+                course_id=course.id,
+                answers={str(question_id): selected for question_id, selected in answers.items()},
+                score=result["score"],
+                correct_count=result["correct_answers"],
+                passed=result["passed"],
+                answer_key_version=key.version,
+                submitted_at=now,
+                graded_at=now
+            ).returning(exam_attempts.c.id)
+        ).scalar_one()
+
+        result["newly_certified"] = result["passed"] and not already_passed
+        if result["newly_certified"]:
+            result["points_earned"] = self._certify(db, [user_id], course, now)
+        else:
+            result["points_earned"] = 0
+            db.commit()
+
+        return result
+
+    def regrade(self, db: Session, course: Any) -> Dict[str, Any]:
+        """
+        Regrade every attempt graded against an outdated answer key.
+
+        Attempts are graded in memory against the current key and written back
+        with one executemany UPDATE per chunk. Users who pass for the first time
+        are certified; certifications already issued are not revoked.
+
+        Args:
+            db: Database session
+            course: Course row (id, title, points_awarded)
+
+        Returns:
+            dict: Counts of regraded attempts and of results that changed
+        """
+        self.invalidate(course.id)
+        key = self.get_key(db, course.id)
+        if key is None:
+            raise LookupError("This course has no certification exam")
+
+        attempts = db.execute(
+            select(exam_attempts.c.id, exam_attempts.c.user_id, exam_attempts.c.answers, exam_attempts.c.passed)
+            .where(exam_attempts.c.course_id == course.id)
+            .where(or_(
+                exam_attempts.c.answer_key_version.is_(None),
+                exam_attempts.c.answer_key_version != key.version
+            ))
+        ).all()
+
+        now = datetime.now(timezone.utc)
+        updates = []
+        newly_passed = set()
+        newly_failed = 0
+        invalid = 0
+        for attempt in attempts:
+            # Answers to questions that were removed from the key are ignored
+            answers = {
+                question_id: selected for question_id, selected in (attempt.answers or {}).items()
+                if question_id.isdigit() and int(question_id) in key.positions
+            }
+            try:
+                result = key.grade(answers)
+            except ValueError:
+                invalid += 1
+                continue
+
+            if result["passed"] and not attempt.passed:
+                newly_passed.add(attempt.user_id)
+            elif attempt.passed and not result["passed"]:
+                newly_failed += 1
+
+            updates.append({
+                "b_id": attempt.id,
+                "b_score": result["score"],
+                "b_correct": result["correct_answers"],
+                "b_passed": result["passed"],
+                "b_version": key.version,
+                "b_graded_at": now
+            })
+
+        # Users with a passing attempt before this regrade are already certified
+        if newly_passed:
+            newly_passed -= set(db.execute(
+                select(exam_attempts.c.user_id)
+                .where(exam_attempts.c.course_id == course.id)
+                .where(exam_attempts.c.passed == True)
+                .where(exam_attempts.c.user_id.in_(newly_passed))
+            ).scalars())
+
+        statement = (
+            update(exam_attempts)
+            .where(exam_attempts.c.id == bindparam("b_id"))
+            .values(
+                score=bindparam("b_score"),
+                correct_count=bindparam("b_correct"),
+                passed=bindparam("b_passed"),
+                answer_key_version=bindparam("b_version"),
+                graded_at=bindparam("b_graded_at")
+            )
+        )
+        for start in range(0, len(updates), INSERT_CHUNK_SIZE):
+            db.connection().execute(statement, updates[start:start + INSERT_CHUNK_SIZE])
+
+        if newly_passed:
+            self._certify(db, sorted(newly_passed), course, now)
+        else:
+            db.commit()
+
+        logger.info(
+            "Regraded %d attempts for course %s against key %s: %d newly certified, %d now failing",
+            len(updates), course.id, key.version, len(newly_passed), newly_failed
+        )
+
+        return {
+            "course_id": course.id,
+            "answer_key_version": key.version,
+            "regraded": len(updates),
+            "invalid": invalid,
+            "newly_certified": len(newly_passed),
+            "newly_failing": newly_failed
+        }
+
+    def invalidate(self, course_id: Optional[int] = None) -> None:
+        """Force answer keys to be recompiled on next use"""
+        with self._lock:
+            if course_id is None:
+                self._keys.clear()
+            else:
+                self._keys.pop(course_id, None)
+
+    def _source_version(self, db: Session, course_id: int) -> tuple:
+        """Get the question count, latest question edit and pass score of a course"""
+        count, updated_at = db.execute(
+            select(func.count(), func.max(exam_questions.c.updated_at))
+            .where(exam_questions.c.course_id == course_id)
+            .where(exam_questions.c.is_active == True)
+        ).one()
+        pass_score = db.execute(
+            select(courses.c.exam_pass_score).where(courses.c.id == course_id)
+        ).scalar()
+        return (count, updated_at, float(pass_score) if pass_score is not None else 70.0)
+
+    def _compile(self, db: Session, course_id: int, pass_score: float) -> Optional[CompiledAnswerKey]:
+        """Load a course's active questions and compile them"""
+        questions = db.execute(
+            select(
+                exam_questions.c.id,
+                exam_questions.c.correct_options,
+                exam_questions.c.weight,
+                exam_questions.c.topic
+            )
+            .where(exam_questions.c.course_id == course_id)
+            .where(exam_questions.c.is_active == True)
+            .order_by(exam_questions.c.sequence_order, exam_questions.c.id)
+        ).all()
+        if not questions:
+            return None
+        return CompiledAnswerKey(course_id, questions, pass_score)
+
+    def _certify(self, db: Session, user_ids: List[str], course: Any, issued_at: datetime) -> int:
+        """
+        Certify users on a course, award the certification points and record the event.
+
+        Commits the current transaction.
+
+        Args:
+            db: Database session
+            user_ids: Users who passed for the first time
+            course: Course row (id, title, points_awarded)
+            issued_at: Time the certification is issued
+
+        Returns:
+            int: Points awarded per user
+        """
+        db.execute(
+            update(enrollments)
+            .where(enrollments.c.course_id == course.id)
+            .where(enrollments.c.user_id.in_(user_ids))
+            .values(
+                is_certified=True,
+                certification_issued_at=issued_at,
+                certification_expires_at=issued_at + CERTIFICATION_VALIDITY,
+                updated_at=issued_at
+            )
+        )
+
+        points = DEFAULT_CERTIFICATION_POINTS if course.points_awarded is None else course.points_awarded
+        if points:
+            # Commits the attempt and enrollment changes together with the points
+            points_ledger.award_bulk(db, [
+                {
+                    "user_id": user_id,
+                    "amount": points,
+                    "action": f"Certification: {course.title}",
+                    "idempotency_key": f"certification:{course.id}:{user_id}"
+                }
+                for user_id in user_ids
+            ])
+
+        achievement_engine.record_events(db, [
+            {"user_id": user_id, "event_type": "certification_earned", "occurred_at": issued_at}
+            for user_id in user_ids
+        ])
+
+        return points
+
+
+# Shared grader instance
+exam_grader = ExamGrader()
@@ -0,0 +1,527 @@
+"""
+Enrollment and module progress store for Local Lift.
+
+Each enrollment carries a rollup of its progress (modules completed, total
+modules, percentage, completion and last activity). Completing a module writes
+the module row and advances the rollup with a single UPDATE in the same
+transaction, so the rollup never drifts from the module rows and course and
+franchise metrics aggregate one row per enrollment instead of counting module
+progress rows.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import and_, case, distinct, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from addons.certifications.tables import courses, enrollments, exam_attempts, module_progress, modules
+from addons.gamification.points import points_ledger
+from addons.leaderboards.tables import participants
+
+logger = logging.getLogger(__name__)
+
+ENROLLMENT_STATUSES = ("not_started", "in_progress", "completed")
+
+
+def _status_expression():
+    """SQL expression deriving an enrollment's status from its rollup"""
+    return case(
+        (enrollments.c.completed_at.isnot(None), literal("completed")),
+        (enrollments.c.modules_completed > 0, literal("in_progress")),
+        else_=literal("not_started")
+    )
+
+
+def _active_module_count(course_id: Any):
+    """Scalar subquery counting a course's active modules"""
+    return (
+        select(func.count(modules.c.id))
+        .where(modules.c.course_id == course_id)
+        .where(modules.c.is_active == True)
+        .scalar_subquery()
+    )
+
+
+def _rate(part: int, whole: int) -> float:
+    """Percentage of part in whole, rounded to one decimal"""
+    return round(part * 100.0 / whole, 1) if whole else 0.0
+
+
+class EnrollmentStore:
+    """
+    Reads and writes enrollments, module progress and their rollups.
+    """
+
+    def enroll(self, db: Session, user_id: str, course_id: int) -> Tuple[Any, bool]:
+        """
+        Enroll a user in a course (idempotent).
+
+        Args:
+            db: Database session
+            user_id: The ID of the user
+            course_id: The ID of the course
+
+        Returns:
+            tuple: (enrollment row, whether it was created)
+        """
+        now = datetime.now(timezone.utc)
+        created = db.execute(
+            insert(enrollments)
+            .values(
+                user_id=str(user_id),
+                course_id=course_id,
+                enrolled_at=now,
+                total_modules=_active_module_count(course_id),
+                modules_completed=0,
+                progress_percentage=0
+            )
+            .on_conflict_do_nothing(index_elements=["user_id", "course_id"])
+            .returning(enrollments.c.id)
+        ).first() is not None
+        db.commit()
+
+        enrollment = db.execute(
+            self._enrollment_query().where(
+                and_(enrollments.c.user_id == str(user_id), enrollments.c.course_id == course_id)
+            )
+        ).first()
+        return enrollment, created
+
+    def get_enrollment(self, db: Session, enrollment_id: int) -> Optional[Any]:
+        """
+        Get one enrollment with its rollup and course title.
+
+        Args:
+            db: Database session
+            enrollment_id: The ID of the enrollment
+
+        Returns:
+            Row or None if the enrollment does not exist
+        """
+        return db.execute(self._enrollment_query().where(enrollments.c.id == enrollment_id)).first()
+
+    def get_enrollments(self, db: Session, user_id: str, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get a user's enrollments from their rollups.
+
+        Args:
+            db: Database session
+            user_id: The ID of the user
+            status: Optional status filter (not_started, in_progress, completed)
+
+        Returns:
+            List[dict]: Enrollments, most recently active first
+        """
+        query = self._enrollment_query().where(enrollments.c.user_id == str(user_id))
+        if status:
+            query = query.where(_status_expression() == status)
+        query = query.order_by(
+            func.coalesce(enrollments.c.last_activity_at, enrollments.c.enrolled_at).desc(),
+            enrollments.c.id.desc()
+        )
+
+        rows = db.execute(query).all()
+        best_scores = self._best_exam_scores(db, user_id, [row.course_id for row in rows])
+        return [self.describe(row, best_scores.get(row.course_id)) for row in rows]
+
+    def get_modules(self, db: Session, enrollment: Any) -> List[Dict[str, Any]]:
+        """
+        Get an enrollment's modules in course order with their progress.
+
+        Args:
+            db: Database session
+            enrollment: Enrollment row
+
+        Returns:
+            List[dict]: Module progress entries
+        """
+        rows = db.execute(
+            select(
+                modules.c.id,
+                modules.c.title,
+                modules.c.has_quiz,
+                module_progress.c.started_at,
+                module_progress.c.completed_at,
+                module_progress.c.is_complete,
+                module_progress.c.score,
+                module_progress.c.time_spent_seconds
+            )
+            .select_from(modules.outerjoin(
+                module_progress,
+                and_(
+                    module_progress.c.module_id == modules.c.id,
+                    module_progress.c.enrollment_id == enrollment.id
+                )
+            ))
+            .where(modules.c.course_id == enrollment.course_id)
+            .where(modules.c.is_active == True)
+            .order_by(modules.c.sequence_order, modules.c.id)
+        ).all()
+
+        entries = []
+        for row in rows:
+            if row.is_complete:
+                module_status = "completed"
+            elif row.started_at is not None:
+                module_status = "in_progress"
+            else:
+                module_status = "not_started"
+            entries.append({
+                "id": row.id,
+                "title": row.title,
+                "status": module_status,
+                "completion_date": row.completed_at.isoformat() if row.completed_at else None,
+                "score": float(row.score) if row.score is not None else None,
+                "time_spent": self.format_duration(row.time_spent_seconds)
+            })
+        return entries
+
+    def get_exam_result(self, db: Session, user_id: str, course_id: int) -> Optional[Any]:
+        """
+        Get a user's best exam attempt for a course.
+
+        Args:
+            db: Database session
+            user_id: The ID of the user
+            course_id: The ID of the course
+
+        Returns:
+            Row (id, score, passed, submitted_at) or None if the exam was not taken
+        """
+        return db.execute(
+            select(exam_attempts.c.id, exam_attempts.c.score, exam_attempts.c.passed, exam_attempts.c.submitted_at)
+            .where(exam_attempts.c.user_id == str(user_id))
+            .where(exam_attempts.c.course_id == course_id)
+            .order_by(exam_attempts.c.passed.desc(), exam_attempts.c.score.desc(), exam_attempts.c.submitted_at)
+            .limit(1)
+        ).first()
+
+    def complete_module(
+        self,
+        db: Session,
+        user_id: str,
+        module_id: int,
+        score: Optional[float] = None,
+        time_spent_seconds: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Record a module completion and advance the enrollment rollup.
+
+        The enrollment row is locked, the module row is written and, when the
+        module was not already complete, the rollup is advanced with one
+        UPDATE; the module points are awarded in the same commit. Completing a
+        module again only updates its score and time spent.
+
+        Args:
+            db: Database session
+            user_id: The ID of the user
+            module_id: The ID of the module
+            score: Quiz score (required for modules with quizzes)
+            time_spent_seconds: Time spent on the module
+
+        Returns:
+            dict: Module, previous and current course progress, points earned and next module
+
+        Raises:
+            LookupError: If the module does not exist or the user is not enrolled in its course
+            ValueError: If a quiz score is missing
+        """
+        user_id = str(user_id)
+        module = db.execute(
+            select(
+                modules.c.id,
+                modules.c.course_id,
+                modules.c.title,
+                modules.c.sequence_order,
+                modules.c.has_quiz,
+                modules.c.points_awarded
+            )
+            .where(modules.c.id == module_id)
+            .where(modules.c.is_active == True)
+        ).first()
+        if module is None:
+            raise LookupError("Module not found")
+        if module.has_quiz and score is None:
+            raise ValueError("Score is required for modules with quizzes")
+        if not module.has_quiz:
+            score = None
+
+        enrollment = db.execute(
+            select(enrollments.c.id, enrollments.c.progress_percentage, enrollments.c.completed_at)
+            .where(enrollments.c.user_id == user_id)
+            .where(enrollments.c.course_id == module.course_id)
+            .with_for_update()
+        ).first()
+        if enrollment is None:
+            raise LookupError("Not enrolled in this module's course")
+
+        now = datetime.now(timezone.utc)
+        existing = db.execute(
+            select(module_progress.c.id, module_progress.c.is_complete, module_progress.c.completed_at)
+            .where(module_progress.c.enrollment_id == enrollment.id)
+            .where(module_progress.c.module_id == module.id)
+        ).first()
+
+        newly_completed = existing is None or not existing.is_complete
+        if existing is None:
+            db.execute(
+                module_progress.insert().values(
+                    enrollment_id=enrollment.id,
+                    module_id=module.id,
+                    started_at=now,
+                    completed_at=now,
+                    is_complete=True,
+                    score=score,
+                    time_spent_seconds=time_spent_seconds
+                )
+            )
+        else:
+            values = {"updated_at": now}
+            if newly_completed:
+                values.update(is_complete=True, completed_at=now, started_at=func.coalesce(module_progress.c.started_at, now))
+            if score is not None:
+                values["score"] = func.greatest(func.coalesce(module_progress.c.score, 0), score)
+            if time_spent_seconds:
+                values["time_spent_seconds"] = func.coalesce(module_progress.c.time_spent_seconds, 0) + time_spent_seconds
+            db.execute(update(module_progress).where(module_progress.c.id == existing.id).values(**values))
+
+        if newly_completed:
+            total = _active_module_count(enrollments.c.course_id)
+            completed = enrollments.c.modules_completed + 1
+            values = {
+                "modules_completed": completed,
+                "total_modules": total,
+                "progress_percentage": func.least(
+                    100, func.round(completed * 100.0 / func.nullif(total, 0), 2)
+                ),
+                "completed_at": case(
+                    (completed >= total, func.coalesce(enrollments.c.completed_at, now)),
+                    else_=enrollments.c.completed_at
+                ),
+                "last_activity_at": now,
+                "updated_at": now
+            }
+        else:
+            values = {"last_activity_at": now, "updated_at": now}
+
+        rollup = db.execute(
+            update(enrollments)
+            .where(enrollments.c.id == enrollment.id)
+            .values(**values)
+            .returning(
+                enrollments.c.modules_completed,
+                enrollments.c.total_modules,
+                enrollments.c.progress_percentage,
+                enrollments.c.completed_at
+            )
+        ).first()
+
+        points = (module.points_awarded or 0) if newly_completed else 0
+        if points > 0:
+            # Commits the module row and rollup together with the points
+            points_ledger.award_bulk(db, [{
+                "user_id": user_id,
+                "amount": points,
+                "action": f"Module completed: {module.title}",
+                "idempotency_key": f"module:{enrollment.id}:{module.id}"
+            }])
+        else:
+            db.commit()
+
+        next_module = db.execute(
+            select(modules.c.id, modules.c.title)
+            .where(modules.c.course_id == module.course_id)
+            .where(modules.c.is_active == True)
+            .where(modules.c.sequence_order > module.sequence_order)
+            .order_by(modules.c.sequence_order, modules.c.id)
+            .limit(1)
+        ).first()
+
+        course_completed = rollup.completed_at is not None
+        offers_certification = course_completed and db.execute(
+            select(courses.c.offers_certification).where(courses.c.id == module.course_id)
+        ).scalar()
+
+        return {
+            "module_id": module.id,
+            "module_title": module.title,
+            "course_id": module.course_id,
+            "enrollment_id": enrollment.id,
+            "status": "completed",
+            "completion_date": (existing.completed_at if existing is not None and existing.completed_at else now).isoformat(),
+            "score": score,
+            "time_spent": self.format_duration(time_spent_seconds),
+            "newly_completed": newly_completed,
+            "course_progress": {
+                "previous": float(enrollment.progress_percentage or 0),
+                "current": float(rollup.progress_percentage or 0),
+                "modules_completed": rollup.modules_completed,
+                "total_modules": rollup.total_modules,
+                "completed": course_completed
+            },
+            "points_earned": points,
+            "next_module": {"id": next_module.id, "title": next_module.title} if next_module else None,
+            "certification_exam_unlocked": bool(offers_certification)
+        }
+
+    def get_course_stats(self, db: Session, course_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Aggregate enrollment rollups per course.
+
+        Args:
+            db: Database session
+            course_ids: IDs of the courses
+
+        Returns:
+            dict: Per course ID, enrolled users, completion and certification rates and average progress
+        """
+        course_ids = list(course_ids)
+        if not course_ids:
+            return {}
+
+        rows = db.execute(
+            select(
+                enrollments.c.course_id,
+                func.count().label("enrolled"),
+                func.count(enrollments.c.completed_at).label("completed"),
+                func.count().filter(enrollments.c.is_certified == True).label("certified"),
+                func.avg(enrollments.c.progress_percentage).label("average_progress")
+            )
+            .where(enrollments.c.course_id.in_(course_ids))
+            .group_by(enrollments.c.course_id)
+        ).all()
+
+        stats = {
+            course_id: {"enrolled_users": 0, "completed_users": 0, "completion_rate": 0.0, "certification_rate": 0.0, "average_progress": 0.0}
+            for course_id in course_ids
+        }
+        for row in rows:
+            stats[row.course_id] = {
+                "enrolled_users": row.enrolled,
+                "completed_users": row.completed,
+                "completion_rate": _rate(row.completed, row.enrolled),
+                "certification_rate": _rate(row.certified, row.enrolled),
+                "average_progress": round(float(row.average_progress or 0), 1)
+            }
+        return stats
+
+    def get_group_stats(
+        self,
+        db: Session,
+        franchise_id: Optional[int] = None,
+        region_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Aggregate enrollment rollups for the participants of a franchise or region.
+
+        Args:
+            db: Database session
+            franchise_id: Restrict to a franchise's participants
+            region_id: Restrict to a region's participants
+
+        Returns:
+            dict: Enrolled and certified users, course enrollments and completions, and rates
+        """
+        query = (
+            select(
+                func.count(distinct(enrollments.c.user_id)).label("enrolled_users"),
+                func.count(distinct(enrollments.c.user_id)).filter(enrollments.c.is_certified == True).label("certified_users"),
+                func.count().label("courses_enrolled"),
+                func.count(enrollments.c.completed_at).label("courses_completed"),
+                func.avg(enrollments.c.progress_percentage).label("average_progress")
+            )
+            .select_from(enrollments.join(participants, participants.c.user_id == enrollments.c.user_id))
+        )
+        if franchise_id is not None:
+            query = query.where(participants.c.franchise_id == franchise_id)
+        if region_id is not None:
+            query = query.where(participants.c.region_id == region_id)
+
+        row = db.execute(query).first()
+        return {
+            "enrolled_users": row.enrolled_users,
+            "certified_users": row.certified_users,
+            "courses_enrolled": row.courses_enrolled,
+            "courses_completed": row.courses_completed,
+            "completion_rate": _rate(row.courses_completed, row.courses_enrolled),
+            "certification_rate": _rate(row.certified_users, row.enrolled_users),
+            "average_progress": round(float(row.average_progress or 0), 1)
+        }
+
+    def describe(self, row: Any, exam_score: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Format an enrollment row for API responses.
+
+        Args:
+            row: Row from the enrollment query
+            exam_score: Best exam score for the course, if the exam was taken
+
+        Returns:
+            dict: Enrollment summary
+        """
+        cert_id = f"CERT-{row.course_id}-{row.user_id}" if row.is_certified else None
+        return {
+            "id": row.id,
+            "user_id": row.user_id,
+            "course_id": row.course_id,
+            "course_title": row.course_title,
+            "status": row.status,
+            "progress": float(row.progress_percentage or 0),
+            "modules_completed": row.modules_completed,
+            "total_modules": row.total_modules,
+            "enrolled_date": row.enrolled_at.isoformat() if row.enrolled_at else None,
+            "completed_date": row.completed_at.isoformat() if row.completed_at else None,
+            "last_activity": row.last_activity_at.isoformat() if row.last_activity_at else None,
+            "score": exam_score,
+            "certification_issued": bool(row.is_certified),
+            "certification_id": cert_id,
+            "certificate_url": f"/certificates/{cert_id}.pdf" if cert_id else None
+        }
+
+    @staticmethod
+    def format_duration(seconds: Optional[int]) -> Optional[str]:
+        """Format a time spent in seconds as minutes"""
+        if seconds is None:
+            return None
+        minutes = max(1, round(seconds / 60))
+        return f"{minutes} minute" if minutes == 1 else f"{minutes} minutes"
+
+    def _enrollment_query(self):
+        """Select enrollments with their rollup, derived status and course title"""
+        return (
+            select(
+                enrollments.c.id,
+                enrollments.c.user_id,
+                enrollments.c.course_id,
+                courses.c.title.label("course_title"),
+                enrollments.c.enrolled_at,
+                enrollments.c.completed_at,
+                enrollments.c.progress_percentage,
+                enrollments.c.modules_completed,
+                enrollments.c.total_modules,
+                enrollments.c.last_activity_at,
+                enrollments.c.is_certified,
+                enrollments.c.certification_issued_at,
+                enrollments.c.certification_expires_at,
+                _status_expression().label("status")
+            )
+            .select_from(enrollments.join(courses, courses.c.id == enrollments.c.course_id))
+        )
+
+    def _best_exam_scores(self, db: Session, user_id: str, course_ids: List[int]) -> Dict[int, float]:
+        """Get a user's best exam score per course"""
+        if not course_ids:
+            return {}
+        rows = db.execute(
+            select(exam_attempts.c.course_id, func.max(exam_attempts.c.score))
+            .where(exam_attempts.c.user_id == str(user_id))
+            .where(exam_attempts.c.course_id.in_(course_ids))
+            .group_by(exam_attempts.c.course_id)
+        ).all()
+        return {course_id: float(score) for course_id, score in rows}
+
+
+# Shared store instance
+enrollment_store = EnrollmentStore()
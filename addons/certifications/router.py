@@ -1,14 +1,23 @@
 """
 Certifications API router for Local Lift application.
 """
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Path
+# The enrollments endpoint takes a `status` filter that shadows the module
+from fastapi import status as http_status
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from core.auth.router import get_current_active_user
 from core.auth.schemas import UserRead
+from core.cache import make_etag, conditional_json_response
 from core.database.connection import get_db
+from addons.certifications.catalog import course_catalog
+from addons.certifications.grading import CERTIFICATION_VALIDITY, exam_grader
+from addons.certifications.progress import ENROLLMENT_STATUSES, enrollment_store
+from addons.certifications.tables import categories as categories_table, courses as courses_table
 
 router = APIRouter()
 
@@ -16,6 +25,7 @@ router = APIRouter()
 # Courses
 @router.get("/courses", response_model=List[dict])
 async def get_all_courses(
+    request: Request,
     status: Optional[str] = None,
     level: Optional[int] = None,
     category: Optional[str] = None,
@@ -26,7 +36,8 @@ async def get_all_courses(
     Get all available courses with optional filtering.
     
     Args:
-        status: Filter by course status (active, draft, archived)
+        request: Incoming request (for conditional requests)
+        status: Filter by course status (active, archived)
         level: Filter by course level (1-5)
         category: Filter by course category (gmb, seo, marketing, etc.)
         current_user: Current authenticated user
@@ -35,105 +46,16 @@ async def get_all_courses(
     Returns:
         List[dict]: List of courses
     """
-    # This is a placeholder - in a real implementation, you would fetch courses from the database
+    catalog = course_catalog.get(db)
+    courses = catalog.filter(status=status, level=level, category=category)
     
-    # For now, we'll simulate courses data
-    courses = [
-        {
-            "id": 1,
-            "title": "GMB Optimization Fundamentals",
-            "description": "Learn the basics of optimizing your Google My Business listing",
-            "level": 1,
-            "category": "gmb",
-            "status": "active",
-            "modules_count": 5,
-            "estimated_duration": "2 hours",
-            "points": 50,
-            "certification": True,
-            "prerequisites": None,
-            "created_by": "Local Lift Team",
-            "created_at": "2025-01-15T10:00:00Z",
-            "updated_at": "2025-03-20T14:30:00Z"
-        },
-        {
-            "id": 2,
-            "title": "Advanced Review Management",
-            "description": "Strategies for handling negative reviews and maximizing positive feedback",
-            "level": 3,
-            "category": "gmb",
-            "status": "active",
-            "modules_count": 3,
-            "estimated_duration": "1.5 hours",
-            "points": 40,
-            "certification": True,
-            "prerequisites": [1],
-            "created_by": "Local Lift Team",
-            "created_at": "2025-02-01T11:00:00Z",
-            "updated_at": "2025-03-25T09:15:00Z"
-        },
-        {
-            "id": 3,
-            "title": "Local SEO Best Practices",
-            "description": "Optimize your local search presence beyond GMB",
-            "level": 2,
-            "category": "seo",
-            "status": "active",
-            "modules_count": 7,
-            "estimated_duration": "3 hours",
-            "points": 75,
-            "certification": True,
-            "prerequisites": [1],
-            "created_by": "Local Lift Team",
-            "created_at": "2025-02-15T13:00:00Z",
-            "updated_at": "2025-04-05T10:45:00Z"
-        },
-        {
-            "id": 4,
-            "title": "Social Media Integration",
-            "description": "Connect your GMB and social media for maximum impact",
-            "level": 2,
-            "category": "marketing",
-            "status": "active",
-            "modules_count": 4,
-            "estimated_duration": "2 hours",
-            "points": 35,
-            "certification": False,
-            "prerequisites": [1],
-            "created_by": "Local Lift Team",
-            "created_at": "2025-03-01T09:00:00Z",
-            "updated_at": "2025-04-01T15:30:00Z"
-        },
-        {
-            "id": 5,
-            "title": "Local Business Analytics",
-            "description": "Understand and leverage business analytics for local success",
-            "level": 4,
-            "category": "analytics",
-            "status": "active",
-            "modules_count": 6,
-            "estimated_duration": "4 hours",
-            "points": 90,
-            "certification": True,
-            "prerequisites": [1, 3],
-            "created_by": "Local Lift Team",
-            "created_at": "2025-03-15T14:00:00Z",
-            "updated_at": "2025-04-10T11:20:00Z"
-        }
-    ]
-    
-    # Apply filters if provided
-    if status:
-        courses = [course for course in courses if course["status"] == status]
-    if level:
-        courses = [course for course in courses if course["level"] == level]
-    if category:
-        courses = [course for course in courses if course["category"] == category]
-    
-    return courses
+    etag = make_etag(catalog.version, status, level, category)
+    return conditional_json_response(request, courses, etag, cache_control="private, no-cache")
 
 
 @router.get("/courses/{course_id}", response_model=dict)
 async def get_course_details(
+    request: Request,
     course_id: int = Path(..., ge=1),
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -142,6 +64,7 @@ async def get_course_details(
     Get detailed information about a specific course.
     
     Args:
+        request: Incoming request (for conditional requests)
         course_id: The ID of the course
         current_user: Current authenticated user
         db: Database session
@@ -149,160 +72,26 @@ async def get_course_details(
     Returns:
         dict: Detailed course information
     """
-    # This is a placeholder - in a real implementation, you would fetch course details from the database
-    
-    # Simulated course IDs for validation
-    courses = {
-        1: {
-            "id": 1,
-            "title": "GMB Optimization Fundamentals",
-            "description": "Learn the basics of optimizing your Google My Business listing",
-            "level": 1,
-            "category": "gmb",
-            "status": "active",
-            "modules_count": 5,
-            "estimated_duration": "2 hours",
-            "points": 50,
-            "certification": True,
-            "prerequisites": None,
-            "created_by": "Local Lift Team",
-            "created_at": "2025-01-15T10:00:00Z",
-            "updated_at": "2025-03-20T14:30:00Z",
-            "modules": [
-                {
-                    "id": 101,
-                    "title": "Introduction to GMB",
-                    "description": "Understanding the basics of Google My Business",
-                    "duration": "15 minutes",
-                    "points": 5,
-                    "has_quiz": False
-                },
-                {
-                    "id": 102,
-                    "title": "Setting Up Your GMB Profile",
-                    "description": "Step-by-step guide to creating an optimized GMB profile",
-                    "duration": "30 minutes",
-                    "points": 10,
-                    "has_quiz": True
-                },
-                {
-                    "id": 103,
-                    "title": "Managing Reviews",
-                    "description": "Best practices for responding to reviews and managing your online reputation",
-                    "duration": "25 minutes",
-                    "points": 10,
-                    "has_quiz": True
-                },
-                {
-                    "id": 104,
-                    "title": "GMB Posts and Updates",
-                    "description": "Using GMB posts to engage with customers and promote your business",
-                    "duration": "20 minutes",
-                    "points": 10,
-                    "has_quiz": True
-                },
-                {
-                    "id": 105,
-                    "title": "GMB Insights and Analytics",
-                    "description": "Understanding and leveraging GMB insights for business growth",
-                    "duration": "30 minutes",
-                    "points": 15,
-                    "has_quiz": True
-                }
-            ],
-            "reviews": [
-                {
-                    "user_id": 156,
-                    "user_name": "John Smith",
-                    "rating": 4.8,
-                    "comment": "Very informative and easy to follow. Highly recommended for GMB beginners!",
-                    "date": "2025-03-10T09:30:00Z"
-                },
-                {
-                    "user_id": 172,
-                    "user_name": "Lisa Johnson",
-                    "rating": 4.5,
-                    "comment": "Great course with practical steps. Would love more examples though.",
-                    "date": "2025-04-05T14:15:00Z"
-                }
-            ],
-            "completion_stats": {
-                "enrolled_users": 68,
-                "completion_rate": 82,
-                "average_rating": 4.7
-            }
-        },
-        2: {
-            "id": 2,
-            "title": "Advanced Review Management",
-            "description": "Strategies for handling negative reviews and maximizing positive feedback",
-            "level": 3,
-            "category": "gmb",
-            "status": "active",
-            "modules_count": 3,
-            "estimated_duration": "1.5 hours",
-            "points": 40,
-            "certification": True,
-            "prerequisites": [1],
-            "created_by": "Local Lift Team",
-            "created_at": "2025-02-01T11:00:00Z",
-            "updated_at": "2025-03-25T09:15:00Z",
-            "modules": [
-                {
-                    "id": 201,
-                    "title": "Review Response Strategies",
-                    "description": "Advanced techniques for crafting effective review responses",
-                    "duration": "30 minutes",
-                    "points": 10,
-                    "has_quiz": True
-                },
-                {
-                    "id": 202,
-                    "title": "Handling Negative Reviews",
-                    "description": "How to professionally address and resolve negative feedback",
-                    "duration": "30 minutes",
-                    "points": 15,
-                    "has_quiz": True
-                },
-                {
-                    "id": 203,
-                    "title": "Encouraging Positive Reviews",
-                    "description": "Ethical strategies to encourage customers to leave positive reviews",
-                    "duration": "30 minutes",
-                    "points": 15,
-                    "has_quiz": True
-                }
-            ],
-            "reviews": [
-                {
-                    "user_id": 134,
-                    "user_name": "Michael Brown",
-                    "rating": 5.0,
-                    "comment": "This changed how I handle reviews completely. Already seeing results!",
-                    "date": "2025-03-15T16:45:00Z"
-                }
-            ],
-            "completion_stats": {
-                "enrolled_users": 42,
-                "completion_rate": 75,
-                "average_rating": 4.8
-            }
-        }
-    }
+    document = course_catalog.get(db).get(course_id)
     
-    if course_id not in courses:
+    if document is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    return courses[course_id]
+    # Completion stats change independently of the document, so they are part of the validator
+    stats = enrollment_store.get_course_stats(db, [course_id])[course_id]
+    course = dict(document.detail, completion_stats=stats)
+    
+    etag = make_etag(document.version, stats)
+    return conditional_json_response(request, course, etag, cache_control="private, no-cache")
 
 
 # Enrollments
 @router.get("/enrollments/{user_id}", response_model=List[dict])
 async def get_user_enrollments(
-    user_id: int,
+    user_id: str,
     status: Optional[str] = None,
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -320,65 +109,19 @@ async def get_user_enrollments(
         List[dict]: List of user enrollments
     """
     # Check permissions - users can view their own enrollments, admins can view anyone's
-    if current_user.id != user_id and current_user.role not in ["admin", "regional_manager", "franchise"]:
+    if str(current_user.id) != user_id and current_user.role not in ["admin", "regional_manager", "franchise"]:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
+            status_code=http_status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
     
-    # This is a placeholder - in a real implementation, you would fetch enrollments from the database
-    
-    # For now, we'll simulate enrollment data
-    enrollments = [
-        {
-            "id": 1001,
-            "user_id": user_id,
-            "course_id": 1,
-            "course_title": "GMB Optimization Fundamentals",
-            "status": "completed",
-            "progress": 100,
-            "enrolled_date": "2025-03-01T09:00:00Z",
-            "completed_date": "2025-03-15T14:30:00Z",
-            "score": 92,
-            "certification_issued": True,
-            "certification_id": "CERT-GMB-001",
-            "certificate_url": "/certificates/CERT-GMB-001.pdf"
-        },
-        {
-            "id": 1002,
-            "user_id": user_id,
-            "course_id": 2,
-            "course_title": "Advanced Review Management",
-            "status": "in_progress",
-            "progress": 60,
-            "enrolled_date": "2025-04-05T10:15:00Z",
-            "completed_date": None,
-            "score": None,
-            "certification_issued": False,
-            "certification_id": None,
-            "certificate_url": None
-        },
-        {
-            "id": 1003,
-            "user_id": user_id,
-            "course_id": 3,
-            "course_title": "Local SEO Best Practices",
-            "status": "not_started",
-            "progress": 0,
-            "enrolled_date": "2025-04-10T16:30:00Z",
-            "completed_date": None,
-            "score": None,
-            "certification_issued": False,
-            "certification_id": None,
-            "certificate_url": None
-        }
-    ]
-    
-    # Apply status filter if provided
-    if status:
-        enrollments = [enrollment for enrollment in enrollments if enrollment["status"] == status]
+    if status and status not in ENROLLMENT_STATUSES:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid status. Must be one of: {', '.join(ENROLLMENT_STATUSES)}"
+        )
     
-    return enrollments
+    return enrollment_store.get_enrollments(db, user_id, status)
 
 
 @router.post("/courses/{course_id}/enroll", response_model=dict)
@@ -398,37 +141,19 @@ async def enroll_in_course(
     Returns:
         dict: Enrollment confirmation
     """
-    # This is a placeholder - in a real implementation, you would create enrollment in the database
-    
-    # Simulated course IDs for validation
-    courses = {
-        1: "GMB Optimization Fundamentals",
-        2: "Advanced Review Management", 
-        3: "Local SEO Best Practices",
-        4: "Social Media Integration",
-        5: "Local Business Analytics"
-    }
+    course = _get_course(db, course_id)
     
-    if course_id not in courses:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
+    enrollment, created = enrollment_store.enroll(db, str(current_user.id), course.id)
     
-    # For now, we'll simulate enrollment
-    enrollment = {
-        "id": 1004,
-        "user_id": current_user.id,
-        "course_id": course_id,
-        "course_title": courses[course_id],
-        "status": "not_started",
-        "progress": 0,
-        "enrolled_date": "2025-04-14T21:00:00Z",
-        "message": f"Successfully enrolled in {courses[course_id]}",
-        "next_steps": "Navigate to the course content to begin learning"
-    }
+    result = enrollment_store.describe(enrollment)
+    if created:
+        result["message"] = f"Successfully enrolled in {course.title}"
+        result["next_steps"] = "Navigate to the course content to begin learning"
+    else:
+        result["message"] = f"Already enrolled in {course.title}"
+        result["next_steps"] = "Continue the course from your last completed module"
     
-    return enrollment
+    return result
 
 
 # Module Progress
@@ -449,127 +174,55 @@ async def get_module_progress(
     Returns:
         dict: Detailed module progress
     """
-    # This is a placeholder - in a real implementation, you would fetch progress from the database
-    
-    # Simulated enrollment IDs for validation
-    enrollments = {
-        1001: {"user_id": 1, "course_id": 1},
-        1002: {"user_id": 1, "course_id": 2}
-    }
+    enrollment = enrollment_store.get_enrollment(db, enrollment_id)
     
-    if enrollment_id not in enrollments:
+    if enrollment is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Enrollment not found"
         )
     
     # Check permissions - users can view their own progress, admins can view anyone's
-    if enrollments[enrollment_id]["user_id"] != current_user.id and current_user.role not in ["admin", "regional_manager", "franchise"]:
+    if enrollment.user_id != str(current_user.id) and current_user.role not in ["admin", "regional_manager", "franchise"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
     
-    # For now, we'll simulate progress data
-    if enrollment_id == 1001:
-        # Completed course
-        progress = {
-            "enrollment_id": 1001,
-            "course_id": 1,
-            "course_title": "GMB Optimization Fundamentals",
-            "overall_progress": 100,
-            "status": "completed",
-            "modules": [
-                {
-                    "id": 101,
-                    "title": "Introduction to GMB",
-                    "status": "completed",
-                    "completion_date": "2025-03-02T10:15:00Z",
-                    "score": None,  # No quiz
-                    "time_spent": "18 minutes"
-                },
-                {
-                    "id": 102,
-                    "title": "Setting Up Your GMB Profile",
-                    "status": "completed",
-                    "completion_date": "2025-03-05T14:30:00Z",
-                    "score": 90,
-                    "time_spent": "35 minutes"
-                },
-                {
-                    "id": 103,
-                    "title": "Managing Reviews",
-                    "status": "completed",
-                    "completion_date": "2025-03-10T11:45:00Z",
-                    "score": 95,
-                    "time_spent": "28 minutes"
-                },
-                {
-                    "id": 104,
-                    "title": "GMB Posts and Updates",
-                    "status": "completed",
-                    "completion_date": "2025-03-12T16:20:00Z",
-                    "score": 85,
-                    "time_spent": "22 minutes"
-                },
-                {
-                    "id": 105,
-                    "title": "GMB Insights and Analytics",
-                    "status": "completed",
-                    "completion_date": "2025-03-15T14:30:00Z",
-                    "score": 100,
-                    "time_spent": "32 minutes"
-                }
-            ],
-            "certification_exam": {
-                "status": "passed",
-                "score": 92,
-                "date": "2025-03-15T15:00:00Z",
-                "certification_id": "CERT-GMB-001",
-                "certificate_url": "/certificates/CERT-GMB-001.pdf"
-            }
+    exam = enrollment_store.get_exam_result(db, enrollment.user_id, enrollment.course_id)
+    if enrollment.is_certified and exam is not None:
+        cert_id = f"CERT-{enrollment.course_id}-{enrollment.user_id}"
+        certification_exam = {
+            "status": "passed",
+            "score": float(exam.score),
+            "date": exam.submitted_at.isoformat() if exam.submitted_at else None,
+            "certification_id": cert_id,
+            "certificate_url": f"/certificates/{cert_id}.pdf"
+        }
+    elif enrollment.status == "completed":
+        certification_exam = {
+            "status": "failed" if exam is not None else "available",
+            "score": float(exam.score) if exam is not None else None,
+            "message": "The certification exam is available"
         }
     else:
-        # In-progress course
-        progress = {
-            "enrollment_id": 1002,
-            "course_id": 2,
-            "course_title": "Advanced Review Management",
-            "overall_progress": 60,
-            "status": "in_progress",
-            "modules": [
-                {
-                    "id": 201,
-                    "title": "Review Response Strategies",
-                    "status": "completed",
-                    "completion_date": "2025-04-08T09:45:00Z",
-                    "score": 85,
-                    "time_spent": "32 minutes"
-                },
-                {
-                    "id": 202,
-                    "title": "Handling Negative Reviews",
-                    "status": "completed",
-                    "completion_date": "2025-04-12T14:20:00Z",
-                    "score": 90,
-                    "time_spent": "35 minutes"
-                },
-                {
-                    "id": 203,
-                    "title": "Encouraging Positive Reviews",
-                    "status": "not_started",
-                    "completion_date": None,
-                    "score": None,
-                    "time_spent": None
-                }
-            ],
-            "certification_exam": {
-                "status": "not_available",
-                "message": "Complete all modules to unlock the certification exam"
-            }
+        certification_exam = {
+            "status": "not_available",
+            "message": "Complete all modules to unlock the certification exam"
         }
     
-    return progress
+    return {
+        "enrollment_id": enrollment.id,
+        "course_id": enrollment.course_id,
+        "course_title": enrollment.course_title,
+        "overall_progress": float(enrollment.progress_percentage or 0),
+        "status": enrollment.status,
+        "modules_completed": enrollment.modules_completed,
+        "total_modules": enrollment.total_modules,
+        "last_activity": enrollment.last_activity_at.isoformat() if enrollment.last_activity_at else None,
+        "modules": enrollment_store.get_modules(db, enrollment),
+        "certification_exam": certification_exam
+    }
 
 
 @router.post("/modules/{module_id}/complete", response_model=dict)
@@ -584,74 +237,35 @@ async def complete_module(
     
     Args:
         module_id: The ID of the module
-        completion_data: Data about the completion (score, time spent, etc.)
+        completion_data: Data about the completion (score, time_spent_seconds)
         current_user: Current authenticated user
         db: Database session
         
     Returns:
         dict: Updated module and course progress
     """
-    # This is a placeholder - in a real implementation, you would update module completion in the database
-    
-    # Simulated module IDs for validation
-    modules = {
-        101: {"course_id": 1, "title": "Introduction to GMB", "has_quiz": False},
-        102: {"course_id": 1, "title": "Setting Up Your GMB Profile", "has_quiz": True},
-        103: {"course_id": 1, "title": "Managing Reviews", "has_quiz": True},
-        201: {"course_id": 2, "title": "Review Response Strategies", "has_quiz": True},
-        202: {"course_id": 2, "title": "Handling Negative Reviews", "has_quiz": True},
-        203: {"course_id": 2, "title": "Encouraging Positive Reviews", "has_quiz": True}
-    }
-    
-    if module_id not in modules:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Module not found"
-        )
+    score = completion_data.get("score")
+    time_spent_seconds = completion_data.get("time_spent_seconds")
     
-    # For now, we'll simulate module completion
-    module = modules[module_id]
-    score = completion_data.get("score") if module["has_quiz"] else None
-    time_spent = completion_data.get("time_spent", "30 minutes")
-    
-    # Check if score is provided for modules with quizzes
-    if module["has_quiz"] and score is None:
+    # Check if score is within valid range
+    if score is not None and (not isinstance(score, (int, float)) or score < 0 or score > 100):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Score is required for modules with quizzes"
+            detail="Score must be between 0 and 100"
         )
     
-    # Check if score is within valid range
-    if score is not None and (score < 0 or score > 100):
+    if time_spent_seconds is not None and (not isinstance(time_spent_seconds, int) or time_spent_seconds < 0):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Score must be between 0 and 100"
+            detail="time_spent_seconds must be a non-negative integer"
         )
     
-    # Return updated progress
-    result = {
-        "module_id": module_id,
-        "module_title": module["title"],
-        "course_id": module["course_id"],
-        "status": "completed",
-        "completion_date": "2025-04-14T21:15:00Z",
-        "score": score,
-        "time_spent": time_spent,
-        "course_progress": {
-            "previous": 33,  # Simulated previous progress percentage
-            "current": 67,   # Simulated updated progress percentage
-            "modules_completed": 2,
-            "total_modules": 3
-        },
-        "points_earned": 15,
-        "next_module": {
-            "id": module_id + 1,
-            "title": "Next Module Title"
-        } if module_id in [101, 102, 201, 202] else None,
-        "certification_exam_unlocked": False
-    }
-    
-    return result
+    try:
+        return enrollment_store.complete_module(db, str(current_user.id), module_id, score, time_spent_seconds)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 # Certifications
@@ -702,6 +316,28 @@ async def get_user_certifications(
     return certifications
 
 
+def _get_course(db: Session, course_id: int):
+    """Load an active course row or raise 404"""
+    course = db.execute(
+        select(
+            courses_table.c.id,
+            courses_table.c.title,
+            courses_table.c.points_awarded,
+            courses_table.c.offers_certification
+        )
+        .where(courses_table.c.id == course_id)
+        .where(courses_table.c.is_active == True)
+    ).first()
+    
+    if course is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    
+    return course
+
+
 @router.post("/exams/{course_id}/take", response_model=dict)
 async def take_certification_exam(
     course_id: int,
@@ -714,85 +350,105 @@ async def take_certification_exam(
     
     Args:
         course_id: The ID of the course
-        exam_answers: The answers submitted for the exam
+        exam_answers: The answers submitted for the exam, as {"answers": {question_id: option(s)}}
         current_user: Current authenticated user
         db: Database session
         
     Returns:
         dict: Exam results
     """
-    # This is a placeholder - in a real implementation, you would validate eligibility and grade the exam
-    
-    # Simulated course IDs for validation
-    courses = {
-        1: {"title": "GMB Optimization Fundamentals", "certification": True},
-        2: {"title": "Advanced Review Management", "certification": True},
-        3: {"title": "Local SEO Best Practices", "certification": True}
-    }
+    course = _get_course(db, course_id)
     
-    if course_id not in courses:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
-    if not courses[course_id]["certification"]:
+    if not course.offers_certification:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This course does not offer certification"
         )
     
-    # In a real implementation, you would check if the user has completed all modules
-    # and is eligible to take the exam
-    
-    # For now, we'll simulate exam grading
     answers = exam_answers.get("answers", {})
-    if not answers:
+    if not answers or not isinstance(answers, dict):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No answers provided"
         )
     
-    # Simulate a score (in a real implementation, this would compare answers to correct answers)
-    score = 85
-    passed = score >= 70  # Pass threshold
+    try:
+        grade = exam_grader.submit(db, str(current_user.id), course, answers)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
+    now = datetime.now(timezone.utc)
     result = {
         "course_id": course_id,
-        "course_title": courses[course_id]["title"],
+        "course_title": course.title,
         "user_id": current_user.id,
-        "score": score,
-        "passed": passed,
-        "date": "2025-04-14T21:30:00Z",
+        "attempt_id": grade["attempt_id"],
+        "score": grade["score"],
+        "passed": grade["passed"],
+        "date": now.isoformat(),
         "feedback": {
-            "correct_answers": 17,
-            "total_questions": 20,
-            "percentage": score,
-            "areas_for_improvement": ["GMB Posts", "Review Management"] if score < 100 else []
+            "correct_answers": grade["correct_answers"],
+            "total_questions": grade["total_questions"],
+            "percentage": grade["score"],
+            "areas_for_improvement": grade["areas_for_improvement"]
         }
     }
     
     # If passed, include certification details
-    if passed:
+    if grade["passed"]:
         cert_id = f"CERT-{course_id}-{current_user.id}"
         result["certification"] = {
             "id": cert_id,
-            "title": f"{courses[course_id]['title']} Certified",
-            "issue_date": "2025-04-14T21:30:00Z",
-            "expiry_date": "2026-04-14T21:30:00Z",
+            "title": f"{course.title} Certified",
+            "issue_date": now.isoformat(),
+            "expiry_date": (now + CERTIFICATION_VALIDITY).isoformat(),
             "certificate_url": f"/certificates/{cert_id}.pdf",
-            "badge_url": f"/badges/{courses[course_id]['title'].lower().replace(' ', '-')}.png",
+            "badge_url": f"/badges/{course.title.lower().replace(' ', '-')}.png",
             "verification_url": f"https://locallift.com/verify/{cert_id}"
         }
-        result["points_earned"] = 100
+        result["points_earned"] = grade["points_earned"]
         result["message"] = "Congratulations! You have passed the certification exam."
     else:
         result["message"] = "You did not pass the certification exam. You can retake it after 7 days."
-        result["retry_available_date"] = "2025-04-21T21:30:00Z"
+        result["retry_available_date"] = (now + timedelta(days=7)).isoformat()
     
     return result
 
 
+@router.post("/exams/{course_id}/regrade", response_model=dict)
+async def regrade_certification_exam(
+    course_id: int,
+    current_user: UserRead = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Regrade all attempts of a course's exam after its answer key changed (admin only).
+    
+    Args:
+        course_id: The ID of the course
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        dict: Counts of regraded attempts and changed results
+    """
+    # Check admin permissions
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    course = _get_course(db, course_id)
+    
+    try:
+        return exam_grader.regrade(db, course)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
 # Admin Endpoints (for course management)
 @router.post("/courses", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def create_course(
@@ -818,25 +474,45 @@ async def create_course(
             detail="Not enough permissions"
         )
     
-    # This is a placeholder - in a real implementation, you would create the course in the database
-    
-    # For now, we'll simulate course creation
-    new_course = {
-        "id": 6,
-        "title": course_data.get("title", "New Course"),
-        "description": course_data.get("description", "Course description"),
-        "level": course_data.get("level", 1),
-        "category": course_data.get("category", "other"),
-        "status": "draft",
-        "modules_count": 0,
-        "estimated_duration": "0 hours",
-        "points": course_data.get("points", 50),
-        "certification": course_data.get("certification", False),
-        "prerequisites": course_data.get("prerequisites", None),
-        "created_by": current_user.name,
-        "created_at": "2025-04-14T21:45:00Z",
-        "updated_at": "2025-04-14T21:45:00Z",
-        "message": "Course created successfully. Add modules to complete the course setup."
-    }
+    title = (course_data.get("title") or "").strip()
+    if not title:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Course title is required"
+        )
+    
+    category_id = course_data.get("category_id")
+    if category_id is None and course_data.get("category"):
+        category_id = db.execute(
+            select(categories_table.c.id)
+            .where(func.lower(categories_table.c.name) == course_data["category"].lower())
+        ).scalar()
+        if category_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unknown course category"
+            )
+    
+    # The course_documents trigger composes the catalog document in the same transaction
+    course_id = db.execute(
+        courses_table.insert().values(
+            title=title,
+            description=course_data.get("description"),
+            category_id=category_id,
+            level=course_data.get("level", 1),
+            duration_minutes=course_data.get("duration_minutes"),
+            points_awarded=course_data.get("points", 50),
+            offers_certification=course_data.get("certification", False),
+            prerequisites=course_data.get("prerequisites"),
+            is_active=course_data.get("is_active", True)
+        ).returning(courses_table.c.id)
+    ).scalar_one()
+    db.commit()
+    
+    course_catalog.invalidate()
+    document = course_catalog.get(db).get(course_id)
+    
+    new_course = dict(document.detail) if document else {"id": course_id, "title": title}
+    new_course["message"] = "Course created successfully. Add modules to complete the course setup."
     
     return new_course
@@ -0,0 +1,125 @@
+"""
+Table definitions for the certifications schema.
+
+These mirror the tables created by the Supabase migrations so the
+certification engines can build set-based statements with SQLAlchemy Core.
+"""
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, Numeric, String, Text, Boolean, DateTime, func
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
+
+metadata = MetaData(schema="certifications")
+
+categories = Table(
+    "categories", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("description", Text),
+    Column("icon_url", Text),
+    Column("is_active", Boolean, default=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+courses = Table(
+    "courses", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("category_id", Integer),
+    Column("title", String(200), nullable=False),
+    Column("description", Text),
+    Column("level", Integer, default=1),
+    Column("duration_minutes", Integer),
+    Column("points_awarded", Integer, default=0),
+    Column("is_active", Boolean, default=True),
+    Column("offers_certification", Boolean, default=True),
+    Column("exam_pass_score", Numeric(5, 2), default=70),
+    Column("prerequisites", ARRAY(Integer)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+modules = Table(
+    "modules", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("course_id", Integer, nullable=False),
+    Column("title", String(200), nullable=False),
+    Column("description", Text),
+    Column("content_url", Text),
+    Column("sequence_order", Integer, nullable=False),
+    Column("duration_minutes", Integer),
+    Column("is_active", Boolean, default=True),
+    Column("has_quiz", Boolean, default=False),
+    Column("points_awarded", Integer, default=0),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+enrollments = Table(
+    "enrollments", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", UUID(as_uuid=False), nullable=False),
+    Column("course_id", Integer, nullable=False),
+    Column("enrolled_at", DateTime(timezone=True), server_default=func.now()),
+    Column("completed_at", DateTime(timezone=True)),
+    Column("progress_percentage", Numeric(5, 2), default=0),
+    Column("is_certified", Boolean, default=False),
+    Column("certification_issued_at", DateTime(timezone=True)),
+    Column("certification_expires_at", DateTime(timezone=True)),
+    Column("modules_completed", Integer, nullable=False, default=0),
+    Column("total_modules", Integer, nullable=False, default=0),
+    Column("last_activity_at", DateTime(timezone=True)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+module_progress = Table(
+    "module_progress", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("enrollment_id", Integer, nullable=False),
+    Column("module_id", Integer, nullable=False),
+    Column("started_at", DateTime(timezone=True)),
+    Column("completed_at", DateTime(timezone=True)),
+    Column("is_complete", Boolean, default=False),
+    Column("score", Numeric(5, 2)),
+    Column("time_spent_seconds", Integer),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+exam_questions = Table(
+    "exam_questions", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("course_id", Integer, nullable=False),
+    Column("prompt", Text, nullable=False),
+    Column("options", JSONB, nullable=False),
+    Column("correct_options", ARRAY(Integer), nullable=False),
+    Column("weight", Numeric(6, 2), nullable=False, default=1),
+    Column("topic", String(100)),
+    Column("sequence_order", Integer, nullable=False, default=0),
+    Column("is_active", Boolean, default=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+exam_attempts = Table(
+    "exam_attempts", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", UUID(as_uuid=False), nullable=False),
+    Column("course_id", Integer, nullable=False),
+    Column("answers", JSONB, nullable=False),
+    Column("score", Numeric(5, 2), nullable=False, default=0),
+    Column("correct_count", Integer, nullable=False, default=0),
+    Column("passed", Boolean, nullable=False, default=False),
+    Column("answer_key_version", String(32)),
+    Column("submitted_at", DateTime(timezone=True), server_default=func.now()),
+    Column("graded_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+course_documents = Table(
+    "course_documents", metadata,
+    Column("course_id", Integer, primary_key=True),
+    Column("document", JSONB, nullable=False),
+    Column("version", String(32), nullable=False),
+    Column("built_at", DateTime(timezone=True), nullable=False),
+)
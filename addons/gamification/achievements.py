@@ -0,0 +1,768 @@
+"""
+Achievement rule engine for the gamification addon.
+
+Achievements are declared as data in gamification.achievements.rule, for example
+{"metric": "gmb_task_completed", "aggregate": "sum", "threshold": 10, "window_days": 7}.
+Active rules are compiled into an index keyed by metric, so an incoming event
+only evaluates the rules its event type can fire. Events increment per-user
+daily buckets and all-time totals (gamification.user_metric_daily and
+user_metric_totals), earned achievements are inserted with ON CONFLICT DO
+NOTHING, and their points go through the points ledger with an idempotency key
+so an achievement can never pay out twice. A set-based backfill evaluates rules
+against the stored counters for every user at once.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+import threading
+import time
+
+from sqlalchemy import func, literal, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from addons.gamification.points import INSERT_CHUNK_SIZE, points_ledger
+from addons.gamification.tables import (
+    achievements as achievements_table,
+    user_achievements,
+    user_metric_daily,
+    user_metric_totals,
+)
+
+logger = logging.getLogger(__name__)
+
+# Supported rule aggregates
+AGGREGATES = ("sum", "streak")
+
+# Day numbers (and streak periods) are counted from this date, in Python and SQL alike
+EPOCH = date(1970, 1, 1)
+
+PairKey = Tuple[str, str]  # (user_id, metric)
+
+# Users qualifying for a windowed sum rule at any point in their history
+_BACKFILL_WINDOWED_SUM = text("""
+    INSERT INTO gamification.user_achievements (user_id, achievement_id, awarded_at)
+    SELECT DISTINCT user_id, :achievement_id, NOW()
+    FROM (
+        SELECT
+            user_id,
+            SUM(value) OVER (
+                PARTITION BY user_id
+                ORDER BY day - DATE '1970-01-01'
+                RANGE BETWEEN :span PRECEDING AND CURRENT ROW
+            ) AS window_total
+        FROM gamification.user_metric_daily
+        WHERE metric = :metric
+    ) AS windows
+    WHERE window_total >= :threshold
+    ON CONFLICT (user_id, achievement_id) DO NOTHING
+    RETURNING user_id
+""")
+
+# Users with a run of consecutive active periods (gaps-and-islands)
+_BACKFILL_STREAK = text("""
+    INSERT INTO gamification.user_achievements (user_id, achievement_id, awarded_at)
+    SELECT DISTINCT user_id, :achievement_id, NOW()
+    FROM (
+        SELECT user_id, period - ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY period) AS island
+        FROM (
+            SELECT DISTINCT user_id, (day - DATE '1970-01-01') / :period_days AS period
+            FROM gamification.user_metric_daily
+            WHERE metric = :metric AND value > 0
+        ) AS periods
+    ) AS islands
+    GROUP BY user_id, island
+    HAVING COUNT(*) >= :threshold
+    ON CONFLICT (user_id, achievement_id) DO NOTHING
+    RETURNING user_id
+""")
+
+
+class AchievementRule:
+    """
+    A single achievement and the condition that earns it.
+    """
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        metric: str,
+        threshold: int,
+        aggregate: str = "sum",
+        window_days: Optional[int] = None,
+        period_days: int = 1,
+        description: Optional[str] = None,
+        points: int = 0,
+        code: Optional[str] = None,
+        category: Optional[str] = None,
+        icon: Optional[str] = None,
+        difficulty: Optional[str] = None
+    ):
+        """
+        Initialize the rule
+
+        Raises:
+            ValueError: If the condition is not a valid rule
+        """
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate '{aggregate}'")
+        if not metric:
+            raise ValueError("Rule is missing a metric")
+        if threshold < 1:
+            raise ValueError("Rule threshold must be at least 1")
+        if window_days is not None and window_days < 1:
+            raise ValueError("Rule window must be at least one day")
+        if period_days < 1:
+            raise ValueError("Streak period must be at least one day")
+
+        self.id = id
+        self.name = name
+        self.metric = metric
+        self.threshold = threshold
+        self.aggregate = aggregate
+        self.window_days = window_days if aggregate == "sum" else None
+        self.period_days = period_days
+        self.description = description
+        self.points = points or 0
+        self.code = code
+        self.category = category
+        self.icon = icon
+        self.difficulty = difficulty
+
+    @classmethod
+    def from_row(cls, row: Any) -> "AchievementRule":
+        """
+        Build a rule from a gamification.achievements row
+
+        Raises:
+            ValueError: If the row's rule document is invalid
+        """
+        rule = row.rule or {}
+        return cls(
+            id=row.id,
+            name=row.name,
+            metric=rule.get("metric"),
+            threshold=int(rule.get("threshold", 1)),
+            aggregate=rule.get("aggregate", "sum"),
+            window_days=rule.get("window_days"),
+            period_days=int(rule.get("period_days", 1)),
+            description=row.description,
+            points=row.points,
+            code=row.code,
+            category=row.category,
+            icon=row.badge_url,
+            difficulty=row.difficulty
+        )
+
+    @property
+    def lookback_days(self) -> int:
+        """Days of daily buckets needed to evaluate the rule (0 means totals suffice)"""
+        if self.aggregate == "streak":
+            # The current period may have just started, so one extra period is read
+            return (self.threshold + 1) * self.period_days
+        return self.window_days or 0
+
+    def progress(self, total: int, daily: Dict[date, int], as_of: date) -> int:
+        """
+        Compute the rule's current value for one user
+
+        Args:
+            total: The user's all-time total for the metric
+            daily: The user's daily buckets covering at least lookback_days before as_of
+            as_of: Day the evaluation is anchored to
+
+        Returns:
+            int: Current value to compare against the threshold
+        """
+        if self.aggregate == "streak":
+            active = {(day - EPOCH).days // self.period_days for day, value in daily.items() if value > 0}
+            period = (as_of - EPOCH).days // self.period_days
+            # A streak still counts until the current period ends without activity
+            if period not in active:
+                period -= 1
+            streak = 0
+            while period in active and streak < self.threshold:
+                streak += 1
+                period -= 1
+            return streak
+
+        if self.window_days:
+            start = as_of - timedelta(days=self.window_days - 1)
+            return sum(value for day, value in daily.items() if start <= day <= as_of)
+
+        return total
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Describe the achievement for API responses"""
+        return {
+            "id": self.id,
+            "code": self.code,
+            "name": self.name,
+            "description": self.description,
+            "points": self.points,
+            "category": self.category,
+            "icon": self.icon,
+            "difficulty": self.difficulty,
+            "rule": {
+                "metric": self.metric,
+                "aggregate": self.aggregate,
+                "threshold": self.threshold,
+                "window_days": self.window_days,
+                "period_days": self.period_days if self.aggregate == "streak" else None
+            }
+        }
+
+
+class CompiledRules:
+    """
+    Active rules indexed by the metric (event type) that can fire them.
+    """
+
+    def __init__(self, rules: List[AchievementRule]):
+        """
+        Build the index
+
+        Args:
+            rules: Active achievement rules
+        """
+        self.rules = rules
+        self.by_id: Dict[int, AchievementRule] = {rule.id: rule for rule in rules}
+        self.by_metric: Dict[str, List[AchievementRule]] = defaultdict(list)
+        for rule in rules:
+            self.by_metric[rule.metric].append(rule)
+        self.max_lookback_days = max((rule.lookback_days for rule in rules), default=0)
+
+
+class AchievementEngine:
+    """
+    Event-driven evaluation of data-declared achievement rules.
+    """
+
+    def __init__(self, check_interval_seconds: int = 60):
+        """
+        Initialize the engine
+
+        Args:
+            check_interval_seconds: Seconds between checks for rule changes
+        """
+        self.check_interval_seconds = check_interval_seconds
+        self._lock = threading.Lock()
+        self._compiled = CompiledRules([])
+        self._version: Optional[tuple] = None
+        self._checked_at: Optional[float] = None
+
+    def get_rules(self, db: Session) -> CompiledRules:
+        """
+        Get the compiled rule index, recompiling it if the rules changed.
+
+        Args:
+            db: Database session
+
+        Returns:
+            CompiledRules: Active rules indexed by metric
+        """
+        self._ensure_loaded(db)
+        return self._compiled
+
+    def list_achievements(self, db: Session) -> List[Dict[str, Any]]:
+        """
+        Get all active achievements.
+
+        Args:
+            db: Database session
+
+        Returns:
+            List[dict]: Achievement definitions
+        """
+        return [rule.to_dict() for rule in self.get_rules(db).rules]
+
+    def record_event(
+        self,
+        db: Session,
+        user_id: str,
+        event_type: str,
+        value: int = 1,
+        occurred_at: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Record one event and award any achievements it completes.
+
+        Args:
+            db: Database session
+            user_id: The ID of the user
+            event_type: Metric the event counts towards
+            value: Amount to add to the metric
+            occurred_at: When the event happened (defaults to now)
+
+        Returns:
+            List[dict]: Achievements newly earned by the user
+        """
+        return self.record_events(db, [{
+            "user_id": user_id,
+            "event_type": event_type,
+            "value": value,
+            "occurred_at": occurred_at
+        }])["earned"]
+
+    def record_events(self, db: Session, events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Record a batch of events and award the achievements they complete.
+
+        Counters are upserted for every event; only (user, metric) pairs with at
+        least one rule indexed under that metric are evaluated, and only against
+        rules the user has not already earned.
+
+        Args:
+            db: Database session
+            events: Dicts with user_id, event_type and optional value / occurred_at
+
+        Returns:
+            dict: Counts of received events and evaluated pairs, and the earned achievements
+
+        Raises:
+            ValueError: If an event is missing a user or type or has a non-positive value
+        """
+        daily: Dict[Tuple[str, str, date], int] = defaultdict(int)
+        totals: Dict[PairKey, int] = defaultdict(int)
+        as_of: Dict[PairKey, date] = {}
+        received = 0
+        today = datetime.now(timezone.utc).date()
+
+        for event in events:
+            received += 1
+            user_id = event.get("user_id")
+            metric = event.get("event_type")
+            value = event.get("value", 1)
+            if not user_id:
+                raise ValueError(f"Event #{received} is missing user_id")
+            if not metric:
+                raise ValueError(f"Event #{received} is missing event_type")
+            if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+                raise ValueError(f"Event #{received} must have a positive integer value")
+
+            day = self._event_day(event.get("occurred_at"), today)
+            pair = (str(user_id), metric)
+            daily[(pair[0], metric, day)] += value
+            totals[pair] += value
+            if pair not in as_of or as_of[pair] < day:
+                as_of[pair] = day
+
+        new_totals = self._update_counters(db, daily, totals)
+
+        compiled = self.get_rules(db)
+        candidates = {pair: day for pair, day in as_of.items() if pair[1] in compiled.by_metric}
+        grants = self._evaluate(db, compiled, candidates, new_totals)
+        earned = self._grant(db, grants)
+
+        logger.info(
+            "Recorded %d achievement events: %d pairs evaluated, %d achievements earned",
+            received, len(candidates), len(earned)
+        )
+
+        return {
+            "received": received,
+            "evaluated": len(candidates),
+            "earned": earned
+        }
+
+    def backfill(self, db: Session, achievement_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Award achievements to every user whose stored history satisfies a rule.
+
+        Each rule is evaluated with one set-based INSERT ... SELECT over the
+        metric counters: a threshold on totals, a rolling window sum, or a
+        gaps-and-islands streak. Points for the new awards are applied as one
+        bulk ledger write.
+
+        Args:
+            db: Database session
+            achievement_ids: Optional subset of achievements to evaluate
+
+        Returns:
+            dict: Number of users newly awarded per achievement and the points applied
+        """
+        compiled = self.get_rules(db)
+        rules = compiled.rules
+        if achievement_ids is not None:
+            wanted = set(achievement_ids)
+            rules = [rule for rule in rules if rule.id in wanted]
+
+        awarded: Dict[int, int] = {}
+        awards = []
+        for rule in rules:
+            user_ids = self._backfill_rule(db, rule)
+            awarded[rule.id] = len(user_ids)
+            awards.extend(self._points_award(user_id, rule) for user_id in user_ids if rule.points > 0)
+
+        applied = 0
+        if awards:
+            applied = points_ledger.award_bulk(db, awards)["applied"]
+        else:
+            db.commit()
+
+        logger.info(
+            "Backfilled %d achievements: %d awards, %d point awards applied",
+            len(rules), sum(awarded.values()), applied
+        )
+
+        return {
+            "rules_evaluated": len(rules),
+            "awarded": awarded,
+            "points_awards_applied": applied
+        }
+
+    def get_user_achievements(self, db: Session, user_id: str) -> Dict[str, Any]:
+        """
+        Get a user's earned achievements and progress towards the others.
+
+        Args:
+            db: Database session
+            user_id: The ID of the user
+
+        Returns:
+            dict: Completed and in-progress achievements with totals
+        """
+        compiled = self.get_rules(db)
+        user_id = str(user_id)
+        today = datetime.now(timezone.utc).date()
+
+        earned_at = {
+            achievement_id: awarded_at
+            for achievement_id, awarded_at in db.execute(
+                select(user_achievements.c.achievement_id, user_achievements.c.awarded_at)
+                .where(user_achievements.c.user_id == user_id)
+            )
+        }
+
+        totals = dict(db.execute(
+            select(user_metric_totals.c.metric, user_metric_totals.c.total)
+            .where(user_metric_totals.c.user_id == user_id)
+        ).all())
+
+        daily: Dict[str, Dict[date, int]] = defaultdict(dict)
+        if compiled.max_lookback_days:
+            for metric, day, value in db.execute(
+                select(user_metric_daily.c.metric, user_metric_daily.c.day, user_metric_daily.c.value)
+                .where(user_metric_daily.c.user_id == user_id)
+                .where(user_metric_daily.c.day >= today - timedelta(days=compiled.max_lookback_days))
+            ):
+                daily[metric][day] = value
+
+        completed = []
+        in_progress = []
+        for rule in compiled.rules:
+            achievement = rule.to_dict()
+            if rule.id in earned_at:
+                awarded_at = earned_at[rule.id]
+                achievement["earned_date"] = awarded_at.isoformat() if awarded_at else None
+                completed.append(achievement)
+                continue
+
+            current = rule.progress(totals.get(rule.metric, 0), daily.get(rule.metric, {}), today)
+            achievement["progress"] = {
+                "current": min(current, rule.threshold),
+                "target": rule.threshold,
+                "percentage": round(min(current, rule.threshold) / rule.threshold * 100)
+            }
+            in_progress.append(achievement)
+
+        return {
+            "user_id": user_id,
+            "completed_count": len(completed),
+            "total_available": len(compiled.rules),
+            "total_points_earned": sum(achievement["points"] for achievement in completed),
+            "completed_achievements": completed,
+            "in_progress_achievements": in_progress
+        }
+
+    def invalidate(self) -> None:
+        """Force the rules to be recompiled on the next use"""
+        self._checked_at = None
+        self._version = None
+
+    def _event_day(self, occurred_at: Any, default: date) -> date:
+        """
+        Get the UTC day an event falls on.
+
+        Args:
+            occurred_at: Datetime, ISO 8601 string or None
+            default: Day used when no time is given
+
+        Returns:
+            date: The event's day
+        """
+        if occurred_at is None:
+            return default
+        if isinstance(occurred_at, str):
+            try:
+                occurred_at = datetime.fromisoformat(occurred_at.replace("Z", "+00:00"))
+            except ValueError:
+                raise ValueError(f"Invalid occurred_at '{occurred_at}'")
+        if occurred_at.tzinfo is not None:
+            occurred_at = occurred_at.astimezone(timezone.utc)
+        return occurred_at.date()
+
+    def _update_counters(
+        self,
+        db: Session,
+        daily: Dict[Tuple[str, str, date], int],
+        totals: Dict[PairKey, int]
+    ) -> Dict[PairKey, int]:
+        """
+        Add event values to the daily buckets and all-time totals.
+
+        Args:
+            db: Database session
+            daily: Value per (user, metric, day)
+            totals: Value per (user, metric)
+
+        Returns:
+            dict: New all-time total per (user, metric)
+        """
+        daily_rows = [
+            {"user_id": user_id, "metric": metric, "day": day, "value": value}
+            for (user_id, metric, day), value in daily.items()
+        ]
+        for start in range(0, len(daily_rows), INSERT_CHUNK_SIZE):
+            statement = insert(user_metric_daily).values(daily_rows[start:start + INSERT_CHUNK_SIZE])
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[user_metric_daily.c.user_id, user_metric_daily.c.metric, user_metric_daily.c.day],
+                set_={"value": user_metric_daily.c.value + statement.excluded.value}
+            ))
+
+        now = datetime.now(timezone.utc)
+        total_rows = [
+            {"user_id": user_id, "metric": metric, "total": value, "updated_at": now}
+            for (user_id, metric), value in totals.items()
+        ]
+        new_totals: Dict[PairKey, int] = {}
+        for start in range(0, len(total_rows), INSERT_CHUNK_SIZE):
+            statement = insert(user_metric_totals).values(total_rows[start:start + INSERT_CHUNK_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=[user_metric_totals.c.user_id, user_metric_totals.c.metric],
+                set_={
+                    "total": user_metric_totals.c.total + statement.excluded.total,
+                    "updated_at": now
+                }
+            ).returning(user_metric_totals.c.user_id, user_metric_totals.c.metric, user_metric_totals.c.total)
+            for user_id, metric, total in db.execute(statement):
+                new_totals[(user_id, metric)] = total
+
+        return new_totals
+
+    def _evaluate(
+        self,
+        db: Session,
+        compiled: CompiledRules,
+        candidates: Dict[PairKey, date],
+        new_totals: Dict[PairKey, int]
+    ) -> List[Tuple[str, AchievementRule]]:
+        """
+        Evaluate the indexed rules for the (user, metric) pairs touched by a batch.
+
+        Args:
+            db: Database session
+            compiled: Compiled rule index
+            candidates: Latest event day per (user, metric) pair with rules
+            new_totals: Updated all-time totals
+
+        Returns:
+            List[tuple]: (user_id, rule) for every newly satisfied rule
+        """
+        if not candidates:
+            return []
+
+        user_ids = {user_id for user_id, _ in candidates}
+        rule_ids = {rule.id for metric in {metric for _, metric in candidates} for rule in compiled.by_metric[metric]}
+        earned = set(db.execute(
+            select(user_achievements.c.user_id, user_achievements.c.achievement_id)
+            .where(user_achievements.c.user_id.in_(user_ids))
+            .where(user_achievements.c.achievement_id.in_(rule_ids))
+        ).all())
+
+        pending = {
+            pair: [rule for rule in compiled.by_metric[pair[1]] if (pair[0], rule.id) not in earned]
+            for pair in candidates
+        }
+
+        # Daily buckets are only read for pairs with an unearned windowed or streak rule
+        daily: Dict[PairKey, Dict[date, int]] = defaultdict(dict)
+        windowed = [pair for pair, rules in pending.items() if any(rule.lookback_days for rule in rules)]
+        if windowed:
+            lookback = max(rule.lookback_days for pair in windowed for rule in pending[pair])
+            since = min(candidates[pair] for pair in windowed) - timedelta(days=lookback)
+            for start in range(0, len(windowed), INSERT_CHUNK_SIZE):
+                chunk = windowed[start:start + INSERT_CHUNK_SIZE]
+                for user_id, metric, day, value in db.execute(
+                    select(
+                        user_metric_daily.c.user_id,
+                        user_metric_daily.c.metric,
+                        user_metric_daily.c.day,
+                        user_metric_daily.c.value
+                    )
+                    .where(tuple_(user_metric_daily.c.user_id, user_metric_daily.c.metric).in_(chunk))
+                    .where(user_metric_daily.c.day >= since)
+                ):
+                    daily[(user_id, metric)][day] = value
+
+        grants = []
+        for pair, rules in pending.items():
+            for rule in rules:
+                current = rule.progress(new_totals.get(pair, 0), daily.get(pair, {}), candidates[pair])
+                if current >= rule.threshold:
+                    grants.append((pair[0], rule))
+
+        return grants
+
+    def _grant(self, db: Session, grants: List[Tuple[str, AchievementRule]]) -> List[Dict[str, Any]]:
+        """
+        Insert earned achievements and award their points, committing the batch.
+
+        Args:
+            db: Database session
+            grants: (user_id, rule) pairs to award
+
+        Returns:
+            List[dict]: Achievements actually inserted (concurrent awards are skipped)
+        """
+        now = datetime.now(timezone.utc)
+        inserted = []
+        rows = [
+            {"user_id": user_id, "achievement_id": rule.id, "awarded_at": now}
+            for user_id, rule in grants
+        ]
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            statement = (
+                insert(user_achievements)
+                .values(rows[start:start + INSERT_CHUNK_SIZE])
+                .on_conflict_do_nothing(index_elements=[user_achievements.c.user_id, user_achievements.c.achievement_id])
+                .returning(user_achievements.c.user_id, user_achievements.c.achievement_id)
+            )
+            inserted.extend(db.execute(statement).all())
+
+        rules = {rule.id: rule for _, rule in grants}
+        awards = [
+            self._points_award(user_id, rules[achievement_id])
+            for user_id, achievement_id in inserted
+            if rules[achievement_id].points > 0
+        ]
+
+        if awards:
+            # Commits the counters and achievements together with the points
+            points_ledger.award_bulk(db, awards)
+        else:
+            db.commit()
+
+        return [
+            dict(rules[achievement_id].to_dict(), user_id=user_id, earned_date=now.isoformat())
+            for user_id, achievement_id in inserted
+        ]
+
+    def _points_award(self, user_id: str, rule: AchievementRule) -> Dict[str, Any]:
+        """Build the ledger award for an earned achievement"""
+        return {
+            "user_id": user_id,
+            "amount": rule.points,
+            "action": f"Achievement: {rule.name}",
+            "idempotency_key": f"achievement:{rule.id}:{user_id}"
+        }
+
+    def _backfill_rule(self, db: Session, rule: AchievementRule) -> List[str]:
+        """
+        Insert the achievement for every user whose counters satisfy the rule.
+
+        Args:
+            db: Database session
+            rule: Rule to evaluate
+
+        Returns:
+            List[str]: Users newly awarded the achievement
+        """
+        if rule.aggregate == "streak":
+            result = db.execute(_BACKFILL_STREAK, {
+                "achievement_id": rule.id,
+                "metric": rule.metric,
+                "period_days": rule.period_days,
+                "threshold": rule.threshold
+            })
+        elif rule.window_days:
+            result = db.execute(_BACKFILL_WINDOWED_SUM, {
+                "achievement_id": rule.id,
+                "metric": rule.metric,
+                "span": rule.window_days - 1,
+                "threshold": rule.threshold
+            })
+        else:
+            result = db.execute(
+                insert(user_achievements)
+                .from_select(
+                    ["user_id", "achievement_id", "awarded_at"],
+                    select(user_metric_totals.c.user_id, literal(rule.id), func.now())
+                    .where(user_metric_totals.c.metric == rule.metric)
+                    .where(user_metric_totals.c.total >= rule.threshold)
+                )
+                .on_conflict_do_nothing(index_elements=[user_achievements.c.user_id, user_achievements.c.achievement_id])
+                .returning(user_achievements.c.user_id)
+            )
+
+        return [str(user_id) for user_id in result.scalars()]
+
+    def _ensure_loaded(self, db: Session) -> None:
+        """
+        Compile the active rules, or recompile them if they changed since the last check.
+
+        Args:
+            db: Database session
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval_seconds:
+            return
+
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval_seconds:
+                return
+
+            version = tuple(db.execute(
+                select(func.count(), func.max(achievements_table.c.updated_at))
+                .select_from(achievements_table)
+            ).one())
+
+            if version != self._version:
+                rows = db.execute(
+                    select(
+                        achievements_table.c.id,
+                        achievements_table.c.code,
+                        achievements_table.c.name,
+                        achievements_table.c.description,
+                        achievements_table.c.points,
+                        achievements_table.c.badge_url,
+                        achievements_table.c.category,
+                        achievements_table.c.difficulty,
+                        achievements_table.c.rule
+                    )
+                    .where(achievements_table.c.is_active == True)
+                    .where(achievements_table.c.rule.isnot(None))
+                    .order_by(achievements_table.c.id)
+                ).all()
+
+                rules = []
+                for row in rows:
+                    try:
+                        rules.append(AchievementRule.from_row(row))
+                    except (TypeError, ValueError) as e:
+                        logger.warning("Skipping achievement %s with invalid rule: %s", row.id, e)
+
+                self._compiled = CompiledRules(rules)
+                self._version = version
+                logger.info(
+                    "Compiled %d achievement rules over %d metrics",
+                    len(rules), len(self._compiled.by_metric)
+                )
+
+            self._checked_at = now
+
+
+# Shared engine instance
+achievement_engine = AchievementEngine()
@@ -0,0 +1,306 @@
+"""
+Level resolution for the gamification addon.
+
+The level table (gamification.levels) is loaded once into a sorted array of
+minimum-point thresholds. Resolving a points total to its level and the points
+needed for the next level is a binary search over that array, and whole pages
+of totals (for example a leaderboard page) can be resolved in one call. The
+table is re-read when its row count or latest updated_at changes.
+"""
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Sequence
+import logging
+import threading
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from addons.gamification.tables import levels as levels_table
+
+logger = logging.getLogger(__name__)
+
+# Used when gamification.levels has no rows
+DEFAULT_LEVELS = [
+    {
+        "level": 1,
+        "name": "Rookie",
+        "min_points": 0,
+        "max_points": 99,
+        "icon": "level1.png",
+        "benefits": ["Basic GMB tools access"]
+    },
+    {
+        "level": 2,
+        "name": "Novice",
+        "min_points": 100,
+        "max_points": 249,
+        "icon": "level2.png",
+        "benefits": ["Basic GMB tools access", "Weekly performance reports"]
+    },
+    {
+        "level": 3,
+        "name": "Apprentice",
+        "min_points": 250,
+        "max_points": 499,
+        "icon": "level3.png",
+        "benefits": ["Basic GMB tools access", "Weekly performance reports", "Basic course access"]
+    },
+    {
+        "level": 4,
+        "name": "Practitioner",
+        "min_points": 500,
+        "max_points": 749,
+        "icon": "level4.png",
+        "benefits": ["Advanced GMB tools access", "Weekly performance reports", "Basic course access"]
+    },
+    {
+        "level": 5,
+        "name": "Expert",
+        "min_points": 750,
+        "max_points": 999,
+        "icon": "level5.png",
+        "benefits": ["Advanced GMB tools access", "Daily performance reports", "Full course access"]
+    },
+    {
+        "level": 6,
+        "name": "Master",
+        "min_points": 1000,
+        "max_points": 1499,
+        "icon": "level6.png",
+        "benefits": ["Advanced GMB tools access", "Real-time performance dashboard", "Full course access", "Priority support"]
+    },
+    {
+        "level": 7,
+        "name": "Grandmaster",
+        "min_points": 1500,
+        "max_points": 1999,
+        "icon": "level7.png",
+        "benefits": ["Advanced GMB tools access", "Real-time performance dashboard", "Full course access", "Priority support", "Custom reporting"]
+    },
+    {
+        "level": 8,
+        "name": "Legend",
+        "min_points": 2000,
+        "max_points": 2999,
+        "icon": "level8.png",
+        "benefits": ["Advanced GMB tools access", "Real-time performance dashboard", "Full course access", "Priority support", "Custom reporting", "Beta feature access"]
+    },
+    {
+        "level": 9,
+        "name": "Champion",
+        "min_points": 3000,
+        "max_points": 3999,
+        "icon": "level9.png",
+        "benefits": ["Advanced GMB tools access", "Real-time performance dashboard", "Full course access", "Priority support", "Custom reporting", "Beta feature access", "Recognition on leaderboards"]
+    },
+    {
+        "level": 10,
+        "name": "Titan",
+        "min_points": 4000,
+        "max_points": None,
+        "icon": "level10.png",
+        "benefits": ["All platform features", "Exclusive Titan badge", "Recognition program participation"]
+    }
+]
+
+class LevelResolver:
+    """
+    Sorted threshold table with binary-search level lookups.
+    """
+
+    def __init__(self, check_interval_seconds: int = 60):
+        """
+        Initialize the resolver
+
+        Args:
+            check_interval_seconds: Seconds between checks for level table changes
+        """
+        self.check_interval_seconds = check_interval_seconds
+        self._lock = threading.Lock()
+        # (levels, thresholds) swapped as one reference so lookups see a consistent table
+        self._table: tuple = ([], [])
+        self._version: Optional[tuple] = None
+        self._checked_at: Optional[float] = None
+
+    def get_levels(self, db: Session) -> List[Dict[str, Any]]:
+        """
+        Get the level system in ascending order.
+
+        Args:
+            db: Database session
+
+        Returns:
+            List[dict]: Level definitions
+        """
+        self._ensure_loaded(db)
+        return [dict(level) for level in self._table[0]]
+
+    def resolve(self, db: Session, total_points: int) -> Dict[str, Any]:
+        """
+        Resolve a points total to its level and progress towards the next one.
+
+        Args:
+            db: Database session
+            total_points: The user's total points
+
+        Returns:
+            dict: Current level, next level and progress information
+        """
+        return self.resolve_many(db, [total_points])[0]
+
+    def resolve_many(self, db: Session, totals: Sequence[int]) -> List[Dict[str, Any]]:
+        """
+        Resolve many points totals at once.
+
+        Sorted input (as on a leaderboard page) is resolved with a single merge
+        walk over the threshold array; unsorted input falls back to one binary
+        search per total.
+
+        Args:
+            db: Database session
+            totals: Points totals in any order
+
+        Returns:
+            List[dict]: Level information for each total, in input order
+        """
+        self._ensure_loaded(db)
+        levels, thresholds = self._table
+        return [
+            self._describe(levels, index, total)
+            for index, total in zip(self._level_indexes(thresholds, totals), totals)
+        ]
+
+    def level_numbers(self, db: Session, totals: Sequence[int]) -> List[int]:
+        """
+        Resolve many points totals to level numbers only.
+
+        Args:
+            db: Database session
+            totals: Points totals in any order
+
+        Returns:
+            List[int]: Level number (1-based) for each total, in input order
+        """
+        self._ensure_loaded(db)
+        levels, thresholds = self._table
+        return [levels[index]["level"] for index in self._level_indexes(thresholds, totals)]
+
+    def _level_indexes(self, thresholds: List[int], totals: Sequence[int]) -> List[int]:
+        """
+        Map points totals to indexes into a threshold array.
+
+        Args:
+            thresholds: Ascending minimum points per level
+            totals: Points totals in any order
+
+        Returns:
+            List[int]: Index of each total's level (0 for totals below the first threshold)
+        """
+        count = len(totals)
+
+        if count > 1 and all(totals[i] >= totals[i + 1] for i in range(count - 1)):
+            # Descending input: walk the thresholds downwards once
+            indexes = []
+            position = len(thresholds) - 1
+            for total in totals:
+                while position > 0 and thresholds[position] > total:
+                    position -= 1
+                indexes.append(position)
+            return indexes
+
+        return [max(0, bisect_right(thresholds, total) - 1) for total in totals]
+
+    def invalidate(self) -> None:
+        """Force the level table to be re-read on the next lookup"""
+        self._checked_at = None
+        self._version = None
+
+    def _describe(self, levels: List[Dict[str, Any]], index: int, total_points: int) -> Dict[str, Any]:
+        """
+        Build the level description for a total whose level index is known.
+
+        Args:
+            levels: Level table the index refers to
+            index: Index into the level table
+            total_points: The user's total points
+
+        Returns:
+            dict: Current level, next level and progress information
+        """
+        current = levels[index]
+        next_level = levels[index + 1] if index + 1 < len(levels) else None
+
+        if next_level is None:
+            return {
+                "total_points": total_points,
+                "current_level": dict(current),
+                "next_level": None,
+                "next_level_points": 0,
+                "progress_percentage": 100.0
+            }
+
+        span = next_level["min_points"] - current["min_points"]
+        gained = total_points - current["min_points"]
+        return {
+            "total_points": total_points,
+            "current_level": dict(current),
+            "next_level": dict(next_level),
+            "next_level_points": max(0, next_level["min_points"] - total_points),
+            "progress_percentage": round(min(100.0, max(0.0, gained / span * 100)), 1) if span > 0 else 0.0
+        }
+
+    def _ensure_loaded(self, db: Session) -> None:
+        """
+        Load the level table, or reload it if it changed since the last check.
+
+        Args:
+            db: Database session
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval_seconds:
+            return
+
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval_seconds:
+                return
+
+            version = tuple(db.execute(
+                select(func.count(), func.max(levels_table.c.updated_at)).select_from(levels_table)
+            ).one())
+
+            if version != self._version or not self._table[0]:
+                rows = db.execute(
+                    select(
+                        levels_table.c.name,
+                        levels_table.c.description,
+                        levels_table.c.min_points,
+                        levels_table.c.max_points,
+                        levels_table.c.icon_url
+                    ).order_by(levels_table.c.min_points)
+                ).all()
+
+                if rows:
+                    loaded = [
+                        {
+                            "level": position,
+                            "name": row.name,
+                            "description": row.description,
+                            "min_points": row.min_points,
+                            "max_points": row.max_points,
+                            "icon": row.icon_url
+                        }
+                        for position, row in enumerate(rows, start=1)
+                    ]
+                else:
+                    loaded = [dict(level) for level in DEFAULT_LEVELS]
+
+                self._table = (loaded, [level["min_points"] for level in loaded])
+                self._version = version
+                logger.info("Loaded %d gamification levels", len(loaded))
+
+            self._checked_at = now
+
+
+# Shared resolver instance
+level_resolver = LevelResolver()
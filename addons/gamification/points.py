@@ -0,0 +1,325 @@
+"""
+Points ledger for the gamification addon.
+
+Awards are appended to gamification.user_points and never modified. Each award
+may carry an idempotency key so retried requests are not counted twice. In the
+same transaction, the per-user running balance and level in
+gamification.user_balances are updated, so reading a user's points is a single
+primary-key lookup instead of a SUM over their ledger. Mistakes are fixed by
+appending a correcting entry with a negative amount.
+"""
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from uuid import UUID
+import logging
+
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from addons.gamification.levels import level_resolver
+from addons.gamification.tables import user_balances, user_points
+
+logger = logging.getLogger(__name__)
+
+# Rows per multi-row INSERT statement
+INSERT_CHUNK_SIZE = 1000
+
+
+class PointsLedger:
+    """
+    Append-only points ledger with materialized running balances.
+    """
+
+    def __init__(self):
+        """Initialize the ledger"""
+        self._listeners: List[Callable[[Dict[str, int], datetime], None]] = []
+
+    def add_listener(self, listener: Callable[[Dict[str, int], datetime], None]) -> None:
+        """
+        Register a callback run after each committed award batch.
+
+        Args:
+            listener: Called with the points applied per user and the award time
+        """
+        self._listeners.append(listener)
+
+    def award(
+        self,
+        db: Session,
+        user_id: str,
+        amount: int,
+        action: str,
+        idempotency_key: Optional[str] = None,
+        point_type_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Award points to a single user.
+
+        Args:
+            db: Database session
+            user_id: The ID of the user
+            amount: Number of points, negative for a correcting entry
+            action: Description of the action being rewarded
+            idempotency_key: Optional key identifying this award across retries
+            point_type_id: Optional point type
+
+        Returns:
+            dict: Whether the award was applied and the user's updated balance
+        """
+        result = self.award_bulk(db, [{
+            "user_id": user_id,
+            "amount": amount,
+            "action": action,
+            "idempotency_key": idempotency_key,
+            "point_type_id": point_type_id
+        }])
+
+        return {
+            "applied": result["applied"] == 1,
+            "balance": self.get_balance(db, user_id)
+        }
+
+    def award_bulk(self, db: Session, awards: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Award points for many (user, amount, action) tuples in one transaction.
+
+        Awards sharing an idempotency key within the batch are collapsed to the
+        first occurrence; keys already present in the ledger are skipped by the
+        unique index. Ledger rows are written with multi-row INSERTs and the
+        balances with one upsert per chunk of affected users.
+
+        Args:
+            db: Database session
+            awards: Dicts with user_id, amount, action and optional idempotency_key / point_type_id
+
+        Returns:
+            dict: Counts of received, applied and duplicate awards and the new balances
+
+        Raises:
+            ValueError: If an award has no valid user ID or a zero amount
+        """
+        now = datetime.now(timezone.utc)
+        rows = []
+        seen_keys = set()
+        received = 0
+
+        for award in awards:
+            received += 1
+            user_id = award.get("user_id")
+            amount = award.get("amount")
+            if not user_id:
+                raise ValueError(f"Award #{received} is missing user_id")
+            try:
+                user_id = str(UUID(str(user_id)))
+            except ValueError:
+                raise ValueError(f"Award #{received} has an invalid user_id '{user_id}'")
+            # Negative amounts are correcting entries; ledger rows are never edited
+            if not isinstance(amount, int) or isinstance(amount, bool) or amount == 0:
+                raise ValueError(f"Award #{received} must have a non-zero integer amount")
+
+            key = award.get("idempotency_key")
+            if key is not None:
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+
+            action = award.get("action") or "Unspecified action"
+            rows.append({
+                "user_id": user_id,
+                "amount": amount,
+                "action": action,
+                "description": action,
+                "idempotency_key": key,
+                "point_type_id": award.get("point_type_id"),
+                "awarded_at": now
+            })
+
+        # Insert ledger rows, keeping only those that were not already recorded
+        totals: Dict[str, int] = defaultdict(int)
+        counts: Dict[str, int] = defaultdict(int)
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            chunk = rows[start:start + INSERT_CHUNK_SIZE]
+            statement = (
+                insert(user_points)
+                .values(chunk)
+                .on_conflict_do_nothing(
+                    index_elements=[user_points.c.idempotency_key],
+                    index_where=user_points.c.idempotency_key.isnot(None)
+                )
+                .returning(user_points.c.user_id, user_points.c.amount)
+            )
+            for user_id, amount in db.execute(statement):
+                totals[user_id] += amount
+                counts[user_id] += 1
+
+        balances = self._apply_to_balances(db, totals, counts, now)
+        db.commit()
+
+        if totals:
+            for listener in self._listeners:
+                try:
+                    listener(dict(totals), now)
+                except Exception:
+                    logger.exception("Points listener %r failed", listener)
+
+        applied = sum(counts.values())
+        logger.info(
+            "Awarded points: %d received, %d applied, %d duplicates, %d users",
+            received, applied, received - applied, len(totals)
+        )
+
+        return {
+            "received": received,
+            "applied": applied,
+            "duplicates": received - applied,
+            "users": len(totals),
+            "balances": balances
+        }
+
+    def get_balance(self, db: Session, user_id: str) -> Dict[str, Any]:
+        """
+        Get a user's materialized balance.
+
+        Args:
+            db: Database session
+            user_id: The ID of the user
+
+        Returns:
+            dict: Total points, level, award count and last award time
+        """
+        row = db.execute(
+            select(
+                user_balances.c.total_points,
+                user_balances.c.level,
+                user_balances.c.award_count,
+                user_balances.c.last_awarded_at
+            ).where(user_balances.c.user_id == str(user_id))
+        ).first()
+
+        if row is None:
+            return {
+                "user_id": str(user_id),
+                "total_points": 0,
+                "level": 1,
+                "award_count": 0,
+                "last_awarded_at": None
+            }
+
+        return {
+            "user_id": str(user_id),
+            "total_points": row.total_points,
+            "level": row.level,
+            "award_count": row.award_count,
+            "last_awarded_at": row.last_awarded_at.isoformat() if row.last_awarded_at else None
+        }
+
+    def get_recent_points(self, db: Session, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get a user's most recent ledger entries.
+
+        Args:
+            db: Database session
+            user_id: The ID of the user
+            limit: Maximum number of entries
+
+        Returns:
+            List[dict]: Ledger entries, newest first
+        """
+        rows = db.execute(
+            select(
+                user_points.c.id,
+                user_points.c.amount,
+                user_points.c.action,
+                user_points.c.awarded_at
+            )
+            .where(user_points.c.user_id == str(user_id))
+            .order_by(user_points.c.awarded_at.desc())
+            .limit(limit)
+        ).all()
+
+        return [
+            {
+                "id": row.id,
+                "amount": row.amount,
+                "action": row.action,
+                "timestamp": row.awarded_at.isoformat() if row.awarded_at else None
+            }
+            for row in rows
+        ]
+
+    def _apply_to_balances(
+        self,
+        db: Session,
+        totals: Dict[str, int],
+        counts: Dict[str, int],
+        awarded_at: datetime
+    ) -> Dict[str, int]:
+        """
+        Add newly recorded points to the running balances and refresh levels.
+
+        Args:
+            db: Database session
+            totals: Points added per user
+            counts: Ledger rows added per user
+            awarded_at: Time of the award batch
+
+        Returns:
+            dict: New total points per user
+        """
+        if not totals:
+            return {}
+
+        new_totals: Dict[str, int] = {}
+        current_levels: Dict[str, int] = {}
+        # Upsert in key order so concurrent batches lock the same rows in the same order
+        user_ids = sorted(totals.keys())
+
+        for start in range(0, len(user_ids), INSERT_CHUNK_SIZE):
+            chunk = [
+                {
+                    "user_id": user_id,
+                    "total_points": totals[user_id],
+                    "award_count": counts[user_id],
+                    "last_awarded_at": awarded_at
+                }
+                for user_id in user_ids[start:start + INSERT_CHUNK_SIZE]
+            ]
+            statement = insert(user_balances).values(chunk)
+            statement = statement.on_conflict_do_update(
+                index_elements=[user_balances.c.user_id],
+                set_={
+                    "total_points": user_balances.c.total_points + statement.excluded.total_points,
+                    "award_count": user_balances.c.award_count + statement.excluded.award_count,
+                    "last_awarded_at": statement.excluded.last_awarded_at,
+                    "updated_at": awarded_at
+                }
+            ).returning(user_balances.c.user_id, user_balances.c.total_points, user_balances.c.level)
+
+            for user_id, total_points, level in db.execute(statement):
+                new_totals[user_id] = total_points
+                current_levels[user_id] = level
+
+        # Only rows whose level actually changed are rewritten
+        user_ids = list(new_totals.keys())
+        resolved = level_resolver.level_numbers(db, [new_totals[user_id] for user_id in user_ids])
+        level_changes = [
+            {"b_user_id": user_id, "b_level": level}
+            for user_id, level in zip(user_ids, resolved)
+            if level != current_levels[user_id]
+        ]
+
+        if level_changes:
+            db.connection().execute(
+                update(user_balances)
+                .where(user_balances.c.user_id == bindparam("b_user_id"))
+                .values(level=bindparam("b_level")),
+                level_changes
+            )
+
+        return new_totals
+
+
+# Shared ledger instance
+points_ledger = PointsLedger()
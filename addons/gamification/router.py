@@ -2,21 +2,31 @@
 Gamification API router for Local Lift application.
 """
 from typing import List, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Path
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status, Path
 from sqlalchemy.orm import Session
 
 from core.auth.router import get_current_active_user
 from core.auth.schemas import UserRead
 from core.database.connection import get_db
+from addons.gamification.achievements import achievement_engine
+from addons.gamification.levels import level_resolver
+from addons.gamification.points import points_ledger
 
 router = APIRouter()
 
+# Maximum number of awards accepted by the bulk endpoint in one call
+MAX_BULK_AWARDS = 10000
+
+# Maximum number of events accepted by the events endpoint in one call
+MAX_BULK_EVENTS = 10000
+
 
 # Points Management
 @router.get("/points/{user_id}", response_model=dict)
 async def get_user_points(
-    user_id: int = Path(..., ge=1),
+    user_id: UUID,
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -32,53 +42,23 @@ async def get_user_points(
         dict: Points information
     """
     # Check permissions - users can view their own points, admins can view anyone's
-    if current_user.id != user_id and current_user.role not in ["admin", "regional_manager", "franchise"]:
+    if str(current_user.id) != str(user_id) and current_user.role not in ["admin", "regional_manager", "franchise"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
     
-    # This is a placeholder - in a real implementation, you would fetch points from the database
+    balance = points_ledger.get_balance(db, str(user_id))
+    level_info = level_resolver.resolve(db, balance["total_points"])
     
-    # For now, we'll simulate points data
     points_data = {
-        "user_id": user_id,
-        "total_points": 875,
-        "level": 8,
-        "next_level_points": 125,
-        "percentile": 92,
-        "rank": {
-            "overall": 42,
-            "region": 3,
-            "franchise": 1
-        },
-        "recent_points": [
-            {
-                "id": 123,
-                "amount": 10,
-                "action": "Complete GMB task: Respond to review",
-                "timestamp": "2025-04-14T14:30:00Z"
-            },
-            {
-                "id": 122,
-                "amount": 5,
-                "action": "Daily login streak: 7 days",
-                "timestamp": "2025-04-14T09:15:00Z"
-            },
-            {
-                "id": 121,
-                "amount": 25,
-                "action": "Complete module in GMB Optimization course",
-                "timestamp": "2025-04-13T16:45:00Z"
-            }
-        ],
-        "points_breakdown": {
-            "gmb_tasks": 350,
-            "courses": 275,
-            "certifications": 150,
-            "login_streaks": 65,
-            "bonuses": 35
-        }
+        "user_id": str(user_id),
+        "total_points": balance["total_points"],
+        "level": level_info["current_level"]["level"],
+        "next_level_points": level_info["next_level_points"],
+        "award_count": balance["award_count"],
+        "last_awarded_at": balance["last_awarded_at"],
+        "recent_points": points_ledger.get_recent_points(db, str(user_id), limit=10)
     }
     
     return points_data
@@ -86,7 +66,7 @@ async def get_user_points(
 
 @router.post("/points/{user_id}/award", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def award_points(
-    user_id: int,
+    user_id: UUID,
     points_data: dict,
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -110,34 +90,84 @@ async def award_points(
             detail="Not enough permissions"
         )
     
-    # This is a placeholder - in a real implementation, you would add points in the database
-    
-    # For now, we'll simulate awarding points
     amount = points_data.get("amount", 0)
     action = points_data.get("action", "Unspecified action")
     
-    if amount <= 0:
+    # Negative amounts record a correcting entry against earlier awards
+    if not isinstance(amount, int) or isinstance(amount, bool) or amount == 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Points amount must be positive"
+            detail="Points amount must be a non-zero integer"
         )
     
-    # Return updated points
+    previous = points_ledger.get_balance(db, str(user_id))
+    award = points_ledger.award(
+        db,
+        user_id=str(user_id),
+        amount=amount,
+        action=action,
+        idempotency_key=points_data.get("idempotency_key"),
+        point_type_id=points_data.get("point_type_id")
+    )
+    balance = award["balance"]
+    level_info = level_resolver.resolve(db, balance["total_points"])
+    
     result = {
-        "user_id": user_id,
-        "points_awarded": amount,
+        "user_id": str(user_id),
+        "points_awarded": amount if award["applied"] else 0,
+        "duplicate": not award["applied"],
         "action": action,
-        "timestamp": "2025-04-14T20:00:00Z",
-        "new_total": 885,  # Previous + amount
-        "previous_total": 875,
-        "level": 8,
-        "next_level_points": 115,  # Updated based on new total
-        "message": f"Successfully awarded {amount} points for {action}"
+        "timestamp": balance["last_awarded_at"],
+        "new_total": balance["total_points"],
+        "previous_total": previous["total_points"],
+        "level": level_info["current_level"]["level"],
+        "next_level_points": level_info["next_level_points"],
+        "message": (
+            f"Successfully awarded {amount} points for {action}"
+            if award["applied"]
+            else "Award already recorded for this idempotency key"
+        )
     }
     
     return result
 
 
+@router.post("/points/bulk", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def award_points_bulk(
+    awards: List[dict] = Body(..., description="Awards as {user_id, amount, action, idempotency_key?}"),
+    current_user: UserRead = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Award points for many users in a single call.
+    
+    Args:
+        awards: List of awards, each with user_id, amount, action and an optional idempotency_key
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        dict: Counts of received, applied and duplicate awards with the new balances
+    """
+    # Check permissions - only admin, regional_manager, or franchise can award points
+    if current_user.role not in ["admin", "regional_manager", "franchise"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    if len(awards) > MAX_BULK_AWARDS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_AWARDS} awards can be submitted per call"
+        )
+    
+    try:
+        return points_ledger.award_bulk(db, awards)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 # Achievements
 @router.get("/achievements", response_model=List[dict])
 async def get_all_achievements(
@@ -154,63 +184,14 @@ async def get_all_achievements(
     Returns:
         List[dict]: List of all achievements
     """
-    # This is a placeholder - in a real implementation, you would fetch achievements from the database
-    
-    # For now, we'll simulate achievements data
-    achievements = [
-        {
-            "id": 1,
-            "name": "GMB Superstar",
-            "description": "Complete 10 GMB tasks in a single week",
-            "points": 50,
-            "category": "GMB",
-            "icon": "star.png",
-            "difficulty": "medium"
-        },
-        {
-            "id": 2,
-            "name": "First Certificate",
-            "description": "Earn your first certification",
-            "points": 100,
-            "category": "Education",
-            "icon": "certificate.png",
-            "difficulty": "easy"
-        },
-        {
-            "id": 3,
-            "name": "Perfect Attendance",
-            "description": "Log in every day for 30 consecutive days",
-            "points": 75,
-            "category": "Engagement",
-            "icon": "calendar.png",
-            "difficulty": "hard"
-        },
-        {
-            "id": 4,
-            "name": "Five-Star Service",
-            "description": "Maintain a 5-star GMB rating for 3 months",
-            "points": 150,
-            "category": "GMB",
-            "icon": "stars.png",
-            "difficulty": "hard"
-        },
-        {
-            "id": 5,
-            "name": "Speedy Response",
-            "description": "Respond to 20 reviews within 24 hours of posting",
-            "points": 75,
-            "category": "GMB",
-            "icon": "clock.png",
-            "difficulty": "medium"
-        }
-    ]
+    achievements = achievement_engine.list_achievements(db)
     
     return achievements
 
 
 @router.get("/achievements/{user_id}", response_model=dict)
 async def get_user_achievements(
-    user_id: int,
+    user_id: UUID,
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -226,73 +207,81 @@ async def get_user_achievements(
         dict: User achievements information
     """
     # Check permissions - users can view their own achievements, admins can view anyone's
-    if current_user.id != user_id and current_user.role not in ["admin", "regional_manager", "franchise"]:
+    if str(current_user.id) != str(user_id) and current_user.role not in ["admin", "regional_manager", "franchise"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
     
-    # This is a placeholder - in a real implementation, you would fetch user achievements from the database
-    
-    # For now, we'll simulate user achievements data
-    user_achievements = {
-        "user_id": user_id,
-        "completed_count": 2,
-        "total_available": 5,
-        "total_points_earned": 150,
-        "completed_achievements": [
-            {
-                "id": 1,
-                "name": "GMB Superstar",
-                "description": "Complete 10 GMB tasks in a single week",
-                "points": 50,
-                "category": "GMB",
-                "icon": "star.png",
-                "earned_date": "2025-04-07T16:45:00Z"
-            },
-            {
-                "id": 2,
-                "name": "First Certificate",
-                "description": "Earn your first certification",
-                "points": 100,
-                "category": "Education",
-                "icon": "certificate.png",
-                "earned_date": "2025-03-15T10:00:00Z"
-            }
-        ],
-        "in_progress_achievements": [
-            {
-                "id": 3,
-                "name": "Perfect Attendance",
-                "description": "Log in every day for 30 consecutive days",
-                "points": 75,
-                "category": "Engagement",
-                "icon": "calendar.png",
-                "progress": {
-                    "current": 12,
-                    "target": 30,
-                    "percentage": 40
-                }
-            },
-            {
-                "id": 5,
-                "name": "Speedy Response",
-                "description": "Respond to 20 reviews within 24 hours of posting",
-                "points": 75,
-                "category": "GMB",
-                "icon": "clock.png",
-                "progress": {
-                    "current": 8,
-                    "target": 20,
-                    "percentage": 40
-                }
-            }
-        ]
-    }
+    user_achievements = achievement_engine.get_user_achievements(db, str(user_id))
+    user_achievements["user_id"] = str(user_id)
     
     return user_achievements
 
 
+@router.post("/events", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def record_achievement_events(
+    events: List[dict] = Body(..., description="Events as {user_id, event_type, value?, occurred_at?}"),
+    current_user: UserRead = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Record activity events and award the achievements they complete.
+    
+    Args:
+        events: List of events, each with user_id, event_type and optional value / occurred_at
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        dict: Counts of received and evaluated events with the achievements earned
+    """
+    # Check permissions - only admin, regional_manager, or franchise can report events
+    if current_user.role not in ["admin", "regional_manager", "franchise"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    if len(events) > MAX_BULK_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_EVENTS} events can be submitted per call"
+        )
+    
+    try:
+        return achievement_engine.record_events(db, events)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/achievements/backfill", response_model=dict)
+async def backfill_achievements(
+    achievement_ids: Optional[List[int]] = Body(None, embed=True),
+    current_user: UserRead = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Award achievements retroactively from recorded activity.
+    
+    Args:
+        achievement_ids: Optional subset of achievements to evaluate (all when omitted)
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        dict: Number of users newly awarded per achievement
+    """
+    # Check permissions - only admins can run a backfill
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return achievement_engine.backfill(db, achievement_ids)
+
+
 # Levels & Progression
 @router.get("/levels", response_model=List[dict])
 async def get_level_system(
@@ -309,98 +298,14 @@ async def get_level_system(
     Returns:
         List[dict]: Level system information
     """
-    # This is a placeholder - in a real implementation, you would fetch level data from the database
-    
-    # For now, we'll simulate level system data
-    levels = [
-        {
-            "level": 1,
-            "name": "Rookie",
-            "min_points": 0,
-            "max_points": 99,
-            "icon": "level1.png",
-            "benefits": ["Basic GMB tools access"]
-        },
-        {
-            "level": 2,
-            "name": "Novice",
-            "min_points": 100,
-            "max_points": 249,
-            "icon": "level2.png",
-            "benefits": ["Basic GMB tools access", "Weekly performance reports"]
-        },
-        {
-            "level": 3,
-            "name": "Apprentice",
-            "min_points": 250,
-            "max_points": 499,
-            "icon": "level3.png",
-            "benefits": ["Basic GMB tools access", "Weekly performance reports", "Basic course access"]
-        },
-        {
-            "level": 4,
-            "name": "Practitioner",
-            "min_points": 500,
-            "max_points": 749,
-            "icon": "level4.png",
-            "benefits": ["Advanced GMB tools access", "Weekly performance reports", "Basic course access"]
-        },
-        {
-            "level": 5,
-            "name": "Expert",
-            "min_points": 750,
-            "max_points": 999,
-            "icon": "level5.png",
-            "benefits": ["Advanced GMB tools access", "Daily performance reports", "Full course access"]
-        },
-        {
-            "level": 6,
-            "name": "Master",
-            "min_points": 1000,
-            "max_points": 1499,
-            "icon": "level6.png",
-            "benefits": ["Advanced GMB tools access", "Real-time performance dashboard", "Full course access", "Priority support"]
-        },
-        {
-            "level": 7,
-            "name": "Grandmaster",
-            "min_points": 1500,
-            "max_points": 1999,
-            "icon": "level7.png",
-            "benefits": ["Advanced GMB tools access", "Real-time performance dashboard", "Full course access", "Priority support", "Custom reporting"]
-        },
-        {
-            "level": 8,
-            "name": "Legend",
-            "min_points": 2000,
-            "max_points": 2999,
-            "icon": "level8.png",
-            "benefits": ["Advanced GMB tools access", "Real-time performance dashboard", "Full course access", "Priority support", "Custom reporting", "Beta feature access"]
-        },
-        {
-            "level": 9,
-            "name": "Champion",
-            "min_points": 3000,
-            "max_points": 3999,
-            "icon": "level9.png",
-            "benefits": ["Advanced GMB tools access", "Real-time performance dashboard", "Full course access", "Priority support", "Custom reporting", "Beta feature access", "Recognition on leaderboards"]
-        },
-        {
-            "level": 10,
-            "name": "Titan",
-            "min_points": 4000,
-            "max_points": None,
-            "icon": "level10.png",
-            "benefits": ["All platform features", "Exclusive Titan badge", "Recognition program participation"]
-        }
-    ]
+    levels = level_resolver.get_levels(db)
     
     return levels
 
 
 @router.get("/progress/{user_id}", response_model=dict)
 async def get_user_progress(
-    user_id: int,
+    user_id: UUID,
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -416,56 +321,25 @@ async def get_user_progress(
         dict: User progression information
     """
     # Check permissions - users can view their own progress, admins can view anyone's
-    if current_user.id != user_id and current_user.role not in ["admin", "regional_manager", "franchise"]:
+    if str(current_user.id) != str(user_id) and current_user.role not in ["admin", "regional_manager", "franchise"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
     
-    # This is a placeholder - in a real implementation, you would fetch user progress from the database
+    balance = points_ledger.get_balance(db, str(user_id))
+    level_info = level_resolver.resolve(db, balance["total_points"])
+    next_level = level_info["next_level"]
     
-    # For now, we'll simulate user progress data
     user_progress = {
-        "user_id": user_id,
-        "total_points": 875,
-        "current_level": {
-            "level": 8,
-            "name": "Legend",
-            "min_points": 2000,
-            "max_points": 2999,
-            "icon": "level8.png"
-        },
-        "next_level": {
-            "level": 9,
-            "name": "Champion",
-            "min_points": 3000,
-            "max_points": 3999,
-            "icon": "level9.png",
-            "points_needed": 125
-        },
+        "user_id": str(user_id),
+        "total_points": balance["total_points"],
+        "current_level": level_info["current_level"],
+        "next_level": dict(next_level, points_needed=level_info["next_level_points"]) if next_level else None,
         "progress_to_next_level": {
-            "current": 875,
-            "target": 1000,
-            "percentage": 87.5
-        },
-        "activity_stats": {
-            "tasks_completed": 42,
-            "tasks_completion_rate": 92.5,
-            "average_response_time": "6 hours",
-            "login_streak": 12,
-            "longest_streak": 18
-        },
-        "trends": {
-            "weekly_points": [
-                {"week": "Apr 1-7", "points": 120},
-                {"week": "Apr 8-14", "points": 150}
-            ],
-            "monthly_points": [
-                {"month": "Jan", "points": 180},
-                {"month": "Feb", "points": 210},
-                {"month": "Mar", "points": 240},
-                {"month": "Apr", "points": 270}
-            ]
+            "current": balance["total_points"],
+            "target": next_level["min_points"] if next_level else None,
+            "percentage": level_info["progress_percentage"]
         }
     }
     
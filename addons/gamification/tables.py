@@ -0,0 +1,94 @@
+"""
+Table definitions for the gamification schema.
+
+These mirror the tables created by the Supabase migrations so the gamification
+engines can build set-based statements (multi-row inserts, ON CONFLICT upserts)
+with SQLAlchemy Core.
+"""
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, BigInteger, String, Text, Boolean, Date, DateTime, func
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+metadata = MetaData(schema="gamification")
+
+levels = Table(
+    "levels", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("description", Text),
+    Column("min_points", Integer, nullable=False),
+    Column("max_points", Integer, nullable=False),
+    Column("icon_url", Text),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+achievements = Table(
+    "achievements", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("description", Text),
+    Column("points", Integer, default=0),
+    Column("badge_url", Text),
+    Column("requirements", Text),
+    Column("code", String(100)),
+    Column("category", String(50)),
+    Column("difficulty", String(20)),
+    Column("rule", JSONB),
+    Column("is_active", Boolean, default=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+user_points = Table(
+    "user_points", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", UUID(as_uuid=False), nullable=False),
+    Column("point_type_id", Integer),
+    Column("amount", Integer, nullable=False, default=0),
+    Column("description", Text),
+    Column("action", Text),
+    Column("idempotency_key", String(200)),
+    Column("awarded_at", DateTime(timezone=True), server_default=func.now()),
+    Column("expires_at", DateTime(timezone=True)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+user_achievements = Table(
+    "user_achievements", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", UUID(as_uuid=False), nullable=False),
+    Column("achievement_id", Integer, nullable=False),
+    Column("awarded_at", DateTime(timezone=True), server_default=func.now()),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+user_balances = Table(
+    "user_balances", metadata,
+    Column("user_id", UUID(as_uuid=False), primary_key=True),
+    Column("total_points", BigInteger, nullable=False, default=0),
+    Column("level", Integer, nullable=False, default=1),
+    Column("award_count", Integer, nullable=False, default=0),
+    Column("last_awarded_at", DateTime(timezone=True)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+user_metric_daily = Table(
+    "user_metric_daily", metadata,
+    Column("user_id", UUID(as_uuid=False), primary_key=True),
+    Column("metric", String(100), primary_key=True),
+    Column("day", Date, primary_key=True),
+    Column("value", BigInteger, nullable=False, default=0),
+)
+
+user_metric_totals = Table(
+    "user_metric_totals", metadata,
+    Column("user_id", UUID(as_uuid=False), primary_key=True),
+    Column("metric", String(100), primary_key=True),
+    Column("total", BigInteger, nullable=False, default=0),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
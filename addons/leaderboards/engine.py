@@ -0,0 +1,606 @@
+"""
+Leaderboard engine for Local Lift.
+
+Standings for each timeframe (day, week, month, all_time) are held in memory as
+ranked sets per board: one global board plus one per region and franchise, built
+from the gamification points ledger. Points awarded through the ledger are
+applied to the live boards immediately, so top-N, rank-of-user and around-me
+reads are O(log n) and never query the database.
+
+When a period ends, the final standings of that period are persisted to
+leaderboards.entries and, as a compact array of user IDs in rank order, to
+leaderboards.rank_snapshots (all-time standings are persisted once per day).
+That snapshot is what movement is measured against. Each board also takes an
+in-memory rank snapshot of its live standings at most once per
+snapshot interval, computing its top movers once rather than per request.
+Boards are rebuilt from the database periodically so awards made by other
+worker processes are picked up.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import threading
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from addons.gamification.points import INSERT_CHUNK_SIZE, points_ledger
+from addons.gamification.tables import user_balances, user_points
+from addons.leaderboards.ranked_set import RankedSet
+from addons.leaderboards.snapshots import RankSnapshot
+from addons.leaderboards.tables import entries, leaderboard_types, participants, rank_snapshots
+
+logger = logging.getLogger(__name__)
+
+TIMEFRAMES = ("day", "week", "month", "all_time")
+SCOPES = ("global", "region", "franchise")
+
+BoardKey = Tuple[str, Optional[int]]  # (scope, scope_id)
+GLOBAL_BOARD: BoardKey = ("global", None)
+
+
+def period_bounds(timeframe: str, moment: datetime) -> Tuple[
+    Optional[datetime], Optional[datetime], Optional[datetime], datetime
+]:
+    """
+    Get the current and previous period of a timeframe.
+
+    All-time boards have no period; their previous snapshot is the standing at
+    the start of the current day.
+
+    Args:
+        timeframe: One of TIMEFRAMES
+        moment: Timezone-aware time inside the current period
+
+    Returns:
+        tuple: (start, end, previous_start, previous_end)
+    """
+    day = moment.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if timeframe == "day":
+        return day, day + timedelta(days=1), day - timedelta(days=1), day
+    if timeframe == "week":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7), start - timedelta(days=7), start
+    if timeframe == "month":
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        previous_start = (start - timedelta(days=1)).replace(day=1)
+        return start, end, previous_start, start
+    if timeframe == "all_time":
+        return None, None, None, day
+
+    raise ValueError(f"Unknown timeframe '{timeframe}'")
+
+
+class LeaderboardBoard:
+    """
+    Ranked standings for one board with the previous period's snapshot.
+    """
+
+    def __init__(
+        self,
+        scores: Optional[Dict[str, int]] = None,
+        previous: Optional[RankSnapshot] = None,
+        snapshot_interval_seconds: int = 60
+    ):
+        """
+        Build the board
+
+        Args:
+            scores: Points per user
+            previous: Final standings of the previous period
+            snapshot_interval_seconds: Maximum age of the live snapshot behind top movers
+        """
+        self.scores: Dict[str, int] = {}
+        self.ranking = RankedSet()
+        self.previous = previous or RankSnapshot(())
+        self.snapshot_interval_seconds = snapshot_interval_seconds
+        self._live: Optional[RankSnapshot] = None
+        for user_id, score in (scores or {}).items():
+            self.add(user_id, score)
+
+    def __len__(self) -> int:
+        return len(self.ranking)
+
+    def add(self, user_id: str, points: int) -> None:
+        """
+        Add points to a user's score
+
+        Args:
+            user_id: The ID of the user
+            points: Points to add
+        """
+        previous = self.scores.get(user_id)
+        if previous is not None:
+            self.ranking.discard((-previous, user_id))
+        score = (previous or 0) + points
+        self.scores[user_id] = score
+        self.ranking.add((-score, user_id))
+
+    def rank_of(self, user_id: str) -> Optional[int]:
+        """Get a user's 1-based rank, or None if they are not on the board"""
+        score = self.scores.get(user_id)
+        if score is None:
+            return None
+        return self.ranking.rank((-score, user_id)) + 1
+
+    def movement(self, user_id: str, rank: int) -> Optional[int]:
+        """Get places gained since the previous snapshot (None for new entrants)"""
+        previous = self.previous.rank_of(user_id)
+        return None if previous is None else previous - rank
+
+    def percentile(self, rank: int) -> int:
+        """Get the share of the board at or below a rank"""
+        if not self.ranking:
+            return 0
+        return round((len(self.ranking) - rank + 1) / len(self.ranking) * 100)
+
+    def top(self, limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Get a page of standings
+
+        Args:
+            limit: Number of entries
+            offset: Number of leading entries to skip
+
+        Returns:
+            List[dict]: Entries with rank, user_id, points and movement
+        """
+        return self._entries(offset, self.ranking.slice(offset, offset + limit))
+
+    def around(self, user_id: str, radius: int = 2) -> List[Dict[str, Any]]:
+        """
+        Get the standings around a user
+
+        Args:
+            user_id: The ID of the user
+            radius: Entries to include on each side
+
+        Returns:
+            List[dict]: Entries around the user (empty if they are not ranked)
+        """
+        rank = self.rank_of(user_id)
+        if rank is None:
+            return []
+        start = max(0, rank - 1 - radius)
+        return self._entries(start, self.ranking.slice(start, rank + radius))
+
+    def top_movers(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Get the largest climbers since the previous period
+
+        Read from the live snapshot, which is retaken only when older than the
+        snapshot interval.
+
+        Args:
+            limit: Maximum number of movers
+
+        Returns:
+            List[dict]: Movers with user_id, movement and current_rank
+        """
+        live = self._live
+        if live is None or time.monotonic() - live.taken_at >= self.snapshot_interval_seconds:
+            live = self._live = self.snapshot()
+        return live.movers[:limit]
+
+    def snapshot(self) -> RankSnapshot:
+        """Take a rank snapshot of the current standings"""
+        return RankSnapshot([user_id for _, user_id in self.ranking], previous=self.previous)
+
+    def _entries(self, start: int, keys: List[Tuple[int, str]]) -> List[Dict[str, Any]]:
+        """Describe consecutive ranking keys starting at a 0-based position"""
+        return [
+            {
+                "rank": start + position,
+                "user_id": user_id,
+                "points": -negative_score,
+                "movement": self.movement(user_id, start + position)
+            }
+            for position, (negative_score, user_id) in enumerate(keys, start=1)
+        ]
+
+
+class TimeframeState:
+    """
+    Boards for one timeframe during its current period.
+    """
+
+    def __init__(
+        self,
+        boards: Dict[BoardKey, LeaderboardBoard],
+        previous: Dict[BoardKey, RankSnapshot],
+        period_start: Optional[datetime],
+        period_end: Optional[datetime],
+        previous_end: datetime
+    ):
+        self.boards = boards
+        self.previous = previous
+        self.period_start = period_start
+        self.period_end = period_end
+        self.previous_end = previous_end
+        self.loaded_at = time.monotonic()
+        self.updated_at = datetime.now(timezone.utc)
+
+    def contains(self, moment: datetime) -> bool:
+        """Check whether a time falls in the current period"""
+        if self.period_start is None:
+            return moment >= self.previous_end
+        return self.period_start <= moment < self.period_end
+
+
+class LeaderboardEngine:
+    """
+    In-memory, multi-timeframe leaderboards fed by the points ledger.
+    """
+
+    def __init__(self, refresh_seconds: int = 300):
+        """
+        Initialize the engine
+
+        Args:
+            refresh_seconds: Maximum age of boards before they are rebuilt from the database
+        """
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._states: Dict[str, TimeframeState] = {}
+        self._participants: Dict[str, Dict[str, Any]] = {}
+        self._type_ids: Dict[Tuple[str, str], int] = {}
+
+    def get_board(
+        self,
+        db: Session,
+        timeframe: str,
+        scope: str = "global",
+        scope_id: Optional[int] = None
+    ) -> LeaderboardBoard:
+        """
+        Get the current board for a timeframe and scope.
+
+        Args:
+            db: Database session (only used to load or roll over the timeframe)
+            timeframe: One of TIMEFRAMES
+            scope: One of SCOPES
+            scope_id: Region or franchise ID for scoped boards
+
+        Returns:
+            LeaderboardBoard: Current standings (empty if nobody has scored)
+        """
+        state = self._ensure_current(db, timeframe)
+        board = state.boards.get((scope, scope_id))
+        if board is None:
+            board = LeaderboardBoard(previous=state.previous.get((scope, scope_id)))
+        return board
+
+    def get_updated_at(self, timeframe: str) -> Optional[str]:
+        """Get when a timeframe's boards last changed"""
+        state = self._states.get(timeframe)
+        return state.updated_at.isoformat() if state else None
+
+    def get_participant(self, user_id: str) -> Dict[str, Any]:
+        """Get a participant's display name, role, region and franchise"""
+        return self._participants.get(user_id, {})
+
+    def has_scope(self, db: Session, scope: str, scope_id: int) -> bool:
+        """
+        Check whether any participant belongs to a region or franchise.
+
+        Args:
+            db: Database session
+            scope: "region" or "franchise"
+            scope_id: Region or franchise ID
+
+        Returns:
+            bool: Whether the scope has participants
+        """
+        self._ensure_current(db, "all_time")
+        column = "region_id" if scope == "region" else "franchise_id"
+        return any(participant[column] == scope_id for participant in self._participants.values())
+
+    def record_points(self, totals: Dict[str, int], awarded_at: datetime) -> None:
+        """
+        Apply newly awarded points to the loaded boards (points ledger listener).
+
+        Args:
+            totals: Points awarded per user
+            awarded_at: Time of the award batch
+        """
+        with self._lock:
+            for state in self._states.values():
+                if not state.contains(awarded_at):
+                    continue
+                for user_id, points in totals.items():
+                    for key in self._board_keys(user_id):
+                        board = state.boards.get(key)
+                        if board is None:
+                            board = state.boards[key] = LeaderboardBoard(previous=state.previous.get(key))
+                        board.add(user_id, points)
+                state.updated_at = awarded_at
+
+    def invalidate(self, timeframe: Optional[str] = None) -> None:
+        """Force boards to be rebuilt from the database on the next read"""
+        with self._lock:
+            if timeframe is None:
+                self._states.clear()
+            else:
+                self._states.pop(timeframe, None)
+
+    def _ensure_current(self, db: Session, timeframe: str) -> TimeframeState:
+        """
+        Get a timeframe's state, rebuilding it on period rollover or after the refresh interval.
+
+        Args:
+            db: Database session
+            timeframe: One of TIMEFRAMES
+
+        Returns:
+            TimeframeState: Boards for the current period
+        """
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"Unknown timeframe '{timeframe}'")
+
+        now = datetime.now(timezone.utc)
+        previous_end = period_bounds(timeframe, now)[3]
+
+        state = self._states.get(timeframe)
+        if self._is_current(state, previous_end):
+            return state
+
+        with self._lock:
+            state = self._states.get(timeframe)
+            if self._is_current(state, previous_end):
+                return state
+
+            state = self._load(db, timeframe, now)
+            self._states[timeframe] = state
+            return state
+
+    def _is_current(self, state: Optional[TimeframeState], previous_end: datetime) -> bool:
+        """Check whether a state belongs to the current period and is fresh"""
+        return (
+            state is not None
+            and state.previous_end == previous_end
+            and time.monotonic() - state.loaded_at < self.refresh_seconds
+        )
+
+    def _load(self, db: Session, timeframe: str, now: datetime) -> TimeframeState:
+        """
+        Build a timeframe's boards and previous snapshot from the database.
+
+        Args:
+            db: Database session
+            timeframe: One of TIMEFRAMES
+            now: Current time
+
+        Returns:
+            TimeframeState: Freshly built boards
+        """
+        self._load_reference(db)
+        start, end, previous_start, previous_end = period_bounds(timeframe, now)
+
+        if timeframe == "all_time":
+            current = dict(db.execute(
+                select(user_balances.c.user_id, user_balances.c.total_points)
+                .where(user_balances.c.total_points > 0)
+            ).all())
+        else:
+            current = self._period_scores(db, start, None)
+
+        previous = self._load_snapshot(db, timeframe, previous_end)
+        if previous is None:
+            previous = self._take_snapshot(db, timeframe, current, previous_start, previous_end)
+
+        boards = {
+            key: LeaderboardBoard(scores, previous.get(key))
+            for key, scores in self._group_scores(current).items()
+        }
+
+        logger.info(
+            "Loaded %s leaderboards: %d boards, %d ranked users",
+            timeframe, len(boards), len(boards[GLOBAL_BOARD]) if GLOBAL_BOARD in boards else 0
+        )
+        return TimeframeState(boards, previous, start, end, previous_end)
+
+    def _load_reference(self, db: Session) -> None:
+        """Load leaderboard type IDs and the participant directory"""
+        self._type_ids = {
+            (scope, timeframe): type_id
+            for type_id, scope, timeframe in db.execute(
+                select(leaderboard_types.c.id, leaderboard_types.c.scope, leaderboard_types.c.timeframe)
+                .where(leaderboard_types.c.is_active == True)
+            )
+        }
+
+        self._participants = {
+            row.user_id: {
+                "name": row.display_name,
+                "role": row.role,
+                "region_id": row.region_id,
+                "franchise_id": row.franchise_id
+            }
+            for row in db.execute(
+                select(
+                    participants.c.user_id,
+                    participants.c.display_name,
+                    participants.c.role,
+                    participants.c.region_id,
+                    participants.c.franchise_id
+                )
+            )
+        }
+
+    def _period_scores(self, db: Session, start: Optional[datetime], end: Optional[datetime]) -> Dict[str, int]:
+        """
+        Sum ledger points per user awarded in [start, end).
+
+        Args:
+            db: Database session
+            start: Inclusive lower bound (None for no bound)
+            end: Exclusive upper bound (None for no bound)
+
+        Returns:
+            dict: Points per user
+        """
+        statement = select(user_points.c.user_id, func.sum(user_points.c.amount)).group_by(user_points.c.user_id)
+        if start is not None:
+            statement = statement.where(user_points.c.awarded_at >= start)
+        if end is not None:
+            statement = statement.where(user_points.c.awarded_at < end)
+        return {user_id: int(total) for user_id, total in db.execute(statement)}
+
+    def _group_scores(self, scores: Dict[str, int]) -> Dict[BoardKey, Dict[str, int]]:
+        """Split user scores into the global, region and franchise boards they belong to"""
+        grouped: Dict[BoardKey, Dict[str, int]] = defaultdict(dict)
+        for user_id, score in scores.items():
+            if score <= 0:
+                continue
+            for key in self._board_keys(user_id):
+                grouped[key][user_id] = score
+        return grouped
+
+    def _board_keys(self, user_id: str) -> List[BoardKey]:
+        """Get the boards a user appears on"""
+        keys = [GLOBAL_BOARD]
+        participant = self._participants.get(user_id)
+        if participant:
+            if participant["region_id"] is not None:
+                keys.append(("region", participant["region_id"]))
+            if participant["franchise_id"] is not None:
+                keys.append(("franchise", participant["franchise_id"]))
+        return keys
+
+    def _load_snapshot(self, db: Session, timeframe: str, period_end: datetime) -> Optional[Dict[BoardKey, RankSnapshot]]:
+        """
+        Read the persisted rank snapshots of the period ending at period_end.
+
+        Args:
+            db: Database session
+            timeframe: One of TIMEFRAMES
+            period_end: End of the snapshot's period
+
+        Returns:
+            dict: Snapshot per board, or None if the period was never persisted
+        """
+        scope_by_type = {
+            type_id: scope for (scope, type_timeframe), type_id in self._type_ids.items()
+            if type_timeframe == timeframe
+        }
+        if not scope_by_type:
+            return None
+
+        rows = db.execute(
+            select(rank_snapshots.c.leaderboard_type_id, rank_snapshots.c.scope_id, rank_snapshots.c.user_ids)
+            .where(rank_snapshots.c.leaderboard_type_id.in_(scope_by_type.keys()))
+            .where(rank_snapshots.c.period_end == period_end)
+        ).all()
+        if not rows:
+            return None
+
+        return {
+            (scope_by_type[type_id], scope_id or None): RankSnapshot(user_ids or ())
+            for type_id, scope_id, user_ids in rows
+        }
+
+    def _take_snapshot(
+        self,
+        db: Session,
+        timeframe: str,
+        current: Dict[str, int],
+        period_start: Optional[datetime],
+        period_end: datetime
+    ) -> Dict[BoardKey, RankSnapshot]:
+        """
+        Compute and persist the final standings of the previous period.
+
+        Standings are written both as per-user rows in leaderboards.entries and
+        as one rank-ordered user ID array per board in leaderboards.rank_snapshots,
+        which is what later loads read back. A global snapshot row is written even
+        when nobody scored so the period is not recomputed on every load.
+
+        Args:
+            db: Database session
+            timeframe: One of TIMEFRAMES
+            current: Current scores (all-time standings are derived from them)
+            period_start: Start of the previous period (None for all-time)
+            period_end: End of the previous period
+
+        Returns:
+            dict: Snapshot per board
+        """
+        if timeframe == "all_time":
+            since = self._period_scores(db, period_end, None)
+            scores = {user_id: total - since.get(user_id, 0) for user_id, total in current.items()}
+        else:
+            scores = self._period_scores(db, period_start, period_end)
+
+        boards = {key: LeaderboardBoard(board_scores) for key, board_scores in self._group_scores(scores).items()}
+        boards.setdefault(GLOBAL_BOARD, LeaderboardBoard())
+
+        entry_rows = []
+        snapshot_rows = []
+        for (scope, scope_id), board in boards.items():
+            type_id = self._type_ids.get((scope, timeframe))
+            if type_id is None:
+                continue
+
+            user_ids = []
+            for position, (negative_score, user_id) in enumerate(board.ranking, start=1):
+                participant = self._participants.get(user_id, {})
+                user_ids.append(user_id)
+                entry_rows.append({
+                    "leaderboard_type_id": type_id,
+                    "user_id": user_id,
+                    "score": -negative_score,
+                    "rank": position,
+                    "region_id": participant.get("region_id"),
+                    "franchise_id": participant.get("franchise_id"),
+                    "period_start": period_start,
+                    "period_end": period_end
+                })
+
+            snapshot_rows.append({
+                "leaderboard_type_id": type_id,
+                "scope_id": scope_id or 0,
+                "period_start": period_start,
+                "period_end": period_end,
+                "user_ids": user_ids
+            })
+
+        # Every worker computes the same standings, so concurrent writers are harmless
+        for start in range(0, len(entry_rows), INSERT_CHUNK_SIZE):
+            db.execute(
+                insert(entries)
+                .values(entry_rows[start:start + INSERT_CHUNK_SIZE])
+                .on_conflict_do_nothing(index_elements=[
+                    entries.c.leaderboard_type_id,
+                    entries.c.period_end,
+                    entries.c.region_id,
+                    entries.c.franchise_id,
+                    entries.c.user_id
+                ])
+            )
+
+        for start in range(0, len(snapshot_rows), INSERT_CHUNK_SIZE):
+            db.execute(
+                insert(rank_snapshots)
+                .values(snapshot_rows[start:start + INSERT_CHUNK_SIZE])
+                .on_conflict_do_nothing(index_elements=[
+                    rank_snapshots.c.leaderboard_type_id,
+                    rank_snapshots.c.scope_id,
+                    rank_snapshots.c.period_end
+                ])
+            )
+        db.commit()
+
+        if entry_rows:
+            logger.info("Persisted %d %s leaderboard entries for period ending %s", len(entry_rows), timeframe, period_end)
+
+        return {key: board.snapshot() for key, board in boards.items()}
+
+
+# Shared engine instance, fed by every points award
+leaderboard_engine = LeaderboardEngine()
+points_ledger.add_listener(leaderboard_engine.record_points)
@@ -0,0 +1,200 @@
+"""
+Ranked set for leaderboard standings.
+
+An indexable skip list: keys are kept in sorted order and every link records how
+many positions it skips, so insertion, removal, rank-of-key and key-at-rank are
+all O(log n) expected. Leaderboards store (-score, user_id) keys so position 0 is
+the highest score and ties are broken by user ID.
+"""
+from typing import Any, Iterable, Iterator, List
+import random
+
+
+class _Node:
+    """Skip list node with forward links and the width of each link"""
+
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key: Any, levels: int):
+        self.key = key
+        self.next: List[Any] = [None] * levels
+        self.width: List[int] = [1] * levels
+
+
+class RankedSet:
+    """
+    Sorted set of comparable keys with O(log n) positional access.
+    """
+
+    MAX_LEVELS = 32
+
+    def __init__(self, keys: Iterable[Any] = ()):
+        """
+        Initialize the set
+
+        Args:
+            keys: Optional initial keys
+        """
+        self._size = 0
+        self._head = _Node(None, self.MAX_LEVELS)
+        for key in keys:
+            self.add(key)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Any]:
+        node = self._head.next[0]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+    def __contains__(self, key: Any) -> bool:
+        node = self._predecessor(key)
+        candidate = node.next[0]
+        return candidate is not None and candidate.key == key
+
+    def __getitem__(self, index: int) -> Any:
+        """
+        Get the key at a 0-based position
+
+        Raises:
+            IndexError: If the position is out of range
+        """
+        return self._node_at(index).key
+
+    def add(self, key: Any) -> None:
+        """
+        Insert a key (keys must be unique)
+
+        Args:
+            key: The key to insert
+        """
+        chain = [None] * self.MAX_LEVELS
+        steps_at_level = [0] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = self._random_levels()
+        new_node = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+
+        self._size += 1
+
+    def discard(self, key: Any) -> bool:
+        """
+        Remove a key if present
+
+        Args:
+            key: The key to remove
+
+        Returns:
+            bool: Whether the key was removed
+        """
+        chain = [None] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            return False
+
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+
+        for level in range(len(target.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+
+        self._size -= 1
+        return True
+
+    def rank(self, key: Any) -> int:
+        """
+        Get the 0-based position of a key
+
+        Raises:
+            KeyError: If the key is not in the set
+        """
+        position = 0
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+
+        candidate = node.next[0]
+        if candidate is None or candidate.key != key:
+            raise KeyError(key)
+        return position
+
+    def slice(self, start: int, stop: int) -> List[Any]:
+        """
+        Get the keys at positions [start, stop)
+
+        Args:
+            start: First position (clamped to 0)
+            stop: Position after the last key (clamped to the size)
+
+        Returns:
+            List: Keys in order
+        """
+        start = max(0, start)
+        stop = min(self._size, stop)
+        if start >= stop:
+            return []
+
+        node = self._node_at(start)
+        keys = []
+        for _ in range(stop - start):
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+    def _node_at(self, index: int) -> _Node:
+        """Walk to the node at a 0-based position"""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("RankedSet index out of range")
+
+        remaining = index + 1
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def _predecessor(self, key: Any) -> _Node:
+        """Get the last node whose key is smaller than the given key"""
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+        return node
+
+    def _random_levels(self) -> int:
+        """Draw a node height with P(height > h) = 2^-h"""
+        levels = 1
+        while levels < self.MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        return levels
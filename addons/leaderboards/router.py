@@ -9,15 +9,92 @@ from sqlalchemy.orm import Session
 from core.auth.router import get_current_active_user
 from core.auth.schemas import UserRead
 from core.database.connection import get_db
+from addons.leaderboards.engine import TIMEFRAMES, leaderboard_engine
 
 router = APIRouter()
 
 
+def _validate_timeframe(timeframe: str) -> None:
+    """Reject timeframes the leaderboard engine does not track"""
+    if timeframe not in TIMEFRAMES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Timeframe must be one of: {', '.join(TIMEFRAMES)}"
+        )
+
+
+def _format_movement(movement: Optional[int]) -> str:
+    """Format places gained since the previous snapshot"""
+    if movement is None:
+        return "new"
+    return f"+{movement}" if movement > 0 else str(movement)
+
+
+def _describe_entries(entries: List[dict]) -> List[dict]:
+    """Add participant details to leaderboard entries"""
+    described = []
+    for entry in entries:
+        participant = leaderboard_engine.get_participant(entry["user_id"])
+        described.append({
+            "rank": entry["rank"],
+            "user_id": entry["user_id"],
+            "name": participant.get("name"),
+            "role": participant.get("role"),
+            "franchise_id": participant.get("franchise_id"),
+            "region_id": participant.get("region_id"),
+            "points": entry["points"],
+            "movement": _format_movement(entry["movement"])
+        })
+    return described
+
+
+def _describe_movers(movers: List[dict]) -> List[dict]:
+    """Add participant details to top movers"""
+    described = []
+    for mover in movers:
+        participant = leaderboard_engine.get_participant(mover["user_id"])
+        described.append({
+            "user_id": mover["user_id"],
+            "name": participant.get("name"),
+            "role": participant.get("role"),
+            "franchise_id": participant.get("franchise_id"),
+            "region_id": participant.get("region_id"),
+            "movement": _format_movement(mover["movement"]),
+            "current_rank": mover["current_rank"]
+        })
+    return described
+
+
+def _describe_board(board, timeframe: str, current_user: UserRead, limit: int) -> dict:
+    """Build the common leaderboard response for a board"""
+    user_id = str(current_user.id)
+    rank = board.rank_of(user_id)
+    
+    position = None
+    if rank is not None:
+        position = {
+            "rank": rank,
+            "points": board.scores[user_id],
+            "movement": _format_movement(board.movement(user_id, rank)),
+            "percentile": board.percentile(rank)
+        }
+    
+    return {
+        "timeframe": timeframe,
+        "updated_at": leaderboard_engine.get_updated_at(timeframe),
+        "total_participants": len(board),
+        "current_user_position": position,
+        "entries": _describe_entries(board.top(limit)),
+        "around_me": _describe_entries(board.around(user_id)),
+        "top_movers": _describe_movers(board.top_movers())
+    }
+
+
 # Global Leaderboards
 @router.get("/global", response_model=dict)
 async def get_global_leaderboard(
     timeframe: Optional[str] = "week",
-    limit: Optional[int] = 10,
+    limit: Optional[int] = Query(10, ge=1, le=100),
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -33,74 +110,10 @@ async def get_global_leaderboard(
     Returns:
         dict: Global leaderboard data
     """
-    # This is a placeholder - in a real implementation, you would fetch leaderboard data from the database
+    _validate_timeframe(timeframe)
     
-    # For now, we'll simulate leaderboard data
-    leaderboard = {
-        "timeframe": timeframe,
-        "updated_at": "2025-04-14T18:00:00Z",
-        "current_user_position": {
-            "rank": 42,
-            "points": 875,
-            "movement": "+3",
-            "percentile": 92
-        },
-        "entries": [
-            {
-                "rank": 1,
-                "user_id": 105,
-                "name": "Sarah Johnson",
-                "role": "client",
-                "franchise": "San Francisco Metro",
-                "region": "West Coast",
-                "points": 1425,
-                "movement": "0",
-                "badges": ["titan", "certified", "gmb_expert"]
-            },
-            {
-                "rank": 2,
-                "user_id": 108,
-                "name": "Michael Chen",
-                "role": "client",
-                "franchise": "New York City",
-                "region": "Northeast",
-                "points": 1380,
-                "movement": "+2",
-                "badges": ["champion", "certified", "perfect_attendance"]
-            },
-            {
-                "rank": 3,
-                "user_id": 112,
-                "name": "Emily Rodriguez",
-                "role": "client",
-                "franchise": "Chicago Metro",
-                "region": "Midwest",
-                "points": 1320,
-                "movement": "-1",
-                "badges": ["champion", "certified", "review_master"]
-            }
-        ],
-        "top_movers": [
-            {
-                "user_id": 142,
-                "name": "James Wilson",
-                "role": "client",
-                "franchise": "Seattle Metro",
-                "region": "West Coast",
-                "movement": "+15",
-                "current_rank": 12
-            },
-            {
-                "user_id": 156,
-                "name": "Sophia Garcia",
-                "role": "client",
-                "franchise": "Miami Area",
-                "region": "Southeast",
-                "movement": "+12",
-                "current_rank": 18
-            }
-        ]
-    }
+    board = leaderboard_engine.get_board(db, timeframe)
+    leaderboard = _describe_board(board, timeframe, current_user, limit)
     
     return leaderboard
 
@@ -110,7 +123,7 @@ async def get_global_leaderboard(
 async def get_region_leaderboard(
     region_id: int = Path(..., ge=1),
     timeframe: Optional[str] = "week",
-    limit: Optional[int] = 10,
+    limit: Optional[int] = Query(10, ge=1, le=100),
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -127,79 +140,17 @@ async def get_region_leaderboard(
     Returns:
         dict: Region leaderboard data
     """
-    # This is a placeholder - in a real implementation, you would fetch regional leaderboard data from the database
+    _validate_timeframe(timeframe)
     
-    # Simulated region IDs for validation
-    regions = {1: "West Coast", 2: "Midwest", 3: "Northeast"}
-    if region_id not in regions:
+    if not leaderboard_engine.has_scope(db, "region", region_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Region not found"
         )
     
-    # For now, we'll simulate leaderboard data
-    leaderboard = {
-        "region_id": region_id,
-        "region_name": regions[region_id],
-        "timeframe": timeframe,
-        "updated_at": "2025-04-14T18:00:00Z",
-        "current_user_position": {
-            "rank": 3,
-            "points": 875,
-            "movement": "+2",
-            "percentile": 95
-        },
-        "entries": [
-            {
-                "rank": 1,
-                "user_id": 105,
-                "name": "Sarah Johnson",
-                "role": "client",
-                "franchise": "San Francisco Metro",
-                "points": 1425,
-                "movement": "0",
-                "badges": ["titan", "certified", "gmb_expert"]
-            },
-            {
-                "rank": 2,
-                "user_id": 142,
-                "name": "James Wilson",
-                "role": "client",
-                "franchise": "Seattle Metro",
-                "points": 980,
-                "movement": "+5",
-                "badges": ["legend", "certified"]
-            },
-            {
-                "rank": 3,
-                "user_id": current_user.id,
-                "name": current_user.name,
-                "role": current_user.role,
-                "franchise": "Portland Area",
-                "points": 875,
-                "movement": "+2",
-                "badges": ["legend"]
-            }
-        ],
-        "top_movers": [
-            {
-                "user_id": 142,
-                "name": "James Wilson",
-                "role": "client",
-                "franchise": "Seattle Metro",
-                "movement": "+5",
-                "current_rank": 2
-            },
-            {
-                "user_id": current_user.id,
-                "name": current_user.name,
-                "role": current_user.role,
-                "franchise": "Portland Area",
-                "movement": "+2",
-                "current_rank": 3
-            }
-        ]
-    }
+    board = leaderboard_engine.get_board(db, timeframe, "region", region_id)
+    leaderboard = {"region_id": region_id}
+    leaderboard.update(_describe_board(board, timeframe, current_user, limit))
     
     return leaderboard
 
@@ -209,7 +160,7 @@ async def get_region_leaderboard(
 async def get_franchise_leaderboard(
     franchise_id: int = Path(..., ge=1),
     timeframe: Optional[str] = "week",
-    limit: Optional[int] = 10,
+    limit: Optional[int] = Query(10, ge=1, le=100),
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -226,82 +177,17 @@ async def get_franchise_leaderboard(
     Returns:
         dict: Franchise leaderboard data
     """
-    # This is a placeholder - in a real implementation, you would fetch franchise leaderboard data from the database
+    _validate_timeframe(timeframe)
     
-    # Simulated franchise IDs for validation
-    franchises = {
-        1: {"name": "San Francisco Metro", "region_id": 1, "region_name": "West Coast"},
-        2: {"name": "Los Angeles County", "region_id": 1, "region_name": "West Coast"},
-        3: {"name": "Portland Area", "region_id": 1, "region_name": "West Coast"}
-    }
-    
-    if franchise_id not in franchises:
+    if not leaderboard_engine.has_scope(db, "franchise", franchise_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Franchise not found"
         )
     
-    # For now, we'll simulate leaderboard data
-    franchise_info = franchises[franchise_id]
-    leaderboard = {
-        "franchise_id": franchise_id,
-        "franchise_name": franchise_info["name"],
-        "region_id": franchise_info["region_id"],
-        "region_name": franchise_info["region_name"],
-        "timeframe": timeframe,
-        "updated_at": "2025-04-14T18:00:00Z",
-        "current_user_position": {
-            "rank": 1,
-            "points": 875,
-            "movement": "0",
-            "percentile": 100
-        },
-        "entries": [
-            {
-                "rank": 1,
-                "user_id": current_user.id,
-                "name": current_user.name,
-                "role": current_user.role,
-                "points": 875,
-                "movement": "0",
-                "badges": ["legend"]
-            },
-            {
-                "rank": 2,
-                "user_id": 156,
-                "name": "John Smith",
-                "role": "client",
-                "points": 780,
-                "movement": "+1",
-                "badges": ["expert", "certified"]
-            },
-            {
-                "rank": 3,
-                "user_id": 178,
-                "name": "Lisa Thompson",
-                "role": "client",
-                "points": 720,
-                "movement": "-1",
-                "badges": ["expert"]
-            }
-        ],
-        "top_movers": [
-            {
-                "user_id": 156,
-                "name": "John Smith",
-                "role": "client",
-                "movement": "+1",
-                "current_rank": 2
-            },
-            {
-                "user_id": 190,
-                "name": "David Rodriguez",
-                "role": "client",
-                "movement": "+3",
-                "current_rank": 5
-            }
-        ]
-    }
+    board = leaderboard_engine.get_board(db, timeframe, "franchise", franchise_id)
+    leaderboard = {"franchise_id": franchise_id}
+    leaderboard.update(_describe_board(board, timeframe, current_user, limit))
     
     return leaderboard
 
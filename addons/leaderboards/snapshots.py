@@ -0,0 +1,56 @@
+"""
+Compact rank snapshots for leaderboards.
+
+A snapshot is the board's user IDs in rank order. When it is taken, the
+position index and the movement of every user against the previous snapshot
+are computed once, together with a small index of the largest climbers, so
+per-user movement and top movers are dictionary and list reads rather than a
+diff of two full leaderboards per request.
+"""
+from typing import Dict, List, Optional, Sequence
+import heapq
+import time
+
+
+class RankSnapshot:
+    """
+    User IDs in rank order with precomputed positions and movers.
+    """
+
+    def __init__(
+        self,
+        user_ids: Sequence[str],
+        previous: Optional["RankSnapshot"] = None,
+        movers_limit: int = 10
+    ):
+        """
+        Build the snapshot indexes
+
+        Args:
+            user_ids: User IDs ordered by rank (best first)
+            previous: Snapshot to measure movement against
+            movers_limit: Number of largest climbers kept in the movers index
+        """
+        self.user_ids = tuple(user_ids)
+        self.taken_at = time.monotonic()
+        self.positions: Dict[str, int] = {user_id: rank for rank, user_id in enumerate(self.user_ids, start=1)}
+
+        self.movement: Dict[str, int] = {}
+        if previous is not None:
+            for user_id, rank in self.positions.items():
+                previous_rank = previous.positions.get(user_id)
+                if previous_rank is not None:
+                    self.movement[user_id] = previous_rank - rank
+
+        climbers = ((delta, user_id) for user_id, delta in self.movement.items() if delta > 0)
+        self.movers: List[Dict[str, object]] = [
+            {"user_id": user_id, "movement": delta, "current_rank": self.positions[user_id]}
+            for delta, user_id in heapq.nlargest(movers_limit, climbers, key=lambda item: (item[0], -self.positions[item[1]]))
+        ]
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def rank_of(self, user_id: str) -> Optional[int]:
+        """Get a user's 1-based rank in the snapshot"""
+        return self.positions.get(user_id)
@@ -0,0 +1,59 @@
+"""
+Table definitions for the leaderboards schema.
+
+These mirror the tables created by the Supabase migrations so the leaderboard
+engine can read participants and persist standings with SQLAlchemy Core.
+"""
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, Text, Boolean, DateTime, func
+)
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+metadata = MetaData(schema="leaderboards")
+
+leaderboard_types = Table(
+    "leaderboard_types", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("description", Text),
+    Column("scope", String(50), nullable=False),
+    Column("timeframe", String(50)),
+    Column("is_active", Boolean, default=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+entries = Table(
+    "entries", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("leaderboard_type_id", Integer, nullable=False),
+    Column("user_id", UUID(as_uuid=False), nullable=False),
+    Column("score", Integer, nullable=False, default=0),
+    Column("rank", Integer),
+    Column("region_id", Integer),
+    Column("franchise_id", Integer),
+    Column("period_start", DateTime(timezone=True)),
+    Column("period_end", DateTime(timezone=True)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+participants = Table(
+    "participants", metadata,
+    Column("user_id", UUID(as_uuid=False), primary_key=True),
+    Column("display_name", String(200)),
+    Column("role", String(50)),
+    Column("region_id", Integer),
+    Column("franchise_id", Integer),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+rank_snapshots = Table(
+    "rank_snapshots", metadata,
+    Column("leaderboard_type_id", Integer, primary_key=True),
+    Column("scope_id", Integer, primary_key=True, default=0),
+    Column("period_end", DateTime(timezone=True), primary_key=True),
+    Column("period_start", DateTime(timezone=True)),
+    Column("user_ids", ARRAY(UUID(as_uuid=False)), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
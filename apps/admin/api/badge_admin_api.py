@@ -5,6 +5,7 @@ This module provides API endpoints for the badge admin dashboard.
 """
 
 from fastapi import APIRouter
+from core.cache import leaderboard_cache
 from core.supabase.client import supabase_admin
 
 router = APIRouter()
@@ -20,8 +21,10 @@ def badge_leaderboard():
     Returns:
         List of clients with their badge statistics
     """
-    result = supabase_admin.rpc("get_admin_badge_leaderboard").execute()
-    return result.data
+    return leaderboard_cache.get(
+        "admin-badge",
+        lambda: supabase_admin.rpc("get_admin_badge_leaderboard").execute().data
+    )
 
 
 @router.get("/api/admin/badge-stats")
@@ -6,11 +6,41 @@ allowing clients to see top performers based on badge earning metrics.
 """
 
 from fastapi import APIRouter, Query
+from core.cache import leaderboard_cache
 from core.supabase import supabase_admin_client
 from typing import Optional, List, Dict, Any
 
 router = APIRouter()
 
+
+async def _fetch_leaderboard(timeframe: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Get badge leaderboard rows through the shared leaderboard cache.
+    
+    Concurrent requests for the same timeframe and limit share one RPC call.
+    The rows are cached, so callers must copy an entry before modifying it.
+    
+    Args:
+        timeframe: Time period for the leaderboard
+        limit: Number of clients requested from the RPC
+        
+    Returns:
+        Ranked leaderboard rows
+    """
+    def load():
+        return supabase_admin_client \
+            .rpc(
+                "get_badge_leaderboard", 
+                {
+                    "timeframe": timeframe,
+                    "limit_count": limit
+                }
+            ) \
+            .execute() \
+            .data
+    
+    return await leaderboard_cache.aget(f"badge:{timeframe}:{limit}", load)
+
 @router.get("/api/leaderboard")
 async def get_leaderboard(
     timeframe: Optional[str] = Query("all", description="Time period for leaderboard: 'week', 'month', 'quarter', 'year', 'all'"),
@@ -29,19 +59,8 @@ async def get_leaderboard(
     Returns:
         A ranked list of clients with badge statistics
     """
-    # Call the database function using RPC
-    result = supabase_admin_client \
-        .rpc(
-            "get_badge_leaderboard", 
-            {
-                "timeframe": timeframe,
-                "limit_count": limit
-            }
-        ) \
-        .execute()
-
-    # Return the leaderboard data
-    return result.data
+    # Call the database function using RPC (cached and coalesced)
+    return await _fetch_leaderboard(timeframe, limit)
 
 
 @router.get("/api/leaderboard/region/{region}")
@@ -62,19 +81,11 @@ async def get_region_leaderboard(
         A ranked list of clients within the specified region
     """
     # First get all leaderboard entries (with a higher limit)
-    all_entries = supabase_admin_client \
-        .rpc(
-            "get_badge_leaderboard", 
-            {
-                "timeframe": timeframe,
-                "limit_count": 100  # Get more entries to filter by region
-            }
-        ) \
-        .execute()
+    all_entries = await _fetch_leaderboard(timeframe, 100)  # Get more entries to filter by region
     
-    # Filter by region and apply the limit
+    # Filter by region and apply the limit (copies, since the rows are cached)
     region_entries = [
-        entry for entry in all_entries.data
+        dict(entry) for entry in all_entries
         if entry["region"] and entry["region"].lower() == region.lower()
     ][:limit]
     
@@ -101,19 +112,11 @@ async def get_client_rank(
         The client's rank and badge statistics
     """
     # Get the full leaderboard (with a high limit to ensure we capture this client)
-    all_entries = supabase_admin_client \
-        .rpc(
-            "get_badge_leaderboard", 
-            {
-                "timeframe": timeframe,
-                "limit_count": 1000  # High limit to ensure we capture the client
-            }
-        ) \
-        .execute()
+    all_entries = await _fetch_leaderboard(timeframe, 1000)  # High limit to ensure we capture the client
     
-    # Find the client in the results
+    # Find the client in the results (copied, since the rows are cached)
     client_entry = next(
-        (entry for entry in all_entries.data if entry["client_id"] == client_id),
+        (dict(entry) for entry in all_entries if entry["client_id"] == client_id),
         None
     )
     
@@ -145,7 +148,7 @@ async def get_client_rank(
             }
     
     # Enhance with percentile information
-    total_clients = len(all_entries.data)
+    total_clients = len(all_entries)
     percentile = round((1 - (client_entry["rank"] / total_clients)) * 100, 1)
     client_entry["percentile"] = percentile
     client_entry["total_clients"] = total_clients
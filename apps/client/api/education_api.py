@@ -4,29 +4,46 @@ Education API
 This module provides API endpoints for the client Education Hub functionality.
 It enables access to educational content, progress tracking, and personalized recommendations.
 """
-from typing import List, Dict, Optional, Any
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Optional, Any
 from datetime import datetime
-import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request
 from sqlalchemy.orm import Session
 
 from core.database.session import get_db
+from core.database.connection import SessionLocal
 from core.auth.dependencies import get_current_user
+from core.cache import make_etag, conditional_json_response
 from apps.client.education_hub_client import EducationHub, get_education_hub_controller
+from apps.client.time_tracking import time_tracking_buffer
 from apps.client.models.lesson import Lesson
 from apps.client.models.progress import Progress
 
+
+@asynccontextmanager
+async def time_tracking_lifespan(app: Any) -> AsyncIterator[None]:
+    """Run the background flush of buffered lesson time while the app is up."""
+    time_tracking_buffer.start(SessionLocal)
+    try:
+        yield
+    finally:
+        # Flushes whatever is still buffered
+        time_tracking_buffer.stop()
+
+
 # Create router
 router = APIRouter(
     prefix="/api/client/education",
     tags=["client", "education"],
     responses={404: {"description": "Not found"}},
+    lifespan=time_tracking_lifespan,
 )
 
 
 @router.get("/lessons")
 async def get_lessons(
+    request: Request,
     category: Optional[str] = Query(None, description="Filter by category"),
     difficulty: Optional[str] = Query(None, description="Filter by difficulty level"),
     format_type: Optional[str] = Query(None, description="Filter by format type"),
@@ -44,6 +61,7 @@ async def get_lessons(
     education_hub = get_education_hub_controller(db)
     
     try:
+        catalog = education_hub.get_catalog()
         lessons = education_hub.get_available_lessons(
             category=category,
             difficulty=difficulty,
@@ -52,17 +70,19 @@ async def get_lessons(
             offset=offset
         )
         
-        return {
+        etag = make_etag(catalog.version, category, difficulty, format_type, limit, offset)
+        return conditional_json_response(request, {
             "status": "success",
             "count": len(lessons),
             "lessons": lessons
-        }
+        }, etag, cache_control="public, no-cache")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving lessons: {str(e)}")
 
 
 @router.get("/lessons/{slug}")
 async def get_lesson(
+    request: Request,
     slug: str = Path(..., description="Lesson slug"),
     db: Session = Depends(get_db),
     current_user: Any = Depends(get_current_user)
@@ -75,6 +95,7 @@ async def get_lesson(
         
     education_hub = get_education_hub_controller(db)
     
+    catalog = education_hub.get_catalog()
     lesson = education_hub.get_lesson_by_slug(slug)
     
     if not lesson:
@@ -92,16 +113,24 @@ async def get_lesson(
     else:
         lesson["progress"] = None
     
-    # Increment view count
-    lesson_obj = db.query(Lesson).filter(Lesson.id == lesson["id"]).first()
-    if lesson_obj:
-        lesson_obj.increment_view_count()
-        db.commit()
+    # Increment view count atomically without loading the row. updated_at is set
+    # to itself so its onupdate does not fire: it tracks content edits only
+    db.query(Lesson).filter(Lesson.id == lesson["id"]).update(
+        {Lesson.view_count: Lesson.view_count + 1, Lesson.updated_at: Lesson.updated_at},
+        synchronize_session=False
+    )
+    db.commit()
     
-    return {
+    # The response embeds the client's progress, so it is part of the validator
+    etag = make_etag(
+        catalog.version,
+        lesson["id"],
+        lesson["progress"]["updated_at"] if lesson["progress"] else None
+    )
+    return conditional_json_response(request, {
         "status": "success",
         "lesson": lesson
-    }
+    }, etag, cache_control="private, no-cache")
 
 
 @router.get("/progress")
@@ -183,58 +212,36 @@ async def track_time_spent(
 ) -> Dict[str, Any]:
     """
     Track time spent on a specific lesson.
+    
+    Heartbeats are buffered in memory and written to the progress record in
+    periodic batches. time_spent_total is the stored time plus the seconds
+    still pending, which are also reported as time_spent_pending.
     """
     if not current_user:
         raise HTTPException(status_code=401, detail="Authentication required")
     
     if seconds < 0:
         raise HTTPException(status_code=400, detail="Time spent cannot be negative")
-        
-    # Get or create progress record
-    progress = (
-        db.query(Progress)
+    
+    education_hub = get_education_hub_controller(db)
+    if not education_hub.get_lesson_by_id(lesson_id):
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    
+    pending = time_tracking_buffer.add(current_user.id, lesson_id, seconds)
+    stored = (
+        db.query(Progress.time_spent_seconds)
         .filter(
             Progress.client_id == current_user.id,
             Progress.lesson_id == lesson_id
         )
-        .first()
+        .scalar()
     )
     
-    if not progress:
-        # Verify the lesson exists
-        lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
-        if not lesson:
-            raise HTTPException(status_code=404, detail="Lesson not found")
-            
-        # Create new progress record
-        progress = Progress(
-            id=str(uuid.uuid4()),
-            client_id=current_user.id,
-            lesson_id=lesson_id,
-            status="in_progress",
-            progress_percentage=0,
-            last_accessed=datetime.utcnow(),
-            bookmarked=False,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
-        )
-        db.add(progress)
-    
-    # Add time spent
-    progress.time_spent_seconds += seconds
-    progress.last_accessed = datetime.utcnow()
-    progress.updated_at = datetime.utcnow()
-    
-    # If not started, update status to in progress
-    if progress.status == "not_started":
-        progress.status = "in_progress"
-    
-    db.commit()
-    
     return {
         "status": "success",
         "message": "Time tracked successfully",
-        "time_spent_total": progress.time_spent_seconds
+        "time_spent_total": (stored or 0) + pending,
+        "time_spent_pending": pending
     }
 
 
@@ -316,6 +323,7 @@ async def get_recommended_lessons(
 
 @router.get("/categories")
 async def get_lesson_categories(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: Any = Depends(get_current_user)
 ) -> Dict[str, Any]:
@@ -328,11 +336,12 @@ async def get_lesson_categories(
     education_hub = get_education_hub_controller(db)
     
     try:
+        catalog = education_hub.get_catalog()
         categories = education_hub.get_lesson_categories()
         
-        return {
+        return conditional_json_response(request, {
             "status": "success",
             "categories": categories
-        }
+        }, make_etag(catalog.version, "categories"), cache_control="public, no-cache")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving categories: {str(e)}")
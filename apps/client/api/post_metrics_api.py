@@ -0,0 +1,70 @@
+"""
+GMB Post Metrics API
+
+API endpoints for bulk ingestion of GMB post metrics snapshots.
+"""
+from fastapi import APIRouter, HTTPException, Depends, Request
+from typing import Dict, Any
+import logging
+
+from sqlalchemy.orm import Session
+
+from core.auth.router import get_current_active_user
+from core.database.connection import get_db
+from apps.client.post_metrics_ingest import post_metrics_ingester
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Create API router
+router = APIRouter(
+    prefix="/api/client/post-metrics",
+    tags=["post-metrics"],
+    responses={404: {"description": "Not found"}}
+)
+
+
+def _require_admin(current_user: Any) -> None:
+    """Metrics ingestion is a sync-service operation reserved to admins"""
+    if getattr(current_user, "role", None) != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+
+@router.post("/ingest")
+async def ingest_post_metrics(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Any = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    """
+    Ingest an NDJSON body of post metrics snapshots
+
+    Each line is {"post_id": ..., "metrics": {...}, "captured_at": ...}. The body
+    is read as a stream and snapshots are upserted in batches as they arrive;
+    invalid lines are skipped and reported.
+
+    Returns:
+        Dict with the counters and throughput of the run
+    """
+    _require_admin(current_user)
+
+    try:
+        return await post_metrics_ingester.ingest_stream(db, request.stream())
+    except Exception as e:
+        logger.error(f"Error ingesting post metrics: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to ingest post metrics: {str(e)}"
+        )
+
+
+@router.get("/stats")
+async def get_ingest_stats(current_user: Any = Depends(get_current_active_user)) -> Dict[str, Any]:
+    """
+    Get the ingestion counters of this process
+
+    Returns:
+        Dict with the totals since start and the overall throughput
+    """
+    _require_admin(current_user)
+    return post_metrics_ingester.get_stats()
@@ -12,7 +12,6 @@ from sqlalchemy.orm import Session
 from core.database.session import get_db
 from core.auth.dependencies import get_current_user
 from apps.client.report_weekly_engagement import WeeklyEngagementReport, get_report_controller
-from apps.client.models.engagement_record import EngagementRecord
 
 # Create router
 router = APIRouter(
@@ -57,11 +56,12 @@ async def generate_weekly_report(
 @router.get("/")
 async def get_reports(
     limit: int = Query(10, description="Maximum number of reports to retrieve"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     db: Session = Depends(get_db),
     current_user: Any = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
-    Get historical reports for the current user.
+    Get a page of historical report summaries for the current user, newest first.
     """
     if not current_user:
         raise HTTPException(status_code=401, detail="Authentication required")
@@ -69,16 +69,20 @@ async def get_reports(
     report_controller = get_report_controller(db)
     
     try:
-        reports = report_controller.get_historical_reports(
+        page = report_controller.get_historical_reports(
             client_id=current_user.id,
-            limit=limit
+            limit=limit,
+            cursor=cursor
         )
         
         return {
             "status": "success",
-            "message": f"Retrieved {len(reports)} reports",
-            "reports": reports
+            "message": f"Retrieved {len(page['reports'])} reports",
+            "reports": page["reports"],
+            "next_cursor": page["next_cursor"]
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving reports: {str(e)}")
 
@@ -95,23 +99,15 @@ async def get_report_detail(
     if not current_user:
         raise HTTPException(status_code=401, detail="Authentication required")
         
-    # Query the database for the report
-    report = db.query(EngagementRecord).filter(
-        EngagementRecord.id == report_id,
-        EngagementRecord.client_id == current_user.id
-    ).first()
+    # Loads the report body and marks the report as viewed
+    report = get_report_controller(db).get_report(current_user.id, report_id)
     
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
-    # Mark the report as viewed if not already
-    if not report.viewed:
-        report_controller = get_report_controller(db)
-        report_controller.mark_report_viewed(report_id)
-    
     return {
         "status": "success",
-        "report": report.to_dict()
+        "report": report
     }
 
 
@@ -3,11 +3,14 @@
 Dashboard Post Tracker Module
 
 Client dashboard widget showing GMB post engagement, badge status, and compliance timeline.
+The data comes from the shared post tracker service (apps.client.post_tracker).
 """
 import json
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from datetime import datetime
+from typing import Dict, Any
+
+from apps.client.post_tracker import post_tracker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -39,10 +42,10 @@ class DashboardPostTracker:
         try:
             logger.info(f"Refreshing data for client {self.client_id}")
             
-            # In a real implementation, these would fetch from database or APIs
-            self._fetch_post_engagement()
-            self._fetch_badge_status()
-            self._fetch_compliance_data()
+            data = post_tracker.get_widget_data(self.client_id)
+            self.post_data = data["post_engagement"]
+            self.badge_status = data["badge_status"]
+            self.compliance_data = data["compliance"]
             
             self.last_refresh = datetime.now()
             return True
@@ -50,98 +53,6 @@ class DashboardPostTracker:
             logger.error(f"Error refreshing data: {e}")
             return False
     
-    def _fetch_post_engagement(self) -> None:
-        """Fetch GMB post engagement data"""
-        # Simulate fetching data from GMB API or database
-        self.post_data = {
-            "recent_posts": [
-                {
-                    "id": "post-1",
-                    "date": (datetime.now() - timedelta(days=2)).isoformat(),
-                    "content": "Check out our latest offerings!",
-                    "views": 245,
-                    "clicks": 37,
-                    "status": "published"
-                },
-                {
-                    "id": "post-2",
-                    "date": (datetime.now() - timedelta(days=7)).isoformat(),
-                    "content": "Special promotion this week only!",
-                    "views": 189,
-                    "clicks": 42,
-                    "status": "published"
-                }
-            ],
-            "scheduled_posts": [
-                {
-                    "id": "post-3",
-                    "scheduled_date": (datetime.now() + timedelta(days=3)).isoformat(),
-                    "content": "Upcoming event announcement",
-                    "status": "scheduled"
-                }
-            ],
-            "engagement_trend": {
-                "views": [120, 145, 210, 198, 245, 267, 230],
-                "clicks": [18, 24, 35, 29, 37, 42, 38],
-                "dates": [(datetime.now() - timedelta(days=x)).strftime("%Y-%m-%d") for x in range(7, 0, -1)]
-            }
-        }
-    
-    def _fetch_badge_status(self) -> None:
-        """Fetch badge status data"""
-        # Simulate fetching badge data from database
-        self.badge_status = {
-            "earned_badges": ["consistent_poster", "engagement_pro", "quick_responder"],
-            "progress": {
-                "local_expert": {
-                    "progress": 75,
-                    "requirements": "Respond to 10 more reviews to earn this badge",
-                    "next_level": "gold"
-                },
-                "content_creator": {
-                    "progress": 60,
-                    "requirements": "Post 4 more image posts to earn this badge",
-                    "next_level": "silver"
-                }
-            },
-            "recent_badges": [
-                {
-                    "name": "quick_responder",
-                    "earned_date": (datetime.now() - timedelta(days=5)).isoformat(),
-                    "level": "silver"
-                }
-            ]
-        }
-    
-    def _fetch_compliance_data(self) -> None:
-        """Fetch compliance timeline data"""
-        # Simulate fetching compliance data from database
-        self.compliance_data = {
-            "status": "good",
-            "score": 92,
-            "timeline": [
-                {
-                    "date": (datetime.now() - timedelta(days=30)).isoformat(),
-                    "score": 85,
-                    "events": ["Missing weekly post"]
-                },
-                {
-                    "date": (datetime.now() - timedelta(days=20)).isoformat(),
-                    "score": 90,
-                    "events": ["Added business hours", "Updated services"]
-                },
-                {
-                    "date": (datetime.now() - timedelta(days=10)).isoformat(),
-                    "score": 92,
-                    "events": ["Responded to all reviews"]
-                }
-            ],
-            "recommendations": [
-                "Add more photos to your business profile",
-                "Consider posting weekly updates about your services"
-            ]
-        }
-    
     def get_widget_data(self) -> Dict[str, Any]:
         """
         Get all data for the dashboard widget
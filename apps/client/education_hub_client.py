@@ -9,12 +9,17 @@ from datetime import datetime
 import uuid
 
 from fastapi import Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from core.database.session import get_db
 from core.auth.dependencies import get_current_user
 from apps.client.models.lesson import Lesson
 from apps.client.models.progress import Progress
+from apps.client.models.progress_summary import ProgressSummary
+from apps.client.lesson_catalog import lesson_catalog, LessonCatalogSnapshot
+from apps.client.lesson_recommendations import lesson_recommender
 
 
 class EducationHub:
@@ -27,6 +32,15 @@ class EducationHub:
         """Initialize the education hub controller with database session"""
         self.db = db
         
+    def get_catalog(self) -> LessonCatalogSnapshot:
+        """
+        Get the current published lesson catalog snapshot
+        
+        Returns:
+            Indexed snapshot of published lessons (its version feeds ETags)
+        """
+        return lesson_catalog.get(self.db)
+        
     def get_available_lessons(
         self, 
         category: Optional[str] = None,
@@ -48,27 +62,16 @@ class EducationHub:
         Returns:
             List of lesson data dictionaries
         """
-        query = self.db.query(Lesson).filter(Lesson.published == True)
-        
-        # Apply filters if specified
-        if category:
-            query = query.filter(Lesson.category == category)
-        if difficulty:
-            query = query.filter(Lesson.difficulty == difficulty)
-        if format_type:
-            query = query.filter(Lesson.format == format_type)
-            
-        # Apply sorting and pagination
-        lessons = (
-            query
-            .order_by(Lesson.category, Lesson.created_at.desc())
-            .limit(limit)
-            .offset(offset)
-            .all()
+        lessons = self.get_catalog().filter(
+            category=category,
+            difficulty=difficulty,
+            format_type=format_type,
+            limit=limit,
+            offset=offset
         )
         
-        # Format results
-        return [lesson.to_dict() for lesson in lessons]
+        # Copy so callers can annotate results without touching the snapshot
+        return [dict(lesson) for lesson in lessons]
     
     def get_lesson_by_slug(self, slug: str) -> Optional[Dict[str, Any]]:
         """
@@ -80,15 +83,8 @@ class EducationHub:
         Returns:
             Lesson data dictionary or None if not found
         """
-        lesson = self.db.query(Lesson).filter(
-            Lesson.slug == slug,
-            Lesson.published == True
-        ).first()
-        
-        if not lesson:
-            return None
-            
-        return lesson.to_dict()
+        lesson = self.get_catalog().by_slug.get(slug)
+        return dict(lesson) if lesson else None
     
     def get_lesson_by_id(self, lesson_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -100,60 +96,63 @@ class EducationHub:
         Returns:
             Lesson data dictionary or None if not found
         """
-        lesson = self.db.query(Lesson).filter(
-            Lesson.id == lesson_id,
-            Lesson.published == True
-        ).first()
-        
-        if not lesson:
-            return None
-            
-        return lesson.to_dict()
+        lesson = self.get_catalog().by_id.get(lesson_id)
+        return dict(lesson) if lesson else None
     
-    def get_client_progress(self, client_id: str) -> Dict[str, Any]:
+    def get_client_progress(self, client_id: str, include_lessons: bool = True) -> Dict[str, Any]:
         """
         Get the learning progress for a specific client
         
+        Progress records are loaded together with their lessons in a single joined
+        query, and the lesson counts come from the client's ProgressSummary row.
+        Reads only commit when they had to build that row.
+        
         Args:
             client_id: The client's user ID
+            include_lessons: Whether to include per-lesson progress details
             
         Returns:
             Dictionary containing progress statistics and lesson status
         """
-        # Get all progress records for the client
-        progress_records = (
-            self.db.query(Progress)
-            .filter(Progress.client_id == client_id)
-            .all()
-        )
+        total_lessons = len(self.get_catalog().lessons)
         
-        # Calculate overall statistics
-        total_lessons = self.db.query(Lesson).filter(Lesson.published == True).count()
-        completed_lessons = sum(1 for p in progress_records if p.status == "completed")
-        in_progress_lessons = sum(1 for p in progress_records if p.status == "in_progress")
-        
-        # Format lesson progress records
-        lesson_progress = [
-            {
-                "lesson_id": p.lesson_id,
-                "status": p.status,
-                "progress_percentage": p.progress_percentage,
-                "last_accessed": p.last_accessed.isoformat() if p.last_accessed else None,
-                "completed_at": p.completed_at.isoformat() if p.completed_at else None,
-                "bookmarked": p.bookmarked
-            }
-            for p in progress_records
-        ]
-        
-        # Get lesson details for each progress record
         lessons_with_progress = []
-        for progress in lesson_progress:
-            lesson = self.db.query(Lesson).filter(Lesson.id == progress["lesson_id"]).first()
-            if lesson:
+        if include_lessons:
+            # Load progress records and their lessons in one query
+            rows = (
+                self.db.query(Progress, Lesson)
+                .join(Lesson, Lesson.id == Progress.lesson_id)
+                .filter(Progress.client_id == client_id)
+                .all()
+            )
+            
+            for progress, lesson in rows:
                 lesson_data = lesson.to_dict()
-                lesson_data["progress"] = progress
+                lesson_data["progress"] = {
+                    "lesson_id": progress.lesson_id,
+                    "status": progress.status,
+                    "progress_percentage": progress.progress_percentage,
+                    "last_accessed": progress.last_accessed.isoformat() if progress.last_accessed else None,
+                    "completed_at": progress.completed_at.isoformat() if progress.completed_at else None,
+                    "bookmarked": progress.bookmarked
+                }
                 lessons_with_progress.append(lesson_data)
         
+        summary = (
+            self.db.query(ProgressSummary)
+            .filter(ProgressSummary.client_id == client_id)
+            .first()
+        )
+        built = summary is None
+        if built:
+            summary = self.get_progress_summary(client_id)
+        completed_lessons = summary.completed_lessons or 0
+        in_progress_lessons = summary.in_progress_lessons or 0
+        last_activity_at = summary.last_activity_at
+        if built:
+            # Persist the summary built for a client that predates summaries
+            self.db.commit()
+        
         # Calculate completion percentage
         completion_percentage = (completed_lessons / total_lessons * 100) if total_lessons > 0 else 0
         
@@ -162,11 +161,93 @@ class EducationHub:
             "total_lessons": total_lessons,
             "completed_lessons": completed_lessons,
             "in_progress_lessons": in_progress_lessons,
-            "not_started_lessons": total_lessons - (completed_lessons + in_progress_lessons),
+            "not_started_lessons": max(0, total_lessons - (completed_lessons + in_progress_lessons)),
             "completion_percentage": round(completion_percentage, 1),
+            "last_activity_at": last_activity_at.isoformat() if last_activity_at else None,
             "lessons": lessons_with_progress
         }
     
+    def get_progress_summary(self, client_id: str, lock: bool = False) -> ProgressSummary:
+        """
+        Get the progress summary row for a client, building it on first use
+        
+        Clients with progress recorded before summaries existed get their row
+        computed once from a grouped count over their Progress records. Callers
+        that change lesson statuses must pass lock=True before reading the
+        Progress records: the row lock serializes all status changes of the
+        client, so the counters are adjusted from the status each change saw.
+        
+        Args:
+            client_id: The client's user ID
+            lock: Whether to lock the summary row until the transaction ends
+            
+        Returns:
+            ProgressSummary instance
+        """
+        query = self.db.query(ProgressSummary).filter(ProgressSummary.client_id == client_id)
+        if lock:
+            query = query.with_for_update().populate_existing()
+        
+        summary = query.first()
+        if summary:
+            return summary
+        
+        status_counts = dict(
+            self.db.query(Progress.status, func.count(Progress.id))
+            .filter(Progress.client_id == client_id)
+            .group_by(Progress.status)
+            .all()
+        )
+        last_activity = (
+            self.db.query(func.max(Progress.last_accessed))
+            .filter(Progress.client_id == client_id)
+            .scalar()
+        )
+        
+        # A concurrent first use may create the row first; keep whichever wins
+        now = datetime.utcnow()
+        self.db.execute(
+            insert(ProgressSummary)
+            .values(
+                id=str(uuid.uuid4()),
+                client_id=client_id,
+                completed_lessons=status_counts.get("completed", 0),
+                in_progress_lessons=status_counts.get("in_progress", 0),
+                last_activity_at=last_activity,
+                created_at=now,
+                updated_at=now
+            )
+            .on_conflict_do_nothing(index_elements=[ProgressSummary.client_id])
+        )
+        return query.first()
+    
+    def lock_progress_summaries(self, client_ids: List[str]) -> Dict[str, ProgressSummary]:
+        """
+        Lock the progress summaries of several clients, building missing ones
+        
+        Rows are locked in client ID order so concurrent batches cannot deadlock.
+        
+        Args:
+            client_ids: The clients' user IDs
+            
+        Returns:
+            ProgressSummary instances by client ID
+        """
+        summaries = {
+            summary.client_id: summary
+            for summary in (
+                self.db.query(ProgressSummary)
+                .filter(ProgressSummary.client_id.in_(client_ids))
+                .order_by(ProgressSummary.client_id)
+                .with_for_update()
+                .populate_existing()
+                .all()
+            )
+        }
+        for client_id in sorted(set(client_ids) - set(summaries)):
+            summaries[client_id] = self.get_progress_summary(client_id, lock=True)
+        return summaries
+    
     def update_lesson_progress(
         self, 
         client_id: str,
@@ -195,6 +276,10 @@ class EducationHub:
         if not lesson:
             raise ValueError(f"Lesson with ID {lesson_id} not found")
             
+        # Lock the summary before reading the progress record so concurrent status
+        # changes of this client are applied one after the other
+        summary = self.get_progress_summary(client_id, lock=True)
+        
         # Get or create progress record
         progress = (
             self.db.query(Progress)
@@ -202,8 +287,11 @@ class EducationHub:
                 Progress.client_id == client_id,
                 Progress.lesson_id == lesson_id
             )
+            .with_for_update()
+            .populate_existing()
             .first()
         )
+        previous_status = progress.status if progress else None
         
         if not progress:
             # Create new progress record
@@ -230,7 +318,7 @@ class EducationHub:
             progress.status = status
             
             # If status is completed, set progress to 100% and completed_at timestamp
-            if status == "completed" and progress.status != "completed":
+            if status == "completed" and previous_status != "completed":
                 progress.progress_percentage = 100
                 progress.completed_at = datetime.utcnow()
                 
@@ -263,16 +351,29 @@ class EducationHub:
         progress.last_accessed = datetime.utcnow()
         progress.updated_at = datetime.utcnow()
         
+        # Keep the client's progress summary in the same transaction
+        summary.apply_status_change(previous_status, progress.status)
+        summary.last_activity_at = progress.last_accessed
+        summary.updated_at = datetime.utcnow()
+        
         # Commit changes
         self.db.commit()
         self.db.refresh(progress)
         
+        # Re-rank the client's cached recommendations
+        lesson_recommender.record_progress(client_id, lesson_id, progress.status)
+        
         return progress.to_dict()
     
     def get_recommended_lessons(self, client_id: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
         Get personalized lesson recommendations for a client
         
+        Recommendations are served from the client's precomputed ranking (see
+        apps.client.lesson_recommendations), which puts in-progress lessons first
+        and then ranks unstarted lessons by category affinity, difficulty
+        progression and popularity.
+        
         Args:
             client_id: The client's user ID
             limit: Maximum number of recommendations to return
@@ -280,72 +381,7 @@ class EducationHub:
         Returns:
             List of recommended lesson dictionaries
         """
-        # Get client's progress
-        progress_records = (
-            self.db.query(Progress)
-            .filter(Progress.client_id == client_id)
-            .all()
-        )
-        
-        # Get lessons the client has already completed
-        completed_lesson_ids = [
-            p.lesson_id for p in progress_records 
-            if p.status == "completed"
-        ]
-        
-        # Get lessons the client has started but not completed
-        in_progress_lesson_ids = [
-            p.lesson_id for p in progress_records 
-            if p.status == "in_progress"
-        ]
-        
-        # First, prioritize in-progress lessons
-        if in_progress_lesson_ids:
-            in_progress_lessons = (
-                self.db.query(Lesson)
-                .filter(
-                    Lesson.id.in_(in_progress_lesson_ids),
-                    Lesson.published == True
-                )
-                .limit(limit)
-                .all()
-            )
-            
-            if in_progress_lessons:
-                return [lesson.to_dict() for lesson in in_progress_lessons]
-        
-        # Then, recommend new lessons based on completed lessons
-        # For simplicity, this just recommends beginner lessons the client hasn't started yet
-        # A more sophisticated implementation would use actual recommendation algorithms
-        recommended_lessons = (
-            self.db.query(Lesson)
-            .filter(
-                Lesson.published == True,
-                ~Lesson.id.in_(completed_lesson_ids + in_progress_lesson_ids),
-                Lesson.difficulty == "beginner"
-            )
-            .order_by(Lesson.created_at.desc())
-            .limit(limit)
-            .all()
-        )
-        
-        # If not enough beginner lessons, add intermediate lessons
-        if len(recommended_lessons) < limit:
-            additional_lessons = (
-                self.db.query(Lesson)
-                .filter(
-                    Lesson.published == True,
-                    ~Lesson.id.in_(completed_lesson_ids + in_progress_lesson_ids),
-                    Lesson.difficulty == "intermediate"
-                )
-                .order_by(Lesson.created_at.desc())
-                .limit(limit - len(recommended_lessons))
-                .all()
-            )
-            
-            recommended_lessons.extend(additional_lessons)
-            
-        return [lesson.to_dict() for lesson in recommended_lessons]
+        return lesson_recommender.recommend(self.db, client_id, limit=limit)
         
     def get_lesson_categories(self) -> List[Dict[str, Any]]:
         """
@@ -354,25 +390,7 @@ class EducationHub:
         Returns:
             List of category dictionaries with counts
         """
-        # Query distinct categories and count lessons in each
-        categories = (
-            self.db.query(
-                Lesson.category, 
-                self.db.func.count(Lesson.id).label("count")
-            )
-            .filter(Lesson.published == True)
-            .group_by(Lesson.category)
-            .all()
-        )
-        
-        # Format results
-        return [
-            {
-                "name": category,
-                "count": count
-            }
-            for category, count in categories
-        ]
+        return [dict(category) for category in self.get_catalog().categories]
 
 
 # Factory function to create a controller
@@ -0,0 +1,293 @@
+"""
+Engagement rule evaluation plans.
+
+Active engagement rules are compiled into an evaluation plan in which every
+distinct clause (metric, field, operator, value) appears once. A batch of
+reports is evaluated column-wise: each clause is tested once over the column of
+that metric field for all clients of the batch, giving a bitmask with one bit
+per client, and each rule's mask is the AND of its clause masks. A
+recommendation that depends on insights ORs the masks of the matching insight
+rules instead of scanning each client's insight list.
+
+Evaluation yields references, {"rule": code, "params": {...}}, holding only the
+values the rule's templates use; RuleTemplate renders them back to text.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+import operator
+import string
+
+logger = logging.getLogger(__name__)
+
+RULE_KINDS = ("insight", "recommendation")
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+# Values a clause can test for a metric
+FIELDS = ("current", "previous", "direction", "change_percentage", "change_value")
+
+Clause = Tuple[str, str, str, Any]  # (metric, field, op, value)
+
+
+class _TemplateParams(dict):
+    """Template values that leave unknown placeholders in place"""
+
+    def __missing__(self, key: str) -> str:
+        return "{" + key + "}"
+
+
+def _field_value(metric: str, field: str, current: Dict[str, Any], previous: Dict[str, Any], trends: Dict[str, Any]) -> Any:
+    """Get one metric field for one client"""
+    if field == "current":
+        return current.get(metric)
+    if field == "previous":
+        return previous.get(metric)
+    return (trends.get(metric) or {}).get(field)
+
+
+def _test(compare: Any, value: Any, threshold: Any) -> bool:
+    """Apply a clause operator, treating missing or incomparable values as not matching"""
+    if value is None:
+        return False
+    try:
+        return bool(compare(value, threshold))
+    except TypeError:
+        return False
+
+
+class RuleTemplate:
+    """
+    The output templates of a rule.
+    """
+
+    def __init__(self, row: Any):
+        """
+        Read the templates of a rule row
+
+        Args:
+            row: EngagementRule row
+        """
+        self.code = row.code
+        self.kind = row.kind
+        self.metric = row.metric
+        self.type = row.type
+        self.category = row.category
+        self.title = row.title
+        self.description = row.description
+        self.actions = list(row.actions or [])
+
+        # Placeholders the templates use, so references store nothing else
+        self.fields = {
+            name
+            for template in (self.title, self.description)
+            for _, name, _, _ in string.Formatter().parse(template)
+            if name
+        }
+
+    def params(self, current: Dict[str, Any], previous: Dict[str, Any], trends: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the template values for one client
+
+        Args:
+            current: The client's metrics for the week
+            previous: The client's metrics for the week before
+            trends: The client's trends
+
+        Returns:
+            dict: Values of the placeholders the templates use
+        """
+        if not self.metric or not self.fields:
+            return {}
+
+        trend = trends.get(self.metric) or {}
+        change = trend.get("change_percentage")
+        values = {
+            "current": current.get(self.metric),
+            "previous": previous.get(self.metric),
+            "change_percentage": change,
+            "abs_change_percentage": abs(change) if change is not None else None,
+            "change_value": trend.get("change_value")
+        }
+        return {name: values[name] for name in self.fields if name in values}
+
+    def render(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Render the rule's output
+
+        Args:
+            params: Template values from params()
+
+        Returns:
+            dict: Insight or recommendation
+        """
+        values = _TemplateParams(params or {})
+        output = {
+            "rule": self.code,
+            "category": self.category,
+            "title": self.title.format_map(values),
+            "description": self.description.format_map(values)
+        }
+        if self.kind == "insight":
+            output["type"] = self.type
+        else:
+            output["actions"] = list(self.actions)
+        return output
+
+
+class CompiledRule(RuleTemplate):
+    """
+    One active rule with its clauses resolved to plan indexes.
+    """
+
+    def __init__(self, row: Any, clause_index: Dict[Clause, int]):
+        """
+        Compile a rule row
+
+        Args:
+            row: EngagementRule row
+            clause_index: Plan clause indexes, extended with this rule's new clauses
+
+        Raises:
+            ValueError: If the rule definition is invalid
+        """
+        if row.kind not in RULE_KINDS:
+            raise ValueError(f"Unknown rule kind '{row.kind}'")
+        if not isinstance(row.conditions, list) or not row.conditions:
+            raise ValueError("Rule needs at least one condition")
+        super().__init__(row)
+
+        self.clauses: List[int] = []
+        self.insight_selectors: List[Tuple[Optional[str], Optional[str]]] = []
+        for condition in row.conditions:
+            if "insight" in condition:
+                if self.kind != "recommendation":
+                    raise ValueError("Only recommendations can depend on insights")
+                selector = condition["insight"] or {}
+                self.insight_selectors.append((selector.get("type"), selector.get("category")))
+                continue
+
+            metric, field, op = condition.get("metric"), condition.get("field", "current"), condition.get("op")
+            if not metric:
+                raise ValueError("Condition is missing a metric")
+            if field not in FIELDS:
+                raise ValueError(f"Unknown field '{field}'")
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator '{op}'")
+            clause = (metric, field, op, condition.get("value"))
+            self.clauses.append(clause_index.setdefault(clause, len(clause_index)))
+
+
+class EvaluationPlan:
+    """
+    Active rules compiled for column-wise evaluation.
+    """
+
+    def __init__(self, rows: Sequence[Any]):
+        """
+        Compile the plan, skipping invalid rules
+
+        Args:
+            rows: Active EngagementRule rows in evaluation order
+        """
+        self.clause_index: Dict[Clause, int] = {}
+        self.insights: List[CompiledRule] = []
+        self.recommendations: List[CompiledRule] = []
+        for row in rows:
+            try:
+                rule = CompiledRule(row, self.clause_index)
+            except (ValueError, TypeError, AttributeError) as e:
+                logger.warning("Skipping invalid engagement rule %s: %s", row.code, e)
+                continue
+            (self.insights if rule.kind == "insight" else self.recommendations).append(rule)
+
+        self.clauses: List[Clause] = sorted(self.clause_index, key=self.clause_index.get)
+        self.templates: Dict[str, RuleTemplate] = {rule.code: rule for rule in self.insights + self.recommendations}
+
+        # Insight rules each recommendation selector ORs together
+        self.selector_insights: Dict[Tuple[Optional[str], Optional[str]], List[int]] = {}
+        for rule in self.recommendations:
+            for selector in rule.insight_selectors:
+                kind, category = selector
+                self.selector_insights[selector] = [
+                    position for position, insight in enumerate(self.insights)
+                    if (kind is None or insight.type == kind) and (category is None or insight.category == category)
+                ]
+
+    def evaluate(
+        self,
+        metrics: Sequence[Dict[str, Any]],
+        previous: Sequence[Dict[str, Any]],
+        trends: Sequence[Dict[str, Any]]
+    ) -> Tuple[List[List[Dict[str, Any]]], List[List[Dict[str, Any]]]]:
+        """
+        Evaluate the rules for a batch of clients
+
+        Args:
+            metrics: Each client's metrics for the week
+            previous: Each client's metrics for the week before
+            trends: Each client's trends
+
+        Returns:
+            tuple: (insights, recommendations) as rule references, one list per
+                client in input order
+        """
+        count = len(metrics)
+        everyone = (1 << count) - 1
+
+        # One bitmask per distinct clause, bit i set when client i matches
+        columns: Dict[Tuple[str, str], List[Any]] = {}
+        clause_masks = []
+        for metric, field, op, threshold in self.clauses:
+            column = columns.get((metric, field))
+            if column is None:
+                column = [_field_value(metric, field, metrics[i], previous[i], trends[i]) for i in range(count)]
+                columns[(metric, field)] = column
+            compare = OPERATORS[op]
+            mask = 0
+            for client, value in enumerate(column):
+                if _test(compare, value, threshold):
+                    mask |= 1 << client
+            clause_masks.append(mask)
+
+        def rule_mask(rule: CompiledRule) -> int:
+            mask = everyone
+            for clause in rule.clauses:
+                mask &= clause_masks[clause]
+            return mask
+
+        insight_masks = [rule_mask(rule) for rule in self.insights]
+        recommendation_masks = []
+        for rule in self.recommendations:
+            mask = rule_mask(rule)
+            for selector in rule.insight_selectors:
+                fired = 0
+                for position in self.selector_insights[selector]:
+                    fired |= insight_masks[position]
+                mask &= fired
+            recommendation_masks.append(mask)
+
+        insights: List[List[Dict[str, Any]]] = [[] for _ in range(count)]
+        recommendations: List[List[Dict[str, Any]]] = [[] for _ in range(count)]
+        for rules, masks, outputs in (
+            (self.insights, insight_masks, insights),
+            (self.recommendations, recommendation_masks, recommendations)
+        ):
+            for rule, mask in zip(rules, masks):
+                while mask:
+                    lowest = mask & -mask
+                    client = lowest.bit_length() - 1
+                    reference: Dict[str, Any] = {"rule": rule.code}
+                    params = rule.params(metrics[client], previous[client], trends[client])
+                    if params:
+                        reference["params"] = params
+                    outputs[client].append(reference)
+                    mask ^= lowest
+
+        return insights, recommendations
@@ -0,0 +1,153 @@
+"""
+Engagement insight and recommendation rules.
+
+The insights and recommendations of weekly engagement reports are declared as
+data in engagement_rules (see EngagementRule). Active rules are compiled into an
+evaluation plan (see apps.client.engagement_plan) that tests each distinct
+clause once per batch of clients and combines the results as bitmasks.
+
+Evaluation yields references, {"rule": code, "params": {...}}, holding only the
+values the rule's templates use. Stored reports keep these references and the
+text is rendered from the shared rule templates when a report is opened.
+
+The plan is recompiled when the rules table changes, so rules can be edited
+without a deploy.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+import threading
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from apps.client.engagement_plan import EvaluationPlan, RuleTemplate
+from apps.client.models.engagement_rule import EngagementRule
+
+logger = logging.getLogger(__name__)
+
+
+class EngagementRuleEngine:
+    """
+    Loads the active engagement rules and keeps their evaluation plan current.
+    """
+
+    def __init__(self, check_interval_seconds: int = 60):
+        """
+        Initialize the engine
+
+        Args:
+            check_interval_seconds: Seconds between checks for rule changes
+        """
+        self.check_interval_seconds = check_interval_seconds
+        self._lock = threading.Lock()
+        self._plan = EvaluationPlan([])
+        self._version: Optional[tuple] = None
+        self._checked_at: Optional[float] = None
+
+    def get_plan(self, db: Session) -> EvaluationPlan:
+        """
+        Get the evaluation plan, recompiling it if the rules changed.
+
+        Args:
+            db: Database session
+
+        Returns:
+            EvaluationPlan: Compiled active rules
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval_seconds:
+            return self._plan
+
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval_seconds:
+                return self._plan
+
+            version = tuple(db.execute(
+                select(func.count(), func.max(EngagementRule.updated_at)).select_from(EngagementRule)
+            ).one())
+            if version != self._version:
+                rows = db.execute(
+                    select(EngagementRule)
+                    .where(EngagementRule.active.is_(True))
+                    .order_by(EngagementRule.position, EngagementRule.id)
+                ).scalars().all()
+                self._plan = EvaluationPlan(rows)
+                self._version = version
+                logger.info(
+                    "Compiled %s insight and %s recommendation rules",
+                    len(self._plan.insights), len(self._plan.recommendations)
+                )
+            self._checked_at = now
+            return self._plan
+
+    def evaluate(
+        self,
+        db: Session,
+        metrics: Sequence[Dict[str, Any]],
+        previous: Sequence[Dict[str, Any]],
+        trends: Sequence[Dict[str, Any]]
+    ) -> Tuple[List[List[Dict[str, Any]]], List[List[Dict[str, Any]]]]:
+        """
+        Evaluate the active rules for a batch of clients.
+
+        Args:
+            db: Database session
+            metrics: Each client's metrics for the week
+            previous: Each client's metrics for the week before
+            trends: Each client's trends
+
+        Returns:
+            tuple: (insights, recommendations) as rule references, one list per
+                client in input order
+        """
+        return self.get_plan(db).evaluate(metrics, previous, trends)
+
+    def expand(self, db: Session, references: Sequence[Sequence[Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+        """
+        Render lists of rule references.
+
+        Templates of active rules come from the plan; rules deactivated since a
+        report was stored are read from the table. Items stored as full text
+        before references were introduced are returned unchanged, and references
+        to deleted rules are dropped.
+
+        Args:
+            db: Database session
+            references: Lists of stored insights or recommendations
+
+        Returns:
+            List[list]: Rendered lists in input order
+        """
+        templates = dict(self.get_plan(db).templates)
+        missing = {
+            item["rule"]
+            for items in references for item in items or []
+            if "title" not in item and item.get("rule") not in templates
+        }
+        if missing:
+            rows = db.execute(select(EngagementRule).where(EngagementRule.code.in_(missing))).scalars().all()
+            templates.update({row.code: RuleTemplate(row) for row in rows})
+
+        expanded = []
+        for items in references:
+            rendered = []
+            for item in items or []:
+                if "title" in item:
+                    rendered.append(item)
+                elif item.get("rule") in templates:
+                    rendered.append(templates[item["rule"]].render(item.get("params")))
+                else:
+                    logger.warning("Dropping reference to unknown engagement rule %s", item.get("rule"))
+            expanded.append(rendered)
+        return expanded
+
+    def invalidate(self) -> None:
+        """Force a rule reload on the next evaluation"""
+        with self._lock:
+            self._checked_at = None
+            self._version = None
+
+
+# Shared engine instance
+engagement_rule_engine = EngagementRuleEngine()
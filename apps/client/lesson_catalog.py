@@ -0,0 +1,219 @@
+"""
+Lesson Catalog Snapshot
+
+This module keeps an in-process snapshot of the published Education Hub catalog.
+The snapshot is indexed by id, slug, category, difficulty and format so catalog
+endpoints never query the lessons table, and it carries a version string used
+to build ETags. It is rebuilt after a transaction that created, deleted or
+changed catalog fields of a lesson through the ORM commits, and after a TTL so
+that changes made by other worker processes are eventually picked up.
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any
+import hashlib
+import logging
+import threading
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from apps.client.models.lesson import Lesson
+
+logger = logging.getLogger(__name__)
+
+# Columns whose changes alter the published catalog. Statistics such as view_count
+# and average_rating are deliberately excluded so tracking does not force rebuilds.
+CATALOG_FIELDS = (
+    "title", "slug", "category", "subcategory", "content", "format", "difficulty",
+    "estimated_time", "published", "author_id", "thumbnail_url", "featured", "tags",
+    "prerequisites", "related_lessons", "meta_description", "meta_keywords", "published_at"
+)
+
+# session.info key marking a transaction that changed the catalog
+_CATALOG_CHANGED = "lesson_catalog_changed"
+
+
+class LessonCatalogSnapshot:
+    """
+    Immutable, indexed view of the published lessons at a point in time.
+    """
+
+    def __init__(self, lessons: List[Dict[str, Any]]):
+        """
+        Build the snapshot indexes
+
+        Args:
+            lessons: Published lesson dictionaries, already sorted for listing
+        """
+        self.lessons = lessons
+        self.built_at = time.time()
+
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_slug: Dict[str, Dict[str, Any]] = {}
+        self.by_category: Dict[str, List[Dict[str, Any]]] = OrderedDict()
+        self.by_difficulty: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_format: Dict[str, List[Dict[str, Any]]] = {}
+
+        for lesson in lessons:
+            self.by_id[lesson["id"]] = lesson
+            self.by_slug[lesson["slug"]] = lesson
+            self.by_category.setdefault(lesson["category"], []).append(lesson)
+            self.by_difficulty.setdefault(lesson["difficulty"], []).append(lesson)
+            self.by_format.setdefault(lesson["format"], []).append(lesson)
+
+        self.categories = [
+            {"name": category, "count": len(category_lessons)}
+            for category, category_lessons in self.by_category.items()
+        ]
+
+        digest = hashlib.sha256()
+        for lesson in lessons:
+            digest.update(f"{lesson['id']}:{lesson['updated_at']}|".encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+
+    def filter(
+        self,
+        category: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        format_type: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Filter and page the catalog using the narrowest available index
+
+        Args:
+            category: Optional category filter
+            difficulty: Optional difficulty level filter
+            format_type: Optional format type filter
+            limit: Number of lessons to return
+            offset: Pagination offset
+
+        Returns:
+            List of lesson dictionaries in catalog order
+        """
+        candidates = [
+            index.get(value, [])
+            for index, value in (
+                (self.by_category, category),
+                (self.by_difficulty, difficulty),
+                (self.by_format, format_type)
+            )
+            if value
+        ]
+        source = min(candidates, key=len) if candidates else self.lessons
+
+        if len(candidates) > 1:
+            source = [
+                lesson for lesson in source
+                if (not category or lesson["category"] == category)
+                and (not difficulty or lesson["difficulty"] == difficulty)
+                and (not format_type or lesson["format"] == format_type)
+            ]
+
+        return source[offset:offset + limit]
+
+
+class LessonCatalog:
+    """
+    Holder for the current catalog snapshot with lazy rebuilds.
+    """
+
+    def __init__(self, ttl_seconds: int = 300):
+        """
+        Initialize the catalog holder
+
+        Args:
+            ttl_seconds: Maximum age of a snapshot before it is rebuilt
+        """
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # (snapshot, loaded_at) swapped as a single reference so readers need no lock
+        self._current: Optional[tuple] = None
+
+    def _fresh_snapshot(self) -> Optional[LessonCatalogSnapshot]:
+        """Return the current snapshot if it exists and has not expired"""
+        current = self._current
+        if current is not None and time.monotonic() - current[1] < self.ttl_seconds:
+            return current[0]
+        return None
+
+    def get(self, db: Session) -> LessonCatalogSnapshot:
+        """
+        Get the current snapshot, rebuilding it if invalidated or expired
+
+        Args:
+            db: Database session used for rebuilds
+
+        Returns:
+            Current catalog snapshot
+        """
+        snapshot = self._fresh_snapshot()
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            # Another request may have rebuilt the snapshot while we waited
+            snapshot = self._fresh_snapshot()
+            if snapshot is not None:
+                return snapshot
+
+            lessons = (
+                db.query(Lesson)
+                .filter(Lesson.published == True)
+                .order_by(Lesson.category, Lesson.created_at.desc())
+                .all()
+            )
+            snapshot = LessonCatalogSnapshot([lesson.to_dict() for lesson in lessons])
+            self._current = (snapshot, time.monotonic())
+            logger.info(
+                "Rebuilt lesson catalog snapshot %s with %d lessons",
+                snapshot.version, len(lessons)
+            )
+            return snapshot
+
+    def invalidate(self) -> None:
+        """Mark the snapshot stale so the next read rebuilds it (call on publish)"""
+        self._current = None
+
+
+# Shared catalog instance for the Education Hub
+lesson_catalog = LessonCatalog()
+
+
+@event.listens_for(Lesson, "after_insert")
+@event.listens_for(Lesson, "after_delete")
+def _record_insert_or_delete(mapper, connection, target) -> None:
+    """Note that the flushing transaction added or removed lessons"""
+    _record_catalog_change(target)
+
+
+@event.listens_for(Lesson, "after_update")
+def _record_update(mapper, connection, target) -> None:
+    """Note a publish or other catalog field change of the flushing transaction"""
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in CATALOG_FIELDS):
+        _record_catalog_change(target)
+
+
+def _record_catalog_change(target: Lesson) -> None:
+    """Defer the rebuild to the commit so no request snapshots uncommitted data"""
+    session = object_session(target)
+    if session is None:
+        lesson_catalog.invalidate()
+    else:
+        session.info[_CATALOG_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session) -> None:
+    """Rebuild the catalog once the lesson changes are visible to other sessions"""
+    if session.info.pop(_CATALOG_CHANGED, False):
+        lesson_catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session) -> None:
+    """Discard the changes of a rolled back transaction"""
+    session.info.pop(_CATALOG_CHANGED, None)
@@ -0,0 +1,276 @@
+"""
+Lesson Recommendation Engine
+
+This module precomputes ranked lesson recommendations for Education Hub clients.
+Each client's candidate list is scored from category affinity, difficulty
+progression and lesson popularity, kept in memory, and re-ranked in place when
+the client's progress changes so that serving recommendations only reads the
+first `limit` entries of an already ranked list. Profiles are rebuilt from
+the database once they reach their maximum age, so progress written by other
+workers or outside the recorded events is picked up.
+"""
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Any, Set
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from apps.client.lesson_catalog import lesson_catalog
+from apps.client.models.progress import Progress
+
+# Difficulty levels in progression order
+DIFFICULTY_LEVELS = {
+    "beginner": 0,
+    "intermediate": 1,
+    "advanced": 2
+}
+
+# Scoring weights for ranking not-yet-started lessons
+AFFINITY_WEIGHT = 0.5
+PROGRESSION_WEIGHT = 0.3
+POPULARITY_WEIGHT = 0.2
+
+
+class ClientLearningProfile:
+    """
+    In-memory view of a client's progress used to score recommendations.
+    """
+
+    def __init__(self):
+        """Initialize an empty profile"""
+        self.built_at = time.monotonic()
+        self.completed: Set[str] = set()
+        self.in_progress: List[str] = []  # Most recently touched first
+        self.category_affinity: Counter = Counter()
+        self.category_level: Dict[str, int] = {}
+
+    def apply(self, lesson: Optional[Dict[str, Any]], lesson_id: str, status: str) -> None:
+        """
+        Record a lesson's current status in the profile
+
+        Args:
+            lesson: Catalog entry for the lesson, if it is published
+            lesson_id: The lesson ID
+            status: The client's status for the lesson
+        """
+        was_tracked = lesson_id in self.completed or lesson_id in self.in_progress
+
+        if lesson_id in self.in_progress:
+            self.in_progress.remove(lesson_id)
+        self.completed.discard(lesson_id)
+
+        if status == "completed":
+            self.completed.add(lesson_id)
+        elif status == "in_progress":
+            self.in_progress.insert(0, lesson_id)
+
+        if lesson and not was_tracked and status in ("completed", "in_progress"):
+            self.category_affinity[lesson["category"]] += 1
+
+        if lesson and status == "completed":
+            level = DIFFICULTY_LEVELS.get(lesson["difficulty"], 0)
+            category = lesson["category"]
+            self.category_level[category] = max(self.category_level.get(category, -1), level)
+
+
+class LessonRecommender:
+    """
+    Precomputed, incrementally refreshed lesson recommendations.
+
+    Lessons come from the shared catalog snapshot and rankings are dropped
+    whenever its version changes. Client profiles are built from a single
+    Progress query the first time a client is seen and are then updated from
+    progress events without touching the database until they expire.
+    """
+
+    def __init__(self, max_candidates: int = 50, max_clients: int = 10000, ttl_seconds: int = 900):
+        """
+        Initialize the recommender
+
+        Args:
+            max_candidates: Number of ranked lessons kept per client
+            max_clients: Number of client profiles kept in memory (LRU)
+            ttl_seconds: Maximum age of a profile before it is rebuilt
+        """
+        self.max_candidates = max_candidates
+        self.max_clients = max_clients
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.RLock()
+        self._lessons: Dict[str, Dict[str, Any]] = {}
+        self._popularity: Dict[str, float] = {}
+        self._catalog_version: Optional[str] = None
+        self._profiles: "OrderedDict[str, ClientLearningProfile]" = OrderedDict()
+        self._ranked: Dict[str, List[str]] = {}
+
+    def recommend(self, db: Session, client_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Get ranked lesson recommendations for a client
+
+        Args:
+            db: Database session (only used to load missing state)
+            client_id: The client's user ID
+            limit: Maximum number of recommendations to return
+
+        Returns:
+            List of recommended lesson dictionaries
+        """
+        with self._lock:
+            self._ensure_catalog(db)
+            profile = self._get_profile(db, client_id)
+
+            ranked = self._ranked.get(client_id)
+            if ranked is None:
+                ranked = self._rank(profile)
+                self._ranked[client_id] = ranked
+
+            return [dict(self._lessons[lesson_id]) for lesson_id in ranked[:limit]]
+
+    def record_progress(self, client_id: str, lesson_id: str, status: str) -> None:
+        """
+        Apply a progress change to a client's profile and re-rank their candidates
+
+        Clients without a cached profile are ignored; their profile is built from
+        the database on their next recommendation request.
+
+        Args:
+            client_id: The client's user ID
+            lesson_id: The lesson whose progress changed
+            status: The client's new status for the lesson
+        """
+        with self._lock:
+            profile = self._profiles.get(client_id)
+            if profile is None:
+                return
+
+            profile.apply(self._lessons.get(lesson_id), lesson_id, status)
+            self._ranked[client_id] = self._rank(profile)
+
+    def invalidate_client(self, client_id: str) -> None:
+        """
+        Drop a client's cached profile and ranking
+
+        Args:
+            client_id: The client's user ID
+        """
+        with self._lock:
+            self._profiles.pop(client_id, None)
+            self._ranked.pop(client_id, None)
+
+    def _ensure_catalog(self, db: Session) -> None:
+        """
+        Sync lesson features with the current catalog snapshot
+
+        Args:
+            db: Database session (used if the snapshot must be rebuilt)
+        """
+        snapshot = lesson_catalog.get(db)
+        if snapshot.version == self._catalog_version:
+            return
+
+        self._lessons = snapshot.by_id
+
+        # Popularity blends completions and views, normalized to 0-1
+        lessons = snapshot.lessons
+        max_completions = max((lesson["completion_count"] or 0 for lesson in lessons), default=0) or 1
+        max_views = max((lesson["view_count"] or 0 for lesson in lessons), default=0) or 1
+        self._popularity = {
+            lesson["id"]: 0.7 * (lesson["completion_count"] or 0) / max_completions
+            + 0.3 * (lesson["view_count"] or 0) / max_views
+            for lesson in lessons
+        }
+
+        self._catalog_version = snapshot.version
+        # Rankings depend on the catalog, profiles do not
+        self._ranked.clear()
+
+    def _get_profile(self, db: Session, client_id: str) -> ClientLearningProfile:
+        """
+        Get a client's profile, building it from their progress records if it is
+        missing or has expired
+
+        Args:
+            db: Database session
+            client_id: The client's user ID
+
+        Returns:
+            The client's learning profile
+        """
+        profile = self._profiles.get(client_id)
+        if profile is not None and time.monotonic() - profile.built_at < self.ttl_seconds:
+            self._profiles.move_to_end(client_id)
+            return profile
+
+        rows = (
+            db.query(Progress.lesson_id, Progress.status)
+            .filter(Progress.client_id == client_id)
+            .order_by(Progress.last_accessed.asc())
+            .all()
+        )
+
+        profile = ClientLearningProfile()
+        for lesson_id, status in rows:
+            profile.apply(self._lessons.get(lesson_id), lesson_id, status)
+
+        self._profiles[client_id] = profile
+        self._profiles.move_to_end(client_id)
+        self._ranked.pop(client_id, None)
+
+        while len(self._profiles) > self.max_clients:
+            evicted_id, _ = self._profiles.popitem(last=False)
+            self._ranked.pop(evicted_id, None)
+
+        return profile
+
+    def _rank(self, profile: ClientLearningProfile) -> List[str]:
+        """
+        Rank candidate lessons for a profile
+
+        In-progress lessons always come first, followed by unstarted lessons
+        ordered by their blended affinity, progression and popularity score.
+
+        Args:
+            profile: The client's learning profile
+
+        Returns:
+            Ranked list of up to max_candidates lesson IDs
+        """
+        ranked = [lesson_id for lesson_id in profile.in_progress if lesson_id in self._lessons]
+        if len(ranked) >= self.max_candidates:
+            return ranked[:self.max_candidates]
+
+        total_affinity = sum(profile.category_affinity.values()) or 1
+        started = profile.completed.union(profile.in_progress)
+
+        scored = []
+        for lesson_id, lesson in self._lessons.items():
+            if lesson_id in started:
+                continue
+
+            category = lesson["category"]
+            affinity = profile.category_affinity.get(category, 0) / total_affinity
+
+            target_level = min(profile.category_level.get(category, -1) + 1, max(DIFFICULTY_LEVELS.values()))
+            level = DIFFICULTY_LEVELS.get(lesson["difficulty"], 0)
+            if level == target_level:
+                progression = 1.0
+            elif level < target_level:
+                progression = 0.5
+            else:
+                progression = 0.0
+
+            score = (
+                AFFINITY_WEIGHT * affinity
+                + PROGRESSION_WEIGHT * progression
+                + POPULARITY_WEIGHT * self._popularity.get(lesson_id, 0.0)
+            )
+            scored.append((score, lesson["created_at"] or "", lesson_id))
+
+        scored.sort(reverse=True)
+        ranked.extend(lesson_id for _, _, lesson_id in scored[:self.max_candidates - len(ranked)])
+        return ranked
+
+
+# Shared recommender instance for the Education Hub
+lesson_recommender = LessonRecommender()
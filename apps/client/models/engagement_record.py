@@ -10,7 +10,7 @@ import uuid
 
 from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, JSON, ForeignKey
 from sqlalchemy.ext.mutable import MutableDict, MutableList
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from core.database.base import Base
 
@@ -21,6 +21,11 @@ class EngagementRecord(Base):
     
     Each record represents a single weekly report, storing metrics, trends,
     insights, and recommendations for a specific client and time period.
+    
+    The report body columns are deferred: listings read the small summary and
+    the body is loaded when a report is opened (undefer_group("body")).
+    Insights and recommendations are stored as references to engagement_rules
+    templates, {"rule": code, "params": {...}}.
     """
     __tablename__ = "engagement_records"
     
@@ -34,11 +39,14 @@ class EngagementRecord(Base):
     start_date = Column(DateTime, nullable=False)
     end_date = Column(DateTime, nullable=False)
     
+    # Key metrics and trend directions for history listings
+    summary = Column(MutableDict.as_mutable(JSON), default=dict)
+    
     # Report data
-    metrics = Column(MutableDict.as_mutable(JSON), default=dict)
-    trends = Column(MutableDict.as_mutable(JSON), default=dict)
-    insights = Column(MutableList.as_mutable(JSON), default=list)
-    recommendations = Column(MutableList.as_mutable(JSON), default=list)
+    metrics = deferred(Column(MutableDict.as_mutable(JSON), default=dict), group="body")
+    trends = deferred(Column(MutableDict.as_mutable(JSON), default=dict), group="body")
+    insights = deferred(Column(MutableList.as_mutable(JSON), default=list), group="body")
+    recommendations = deferred(Column(MutableList.as_mutable(JSON), default=list), group="body")
     
     # Status tracking
     viewed = Column(Boolean, default=False)
@@ -0,0 +1,72 @@
+"""
+Engagement Rule Model
+
+This module defines the EngagementRule model for the data-declared insight and
+recommendation rules applied to weekly engagement reports.
+"""
+from datetime import datetime
+from typing import Dict, Any
+
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, JSON, Text
+
+from core.database.base import Base
+
+
+class EngagementRule(Base):
+    """
+    Model for one insight or recommendation rule.
+
+    conditions is a list of clauses that must all hold, each either a metric test
+    such as {"metric": "views", "field": "change_percentage", "op": ">", "value": 20}
+    or, for recommendations, {"insight": {"type": "negative", "category": "visibility"}}
+    which holds when any insight of that type and category fired for the client.
+    title and description are templates filled with the subject metric's values.
+    """
+    __tablename__ = "engagement_rules"
+
+    id = Column(Integer, primary_key=True)
+    code = Column(String, nullable=False, unique=True)
+    kind = Column(String, nullable=False)  # 'insight', 'recommendation'
+    position = Column(Integer, nullable=False, default=0)
+
+    # Rule definition
+    metric = Column(String, nullable=True)  # Subject metric for the text templates
+    conditions = Column(JSON, nullable=False, default=list)
+
+    # Output
+    type = Column(String, nullable=True)  # 'positive', 'negative' (insights only)
+    category = Column(String, nullable=False)
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=False)
+    actions = Column(JSON, nullable=False, default=list)
+
+    active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        """String representation of the model"""
+        return f"<EngagementRule(code={self.code}, kind={self.kind})>"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the model to a dictionary for API responses
+
+        Returns:
+            Dictionary representation of the model
+        """
+        return {
+            "id": self.id,
+            "code": self.code,
+            "kind": self.kind,
+            "position": self.position,
+            "metric": self.metric,
+            "conditions": self.conditions,
+            "type": self.type,
+            "category": self.category,
+            "title": self.title,
+            "description": self.description,
+            "actions": self.actions,
+            "active": self.active,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -9,6 +9,9 @@ from sqlalchemy import Column, String, Integer, Float, Boolean, ForeignKey, Date
 from sqlalchemy.orm import relationship
 from core.database.base import Base
 
+# Numeric counters of a post's metrics, read as FLOAT by reports and the post tracker
+POST_COUNTERS = ("views", "clicks", "calls", "direction_requests", "messages", "bookings")
+
 
 class GmbPost(Base):
     """
@@ -0,0 +1,41 @@
+"""
+GmbPostMetrics model for ingested GMB post metrics snapshots
+"""
+from datetime import datetime
+from typing import Dict, Any
+
+from sqlalchemy import Column, String, DateTime, JSON
+
+from core.database.base import Base
+
+
+class GmbPostMetrics(Base):
+    """
+    Latest metrics snapshot received from the GMB side for a post.
+
+    Keyed by the GMB post ID so snapshots can arrive before the post itself is
+    synced; the ingester copies them onto GmbPost.metrics when the post exists.
+    """
+    __tablename__ = "gmb_post_metrics"
+
+    post_id = Column(String, primary_key=True)
+    metrics = Column(JSON, nullable=False)
+    captured_at = Column(DateTime, nullable=False)
+    ingested_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<GmbPostMetrics(post_id={self.post_id}, captured_at={self.captured_at})>"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the model to a dictionary
+
+        Returns:
+            Dict[str, Any]: Dictionary representation of the model
+        """
+        return {
+            "post_id": self.post_id,
+            "metrics": self.metrics,
+            "captured_at": self.captured_at.isoformat() if self.captured_at else None,
+            "ingested_at": self.ingested_at.isoformat() if self.ingested_at else None
+        }
@@ -0,0 +1,87 @@
+"""
+Progress Summary Model
+
+This module defines the ProgressSummary model, a per-client rollup of Education Hub progress.
+"""
+from datetime import datetime
+from typing import Dict, Optional, Any
+import uuid
+
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+
+from core.database.base import Base
+
+
+class ProgressSummary(Base):
+    """
+    Model for storing a client's aggregated learning progress.
+
+    One row exists per client and is kept in step with the client's Progress records
+    by the Education Hub controller, so progress pages can read lesson counts
+    without scanning every Progress row. Writers lock the row (SELECT ... FOR UPDATE)
+    before reading the statuses they change, so apply_status_change runs on
+    current counters.
+    """
+    __tablename__ = "learning_progress_summary"
+
+    # Primary key
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    # Foreign keys
+    client_id = Column(String, ForeignKey("users.id"), unique=True, index=True, nullable=False)
+
+    # Aggregated counters
+    completed_lessons = Column(Integer, nullable=False, default=0)
+    in_progress_lessons = Column(Integer, nullable=False, default=0)
+
+    # Activity tracking
+    last_activity_at = Column(DateTime, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        """String representation of the model"""
+        return (
+            f"<ProgressSummary(client_id={self.client_id}, completed={self.completed_lessons}, "
+            f"in_progress={self.in_progress_lessons})>"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the model to a dictionary for API responses
+
+        Returns:
+            Dictionary representation of the model
+        """
+        return {
+            "id": self.id,
+            "client_id": self.client_id,
+            "completed_lessons": self.completed_lessons,
+            "in_progress_lessons": self.in_progress_lessons,
+            "last_activity_at": self.last_activity_at.isoformat() if self.last_activity_at else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def apply_status_change(self, previous_status: Optional[str], new_status: str) -> None:
+        """
+        Adjust the counters for a single lesson changing status (on a locked row)
+
+        Args:
+            previous_status: Status before the change (None for a new Progress record)
+            new_status: Status after the change
+        """
+        if previous_status == new_status:
+            return
+
+        if previous_status == "completed":
+            self.completed_lessons = max(0, (self.completed_lessons or 0) - 1)
+        elif previous_status == "in_progress":
+            self.in_progress_lessons = max(0, (self.in_progress_lessons or 0) - 1)
+
+        if new_status == "completed":
+            self.completed_lessons = (self.completed_lessons or 0) + 1
+        elif new_status == "in_progress":
+            self.in_progress_lessons = (self.in_progress_lessons or 0) + 1
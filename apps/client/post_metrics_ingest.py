@@ -0,0 +1,458 @@
+"""
+GMB Post Metrics Ingestion
+
+This module ingests metrics snapshots synced from the GMB side. Input is NDJSON,
+one snapshot per line:
+
+    {"post_id": "...", "metrics": {"views": 120, "clicks": 9}, "captured_at": "2026-10-18T06:00:00Z"}
+
+Lines are parsed and grouped into batches. Within a batch only the latest
+snapshot of each post is kept, then the batch is written with two set-based
+statements in one transaction: a multi-row INSERT ... ON CONFLICT into
+gmb_post_metrics that never replaces a newer snapshot, and an UPDATE ... FROM
+that copies the applied snapshots onto gmb_post.metrics. Post tracker payloads
+of the affected clients are invalidated after the commit.
+
+FileMetricsFeed is a local stand-in for the upstream feed: producers drop NDJSON
+files into a directory and the ingester consumes them in name order. Run the
+module as a script to ingest a feed directory, files or standard input:
+
+    python -m apps.client.post_metrics_ingest --feed /var/lib/locallift/gmb-metrics
+    python -m apps.client.post_metrics_ingest snapshots.ndjson
+"""
+from datetime import datetime, timezone
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import uuid
+
+from sqlalchemy import cast, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from apps.client.models.gmb_post import GmbPost, POST_COUNTERS
+from apps.client.models.gmb_post_metrics import GmbPostMetrics
+from apps.client.post_tracker import post_tracker
+
+logger = logging.getLogger(__name__)
+
+# Snapshots per INSERT ... ON CONFLICT statement
+DEFAULT_BATCH_SIZE = 1000
+
+# Invalid lines reported back to the caller
+MAX_REPORTED_ERRORS = 20
+
+
+def _utc_naive(value: datetime) -> datetime:
+    """Convert a timestamp to naive UTC, the convention of the gmb_post columns"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_snapshot(line: str, received_at: datetime) -> Dict[str, Any]:
+    """
+    Parse one NDJSON snapshot line.
+
+    Args:
+        line: JSON object with post_id, metrics and optionally captured_at
+        received_at: Capture time for snapshots without one
+
+    Returns:
+        dict: post_id, metrics and captured_at
+
+    Raises:
+        ValueError: If the line is not a valid snapshot
+    """
+    try:
+        payload = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e.msg}")
+    if not isinstance(payload, dict):
+        raise ValueError("Snapshot must be a JSON object")
+
+    post_id = payload.get("post_id")
+    if not isinstance(post_id, str) or not post_id:
+        raise ValueError("post_id is required")
+    metrics = payload.get("metrics")
+    if not isinstance(metrics, dict):
+        raise ValueError("metrics must be an object")
+    # Reports and the post tracker cast these counters to FLOAT in SQL
+    for name in POST_COUNTERS:
+        value = metrics.get(name)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f"metrics.{name} must be a number")
+
+    captured_at = received_at
+    if payload.get("captured_at"):
+        try:
+            captured_at = _utc_naive(datetime.fromisoformat(str(payload["captured_at"]).replace("Z", "+00:00")))
+        except ValueError:
+            raise ValueError("captured_at must be an ISO 8601 timestamp")
+
+    return {"post_id": post_id, "metrics": metrics, "captured_at": captured_at}
+
+
+class PostMetricsIngester:
+    """
+    Upserts GMB post metrics snapshots in batches and keeps throughput counters.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Initialize the ingester
+
+        Args:
+            batch_size: Snapshots per upsert statement
+        """
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        # Process-wide totals since start
+        self.stats = {
+            "lines": 0, "invalid": 0, "duplicates": 0, "stale": 0,
+            "upserted": 0, "posts_updated": 0, "batches": 0, "seconds": 0.0
+        }
+
+    def ingest_lines(self, db: Session, lines: Iterable[str]) -> Dict[str, Any]:
+        """
+        Ingest NDJSON snapshot lines (commits once per batch).
+
+        Invalid lines are skipped and reported; a failing batch is rolled back and
+        raised, leaving earlier batches committed.
+
+        Args:
+            db: Database session
+            lines: NDJSON lines
+
+        Returns:
+            dict: Counters of this run with its throughput and the first invalid lines
+        """
+        started = time.monotonic()
+        received_at = datetime.utcnow()
+        run = {key: 0 for key in self.stats}
+        errors: List[Dict[str, Any]] = []
+
+        batch: List[Dict[str, Any]] = []
+        for number, line in enumerate(lines, 1):
+            if self._accept(run, errors, batch, number, line, received_at):
+                self._merge(run, self.ingest_batch(db, batch))
+                batch = []
+        if batch:
+            self._merge(run, self.ingest_batch(db, batch))
+
+        return self._finish(run, errors, started)
+
+    async def ingest_stream(self, db: Session, chunks: AsyncIterable[bytes]) -> Dict[str, Any]:
+        """
+        Ingest an NDJSON byte stream, such as a request body, as it arrives.
+
+        Only the current batch is held in memory; each full batch is written in a
+        worker thread (commits once per batch) while the stream keeps being read
+        in between. Lines that are not valid UTF-8 are reported as invalid.
+
+        Args:
+            db: Database session
+            chunks: Byte chunks of the NDJSON input
+
+        Returns:
+            dict: Counters of this run with its throughput and the first invalid lines
+        """
+        started = time.monotonic()
+        received_at = datetime.utcnow()
+        run = {key: 0 for key in self.stats}
+        errors: List[Dict[str, Any]] = []
+
+        batch: List[Dict[str, Any]] = []
+        number = 0
+        async for raw in _iter_lines(chunks):
+            number += 1
+            try:
+                line = raw.decode("utf-8")
+            except UnicodeDecodeError:
+                run["lines"] += 1
+                self._reject(run, errors, number, "Line is not valid UTF-8")
+                continue
+            if self._accept(run, errors, batch, number, line, received_at):
+                self._merge(run, await asyncio.to_thread(self.ingest_batch, db, batch))
+                batch = []
+        if batch:
+            self._merge(run, await asyncio.to_thread(self.ingest_batch, db, batch))
+
+        return self._finish(run, errors, started)
+
+    def ingest_batch(self, db: Session, snapshots: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Upsert one batch of parsed snapshots in a single transaction (commits).
+
+        Args:
+            db: Database session
+            snapshots: Parsed snapshots
+
+        Returns:
+            dict: duplicates, stale, upserted and posts_updated counts of the batch
+        """
+        # Latest snapshot per post; one row may only be affected once per statement
+        latest: Dict[str, Dict[str, Any]] = {}
+        for snapshot in snapshots:
+            current = latest.get(snapshot["post_id"])
+            if current is None or snapshot["captured_at"] >= current["captured_at"]:
+                latest[snapshot["post_id"]] = snapshot
+
+        try:
+            statement = insert(GmbPostMetrics).values(list(latest.values()))
+            applied = db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[GmbPostMetrics.post_id],
+                    set_={
+                        "metrics": statement.excluded.metrics,
+                        "captured_at": statement.excluded.captured_at,
+                        "ingested_at": func.now()
+                    },
+                    where=GmbPostMetrics.captured_at <= statement.excluded.captured_at
+                )
+                .returning(GmbPostMetrics.post_id)
+            ).scalars().all()
+
+            client_ids: List[str] = []
+            if applied:
+                client_ids = db.execute(
+                    update(GmbPost)
+                    .where(GmbPost.post_id == GmbPostMetrics.post_id)
+                    .where(GmbPostMetrics.post_id.in_(applied))
+                    .where((GmbPost.last_updated.is_(None)) | (GmbPost.last_updated <= GmbPostMetrics.captured_at))
+                    .values(
+                        metrics=cast(GmbPostMetrics.metrics, GmbPost.metrics.type),
+                        last_updated=GmbPostMetrics.captured_at,
+                        updated_at=func.now()
+                    )
+                    .returning(GmbPost.client_id)
+                    .execution_options(synchronize_session=False)
+                ).scalars().all()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        post_tracker.invalidate(client_ids)
+        return {
+            "duplicates": len(snapshots) - len(latest),
+            "stale": len(latest) - len(applied),
+            "upserted": len(applied),
+            "posts_updated": len(client_ids),
+            "batches": 1
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the process-wide counters with the overall throughput.
+
+        Returns:
+            dict: Counters since start
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        ingested = stats["lines"] - stats["invalid"]
+        stats["snapshots_per_second"] = round(ingested / stats["seconds"], 1) if stats["seconds"] else None
+        return stats
+
+    def _accept(
+        self,
+        run: Dict[str, Any],
+        errors: List[Dict[str, Any]],
+        batch: List[Dict[str, Any]],
+        number: int,
+        line: str,
+        received_at: datetime
+    ) -> bool:
+        """Parse a line into the batch, returning whether the batch is full"""
+        line = line.strip()
+        if not line:
+            return False
+        run["lines"] += 1
+        try:
+            batch.append(parse_snapshot(line, received_at))
+        except ValueError as e:
+            self._reject(run, errors, number, str(e))
+            return False
+        return len(batch) >= self.batch_size
+
+    def _reject(self, run: Dict[str, Any], errors: List[Dict[str, Any]], number: int, error: str) -> None:
+        """Count an invalid line, reporting the first ones"""
+        run["invalid"] += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": number, "error": error})
+
+    def _finish(self, run: Dict[str, Any], errors: List[Dict[str, Any]], started: float) -> Dict[str, Any]:
+        """Record a finished run and build its result"""
+        run["seconds"] = round(time.monotonic() - started, 3)
+        self._record(run)
+        return {
+            **run,
+            "snapshots_per_second": round((run["lines"] - run["invalid"]) / run["seconds"], 1) if run["seconds"] else None,
+            "errors": errors
+        }
+
+    def _merge(self, run: Dict[str, Any], batch: Dict[str, int]) -> None:
+        """Add a batch's counts to a run"""
+        for key, value in batch.items():
+            run[key] += value
+
+    def _record(self, run: Dict[str, Any]) -> None:
+        """Add a run's counts to the process-wide counters"""
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] += run[key]
+
+
+async def _iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines, without their line endings"""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+class FileMetricsFeed:
+    """
+    Directory of NDJSON files standing in for the upstream metrics feed.
+
+    Producers publish complete files (written under a temporary name, then
+    renamed); the consumer reads *.ndjson files in name order and marks each
+    one done by renaming it to *.ndjson.done after it was ingested.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize the feed
+
+        Args:
+            directory: Feed directory (created if missing)
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def publish(self, snapshots: Iterable[Dict[str, Any]]) -> str:
+        """
+        Write snapshots as a new feed file.
+
+        Args:
+            snapshots: Snapshots with post_id, metrics and optionally captured_at
+
+        Returns:
+            str: Path of the published file
+        """
+        name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}.ndjson"
+        path = os.path.join(self.directory, name)
+        with open(path + ".tmp", "w", encoding="utf-8") as feed_file:
+            for snapshot in snapshots:
+                feed_file.write(json.dumps(snapshot, default=str) + "\n")
+        os.replace(path + ".tmp", path)
+        return path
+
+    def pending(self) -> List[str]:
+        """
+        List the files not yet consumed.
+
+        Returns:
+            List[str]: Paths in name order
+        """
+        return [
+            os.path.join(self.directory, name)
+            for name in sorted(os.listdir(self.directory))
+            if name.endswith(".ndjson")
+        ]
+
+    def read(self, path: str) -> Iterator[str]:
+        """Iterate over the lines of a feed file"""
+        with open(path, encoding="utf-8") as feed_file:
+            yield from feed_file
+
+    def acknowledge(self, path: str) -> None:
+        """Mark a feed file as consumed"""
+        os.replace(path, path + ".done")
+
+
+def run_metrics_ingest_job(
+    feed: FileMetricsFeed,
+    session_factory: Optional[Callable[[], Session]] = None,
+    batch_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Ingest every pending file of a feed (scheduled job entry point)
+
+    A file is acknowledged only after all its batches were committed; a failed
+    file stays pending and is retried on the next run (re-ingesting a file is
+    harmless because older snapshots never replace newer ones).
+
+    Args:
+        feed: Feed to consume
+        session_factory: Callable returning a new database session
+            (defaults to core.database.connection.SessionLocal)
+        batch_size: Snapshots per upsert statement (defaults to the shared ingester's)
+
+    Returns:
+        dict: Results by file
+    """
+    if session_factory is None:
+        from core.database.connection import SessionLocal
+        session_factory = SessionLocal
+
+    ingester = PostMetricsIngester(batch_size=batch_size) if batch_size else post_metrics_ingester
+    results = {}
+    db = session_factory()
+    try:
+        for path in feed.pending():
+            try:
+                results[path] = ingester.ingest_lines(db, feed.read(path))
+                feed.acknowledge(path)
+            except Exception:
+                logger.exception("Failed to ingest GMB metrics feed file %s", path)
+                results[path] = {"failed": True}
+    finally:
+        db.close()
+    return results
+
+
+# Shared ingester instance
+post_metrics_ingester = PostMetricsIngester()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Ingest GMB post metrics snapshots from NDJSON")
+    parser.add_argument("files", nargs="*", help="NDJSON files to ingest ('-' for standard input)")
+    parser.add_argument("--feed", help="Feed directory whose pending files are ingested and acknowledged")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Snapshots per upsert statement")
+    args = parser.parse_args()
+
+    if args.feed:
+        print(json.dumps(run_metrics_ingest_job(FileMetricsFeed(args.feed), batch_size=args.batch_size)))
+    else:
+        from core.database.connection import SessionLocal
+
+        cli_ingester = PostMetricsIngester(batch_size=args.batch_size)
+        session = SessionLocal()
+        try:
+            for file_name in args.files or ["-"]:
+                if file_name == "-":
+                    result = cli_ingester.ingest_lines(session, sys.stdin)
+                else:
+                    with open(file_name, encoding="utf-8") as lines:
+                        result = cli_ingester.ingest_lines(session, lines)
+                print(json.dumps({"file": file_name, **result}))
+        finally:
+            session.close()
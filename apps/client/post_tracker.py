@@ -0,0 +1,366 @@
+"""
+GMB Post Tracker Service
+
+This module builds the post tracker widget payload of a client from the gmb_post
+table: recent and scheduled posts, the views/clicks trend of the last seven
+days, the weekly posting compliance timeline and the posting badges. Each part
+is one query over the (client_id, status, date) indexes.
+
+Payloads are cached per client in a ResponseCache. The entry of a client is
+dropped when a transaction that inserted, updated or deleted one of their posts
+through the ORM commits; writers that bypass the ORM call invalidate() with the
+affected clients. The TTL bounds staleness from time passing (a scheduled post
+becoming due) and from writes in other processes when the cache is in-process.
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import logging
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from core.cache.response_cache import ResponseCache, create_cache_backend
+from apps.client.models.gmb_post import GmbPost
+
+logger = logging.getLogger(__name__)
+
+RECENT_POSTS = 5
+SCHEDULED_POSTS = 5
+TREND_DAYS = 7
+
+# Weeks shown in the compliance timeline, the current week included
+COMPLIANCE_WEEKS = 6
+
+# Posts with an image in the compliance window needed for the content creator badge
+CONTENT_CREATOR_IMAGES = 10
+
+# session.info key collecting the clients whose posts a transaction changed
+_CHANGED_CLIENTS = "post_tracker_changed_clients"
+
+
+def _compliance_status(score: int) -> str:
+    """Label a compliance score with the widget's thresholds"""
+    if score >= 90:
+        return "good"
+    if score >= 70:
+        return "fair"
+    return "poor"
+
+
+class PostTracker:
+    """
+    Computes and caches post tracker widget payloads.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        ttl_seconds: float = 300,
+        stale_seconds: float = 600
+    ):
+        """
+        Initialize the tracker
+
+        Args:
+            session_factory: Callable returning a new database session
+                (defaults to core.database.connection.SessionLocal)
+            ttl_seconds: Seconds a payload is served without recomputation
+            stale_seconds: Further seconds a payload is served while it is refreshed
+        """
+        self.session_factory = session_factory
+        self.cache = ResponseCache(
+            "post_tracker", backend=create_cache_backend(), ttl_seconds=ttl_seconds, stale_seconds=stale_seconds
+        )
+
+    def get_widget_data(self, client_id: str) -> Dict[str, Any]:
+        """
+        Get a client's widget payload, computing it on a cache miss
+
+        Args:
+            client_id: ID of the client
+
+        Returns:
+            dict: Widget payload
+        """
+        return self.cache.get(client_id, lambda: self._load(client_id))
+
+    async def aget_widget_data(self, client_id: str) -> Dict[str, Any]:
+        """
+        Get a client's widget payload from async code
+
+        Args:
+            client_id: ID of the client
+
+        Returns:
+            dict: Widget payload
+        """
+        return await self.cache.aget(client_id, lambda: self._load(client_id))
+
+    def invalidate(self, client_ids: Iterable[str]) -> None:
+        """
+        Drop the cached payloads of clients whose posts changed
+
+        Args:
+            client_ids: IDs of the clients
+        """
+        for client_id in set(client_ids):
+            if client_id:
+                self.cache.invalidate(client_id)
+
+    def build(self, db: Session, client_id: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Compute a client's widget payload
+
+        Args:
+            db: Database session
+            client_id: ID of the client
+            now: Reference time (defaults to now)
+
+        Returns:
+            dict: Widget payload
+        """
+        now = now or datetime.now()
+        weeks = self._posting_weeks(db, client_id, now.date())
+        return {
+            "client_id": client_id,
+            "last_updated": now.isoformat(),
+            "post_engagement": {
+                "recent_posts": self._recent_posts(db, client_id),
+                "scheduled_posts": self._scheduled_posts(db, client_id, now),
+                "engagement_trend": self._engagement_trend(db, client_id, now.date())
+            },
+            "badge_status": self._badge_status(weeks),
+            "compliance": self._compliance(weeks, now.date())
+        }
+
+    def _load(self, client_id: str) -> Dict[str, Any]:
+        """Compute a payload in a session of its own (also used for background refreshes)"""
+        session_factory = self.session_factory
+        if session_factory is None:
+            from core.database.connection import SessionLocal
+            session_factory = SessionLocal
+
+        db = session_factory()
+        try:
+            return self.build(db, client_id)
+        finally:
+            db.close()
+
+    def _recent_posts(self, db: Session, client_id: str) -> List[Dict[str, Any]]:
+        """Latest published posts with their views and clicks"""
+        rows = db.execute(
+            select(
+                GmbPost.id,
+                GmbPost.content,
+                GmbPost.status,
+                GmbPost.published_date,
+                GmbPost.metrics["views"].as_float().label("views"),
+                GmbPost.metrics["clicks"].as_float().label("clicks")
+            )
+            .where(GmbPost.client_id == client_id)
+            .where(GmbPost.status == "published")
+            .order_by(GmbPost.published_date.desc())
+            .limit(RECENT_POSTS)
+        ).all()
+        return [
+            {
+                "id": row.id,
+                "date": row.published_date.isoformat() if row.published_date else None,
+                "content": row.content,
+                "views": int(row.views or 0),
+                "clicks": int(row.clicks or 0),
+                "status": row.status
+            }
+            for row in rows
+        ]
+
+    def _scheduled_posts(self, db: Session, client_id: str, now: datetime) -> List[Dict[str, Any]]:
+        """Next posts scheduled for publication"""
+        rows = db.execute(
+            select(GmbPost.id, GmbPost.content, GmbPost.status, GmbPost.scheduled_date)
+            .where(GmbPost.client_id == client_id)
+            .where(GmbPost.status == "scheduled")
+            .where(GmbPost.scheduled_date >= now)
+            .order_by(GmbPost.scheduled_date)
+            .limit(SCHEDULED_POSTS)
+        ).all()
+        return [
+            {
+                "id": row.id,
+                "scheduled_date": row.scheduled_date.isoformat(),
+                "content": row.content,
+                "status": row.status
+            }
+            for row in rows
+        ]
+
+    def _engagement_trend(self, db: Session, client_id: str, today: date) -> Dict[str, Any]:
+        """
+        Views and clicks of the posts published on each of the last seven days.
+
+        Post metrics are lifetime totals, so each post's numbers count on the day
+        it was published.
+        """
+        first = today - timedelta(days=TREND_DAYS - 1)
+        day = func.date(GmbPost.published_date)
+        rows = db.execute(
+            select(
+                day.label("day"),
+                func.coalesce(func.sum(GmbPost.metrics["views"].as_float()), 0).label("views"),
+                func.coalesce(func.sum(GmbPost.metrics["clicks"].as_float()), 0).label("clicks")
+            )
+            .where(GmbPost.client_id == client_id)
+            .where(GmbPost.status == "published")
+            .where(GmbPost.published_date >= datetime.combine(first, datetime.min.time()))
+            .where(GmbPost.published_date < datetime.combine(today + timedelta(days=1), datetime.min.time()))
+            .group_by(day)
+        ).all()
+        by_day = {row.day: row for row in rows}
+
+        days = [first + timedelta(days=offset) for offset in range(TREND_DAYS)]
+        return {
+            "views": [int(by_day[d].views) if d in by_day else 0 for d in days],
+            "clicks": [int(by_day[d].clicks) if d in by_day else 0 for d in days],
+            "dates": [d.isoformat() for d in days]
+        }
+
+    def _posting_weeks(self, db: Session, client_id: str, today: date) -> List[Dict[str, Any]]:
+        """
+        Published, failed and image post counts of each week in the compliance window.
+
+        Returns:
+            List[dict]: Weeks oldest first, each with its Monday as start
+        """
+        current_monday = today - timedelta(days=today.weekday())
+        first_monday = current_monday - timedelta(weeks=COMPLIANCE_WEEKS - 1)
+        post_date = func.coalesce(GmbPost.published_date, GmbPost.scheduled_date)
+        week = func.date_trunc("week", post_date)
+        rows = db.execute(
+            select(
+                week.label("week"),
+                GmbPost.status,
+                func.count().label("posts"),
+                func.count(GmbPost.image_url).label("image_posts")
+            )
+            .where(GmbPost.client_id == client_id)
+            .where(GmbPost.status.in_(("published", "failed")))
+            .where(post_date >= datetime.combine(first_monday, datetime.min.time()))
+            .group_by(week, GmbPost.status)
+        ).all()
+
+        weeks = [
+            {"start": first_monday + timedelta(weeks=offset), "published": 0, "failed": 0, "image_posts": 0}
+            for offset in range(COMPLIANCE_WEEKS)
+        ]
+        by_start = {entry["start"]: entry for entry in weeks}
+        for row in rows:
+            entry = by_start.get(row.week.date())
+            if entry is None:
+                continue
+            entry[row.status] += row.posts
+            if row.status == "published":
+                entry["image_posts"] += row.image_posts
+        return weeks
+
+    def _compliance(self, weeks: List[Dict[str, Any]], today: date) -> Dict[str, Any]:
+        """
+        Weekly posting compliance: a week complies when at least one post was
+        published. The current week only counts once it has a post.
+        """
+        current_monday = today - timedelta(days=today.weekday())
+        timeline = []
+        counted = compliant = 0
+        for entry in weeks:
+            in_progress = entry["start"] == current_monday
+            if not (in_progress and entry["published"] == 0):
+                counted += 1
+                compliant += 1 if entry["published"] else 0
+
+            events = []
+            if entry["published"]:
+                events.append(f"{entry['published']} post{'s' if entry['published'] != 1 else ''} published")
+            elif not in_progress:
+                events.append("Missing weekly post")
+            if entry["failed"]:
+                events.append(f"{entry['failed']} post{'s' if entry['failed'] != 1 else ''} failed to publish")
+            if events:
+                timeline.append({
+                    "date": entry["start"].isoformat(),
+                    "score": round(compliant * 100 / counted) if counted else 100,
+                    "events": events
+                })
+
+        score = round(compliant * 100 / counted) if counted else 100
+        recommendations = []
+        if compliant < counted:
+            recommendations.append("Consider posting weekly updates about your services")
+        if any(entry["failed"] for entry in weeks):
+            recommendations.append("Review and reschedule posts that failed to publish")
+        if sum(entry["image_posts"] for entry in weeks) < sum(entry["published"] for entry in weeks):
+            recommendations.append("Add photos to your posts to increase engagement")
+
+        return {
+            "status": _compliance_status(score),
+            "score": score,
+            "timeline": timeline,
+            "recommendations": recommendations
+        }
+
+    def _badge_status(self, weeks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Posting badges earned in, or progressing over, the compliance window"""
+        posting_weeks = sum(1 for entry in weeks if entry["published"])
+        image_posts = sum(entry["image_posts"] for entry in weeks)
+
+        earned = []
+        progress = {}
+        if posting_weeks == len(weeks):
+            earned.append("consistent_poster")
+        else:
+            progress["consistent_poster"] = {
+                "progress": round(posting_weeks * 100 / len(weeks)),
+                "requirements": f"Publish a post in each of the last {len(weeks)} weeks to earn this badge"
+            }
+        if image_posts >= CONTENT_CREATOR_IMAGES:
+            earned.append("content_creator")
+        else:
+            remaining = CONTENT_CREATOR_IMAGES - image_posts
+            progress["content_creator"] = {
+                "progress": round(image_posts * 100 / CONTENT_CREATOR_IMAGES),
+                "requirements": f"Post {remaining} more image post{'s' if remaining != 1 else ''} to earn this badge"
+            }
+
+        return {"earned_badges": earned, "progress": progress}
+
+
+# Shared tracker instance
+post_tracker = PostTracker()
+
+
+@event.listens_for(GmbPost, "after_insert")
+@event.listens_for(GmbPost, "after_update")
+@event.listens_for(GmbPost, "after_delete")
+def _collect_changed_client(mapper, connection, target) -> None:
+    """Remember the clients whose posts the flushing transaction changed"""
+    session = object_session(target)
+    if session is None:
+        post_tracker.invalidate([target.client_id])
+        return
+
+    changed = session.info.setdefault(_CHANGED_CLIENTS, set())
+    changed.add(target.client_id)
+    # A post moved to another client changes the previous owner's widget too
+    changed.update(inspect(target).attrs.client_id.history.deleted or ())
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_clients(session) -> None:
+    """Drop the cached payloads once the changes are visible to other sessions"""
+    changed = session.info.pop(_CHANGED_CLIENTS, None)
+    if changed:
+        post_tracker.invalidate(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_clients(session) -> None:
+    """Discard the clients of a rolled back transaction"""
+    session.info.pop(_CHANGED_CLIENTS, None)
@@ -2,19 +2,91 @@
 Weekly Engagement Report Controller
 
 This module provides functionality to generate and display weekly engagement reports for clients.
-It analyzes engagement metrics, presents trends, and provides actionable insights.
+It analyzes engagement metrics, presents trends, and provides actionable insights
+from the rules in engagement_rules (see apps.client.engagement_rules).
+
+Reports are generated in batches: for each chunk of clients, the week's metrics
+are aggregated from published GMB posts in one grouped query, the previous
+week's metrics are read in bulk from the stored reports (falling back to the
+same aggregation for clients without one), and all reports of the chunk are
+written in a single transaction. Stored reports reference the engagement rule
+templates instead of repeating their text, and carry a small summary so history
+listings never read the report body. Run the module as a script to generate the
+reports of the last completed week for every client, e.g. from cron:
+
+    python -m apps.client.report_weekly_engagement --chunk-size 500
 """
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Any, Tuple
+import argparse
+import logging
 import uuid
 import json
 
 from fastapi import Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, insert, select, tuple_, union, update
+from sqlalchemy.orm import Session, undefer_group
 
 from core.database.session import get_db
 from core.auth.dependencies import get_current_user
 from apps.client.models.engagement_record import EngagementRecord
+from apps.client.models.gmb_post import GmbPost, POST_COUNTERS
+from apps.client.engagement_rules import engagement_rule_engine
+
+logger = logging.getLogger(__name__)
+
+# Clients per generation transaction
+DEFAULT_CHUNK_SIZE = 500
+
+# Metrics listed in report history, with the names the listing uses for their trends
+SUMMARY_METRICS = {"views": "views", "engagement_rate": "engagement", "conversion_rate": "conversion"}
+
+MAX_HISTORY_PAGE = 100
+
+
+def _percentage(part: float, whole: float) -> float:
+    """Percentage of part in whole, rounded to two decimals"""
+    return round(part * 100 / whole, 2) if whole else 0.0
+
+
+def _derive_metrics(counters: Dict[str, float], posts_published: int) -> Dict[str, Any]:
+    """Build a report's metrics from the summed post counters"""
+    metrics: Dict[str, Any] = {name: counters.get(name, 0) for name in POST_COUNTERS}
+    interactions = metrics["clicks"] + metrics["calls"] + metrics["direction_requests"] + metrics["messages"]
+    metrics["posts_published"] = posts_published
+    metrics["engagement_rate"] = _percentage(interactions, metrics["views"])
+    metrics["conversion_rate"] = _percentage(metrics["calls"] + metrics["bookings"], metrics["views"])
+    return metrics
+
+
+def _summarize(metrics: Dict[str, Any], trends: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the stored summary of a report"""
+    return {
+        "key_metrics": {name: metrics.get(name, 0) for name in SUMMARY_METRICS},
+        "trends": {
+            label: (trends.get(name) or {}).get("direction", "stable")
+            for name, label in SUMMARY_METRICS.items()
+        }
+    }
+
+
+def _encode_cursor(year: int, week_number: int, report_id: str) -> str:
+    """Encode a history listing position"""
+    return f"{year}.{week_number}.{report_id}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, int, str]:
+    """
+    Decode a history listing position.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        year, week_number, report_id = cursor.split(".", 2)
+        return int(year), int(week_number), report_id
+    except ValueError:
+        raise ValueError("Invalid cursor")
 
 
 class WeeklyEngagementReport:
@@ -32,140 +104,332 @@ class WeeklyEngagementReport:
         
         Args:
             client_id: ID of the client
-            week_number: Week number (1-52)
-            year: Year for the report
+            week_number: ISO week number (1-53)
+            year: ISO year for the report
             
         Returns:
             Dictionary containing the report data
         """
         # Default to current week if not specified
-        now = datetime.now()
         if not week_number or not year:
-            # Calculate the current week number and year
-            year = now.year
-            # ISO week calculation
-            week_number = int(now.strftime("%V"))
+            year, week_number, _ = datetime.now().isocalendar()
+        
+        reports = self._generate_chunk([client_id], year, week_number)
+        return reports[0]
+    
+    def generate_weekly_reports(
+        self,
+        week_number: int = None,
+        year: int = None,
+        client_ids: Optional[Iterable[str]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Dict[str, Any]:
+        """
+        Generate the weekly engagement reports of many clients
+        
+        Existing reports for the same week are replaced, so the job can be re-run.
+        
+        Args:
+            week_number: ISO week number (defaults to the last completed week)
+            year: ISO year for the reports
+            client_ids: Clients to report on (defaults to every client with posts
+                in the week or the week before, or a report for the week before)
+            chunk_size: Clients per transaction
+            
+        Returns:
+            Summary with the number of reports and chunks written
+        """
+        if not week_number or not year:
+            year, week_number, _ = (datetime.now() - timedelta(days=7)).isocalendar()
+        
+        if client_ids is None:
+            client_ids = self._active_client_ids(year, week_number)
+        client_ids = sorted(set(client_ids))
+        
+        generated = 0
+        chunks = 0
+        for offset in range(0, len(client_ids), chunk_size):
+            chunk = client_ids[offset:offset + chunk_size]
+            try:
+                generated += len(self._generate_chunk(chunk, year, week_number))
+                chunks += 1
+            except Exception:
+                self.db.rollback()
+                logger.exception("Failed to generate engagement reports for %s clients of %s-W%02d", len(chunk), year, week_number)
+        
+        logger.info("Generated %s engagement reports for %s-W%02d in %s chunks", generated, year, week_number, chunks)
+        return {
+            "year": year,
+            "week_number": week_number,
+            "clients": len(client_ids),
+            "generated": generated,
+            "chunks": chunks,
+            "failed": len(client_ids) - generated
+        }
+    
+    def _generate_chunk(self, client_ids: List[str], year: int, week_number: int) -> List[Dict[str, Any]]:
+        """
+        Generate and store the reports of a chunk of clients in one transaction
         
-        # Calculate date range for the week
+        Args:
+            client_ids: Clients of the chunk
+            year: ISO year
+            week_number: ISO week number
+            
+        Returns:
+            The generated reports
+        """
+        now = datetime.now()
         start_date, end_date = self._get_week_date_range(year, week_number)
+        prev_year, prev_week, _ = (start_date - timedelta(days=7)).isocalendar()
+        prev_start, _ = self._get_week_date_range(prev_year, prev_week)
         
-        # Get metrics for the current week
-        current_metrics = self._get_metrics(client_id, start_date, end_date)
+        current, previous = self._load_post_metrics(client_ids, prev_start, start_date)
+        stored_previous = self._load_stored_metrics(client_ids, prev_year, prev_week)
         
-        # Get metrics for the previous week for comparison
-        prev_week_start, prev_week_end = self._get_week_date_range(
-            year - 1 if week_number == 1 else year, 
-            52 if week_number == 1 else week_number - 1
+        current_list = [current.get(client_id) or _derive_metrics({}, 0) for client_id in client_ids]
+        previous_list = [
+            stored_previous.get(client_id) or previous.get(client_id) or _derive_metrics({}, 0)
+            for client_id in client_ids
+        ]
+        trend_list = [
+            self._calculate_trends(current_metrics, previous_metrics)
+            for current_metrics, previous_metrics in zip(current_list, previous_list)
+        ]
+        
+        # Insight and recommendation rules are evaluated once over the whole chunk
+        insight_refs, recommendation_refs = engagement_rule_engine.evaluate(
+            self.db, current_list, previous_list, trend_list
+        )
+        insights = engagement_rule_engine.expand(self.db, insight_refs)
+        recommendations = engagement_rule_engine.expand(self.db, recommendation_refs)
+        
+        reports = []
+        rows = []
+        for index, client_id in enumerate(client_ids):
+            reports.append({
+                "client_id": client_id,
+                "week_number": week_number,
+                "year": year,
+                "period": {
+                    "start_date": start_date.isoformat(),
+                    "end_date": end_date.isoformat()
+                },
+                "metrics": current_list[index],
+                "previous_metrics": previous_list[index],
+                "trends": trend_list[index],
+                "insights": insights[index],
+                "recommendations": recommendations[index],
+                "generated_at": now.isoformat()
+            })
+            rows.append(self._record_values(reports[-1], insight_refs[index], recommendation_refs[index], now))
+        
+        # Replace any earlier run's reports for the week together with the new ones
+        self.db.execute(
+            delete(EngagementRecord)
+            .where(EngagementRecord.client_id.in_(client_ids))
+            .where(EngagementRecord.year == year)
+            .where(EngagementRecord.week_number == week_number)
         )
-        previous_metrics = self._get_metrics(client_id, prev_week_start, prev_week_end)
+        self.db.execute(insert(EngagementRecord), rows)
+        self.db.commit()
         
-        # Calculate trends and changes
-        trend_data = self._calculate_trends(current_metrics, previous_metrics)
+        return reports
+    
+    def get_historical_reports(
+        self,
+        client_id: str,
+        limit: int = 10,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get a page of a client's report history, newest week first
+        
+        Only the summary columns are read; open a report with get_report for its body.
         
-        # Generate insights based on the data
-        insights = self._generate_insights(trend_data, current_metrics, previous_metrics)
+        Args:
+            client_id: ID of the client
+            limit: Maximum number of reports to return (at most MAX_HISTORY_PAGE)
+            cursor: next_cursor of the previous page
+            
+        Returns:
+            Report summaries and the cursor of the next page (None on the last page)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(limit, MAX_HISTORY_PAGE))
+        position = tuple_(EngagementRecord.year, EngagementRecord.week_number, EngagementRecord.id)
+        query = (
+            select(
+                EngagementRecord.id,
+                EngagementRecord.week_number,
+                EngagementRecord.year,
+                EngagementRecord.start_date,
+                EngagementRecord.end_date,
+                EngagementRecord.summary,
+                EngagementRecord.viewed,
+                EngagementRecord.created_at
+            )
+            .where(EngagementRecord.client_id == client_id)
+            .order_by(EngagementRecord.year.desc(), EngagementRecord.week_number.desc(), EngagementRecord.id.desc())
+            .limit(limit + 1)
+        )
+        if cursor:
+            query = query.where(position < tuple_(*_decode_cursor(cursor)))
         
-        # Generate recommendations
-        recommendations = self._generate_recommendations(insights, current_metrics)
+        rows = self.db.execute(query).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1].year, rows[-1].week_number, rows[-1].id)
         
-        # Create report data
-        report = {
-            "client_id": client_id,
-            "week_number": week_number,
-            "year": year,
-            "period": {
-                "start_date": start_date.isoformat(),
-                "end_date": end_date.isoformat()
-            },
-            "metrics": current_metrics,
-            "previous_metrics": previous_metrics,
-            "trends": trend_data,
-            "insights": insights,
-            "recommendations": recommendations,
-            "generated_at": now.isoformat()
+        return {
+            "reports": [
+                {
+                    "id": row.id,
+                    "week_number": row.week_number,
+                    "year": row.year,
+                    "period": {
+                        "start_date": row.start_date.isoformat(),
+                        "end_date": row.end_date.isoformat()
+                    },
+                    "key_metrics": (row.summary or {}).get("key_metrics", {}),
+                    "trends": (row.summary or {}).get("trends", {}),
+                    "generated_at": row.created_at.isoformat(),
+                    "viewed": row.viewed
+                }
+                for row in rows
+            ],
+            "next_cursor": next_cursor
         }
+    
+    def get_report(self, client_id: str, report_id: str, mark_viewed: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Open one of a client's reports with its full body
         
-        # Save the report to the database
-        self._save_report(report)
+        Args:
+            client_id: ID of the client
+            report_id: ID of the report
+            mark_viewed: Whether to mark the report as viewed
+            
+        Returns:
+            The report with rendered insights and recommendations, or None if the
+            client has no such report
+        """
+        record = (
+            self.db.query(EngagementRecord)
+            .options(undefer_group("body"))
+            .filter(EngagementRecord.id == report_id, EngagementRecord.client_id == client_id)
+            .first()
+        )
+        if not record:
+            return None
+        
+        # Built before the commit below, which would expire the undeferred body
+        report = record.to_dict()
+        report["insights"], report["recommendations"] = engagement_rule_engine.expand(
+            self.db, [record.insights or [], record.recommendations or []]
+        )
+        
+        if mark_viewed and not record.viewed:
+            viewed_at = datetime.now()
+            self.db.execute(
+                update(EngagementRecord)
+                .where(EngagementRecord.id == record.id)
+                .values(viewed=True, viewed_at=viewed_at)
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+            report["viewed"] = True
+            report["viewed_at"] = viewed_at.isoformat()
         
         return report
     
-    def get_historical_reports(self, client_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+    def _active_client_ids(self, year: int, week_number: int) -> List[str]:
         """
-        Get historical reports for a client
+        Get the clients with posts in a week or the week before, or a report for the week before
         
         Args:
-            client_id: ID of the client
-            limit: Maximum number of reports to return
+            year: ISO year
+            week_number: ISO week number
             
         Returns:
-            List of report summaries
+            Client IDs
         """
-        # Query for past reports
-        records = (
-            self.db.query(EngagementRecord)
-            .filter(EngagementRecord.client_id == client_id)
-            .order_by(EngagementRecord.year.desc(), EngagementRecord.week_number.desc())
-            .limit(limit)
-            .all()
+        start_date, _ = self._get_week_date_range(year, week_number)
+        prev_year, prev_week, _ = (start_date - timedelta(days=7)).isocalendar()
+        
+        posting = (
+            select(GmbPost.client_id)
+            .where(GmbPost.status == "published")
+            .where(GmbPost.published_date >= start_date - timedelta(days=7))
+            .where(GmbPost.published_date < start_date + timedelta(days=7))
+        )
+        reported = (
+            select(EngagementRecord.client_id)
+            .where(EngagementRecord.year == prev_year)
+            .where(EngagementRecord.week_number == prev_week)
         )
+        return [client_id for client_id in self.db.execute(union(posting, reported)).scalars() if client_id]
+    
+    def _load_post_metrics(
+        self,
+        client_ids: List[str],
+        prev_start: datetime,
+        start_date: datetime
+    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        Aggregate the metrics of published posts for a week and the week before
         
-        # Format into summaries
-        return [
-            {
-                "id": record.id,
-                "week_number": record.week_number,
-                "year": record.year,
-                "period": {
-                    "start_date": record.start_date.isoformat(),
-                    "end_date": record.end_date.isoformat()
-                },
-                "key_metrics": {
-                    "views": record.metrics.get("views", 0),
-                    "engagement_rate": record.metrics.get("engagement_rate", 0),
-                    "conversion_rate": record.metrics.get("conversion_rate", 0)
-                },
-                "trends": {
-                    "views": record.trends.get("views", "stable"),
-                    "engagement": record.trends.get("engagement", "stable"),
-                    "conversion": record.trends.get("conversion", "stable")
-                },
-                "generated_at": record.created_at.isoformat(),
-                "viewed": record.viewed
-            }
-            for record in records
+        Args:
+            client_ids: Clients to aggregate
+            prev_start: Start of the previous week
+            start_date: Start of the week
+            
+        Returns:
+            Tuple of (this week's, previous week's) metrics by client
+        """
+        is_current = GmbPost.published_date >= start_date
+        counters = [
+            func.coalesce(func.sum(GmbPost.metrics[name].as_float()), 0).label(name)
+            for name in POST_COUNTERS
         ]
+        rows = self.db.execute(
+            select(GmbPost.client_id, is_current.label("is_current"), func.count().label("posts"), *counters)
+            .where(GmbPost.client_id.in_(client_ids))
+            .where(GmbPost.status == "published")
+            .where(GmbPost.published_date >= prev_start)
+            .where(GmbPost.published_date < start_date + timedelta(days=7))
+            .group_by(GmbPost.client_id, is_current)
+        ).all()
+        
+        current: Dict[str, Dict[str, Any]] = {}
+        previous: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            metrics = _derive_metrics({name: float(getattr(row, name)) for name in POST_COUNTERS}, row.posts)
+            (current if row.is_current else previous)[row.client_id] = metrics
+        return current, previous
     
-    def _get_metrics(self, client_id: str, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    def _load_stored_metrics(self, client_ids: List[str], year: int, week_number: int) -> Dict[str, Dict[str, Any]]:
         """
-        Get engagement metrics for a specific time period
+        Read the metrics of stored reports for a week
         
         Args:
-            client_id: ID of the client
-            start_date: Start date of the period
-            end_date: End date of the period
+            client_ids: Clients to read
+            year: ISO year
+            week_number: ISO week number
             
         Returns:
-            Dictionary of metrics
+            Metrics by client
         """
-        # In a real implementation, this would query actual data sources
-        # For this example, we'll generate some sample metrics
-        return {
-            "views": self._generate_sample_metric(1000, 5000),
-            "clicks": self._generate_sample_metric(50, 500),
-            "calls": self._generate_sample_metric(5, 50),
-            "direction_requests": self._generate_sample_metric(10, 100),
-            "messages": self._generate_sample_metric(20, 200),
-            "bookings": self._generate_sample_metric(2, 20),
-            "engagement_rate": self._generate_sample_metric(1.0, 5.0),
-            "conversion_rate": self._generate_sample_metric(0.5, 3.0),
-            "average_response_time": self._generate_sample_metric(1, 24)
-        }
-    
-    def _generate_sample_metric(self, min_value: float, max_value: float) -> float:
-        """Generate a sample metric value within a range"""
-        import random
-        return round(random.uniform(min_value, max_value), 2)
+        rows = self.db.execute(
+            select(EngagementRecord.client_id, EngagementRecord.metrics)
+            .where(EngagementRecord.client_id.in_(client_ids))
+            .where(EngagementRecord.year == year)
+            .where(EngagementRecord.week_number == week_number)
+        ).all()
+        return {row.client_id: row.metrics for row in rows if row.metrics}
     
     def _calculate_trends(self, current_metrics: Dict[str, Any], previous_metrics: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -205,195 +469,60 @@ class WeeklyEngagementReport:
         
         return trends
     
-    def _generate_insights(
-        self, 
-        trends: Dict[str, Any], 
-        current_metrics: Dict[str, Any], 
-        previous_metrics: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
-        """
-        Generate insights based on metrics and trends
-        
-        Args:
-            trends: Calculated trends
-            current_metrics: Current period metrics
-            previous_metrics: Previous period metrics
-            
-        Returns:
-            List of insights
-        """
-        insights = []
-        
-        # Example insights based on views trend
-        views_trend = trends.get("views", {})
-        if views_trend.get("direction") == "up" and views_trend.get("change_percentage", 0) > 20:
-            insights.append({
-                "type": "positive",
-                "category": "visibility",
-                "title": "Strong increase in profile views",
-                "description": f"Your profile views increased by {views_trend.get('change_percentage')}% compared to last week."
-            })
-        elif views_trend.get("direction") == "down" and views_trend.get("change_percentage", 0) < -20:
-            insights.append({
-                "type": "negative",
-                "category": "visibility",
-                "title": "Significant drop in profile views",
-                "description": f"Your profile views decreased by {abs(views_trend.get('change_percentage'))}% compared to last week."
-            })
-        
-        # Example insight for engagement rate
-        engagement_trend = trends.get("engagement_rate", {})
-        if engagement_trend.get("direction") == "up":
-            insights.append({
-                "type": "positive",
-                "category": "engagement",
-                "title": "Improved customer engagement",
-                "description": f"Your engagement rate increased to {current_metrics.get('engagement_rate')}%, up from {previous_metrics.get('engagement_rate')}% last week."
-            })
-        
-        # Example insight for conversion
-        conversion_trend = trends.get("conversion_rate", {})
-        if conversion_trend.get("direction") == "up":
-            insights.append({
-                "type": "positive",
-                "category": "conversion",
-                "title": "Higher conversion rate",
-                "description": f"Your conversion rate improved to {current_metrics.get('conversion_rate')}%, generating more business from existing traffic."
-            })
-        elif conversion_trend.get("direction") == "down":
-            insights.append({
-                "type": "negative",
-                "category": "conversion",
-                "title": "Declining conversion rate",
-                "description": f"Your conversion rate dropped to {current_metrics.get('conversion_rate')}% from {previous_metrics.get('conversion_rate')}% last week."
-            })
-        
-        return insights
-    
-    def _generate_recommendations(
-        self, 
-        insights: List[Dict[str, Any]], 
-        metrics: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
-        """
-        Generate actionable recommendations based on insights
-        
-        Args:
-            insights: Generated insights
-            metrics: Current metrics
-            
-        Returns:
-            List of recommendations
-        """
-        recommendations = []
-        
-        # Check for negative visibility insights
-        if any(i["type"] == "negative" and i["category"] == "visibility" for i in insights):
-            recommendations.append({
-                "category": "visibility",
-                "title": "Improve your online visibility",
-                "description": "Schedule more posts and update your business information to increase visibility.",
-                "actions": [
-                    "Schedule at least 3 posts for next week",
-                    "Update your business hours and information",
-                    "Add recent photos of your products or services"
-                ]
-            })
-        
-        # Check engagement metrics
-        if metrics.get("engagement_rate", 0) < 3.0:
-            recommendations.append({
-                "category": "engagement",
-                "title": "Boost customer engagement",
-                "description": "Encourage more interactions with your online presence.",
-                "actions": [
-                    "Respond to all customer questions within 2 hours",
-                    "Create interactive posts that ask questions",
-                    "Run a limited-time promotion to drive engagement"
-                ]
-            })
-        
-        # Check response time
-        if metrics.get("average_response_time", 0) > 5:
-            recommendations.append({
-                "category": "responsiveness",
-                "title": "Improve response time",
-                "description": f"Your average response time of {metrics.get('average_response_time')} hours is too high. Aim to respond faster.",
-                "actions": [
-                    "Set up notifications for new messages",
-                    "Create saved responses for common questions",
-                    "Delegate response duties during busy hours"
-                ]
-            })
-        
-        return recommendations
-    
     def _get_week_date_range(self, year: int, week_number: int) -> Tuple[datetime, datetime]:
         """
-        Get the date range for a specific week number
+        Get the date range for a specific ISO week
         
         Args:
-            year: Year
-            week_number: Week number (1-52)
+            year: ISO year
+            week_number: ISO week number (1-53)
             
         Returns:
             Tuple of (start_date, end_date)
         """
-        import datetime as dt
-        from datetime import timedelta
-        
-        # Find the first day of the year
-        first_day = dt.datetime(year, 1, 1)
-        
-        # Find the first day of the week (the ISO standard considers Monday as the first day)
-        first_day_of_week = first_day + timedelta(days=((8 - first_day.isoweekday()) % 7))
+        # ISO weeks start on Monday
+        start_date = datetime.combine(date.fromisocalendar(year, week_number, 1), datetime.min.time())
         
-        # Adjust to the correct week
-        start_date = first_day_of_week + timedelta(weeks=week_number - 1)
-        
-        # End date is 7 days later
+        # End date is the last second of the Sunday
         end_date = start_date + timedelta(days=6, hours=23, minutes=59, seconds=59)
         
         return start_date, end_date
     
-    def _save_report(self, report: Dict[str, Any]) -> None:
+    def _record_values(
+        self,
+        report: Dict[str, Any],
+        insight_refs: List[Dict[str, Any]],
+        recommendation_refs: List[Dict[str, Any]],
+        created_at: datetime
+    ) -> Dict[str, Any]:
         """
-        Save the report to the database
+        Build the stored row of a generated report
         
         Args:
             report: The generated report
+            insight_refs: The report's insights as rule references
+            recommendation_refs: The report's recommendations as rule references
+            created_at: Generation time
+            
+        Returns:
+            Column values for an EngagementRecord
         """
-        # Create a new record
-        start_date = datetime.fromisoformat(report["period"]["start_date"])
-        end_date = datetime.fromisoformat(report["period"]["end_date"])
-        
-        record = EngagementRecord(
-            id=str(uuid.uuid4()),
-            client_id=report["client_id"],
-            week_number=report["week_number"],
-            year=report["year"],
-            start_date=start_date,
-            end_date=end_date,
-            metrics=report["metrics"],
-            trends=report["trends"],
-            insights=[{
-                "type": insight["type"],
-                "category": insight["category"],
-                "title": insight["title"],
-                "description": insight["description"]
-            } for insight in report["insights"]],
-            recommendations=[{
-                "category": rec["category"],
-                "title": rec["title"],
-                "description": rec["description"],
-                "actions": rec["actions"]
-            } for rec in report["recommendations"]],
-            viewed=False,
-            created_at=datetime.now()
-        )
-        
-        self.db.add(record)
-        self.db.commit()
+        return {
+            "id": str(uuid.uuid4()),
+            "client_id": report["client_id"],
+            "week_number": report["week_number"],
+            "year": report["year"],
+            "start_date": datetime.fromisoformat(report["period"]["start_date"]),
+            "end_date": datetime.fromisoformat(report["period"]["end_date"]),
+            "summary": _summarize(report["metrics"], report["trends"]),
+            "metrics": report["metrics"],
+            "trends": report["trends"],
+            "insights": insight_refs,
+            "recommendations": recommendation_refs,
+            "viewed": False,
+            "created_at": created_at,
+            "updated_at": created_at
+        }
         
     def mark_report_viewed(self, report_id: str) -> bool:
         """
@@ -421,3 +550,45 @@ class WeeklyEngagementReport:
 def get_report_controller(db: Session = Depends(get_db)):
     """Factory function to create a WeeklyEngagementReport instance"""
     return WeeklyEngagementReport(db)
+
+
+def run_weekly_engagement_job(
+    session_factory: Optional[Callable[[], Session]] = None,
+    year: int = None,
+    week_number: int = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Generate every client's weekly engagement report (scheduled job entry point)
+    
+    Args:
+        session_factory: Callable returning a new database session
+            (defaults to core.database.connection.SessionLocal)
+        year: ISO year (defaults to the last completed week's)
+        week_number: ISO week number (defaults to the last completed week)
+        chunk_size: Clients per transaction
+        
+    Returns:
+        Generation summary
+    """
+    if session_factory is None:
+        from core.database.connection import SessionLocal
+        session_factory = SessionLocal
+    
+    db = session_factory()
+    try:
+        return WeeklyEngagementReport(db).generate_weekly_reports(week_number, year, chunk_size=chunk_size)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
+    parser = argparse.ArgumentParser(description="Generate weekly engagement reports for all clients")
+    parser.add_argument("--year", type=int, help="ISO year (defaults to the last completed week)")
+    parser.add_argument("--week", type=int, help="ISO week number (defaults to the last completed week)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Clients per transaction")
+    args = parser.parse_args()
+    
+    print(json.dumps(run_weekly_engagement_job(year=args.year, week_number=args.week, chunk_size=args.chunk_size)))
@@ -0,0 +1,308 @@
+"""
+Lesson Time Tracking Buffer
+
+This module coalesces time-tracking heartbeats from the lesson player. Increments
+are accumulated in memory per (client, lesson) and written periodically as one
+batched, atomic `time_spent_seconds = time_spent_seconds + n` update, instead of
+a read-modify-write transaction per heartbeat. Pending increments are flushed on
+shutdown and kept in the buffer if a flush fails.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import atexit
+import logging
+import threading
+import uuid
+
+from sqlalchemy import bindparam, case, select, tuple_
+from sqlalchemy.orm import Session
+
+from apps.client.education_hub_client import EducationHub
+from apps.client.lesson_recommendations import lesson_recommender
+from apps.client.models.lesson import Lesson
+from apps.client.models.progress import Progress
+
+logger = logging.getLogger(__name__)
+
+PendingKey = Tuple[str, str]  # (client_id, lesson_id)
+
+
+class TimeTrackingBuffer:
+    """
+    In-memory accumulator for lesson time increments with periodic batched flushes.
+    """
+
+    def __init__(self, flush_interval_seconds: float = 15.0, max_pending_keys: int = 10000):
+        """
+        Initialize the buffer
+
+        Args:
+            flush_interval_seconds: Seconds between background flushes
+            max_pending_keys: Number of distinct (client, lesson) pairs that triggers an early flush
+        """
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending_keys = max_pending_keys
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[PendingKey, int] = defaultdict(int)
+        self._last_seen: Dict[PendingKey, datetime] = {}
+
+        self._session_factory: Optional[Callable[[], Session]] = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._exit_hook_registered = False
+
+    def add(self, client_id: str, lesson_id: str, seconds: int) -> int:
+        """
+        Buffer a time increment
+
+        Args:
+            client_id: The client's user ID
+            lesson_id: The lesson ID
+            seconds: Seconds spent since the last heartbeat
+
+        Returns:
+            Seconds pending for this (client, lesson) pair
+        """
+        if seconds < 0:
+            raise ValueError("Time spent cannot be negative")
+
+        key = (client_id, lesson_id)
+        with self._lock:
+            self._pending[key] += seconds
+            self._last_seen[key] = datetime.utcnow()
+            pending = self._pending[key]
+            full = len(self._pending) >= self.max_pending_keys
+
+        if full:
+            self._wake_event.set()
+
+        return pending
+
+    def pending_seconds(self, client_id: str, lesson_id: str) -> int:
+        """
+        Get the seconds not yet written for a (client, lesson) pair
+
+        Args:
+            client_id: The client's user ID
+            lesson_id: The lesson ID
+
+        Returns:
+            Buffered seconds
+        """
+        with self._lock:
+            return self._pending.get((client_id, lesson_id), 0)
+
+    def flush(self, db: Session) -> int:
+        """
+        Write all buffered increments in a single transaction
+
+        Existing progress rows receive an atomic increment through one executemany
+        UPDATE; missing rows are inserted for lessons that exist. If the write
+        fails, the increments are merged back into the buffer.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of (client, lesson) pairs written
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                pending = dict(self._pending)
+                last_seen = dict(self._last_seen)
+                self._pending = defaultdict(int)
+                self._last_seen = {}
+
+            try:
+                written = self._write(db, pending, last_seen)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._restore(pending, last_seen)
+                logger.exception("Failed to flush %d lesson time increments", len(pending))
+                raise
+
+        # Lessons that moved to in_progress change the client's recommendations
+        for client_id, lesson_id in written:
+            lesson_recommender.record_progress(client_id, lesson_id, "in_progress")
+
+        logger.debug("Flushed %d lesson time increments", len(pending))
+        return len(pending)
+
+    def _write(
+        self,
+        db: Session,
+        pending: Dict[PendingKey, int],
+        last_seen: Dict[PendingKey, datetime]
+    ) -> List[PendingKey]:
+        """
+        Apply buffered increments inside the current transaction
+
+        Args:
+            db: Database session
+            pending: Seconds per (client, lesson) pair
+            last_seen: Last heartbeat time per pair
+
+        Returns:
+            Pairs whose status moved to in_progress (new or previously not started)
+        """
+        keys = list(pending.keys())
+
+        # Lock the summaries before reading statuses so status changes made
+        # concurrently by the Education Hub are applied one after the other
+        summaries = EducationHub(db).lock_progress_summaries(list({key[0] for key in keys}))
+
+        existing = {
+            (client_id, lesson_id): status
+            for client_id, lesson_id, status in db.execute(
+                select(Progress.client_id, Progress.lesson_id, Progress.status)
+                .where(tuple_(Progress.client_id, Progress.lesson_id).in_(keys))
+            )
+        }
+
+        # Only rows for lessons that still exist can be inserted
+        missing_lesson_ids = {key[1] for key in keys if key not in existing}
+        known_lessons = set()
+        if missing_lesson_ids:
+            known_lessons = set(db.execute(
+                select(Lesson.id).where(Lesson.id.in_(missing_lesson_ids))
+            ).scalars())
+
+        started = [
+            (client_id, lesson_id) for client_id, lesson_id in keys
+            if existing.get((client_id, lesson_id)) == "not_started"
+            or ((client_id, lesson_id) not in existing and lesson_id in known_lessons)
+        ]
+
+        now = datetime.utcnow()
+        updates = [
+            {
+                "b_client_id": client_id,
+                "b_lesson_id": lesson_id,
+                "b_seconds": pending[(client_id, lesson_id)],
+                "b_last_accessed": last_seen[(client_id, lesson_id)],
+                "b_updated_at": now
+            }
+            for client_id, lesson_id in keys
+            if (client_id, lesson_id) in existing
+        ]
+
+        if updates:
+            table = Progress.__table__
+            statement = (
+                table.update()
+                .where(table.c.client_id == bindparam("b_client_id"))
+                .where(table.c.lesson_id == bindparam("b_lesson_id"))
+                .values(
+                    time_spent_seconds=table.c.time_spent_seconds + bindparam("b_seconds"),
+                    last_accessed=bindparam("b_last_accessed"),
+                    updated_at=bindparam("b_updated_at"),
+                    status=case(
+                        (table.c.status == "not_started", "in_progress"),
+                        else_=table.c.status
+                    )
+                )
+            )
+            db.connection().execute(statement, updates)
+
+        for client_id, lesson_id in keys:
+            key = (client_id, lesson_id)
+            if key in existing or lesson_id not in known_lessons:
+                continue
+            db.add(Progress(
+                id=str(uuid.uuid4()),
+                client_id=client_id,
+                lesson_id=lesson_id,
+                status="in_progress",
+                progress_percentage=0,
+                time_spent_seconds=pending[key],
+                last_accessed=last_seen[key],
+                bookmarked=False,
+                created_at=now,
+                updated_at=now
+            ))
+
+        dropped = [key for key in keys if key not in existing and key[1] not in known_lessons]
+        if dropped:
+            logger.warning("Dropped time increments for %d unknown lessons", len(dropped))
+
+        for client_id, lesson_id in started:
+            summary = summaries[client_id]
+            summary.apply_status_change(existing.get((client_id, lesson_id)), "in_progress")
+            summary.last_activity_at = last_seen[(client_id, lesson_id)]
+
+        return started
+
+    def _restore(self, pending: Dict[PendingKey, int], last_seen: Dict[PendingKey, datetime]) -> None:
+        """
+        Merge increments from a failed flush back into the buffer
+
+        Args:
+            pending: Seconds per (client, lesson) pair
+            last_seen: Last heartbeat time per pair
+        """
+        with self._lock:
+            for key, seconds in pending.items():
+                self._pending[key] += seconds
+                if key not in self._last_seen or self._last_seen[key] < last_seen[key]:
+                    self._last_seen[key] = last_seen[key]
+
+    def start(self, session_factory: Callable[[], Session]) -> None:
+        """
+        Start the background flush thread
+
+        Args:
+            session_factory: Callable returning a new database session
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._session_factory = session_factory
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="lesson-time-flush", daemon=True)
+        self._thread.start()
+        if not self._exit_hook_registered:
+            atexit.register(self.stop)
+            self._exit_hook_registered = True
+
+    def stop(self) -> None:
+        """Stop the background thread and flush whatever is still buffered"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval_seconds * 2)
+            self._thread = None
+        self._flush_with_new_session()
+
+    def _run(self) -> None:
+        """Background loop flushing on the interval or when the buffer fills"""
+        while not self._stop_event.is_set():
+            self._wake_event.wait(self.flush_interval_seconds)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                break
+            self._flush_with_new_session()
+
+    def _flush_with_new_session(self) -> None:
+        """Flush using a fresh session, logging (not raising) failures"""
+        if self._session_factory is None:
+            return
+
+        db = self._session_factory()
+        try:
+            self.flush(db)
+        except Exception:
+            # Already logged by flush; increments remain buffered for the next attempt
+            pass
+        finally:
+            db.close()
+
+
+# Shared buffer for the Education Hub time-tracking endpoint
+time_tracking_buffer = TimeTrackingBuffer()
@@ -0,0 +1,304 @@
+"""
+Franchise client directory.
+
+Client listings are keyset-paginated: each page is read in the order of one of
+the (franchise_id, ...) composite indexes on public.customers, continuing after
+the last row of the previous page, so deep pages cost the same as the first and
+no page repeats or skips rows when clients are added meanwhile. Name/email search
+uses the trigram indexes. The client performance report is streamed row by row
+from a server-side cursor as NDJSON or CSV instead of being built as one list.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import base64
+import csv
+import io
+import json
+
+from sqlalchemy import func, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from apps.franchise.tables import customers, orders
+
+# Listing sorts: (keyset column, descending)
+LIST_SORTS = {
+    "newest": (customers.c.created_at, True),
+    "last_activity": (customers.c.last_activity_at, True),
+    "name": (customers.c.name, False),
+}
+
+REPORT_SORTS = ("revenue", "orders", "last_activity", "name")
+REPORT_COLUMNS = (
+    "id", "name", "email", "status", "join_date", "last_activity_at",
+    "badge_earned", "orders_completed", "revenue", "last_order_date"
+)
+EXPORT_FORMATS = ("ndjson", "csv")
+
+MAX_PAGE_SIZE = 200
+
+# Rows fetched per round trip while streaming the report
+STREAM_BATCH_SIZE = 500
+# Characters of formatted output sent per response chunk
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _escape_like(term: str) -> str:
+    """Escape LIKE wildcards in a search term"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _encode_cursor(sort_by: str, value: Any, client_id: str) -> str:
+    """Encode the position after a row as an opaque cursor"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, value, client_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_by: str) -> List[Any]:
+    """
+    Decode a cursor for a sort.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, client_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort_by:
+        raise ValueError("Cursor does not match the requested sort")
+    if sort_by != "name":
+        value = datetime.fromisoformat(value)
+    return [value, client_id]
+
+
+def _describe(row: Any) -> Dict[str, Any]:
+    """Format a client row for the listing"""
+    return {
+        "id": row.id,
+        "name": row.name,
+        "email": row.email,
+        "phone": row.phone,
+        "company": row.company,
+        "status": row.status,
+        "join_date": row.created_at.date().isoformat(),
+        "last_activity_at": row.last_activity_at.isoformat(),
+        "badge_earned": row.badge_earned
+    }
+
+
+class ClientDirectory:
+    """
+    Keyset-paginated client listing and streamed client reports for a franchise.
+    """
+
+    def list_clients(
+        self,
+        db: Session,
+        franchise_id: int,
+        status: Optional[str] = None,
+        badge_earned: Optional[bool] = None,
+        active_since: Optional[datetime] = None,
+        inactive_since: Optional[datetime] = None,
+        search: Optional[str] = None,
+        sort_by: str = "newest",
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """
+        Get one page of a franchise's clients.
+
+        Args:
+            db: Database session
+            franchise_id: The ID of the franchise
+            status: Optional client status filter
+            badge_earned: Optional filter on the current badge state
+            active_since: Only clients with activity at or after this time
+            inactive_since: Only clients without activity since this time
+            search: Optional substring of the client name or email
+            sort_by: Sort order (newest, last_activity, name)
+            cursor: Cursor returned with the previous page
+            limit: Maximum number of clients (at most MAX_PAGE_SIZE)
+
+        Returns:
+            dict: Clients of the page and the cursor of the next page (None on the last page)
+
+        Raises:
+            ValueError: If the sort or cursor is invalid
+        """
+        if sort_by not in LIST_SORTS:
+            raise ValueError(f"Invalid sort_by. Must be one of: {', '.join(LIST_SORTS)}")
+        column, descending = LIST_SORTS[sort_by]
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        query = self._filtered(
+            select(customers), franchise_id, status, badge_earned, active_since, inactive_since, search
+        )
+        if cursor:
+            position = tuple_(column, customers.c.id)
+            after = _decode_cursor(cursor, sort_by)
+            query = query.where(position < tuple_(*after) if descending else position > tuple_(*after))
+        if descending:
+            query = query.order_by(column.desc(), customers.c.id.desc())
+        else:
+            query = query.order_by(column, customers.c.id)
+
+        # One extra row tells whether another page follows
+        rows = db.execute(query.limit(limit + 1)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = _encode_cursor(sort_by, getattr(last, column.key), last.id)
+
+        return {"items": [_describe(row) for row in rows], "next_cursor": next_cursor}
+
+    def stream_report(
+        self,
+        session_factory: Callable[[], Session],
+        franchise_id: int,
+        export_format: str = "ndjson",
+        status: Optional[str] = None,
+        sort_by: str = "revenue"
+    ) -> Iterator[str]:
+        """
+        Stream the client performance report.
+
+        The report is read through its own session, since the response body is
+        produced after the request's session may have been closed.
+
+        Args:
+            session_factory: Callable returning a new database session
+            franchise_id: The ID of the franchise
+            export_format: ndjson or csv
+            status: Optional client status filter
+            sort_by: Sort order (revenue, orders, last_activity, name)
+
+        Returns:
+            Iterator[str]: Report chunks of whole lines
+
+        Raises:
+            ValueError: If the format or sort is invalid
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Invalid format. Must be one of: {', '.join(EXPORT_FORMATS)}")
+        query = self._report_query(franchise_id, status, sort_by)
+        return self._stream(session_factory, query, export_format)
+
+    def _stream(self, session_factory: Callable[[], Session], query: Any, export_format: str) -> Iterator[str]:
+        """Yield formatted report chunks from a server-side cursor"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(REPORT_COLUMNS)
+
+        db = session_factory()
+        try:
+            result = db.execute(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+            for row in result:
+                record = {
+                    "id": row.id,
+                    "name": row.name,
+                    "email": row.email,
+                    "status": row.status,
+                    "join_date": row.created_at.date().isoformat(),
+                    "last_activity_at": row.last_activity_at.isoformat(),
+                    "badge_earned": row.badge_earned,
+                    "orders_completed": row.orders_completed,
+                    "revenue": float(row.revenue),
+                    "last_order_date": row.last_order_date.isoformat() if row.last_order_date else None
+                }
+                if export_format == "ndjson":
+                    buffer.write(json.dumps(record) + "\n")
+                else:
+                    writer.writerow(record[column] for column in REPORT_COLUMNS)
+                if buffer.tell() >= STREAM_CHUNK_SIZE:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        finally:
+            db.close()
+
+    def _report_query(self, franchise_id: int, status: Optional[str], sort_by: str) -> Any:
+        """Build the per-client report statement"""
+        if sort_by not in REPORT_SORTS:
+            raise ValueError(f"Invalid sort_by. Must be one of: {', '.join(REPORT_SORTS)}")
+
+        completed = (
+            select(
+                orders.c.customer_id,
+                func.count().label("orders_completed"),
+                func.sum(orders.c.amount).label("revenue"),
+                func.max(func.coalesce(orders.c.date, func.date(orders.c.created_at))).label("last_order_date")
+            )
+            .where(orders.c.status == "completed")
+            .where(orders.c.customer_id.in_(select(customers.c.id).where(customers.c.franchise_id == franchise_id)))
+            .group_by(orders.c.customer_id)
+            .subquery()
+        )
+        orders_completed = func.coalesce(completed.c.orders_completed, 0).label("orders_completed")
+        revenue = func.coalesce(completed.c.revenue, Decimal(0)).label("revenue")
+
+        query = (
+            select(
+                customers.c.id,
+                customers.c.name,
+                customers.c.email,
+                customers.c.status,
+                customers.c.created_at,
+                customers.c.last_activity_at,
+                customers.c.badge_earned,
+                orders_completed,
+                revenue,
+                completed.c.last_order_date
+            )
+            .select_from(customers.outerjoin(completed, completed.c.customer_id == customers.c.id))
+            .where(customers.c.franchise_id == franchise_id)
+        )
+        if status:
+            query = query.where(customers.c.status == status)
+
+        order = {
+            "revenue": revenue.desc(),
+            "orders": orders_completed.desc(),
+            "last_activity": customers.c.last_activity_at.desc(),
+            "name": customers.c.name.asc(),
+        }[sort_by]
+        return query.order_by(order, customers.c.id)
+
+    def _filtered(
+        self,
+        query: Any,
+        franchise_id: int,
+        status: Optional[str],
+        badge_earned: Optional[bool],
+        active_since: Optional[datetime],
+        inactive_since: Optional[datetime],
+        search: Optional[str]
+    ) -> Any:
+        """Apply the listing filters"""
+        query = query.where(customers.c.franchise_id == franchise_id)
+        if status:
+            query = query.where(customers.c.status == status)
+        if badge_earned is not None:
+            query = query.where(customers.c.badge_earned == badge_earned)
+        if active_since is not None:
+            query = query.where(customers.c.last_activity_at >= active_since)
+        if inactive_since is not None:
+            query = query.where(customers.c.last_activity_at < inactive_since)
+        if search and search.strip():
+            pattern = f"%{_escape_like(search.strip())}%"
+            query = query.where(or_(
+                customers.c.name.ilike(pattern, escape="\\"),
+                customers.c.email.ilike(pattern, escape="\\")
+            ))
+        return query
+
+
+# Shared directory instance
+client_directory = ClientDirectory()
@@ -1,18 +1,52 @@
 """
 Franchise API router for Local Lift application.
 """
+from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Path
+# The client endpoints take a `status` filter that shadows the module
+from fastapi import status as http_status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from core.auth.router import get_current_active_user
 from core.auth.schemas import UserRead, UserCreate, UserUpdate
-from core.database.connection import get_db
+from core.database.connection import SessionLocal, get_db
+from apps.franchise.client_directory import MAX_PAGE_SIZE, client_directory
+from apps.franchise.task_store import MAX_CHANGES, MAX_TASKS, task_store
+from addons.certifications.progress import enrollment_store
+from addons.leaderboards.tables import participants
 
 router = APIRouter()
 
 
+def _current_franchise_id(db: Session, current_user: UserRead) -> Optional[int]:
+    """Get the franchise the current user belongs to, if known"""
+    return db.execute(
+        select(participants.c.franchise_id).where(participants.c.user_id == str(current_user.id))
+    ).scalar()
+
+
+def _require_franchise(db: Session, current_user: UserRead) -> int:
+    """Get the current franchise user's franchise, rejecting other users"""
+    # Check if user is a franchise owner/manager
+    if current_user.role != "franchise":
+        raise HTTPException(
+            status_code=http_status.HTTP_403_FORBIDDEN,
+            detail="Access restricted to franchise users"
+        )
+    
+    franchise_id = _current_franchise_id(db, current_user)
+    if franchise_id is None:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="No franchise is assigned to this user"
+        )
+    return franchise_id
+
+
 # Franchise Management
 @router.get("/info", response_model=dict)
 async def get_franchise_info(
@@ -63,98 +97,63 @@ async def get_franchise_info(
 
 
 # Client Management
-@router.get("/clients", response_model=List[dict])
+@router.get("/clients", response_model=dict)
 async def get_franchise_clients(
     status: Optional[str] = None,
-    search: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 100,
+    badge_earned: Optional[bool] = None,
+    active_since: Optional[datetime] = None,
+    inactive_since: Optional[datetime] = None,
+    search: Optional[str] = Query(None, max_length=100),
+    sort_by: str = "newest",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get clients managed by this franchise.
+    Get clients managed by this franchise, one page at a time.
     
     Args:
-        status: Filter by client status (active, inactive, pending)
+        status: Filter by client status (active, inactive, lead, prospect, churned)
+        badge_earned: Filter by current badge state
+        active_since: Only clients with activity since this time
+        inactive_since: Only clients without activity since this time
         search: Search by client name or email
-        skip: Number of records to skip (pagination)
+        sort_by: Sort order (newest, last_activity, name)
+        cursor: Cursor returned with the previous page
         limit: Maximum number of records to return
         current_user: Current authenticated user
         db: Database session
         
     Returns:
-        List[dict]: List of clients
+        dict: Clients of the page and the cursor of the next page
     """
     # Check if user is a franchise owner/manager
     if current_user.role != "franchise":
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
+            status_code=http_status.HTTP_403_FORBIDDEN,
             detail="Access restricted to franchise users"
         )
     
-    # This is a placeholder - in a real implementation, you would fetch clients from the database
-    
-    # For now, we'll simulate clients data
-    clients = [
-        {
-            "id": 101,
-            "name": "Acme Corporation",
-            "email": "contact@acme.com",
-            "phone": "555-111-2222",
-            "address": "789 Oak St, San Francisco, CA 94103",
-            "business_type": "Retail",
-            "join_date": "2024-01-20",
-            "status": "active",
-            "gmb_linked": True,
-            "points": 250,
-            "completed_tasks": 15,
-            "pending_tasks": 2
-        },
-        {
-            "id": 102,
-            "name": "Bay Area Tech Solutions",
-            "email": "info@bayareatech.com",
-            "phone": "555-333-4444",
-            "address": "456 Pine St, San Francisco, CA 94102",
-            "business_type": "Technology",
-            "join_date": "2024-02-10",
-            "status": "active",
-            "gmb_linked": True,
-            "points": 180,
-            "completed_tasks": 12,
-            "pending_tasks": 1
-        },
-        {
-            "id": 103,
-            "name": "Golden Gate Consulting",
-            "email": "hello@ggconsulting.com",
-            "phone": "555-555-6666",
-            "address": "123 Market St, San Francisco, CA 94105",
-            "business_type": "Professional Services",
-            "join_date": "2024-03-05",
-            "status": "pending",
-            "gmb_linked": False,
-            "points": 50,
-            "completed_tasks": 3,
-            "pending_tasks": 5
-        }
-    ]
-    
-    # Apply status filter if provided
-    if status:
-        clients = [client for client in clients if client["status"] == status]
-    
-    # Apply search filter if provided
-    if search:
-        search = search.lower()
-        clients = [
-            client for client in clients 
-            if search in client["name"].lower() or search in client["email"].lower()
-        ]
-    
-    # Apply pagination
-    return clients[skip:skip+limit]
+    franchise_id = _current_franchise_id(db, current_user)
+    if franchise_id is None:
+        return {"items": [], "next_cursor": None}
+    
+    try:
+        return client_directory.list_clients(
+            db,
+            franchise_id,
+            status=status,
+            badge_earned=badge_earned,
+            active_since=active_since,
+            inactive_since=inactive_since,
+            search=search,
+            sort_by=sort_by,
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.post("/clients", response_model=dict, status_code=status.HTTP_201_CREATED)
@@ -425,6 +424,12 @@ async def get_franchise_dashboard(
         ]
     }
     
+    # Certification metrics come from the enrollment rollups
+    franchise_id = _current_franchise_id(db, current_user)
+    if franchise_id is not None:
+        education = enrollment_store.get_group_stats(db, franchise_id=franchise_id)
+        dashboard["client_engagement"]["certified_clients"] = education["certified_users"]
+    
     return dashboard
 
 
@@ -432,98 +437,145 @@ async def get_franchise_dashboard(
 async def get_franchise_tasks(
     status: Optional[str] = None,
     priority: Optional[str] = None,
-    client_id: Optional[int] = None,
+    client_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_TASKS),
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get tasks for the franchise.
+    Get tasks for the franchise, by priority then due date.
     
     Args:
-        status: Filter by task status (pending, assigned, completed, overdue)
+        status: Filter by task status (pending, assigned, completed, cancelled, overdue)
         priority: Filter by priority (high, medium, low)
         client_id: Filter by client ID
+        limit: Maximum number of tasks to return
         current_user: Current authenticated user
         db: Database session
         
     Returns:
         List[dict]: List of tasks
     """
-    # Check if user is a franchise owner/manager
-    if current_user.role != "franchise":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access restricted to franchise users"
-        )
+    franchise_id = _require_franchise(db, current_user)
     
-    # This is a placeholder - in a real implementation, you would fetch tasks from the database
+    try:
+        return task_store.list_tasks(db, franchise_id, status=status, priority=priority, client_id=client_id, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/tasks/next", response_model=List[dict])
+async def get_next_tasks(
+    limit: int = Query(10, ge=1, le=MAX_TASKS),
+    mine: bool = False,
+    current_user: UserRead = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the next actionable (pending or assigned) tasks, most urgent first.
     
-    # For now, we'll simulate tasks data
-    tasks = [
-        {
-            "id": 1001,
-            "title": "Client onboarding: San Francisco Bakery",
-            "description": "Complete GMB profile setup and initial training",
-            "status": "pending",
-            "priority": "high",
-            "client_id": 125,
-            "client_name": "San Francisco Bakery",
-            "assigned_to": None,
-            "created_date": "2025-04-14",
-            "due_date": "2025-04-21"
-        },
-        {
-            "id": 1002,
-            "title": "Quarterly review: Acme Corporation",
-            "description": "Review Q1 performance and plan Q2 strategy",
-            "status": "pending",
-            "priority": "medium",
-            "client_id": 101,
-            "client_name": "Acme Corporation",
-            "assigned_to": current_user.id,
-            "created_date": "2025-04-10",
-            "due_date": "2025-04-25"
-        },
-        {
-            "id": 1003,
-            "title": "GMB optimization: Golden Gate Consulting",
-            "description": "Complete GMB verification and optimize profile",
-            "status": "assigned",
-            "priority": "high",
-            "client_id": 103,
-            "client_name": "Golden Gate Consulting",
-            "assigned_to": current_user.id,
-            "created_date": "2025-04-08",
-            "due_date": "2025-04-18"
-        },
-        {
-            "id": 1004,
-            "title": "Follow-up training: Bay Area Tech Solutions",
-            "description": "Schedule advanced GMB training session",
-            "status": "completed",
-            "priority": "medium",
-            "client_id": 102,
-            "client_name": "Bay Area Tech Solutions",
-            "assigned_to": current_user.id,
-            "created_date": "2025-04-01",
-            "due_date": "2025-04-12",
-            "completed_date": "2025-04-10"
-        }
-    ]
+    Args:
+        limit: Number of tasks to return
+        mine: Only tasks assigned to the current user or unassigned
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        List[dict]: Open tasks by priority, then due date
+    """
+    franchise_id = _require_franchise(db, current_user)
+    
+    return task_store.next_actionable(db, franchise_id, limit=limit, assigned_to=str(current_user.id) if mine else None)
+
+
+@router.get("/tasks/changes", response_model=dict)
+async def get_task_changes(
+    cursor: Optional[str] = None,
+    limit: int = Query(200, ge=1, le=MAX_CHANGES),
+    current_user: UserRead = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the tasks created or changed since a cursor.
+    
+    Start without a cursor to load every task, then pass the returned cursor
+    on each poll to receive only the tasks written since.
+    
+    Args:
+        cursor: Cursor returned by the previous call
+        limit: Maximum number of changed tasks to return
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        dict: Changed tasks, the next cursor and whether more changes are waiting
+    """
+    franchise_id = _require_franchise(db, current_user)
+    
+    try:
+        return task_store.changes(db, franchise_id, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/tasks", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def create_task(
+    task_data: dict,
+    current_user: UserRead = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Create a task for the franchise.
+    
+    Args:
+        task_data: Task data (title, description, priority, client_id, assigned_to, due_date)
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        dict: The newly created task
+    """
+    franchise_id = _require_franchise(db, current_user)
+    
+    try:
+        return task_store.create(db, franchise_id, task_data, created_by=str(current_user.id))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.patch("/tasks/{task_id}", response_model=dict)
+async def update_task(
+    task_data: dict,
+    task_id: int = Path(..., ge=1),
+    current_user: UserRead = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Update a task's status, priority, assignment or due date.
     
-    # Apply status filter if provided
-    if status:
-        tasks = [task for task in tasks if task["status"] == status]
+    Args:
+        task_data: Fields to change
+        task_id: The ID of the task
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        dict: The updated task
+    """
+    franchise_id = _require_franchise(db, current_user)
     
-    # Apply priority filter if provided
-    if priority:
-        tasks = [task for task in tasks if task["priority"] == priority]
+    try:
+        task = task_store.update(db, franchise_id, task_id, task_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    # Apply client filter if provided
-    if client_id:
-        tasks = [task for task in tasks if task["client_id"] == client_id]
+    if task is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
     
-    return tasks
+    return task
 
 
 # Reports
@@ -607,114 +659,66 @@ async def get_franchise_performance_report(
         ]
     }
     
+    franchise_id = _current_franchise_id(db, current_user)
+    if franchise_id is not None:
+        education = enrollment_store.get_group_stats(db, franchise_id=franchise_id)
+        report["franchise_id"] = franchise_id
+        report["education_metrics"].update(
+            courses_enrolled=education["courses_enrolled"],
+            courses_completed=education["courses_completed"],
+            certification_rate=education["certification_rate"]
+        )
+    
     return report
 
 
-@router.get("/reports/clients", response_model=List[dict])
+@router.get("/reports/clients")
 async def get_client_performance_report(
     status: Optional[str] = None,
-    sort_by: Optional[str] = "performance",
+    sort_by: Optional[str] = "revenue",
+    format: str = "ndjson",
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get client performance report for the franchise.
+    Export the client performance report for the franchise.
+    
+    Rows are streamed as they are read, one JSON object per line (ndjson) or
+    as CSV with a header row.
     
     Args:
-        status: Filter by client status (active, inactive, pending)
-        sort_by: Sort clients by field (performance, points, tasks, reviews)
+        status: Filter by client status (active, inactive, lead, prospect, churned)
+        sort_by: Sort clients by field (revenue, orders, last_activity, name)
+        format: Export format (ndjson, csv)
         current_user: Current authenticated user
         db: Database session
         
     Returns:
-        List[dict]: Client performance data
+        StreamingResponse: Client performance rows
     """
     # Check if user is a franchise owner/manager
     if current_user.role != "franchise":
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
+            status_code=http_status.HTTP_403_FORBIDDEN,
             detail="Access restricted to franchise users"
         )
     
-    # This is a placeholder - in a real implementation, you would fetch client data from the database
+    franchise_id = _current_franchise_id(db, current_user)
+    if franchise_id is None:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="No franchise is assigned to this user"
+        )
     
-    # For now, we'll simulate client performance data
-    clients = [
-        {
-            "id": 101,
-            "name": "Acme Corporation",
-            "status": "active",
-            "join_date": "2024-01-20",
-            "performance_index": 95,
-            "points": 250,
-            "tasks_completed": 15,
-            "tasks_pending": 2,
-            "gmb_metrics": {
-                "rating": 4.7,
-                "reviews": 35,
-                "review_responses": 33,
-                "response_rate": 94.3
-            },
-            "education": {
-                "courses_completed": 1,
-                "certifications": 1
-            }
-        },
-        {
-            "id": 102,
-            "name": "Bay Area Tech Solutions",
-            "status": "active",
-            "join_date": "2024-02-10",
-            "performance_index": 88,
-            "points": 180,
-            "tasks_completed": 12,
-            "tasks_pending": 1,
-            "gmb_metrics": {
-                "rating": 4.5,
-                "reviews": 28,
-                "review_responses": 25,
-                "response_rate": 89.3
-            },
-            "education": {
-                "courses_completed": 0,
-                "courses_in_progress": 1,
-                "certifications": 0
-            }
-        },
-        {
-            "id": 105,
-            "name": "Pacific Heights Realty",
-            "status": "active",
-            "join_date": "2024-01-25",
-            "performance_index": 92,
-            "points": 235,
-            "tasks_completed": 18,
-            "tasks_pending": 0,
-            "gmb_metrics": {
-                "rating": 4.8,
-                "reviews": 42,
-                "review_responses": 40,
-                "response_rate": 95.2
-            },
-            "education": {
-                "courses_completed": 2,
-                "certifications": 1
-            }
-        }
-    ]
-    
-    # Apply status filter if provided
-    if status:
-        clients = [client for client in clients if client["status"] == status]
-    
-    # Apply sorting
-    if sort_by == "performance":
-        clients = sorted(clients, key=lambda x: x["performance_index"], reverse=True)
-    elif sort_by == "points":
-        clients = sorted(clients, key=lambda x: x["points"], reverse=True)
-    elif sort_by == "tasks":
-        clients = sorted(clients, key=lambda x: x["tasks_completed"], reverse=True)
-    elif sort_by == "reviews":
-        clients = sorted(clients, key=lambda x: x["gmb_metrics"]["reviews"], reverse=True)
-    
-    return clients
+    try:
+        lines = client_directory.stream_report(SessionLocal, franchise_id, format, status=status, sort_by=sort_by)
+    except ValueError as e:
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"client-performance-{franchise_id}.{format}"
+    return StreamingResponse(
+        lines,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
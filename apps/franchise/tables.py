@@ -0,0 +1,36 @@
+"""
+Table definitions for the CRM tables read by the franchise portal.
+
+These mirror the tables created by the Supabase migrations so the client
+directory can build keyset-paginated statements with SQLAlchemy Core.
+"""
+from sqlalchemy import MetaData, Table, Column, Boolean, Date, DateTime, Integer, Numeric, String, func
+from sqlalchemy.dialects.postgresql import UUID
+
+metadata = MetaData(schema="public")
+
+customers = Table(
+    "customers", metadata,
+    Column("id", UUID(as_uuid=False), primary_key=True),
+    Column("name", String, nullable=False),
+    Column("email", String),
+    Column("phone", String),
+    Column("company", String),
+    Column("status", String, default="active"),
+    Column("assigned_to", UUID(as_uuid=False)),
+    Column("franchise_id", Integer),
+    Column("badge_earned", Boolean, nullable=False, default=False),
+    Column("last_activity_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+orders = Table(
+    "orders", metadata,
+    Column("id", UUID(as_uuid=False), primary_key=True),
+    Column("customer_id", UUID(as_uuid=False), nullable=False),
+    Column("amount", Numeric(10, 2), nullable=False),
+    Column("status", String, default="pending"),
+    Column("date", Date),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
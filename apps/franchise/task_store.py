@@ -0,0 +1,366 @@
+"""
+Franchise task store.
+
+Tasks live in regional.franchise_tasks. Listings read the (franchise, status,
+priority, due_date) index in queue order, and the "next actionable" query walks
+a partial index over open tasks so it reads only the rows it returns.
+
+The portal keeps its task list current through the change feed instead of
+re-reading the full list: every write stamps the row with its transaction ID,
+and the feed returns rows in (change_xid, id) order after the caller's cursor,
+up to the oldest transaction still in progress. A transaction that commits
+later always has an ID at or above that horizon, so no change is skipped.
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, text, tuple_, update
+from sqlalchemy.orm import Session
+
+from core.reporting import utc_today
+from apps.franchise.tables import customers
+from apps.regional_manager.franchise_metrics import franchise_metrics_cube
+from apps.regional_manager.tables import franchise_tasks
+
+PRIORITIES = {"high": 1, "medium": 2, "low": 3}
+PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+TASK_STATUSES = ("pending", "assigned", "completed", "cancelled")
+OPEN_STATUSES = ("pending", "assigned")
+
+MAX_TASKS = 200
+MAX_CHANGES = 500
+
+
+
+def _encode_cursor(change_xid: int, task_id: int) -> str:
+    """Encode a change feed position"""
+    return f"{change_xid}.{task_id}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    Decode a change feed position.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        change_xid, task_id = cursor.split(".")
+        return int(change_xid), int(task_id)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def _check_client(db: Session, franchise_id: int, client_id: Optional[str]) -> Optional[str]:
+    """
+    Check that a task's client belongs to the franchise.
+
+    Returns:
+        str: The client ID, or None for a task without a client
+
+    Raises:
+        ValueError: If the client is not one of the franchise's customers
+    """
+    if client_id is None:
+        return None
+    try:
+        client_id = str(UUID(str(client_id)))
+    except ValueError:
+        raise ValueError("Invalid client_id")
+
+    found = db.execute(
+        select(customers.c.id)
+        .where(customers.c.id == client_id)
+        .where(customers.c.franchise_id == franchise_id)
+    ).first()
+    if found is None:
+        raise ValueError("Client not found in this franchise")
+    return client_id
+
+
+def _priority(name: str) -> int:
+    """
+    Map a priority name to its stored value.
+
+    Raises:
+        ValueError: If the priority is unknown
+    """
+    if name not in PRIORITIES:
+        raise ValueError(f"Invalid priority. Must be one of: {', '.join(PRIORITIES)}")
+    return PRIORITIES[name]
+
+
+class TaskStore:
+    """
+    Reads and writes franchise tasks.
+    """
+
+    def list_tasks(
+        self,
+        db: Session,
+        franchise_id: int,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        client_id: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        List a franchise's tasks in queue order (priority, then due date).
+
+        Args:
+            db: Database session
+            franchise_id: The ID of the franchise
+            status: Optional status filter; overdue selects open tasks past their due date
+            priority: Optional priority filter (high, medium, low)
+            client_id: Optional client filter
+            limit: Maximum number of tasks (at most MAX_TASKS)
+
+        Returns:
+            List[dict]: Tasks
+
+        Raises:
+            ValueError: If the status or priority is unknown or the client is another franchise's
+        """
+        query = self._query().where(franchise_tasks.c.franchise_id == franchise_id)
+        if status == "overdue":
+            query = query.where(franchise_tasks.c.status.in_(OPEN_STATUSES)).where(franchise_tasks.c.due_date < utc_today())
+        elif status:
+            if status not in TASK_STATUSES:
+                raise ValueError(f"Invalid status. Must be one of: {', '.join(TASK_STATUSES + ('overdue',))}")
+            query = query.where(franchise_tasks.c.status == status)
+        if priority:
+            query = query.where(franchise_tasks.c.priority == _priority(priority))
+        if client_id:
+            query = query.where(franchise_tasks.c.client_id == client_id)
+
+        query = query.order_by(
+            franchise_tasks.c.priority, franchise_tasks.c.due_date.nulls_last(), franchise_tasks.c.id
+        ).limit(max(1, min(limit, MAX_TASKS)))
+        return [self.describe(row) for row in db.execute(query).all()]
+
+    def next_actionable(
+        self,
+        db: Session,
+        franchise_id: int,
+        limit: int = 10,
+        assigned_to: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the next open tasks to work on, most urgent first.
+
+        Args:
+            db: Database session
+            franchise_id: The ID of the franchise
+            limit: Number of tasks (at most MAX_TASKS)
+            assigned_to: Optionally only tasks assigned to this user or unassigned
+
+        Returns:
+            List[dict]: Open tasks by priority, then due date
+        """
+        # Matches the partial index's predicate and order exactly
+        query = (
+            self._query()
+            .where(franchise_tasks.c.franchise_id == franchise_id)
+            .where(franchise_tasks.c.status.in_(OPEN_STATUSES))
+            .order_by(franchise_tasks.c.priority, franchise_tasks.c.due_date, franchise_tasks.c.id)
+            .limit(max(1, min(limit, MAX_TASKS)))
+        )
+        if assigned_to:
+            query = query.where(
+                (franchise_tasks.c.assigned_to == assigned_to) | franchise_tasks.c.assigned_to.is_(None)
+            )
+        return [self.describe(row) for row in db.execute(query).all()]
+
+    def changes(self, db: Session, franchise_id: int, cursor: Optional[str] = None, limit: int = 200) -> Dict[str, Any]:
+        """
+        Get the tasks written since a change feed cursor.
+
+        Args:
+            db: Database session
+            franchise_id: The ID of the franchise
+            cursor: Cursor returned by the previous call (omit to start from the beginning)
+            limit: Maximum number of changed tasks (at most MAX_CHANGES)
+
+        Returns:
+            dict: Changed tasks (current state, oldest change first), the cursor to
+                pass next and whether more changes are already available
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(limit, MAX_CHANGES))
+        horizon = db.execute(text("SELECT regional.task_feed_horizon()")).scalar()
+
+        query = (
+            self._query()
+            .where(franchise_tasks.c.franchise_id == franchise_id)
+            .where(franchise_tasks.c.change_xid < horizon)
+            .order_by(franchise_tasks.c.change_xid, franchise_tasks.c.id)
+            .limit(limit + 1)
+        )
+        if cursor:
+            query = query.where(tuple_(franchise_tasks.c.change_xid, franchise_tasks.c.id) > tuple_(*_decode_cursor(cursor)))
+
+        rows = db.execute(query).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if rows:
+            cursor = _encode_cursor(rows[-1].change_xid, rows[-1].id)
+
+        return {
+            "changes": [self.describe(row) for row in rows],
+            "cursor": cursor or _encode_cursor(0, 0),
+            "has_more": has_more
+        }
+
+    def create(self, db: Session, franchise_id: int, data: Dict[str, Any], created_by: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Create a task (commits).
+
+        Args:
+            db: Database session
+            franchise_id: The ID of the franchise
+            data: Task fields (title, description, priority, client_id, assigned_to, due_date)
+            created_by: The ID of the creating user
+
+        Returns:
+            dict: The created task
+
+        Raises:
+            ValueError: If the title is missing, the priority is unknown or the client is another franchise's
+        """
+        if not data.get("title"):
+            raise ValueError("title is required")
+        client_id = _check_client(db, franchise_id, data.get("client_id"))
+
+        task_id = db.execute(
+            franchise_tasks.insert()
+            .values(
+                franchise_id=franchise_id,
+                title=data["title"],
+                description=data.get("description"),
+                priority=_priority(data.get("priority", "medium")),
+                client_id=client_id,
+                assigned_to=data.get("assigned_to"),
+                status="assigned" if data.get("assigned_to") else "pending",
+                due_date=data.get("due_date"),
+                created_by=created_by
+            )
+            .returning(franchise_tasks.c.id)
+        ).scalar()
+        franchise_metrics_cube.record(db, franchise_id, tasks_total=1)
+        db.commit()
+        return self.get(db, franchise_id, task_id)
+
+    def update(self, db: Session, franchise_id: int, task_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Update a task's status, priority, assignment, client or due date (commits).
+
+        Args:
+            db: Database session
+            franchise_id: The ID of the franchise
+            task_id: The ID of the task
+            data: Fields to change
+
+        Returns:
+            dict: The updated task, or None if the franchise has no such task
+
+        Raises:
+            ValueError: If the status or priority is unknown
+        """
+        values: Dict[str, Any] = {}
+        if "status" in data:
+            if data["status"] not in TASK_STATUSES:
+                raise ValueError(f"Invalid status. Must be one of: {', '.join(TASK_STATUSES)}")
+            values["status"] = data["status"]
+        if "priority" in data:
+            values["priority"] = _priority(data["priority"])
+        for field in ("title", "description", "assigned_to", "due_date"):
+            if field in data:
+                values[field] = data[field]
+        if "client_id" in data:
+            values["client_id"] = _check_client(db, franchise_id, data["client_id"])
+        if not values:
+            return self.get(db, franchise_id, task_id)
+
+        # Lock the row so the completion delta is counted once
+        previous = db.execute(
+            select(franchise_tasks.c.status)
+            .where(franchise_tasks.c.id == task_id)
+            .where(franchise_tasks.c.franchise_id == franchise_id)
+            .with_for_update()
+        ).scalar()
+        if previous is None:
+            db.rollback()
+            return None
+
+        db.execute(update(franchise_tasks).where(franchise_tasks.c.id == task_id).values(**values))
+        status = values.get("status", previous)
+        if (status == "completed") != (previous == "completed"):
+            franchise_metrics_cube.record(db, franchise_id, tasks_completed=1 if status == "completed" else -1)
+        db.commit()
+        return self.get(db, franchise_id, task_id)
+
+    def get(self, db: Session, franchise_id: int, task_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get one of a franchise's tasks.
+
+        Args:
+            db: Database session
+            franchise_id: The ID of the franchise
+            task_id: The ID of the task
+
+        Returns:
+            dict or None if the franchise has no such task
+        """
+        row = db.execute(
+            self._query()
+            .where(franchise_tasks.c.id == task_id)
+            .where(franchise_tasks.c.franchise_id == franchise_id)
+        ).first()
+        return self.describe(row) if row is not None else None
+
+    def describe(self, row: Any, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Format a task row for API responses.
+
+        Args:
+            row: Task row with client_name
+            today: Reference date for the overdue flag
+
+        Returns:
+            dict: Task
+        """
+        today = today or utc_today()
+        return {
+            "id": row.id,
+            "title": row.title,
+            "description": row.description,
+            "status": row.status,
+            "priority": PRIORITY_NAMES[row.priority],
+            "client_id": row.client_id,
+            "client_name": row.client_name,
+            "assigned_to": row.assigned_to,
+            "created_date": row.created_at.date().isoformat(),
+            "due_date": row.due_date.isoformat() if row.due_date else None,
+            "completed_date": row.completed_at.date().isoformat() if row.completed_at else None,
+            "overdue": row.status in OPEN_STATUSES and row.due_date is not None and row.due_date < today,
+            "updated_at": row.updated_at.isoformat()
+        }
+
+    def _query(self) -> Any:
+        """Select tasks with their client's name (only clients of the task's franchise)"""
+        return (
+            select(franchise_tasks, customers.c.name.label("client_name"))
+            .select_from(franchise_tasks.outerjoin(
+                customers,
+                (customers.c.id == franchise_tasks.c.client_id)
+                & (customers.c.franchise_id == franchise_tasks.c.franchise_id)
+            ))
+        )
+
+
+# Shared store instance
+task_store = TaskStore()
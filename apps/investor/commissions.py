@@ -0,0 +1,245 @@
+"""
+Investor commission engine.
+
+Commissions are accrued into investor.commission_daily, one bucket per
+(investor, day, region), by a trigger on orders as they are completed, edited
+or reversed. Reports for a day, week, month, quarter, year or any custom date
+range read the day buckets of the range (and of the equally long range before
+it, for the comparison) in one indexed scan and roll them up in memory, so no
+report scans orders.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from core.reporting import add_months, format_change
+from apps.investor.tables import commission_daily, holdings
+from apps.regional_manager.tables import regions
+
+logger = logging.getLogger(__name__)
+
+TIME_PERIODS = ("day", "week", "month", "quarter", "year")
+
+# Custom ranges up to these lengths (in days) trend by day, then by week; longer ones by month
+DAILY_TREND_MAX_DAYS = 31
+WEEKLY_TREND_MAX_DAYS = 120
+
+
+def period_range(time_period: str, today: date) -> Tuple[date, date]:
+    """
+    Get the calendar period containing a date.
+
+    Args:
+        time_period: day, week, month, quarter or year
+        today: Reference date
+
+    Returns:
+        tuple: (first day, last day) of the period, inclusive
+
+    Raises:
+        ValueError: If the period is unknown
+    """
+    if time_period == "day":
+        return today, today
+    if time_period == "week":
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=6)
+    if time_period == "month":
+        start = today.replace(day=1)
+    elif time_period == "quarter":
+        start = date(today.year, 3 * ((today.month - 1) // 3) + 1, 1)
+    elif time_period == "year":
+        start = date(today.year, 1, 1)
+    else:
+        raise ValueError(f"Invalid time period. Must be one of: {', '.join(TIME_PERIODS)}")
+
+    months = {"month": 1, "quarter": 3, "year": 12}[time_period]
+    end = add_months(start, months) - timedelta(days=1)
+    return start, end
+
+
+def trend_bucket(time_period: Optional[str], start: date, end: date) -> str:
+    """Choose the trend granularity for a period or custom range"""
+    if time_period in ("day", "week"):
+        return "day"
+    if time_period == "month":
+        return "week"
+    if time_period in ("quarter", "year"):
+        return "month"
+
+    days = (end - start).days + 1
+    if days <= DAILY_TREND_MAX_DAYS:
+        return "day"
+    if days <= WEEKLY_TREND_MAX_DAYS:
+        return "week"
+    return "month"
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    """Truncate a day to the start of its trend bucket"""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+
+class CommissionEngine:
+    """
+    Commission reports over the pre-aggregated day buckets.
+    """
+
+    def report(
+        self,
+        db: Session,
+        investor_id: str,
+        start: date,
+        end: date,
+        region_id: Optional[int] = None,
+        time_period: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Build a commission report for an inclusive date range.
+
+        Args:
+            db: Database session
+            investor_id: The ID of the investor
+            start: First day of the range
+            end: Last day of the range
+            region_id: Optional region filter
+            time_period: Calendar period the range represents (None for custom ranges)
+
+        Returns:
+            dict: Total, change against the previous range, breakdown by region and trend
+        """
+        length = (end - start).days + 1
+        previous_start = start - timedelta(days=length)
+
+        query = (
+            select(
+                commission_daily.c.day,
+                commission_daily.c.region_id,
+                commission_daily.c.commission,
+                commission_daily.c.order_amount,
+                commission_daily.c.orders_count
+            )
+            .where(commission_daily.c.investor_id == str(investor_id))
+            .where(commission_daily.c.day >= previous_start)
+            .where(commission_daily.c.day <= end)
+        )
+        if region_id is not None:
+            query = query.where(commission_daily.c.region_id == region_id)
+
+        bucket = trend_bucket(time_period, start, end)
+        total = Decimal(0)
+        previous_total = Decimal(0)
+        by_region: Dict[int, List[Decimal]] = defaultdict(lambda: [Decimal(0), Decimal(0), 0])
+        trend: Dict[date, Decimal] = defaultdict(Decimal)
+
+        for row in db.execute(query):
+            if row.day < start:
+                previous_total += row.commission
+                continue
+            total += row.commission
+            region_totals = by_region[row.region_id]
+            region_totals[0] += row.commission
+            region_totals[1] += row.order_amount
+            region_totals[2] += row.orders_count
+            trend[_bucket_start(row.day, bucket)] += row.commission
+
+        names = self._region_names(db, by_region)
+        commission_by_region = [
+            {
+                "region_id": region,
+                "region_name": names.get(region),
+                "amount": float(amount),
+                "order_amount": float(order_amount),
+                "orders": orders,
+                "percentage": round(float(amount * 100 / total), 2) if total else 0.0
+            }
+            for region, (amount, order_amount, orders) in sorted(by_region.items(), key=lambda item: -item[1][0])
+        ]
+
+        # Every bucket in the range is listed so gaps show as zero
+        commission_trend = []
+        cursor = _bucket_start(start, bucket)
+        while cursor <= end:
+            commission_trend.append({"date": cursor.isoformat(), "amount": float(trend.get(cursor, 0))})
+            if bucket == "day":
+                cursor += timedelta(days=1)
+            elif bucket == "week":
+                cursor += timedelta(days=7)
+            else:
+                cursor = add_months(cursor, 1)
+
+        return {
+            "time_period": time_period or "custom",
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "total_commission": float(total),
+            "previous_commission": float(previous_total),
+            "compared_to_previous": format_change(total, previous_total),
+            "commission_by_region": commission_by_region,
+            "trend_interval": bucket,
+            "commission_trend": commission_trend
+        }
+
+    def holds_region(self, db: Session, investor_id: str, region_id: int) -> bool:
+        """
+        Check whether an investor holds (or held) a region.
+
+        Args:
+            db: Database session
+            investor_id: The ID of the investor
+            region_id: The ID of the region
+
+        Returns:
+            bool: Whether a holding exists
+        """
+        return db.execute(
+            select(holdings.c.id)
+            .where(holdings.c.investor_id == str(investor_id))
+            .where(holdings.c.region_id == region_id)
+            .limit(1)
+        ).first() is not None
+
+    def rebuild(self, db: Session, start: date, end: date, investor_id: Optional[str] = None) -> int:
+        """
+        Recompute the day buckets of a range from orders (commits).
+
+        Needed after holdings or commission rates change, since accrual only
+        applies the rates in effect when each order was recorded.
+
+        Args:
+            db: Database session
+            start: First day to rebuild
+            end: Last day to rebuild
+            investor_id: Optional investor to rebuild (all when omitted)
+
+        Returns:
+            int: Number of day buckets written
+        """
+        rows = db.execute(
+            text("SELECT investor.rebuild_commissions(:start, :end, CAST(:investor_id AS UUID))"),
+            {"start": start, "end": end, "investor_id": str(investor_id) if investor_id else None}
+        ).scalar()
+        db.commit()
+        logger.info("Rebuilt %s commission buckets from %s to %s", rows, start, end)
+        return rows or 0
+
+    def _region_names(self, db: Session, region_ids) -> Dict[int, str]:
+        """Look up region names"""
+        region_ids = list(region_ids)
+        if not region_ids:
+            return {}
+        return dict(db.execute(select(regions.c.id, regions.c.name).where(regions.c.id.in_(region_ids))).all())
+
+
+# Shared engine instance
+commission_engine = CommissionEngine()
@@ -0,0 +1,222 @@
+"""
+Investor portfolio and dashboard sections.
+
+Each function loads one independent section of the investor portfolio or
+dashboard with its own session, so the views can compose them concurrently
+through core.dashboard.
+"""
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from core.dashboard import DashboardComposer, DashboardSection
+from core.reporting import utc_today
+from apps.investor.commissions import commission_engine, period_range
+from apps.investor.tables import holdings
+from apps.regional_manager.franchise_metrics import franchise_metrics_cube, period_start
+from apps.regional_manager.tables import franchise_metrics, franchises, regions
+
+
+
+def _percentage(part: Decimal, whole: Decimal) -> float:
+    """Percentage of part in whole, rounded to two decimals"""
+    return round(float(part * 100 / whole), 2) if whole else 0.0
+
+
+def load_regions(db: Session, investor_id: str) -> List[Dict[str, Any]]:
+    """
+    Load the regions an investor holds with their investment and franchise figures.
+
+    Args:
+        db: Database session
+        investor_id: The ID of the investor
+
+    Returns:
+        List[dict]: Regions, largest investment first
+    """
+    today = utc_today()
+    franchise_counts = (
+        select(franchises.c.region_id, func.count().label("franchises"))
+        .where(franchises.c.status == "active")
+        .group_by(franchises.c.region_id)
+        .subquery()
+    )
+    client_counts = (
+        select(franchise_metrics.c.region_id, func.sum(franchise_metrics.c.clients_count).label("clients"))
+        .where(franchise_metrics.c.period == period_start(today))
+        .group_by(franchise_metrics.c.region_id)
+        .subquery()
+    )
+
+    rows = db.execute(
+        select(
+            holdings.c.region_id,
+            regions.c.name,
+            holdings.c.investment_amount,
+            holdings.c.current_value,
+            holdings.c.commission_rate,
+            holdings.c.end_date,
+            func.coalesce(franchise_counts.c.franchises, 0).label("franchises"),
+            func.coalesce(client_counts.c.clients, 0).label("clients")
+        )
+        .select_from(
+            holdings
+            .outerjoin(regions, regions.c.id == holdings.c.region_id)
+            .outerjoin(franchise_counts, franchise_counts.c.region_id == holdings.c.region_id)
+            .outerjoin(client_counts, client_counts.c.region_id == holdings.c.region_id)
+        )
+        .where(holdings.c.investor_id == str(investor_id))
+        .order_by(holdings.c.investment_amount.desc(), holdings.c.region_id)
+    ).all()
+
+    result = []
+    for row in rows:
+        invested = row.investment_amount or Decimal(0)
+        value = row.current_value if row.current_value is not None else invested
+        result.append({
+            "id": row.region_id,
+            "name": row.name,
+            "investment_amount": float(invested),
+            "current_value": float(value),
+            "roi_percentage": _percentage(value - invested, invested),
+            "commission_rate": float(row.commission_rate),
+            "franchises": row.franchises,
+            "clients": int(row.clients),
+            "status": "active" if row.end_date is None or row.end_date >= today else "closed"
+        })
+    return result
+
+
+def load_portfolio_summary(db: Session, investor_id: str) -> Dict[str, Any]:
+    """
+    Load an investor's portfolio totals and region distribution.
+
+    Args:
+        db: Database session
+        investor_id: The ID of the investor
+
+    Returns:
+        dict: Portfolio totals
+    """
+    held = load_regions(db, investor_id)
+    invested = sum(Decimal(str(region["investment_amount"])) for region in held)
+    value = sum(Decimal(str(region["current_value"])) for region in held)
+
+    return {
+        "total_invested": float(invested),
+        "current_value": float(value),
+        "total_return": float(value - invested),
+        "roi_percentage": _percentage(value - invested, invested),
+        "total_regions": len(held),
+        "active_regions": sum(1 for region in held if region["status"] == "active"),
+        "total_franchises": sum(region["franchises"] for region in held),
+        "region_distribution": [
+            {
+                "region_id": region["id"],
+                "name": region["name"],
+                "value": region["current_value"],
+                "percentage": _percentage(Decimal(str(region["current_value"])), value)
+            }
+            for region in held
+        ]
+    }
+
+
+def load_commission_overview(db: Session, investor_id: str) -> Dict[str, Any]:
+    """
+    Load commission income and its change per calendar period.
+
+    Args:
+        db: Database session
+        investor_id: The ID of the investor
+
+    Returns:
+        dict: This month's income and the change against the previous day, week, month and year
+    """
+    today = utc_today()
+    overview: Dict[str, Any] = {}
+    for time_period, key in (("day", "daily_change"), ("week", "weekly_change"), ("month", "monthly_change"), ("year", "yearly_change")):
+        start, end = period_range(time_period, today)
+        report = commission_engine.report(db, investor_id, start, end, time_period=time_period)
+        overview[key] = report["compared_to_previous"]
+        if time_period == "month":
+            overview["monthly_income"] = report["total_commission"]
+    return overview
+
+
+def load_commission_trend(db: Session, investor_id: str) -> List[Dict[str, Any]]:
+    """
+    Load this year's commission per month.
+
+    Args:
+        db: Database session
+        investor_id: The ID of the investor
+
+    Returns:
+        List[dict]: Monthly commission amounts
+    """
+    start, end = period_range("year", utc_today())
+    return commission_engine.report(db, investor_id, start, end, time_period="year")["commission_trend"]
+
+
+def annual_return(total_invested: Optional[float], commission_trend: List[Dict[str, Any]]) -> float:
+    """
+    Year-to-date commission income as a percentage of the amount invested.
+
+    Args:
+        total_invested: Invested amount from the portfolio summary
+        commission_trend: This year's commission per month
+
+    Returns:
+        float: Return percentage, 0 when nothing is invested
+    """
+    income = sum(Decimal(str(month["amount"])) for month in commission_trend)
+    return _percentage(income, Decimal(str(total_invested or 0)))
+
+
+def load_top_franchises(db: Session, investor_id: str, limit: int = 3) -> List[Dict[str, Any]]:
+    """
+    Load the best performing franchises this month across the investor's regions.
+
+    Args:
+        db: Database session
+        investor_id: The ID of the investor
+        limit: Number of franchises
+
+    Returns:
+        List[dict]: Franchises with their region and performance index
+    """
+    today = utc_today()
+    region_ids = db.execute(
+        select(holdings.c.region_id)
+        .where(holdings.c.investor_id == str(investor_id))
+        .where(or_(holdings.c.end_date.is_(None), holdings.c.end_date >= today))
+    ).scalars().all()
+
+    top = []
+    for region_id in set(region_ids):
+        for franchise in franchise_metrics_cube.compare(db, region_id, today, sort_by="performance", limit=limit):
+            top.append({
+                "id": franchise["id"],
+                "name": franchise["name"],
+                "region_id": region_id,
+                "performance_index": franchise["performance_index"]
+            })
+
+    top.sort(key=lambda franchise: franchise["performance_index"] or 0, reverse=True)
+    return top[:limit]
+
+
+# Dashboard layouts; figures change slowly, so sections are cached briefly per investor
+portfolio_composer = DashboardComposer("investor_portfolio", [
+    DashboardSection("summary", load_portfolio_summary, timeout_seconds=2.0, ttl_seconds=60, default={}),
+    DashboardSection("performance_trend", load_commission_trend, timeout_seconds=2.0, ttl_seconds=300, default=[]),
+])
+
+dashboard_composer = DashboardComposer("investor_dashboard", [
+    DashboardSection("portfolio_summary", load_portfolio_summary, timeout_seconds=2.0, ttl_seconds=60, default={}),
+    DashboardSection("performance_overview", load_commission_overview, timeout_seconds=2.0, ttl_seconds=60, default={}),
+    DashboardSection("top_performing_franchises", load_top_franchises, timeout_seconds=2.0, ttl_seconds=300, default=[]),
+])
@@ -10,6 +10,8 @@ from sqlalchemy.orm import Session
 from core.auth.router import get_current_active_user
 from core.auth.schemas import UserRead
 from core.database.connection import get_db
+from apps.investor.commissions import TIME_PERIODS, commission_engine, period_range
+from apps.investor.portfolio import annual_return, dashboard_composer, load_regions, portfolio_composer
 
 router = APIRouter()
 
@@ -37,30 +39,15 @@ async def get_portfolio_summary(
             detail="Access restricted to investor users"
         )
     
-    # This is a placeholder - in a real implementation, you would fetch portfolio data from the database
+    investor_id = str(current_user.id)
+    sections = await portfolio_composer.compose(investor_id, investor_id=investor_id)
     
-    # For now, we'll simulate portfolio data
-    portfolio = {
-        "total_invested": 750000,
-        "current_value": 825000,
-        "roi_percentage": 10.0,
-        "annual_return": 8.5,
-        "total_regions": 3,
-        "active_regions": 3,
-        "total_franchises": 12,
-        "last_updated": "2025-04-14T12:00:00Z",
-        "performance_trend": [
-            {"month": "Jan", "value": 760000},
-            {"month": "Feb", "value": 775000},
-            {"month": "Mar", "value": 795000},
-            {"month": "Apr", "value": 825000}
-        ],
-        "region_distribution": [
-            {"name": "West Coast", "value": 350000, "percentage": 46.67},
-            {"name": "Midwest", "value": 250000, "percentage": 33.33},
-            {"name": "Northeast", "value": 150000, "percentage": 20.00}
-        ]
-    }
+    portfolio = dict(sections["summary"])
+    portfolio["performance_trend"] = sections["performance_trend"]
+    # Year-to-date commission income as a percentage of the amount invested
+    portfolio["annual_return"] = annual_return(portfolio.get("total_invested"), sections["performance_trend"])
+    portfolio["last_updated"] = sections["meta"]["generated_at"]
+    portfolio["meta"] = sections["meta"]
     
     return portfolio
 
@@ -87,49 +74,7 @@ async def get_investor_regions(
             detail="Access restricted to investor users"
         )
     
-    # This is a placeholder - in a real implementation, you would fetch regions from the database
-    
-    # For now, we'll simulate region data
-    regions = [
-        {
-            "id": 1,
-            "name": "West Coast",
-            "location": "California, Oregon, Washington",
-            "investment_amount": 350000,
-            "current_value": 385000,
-            "roi_percentage": 10.0,
-            "franchises": 5,
-            "clients": 78,
-            "growth_rate": 12.5,
-            "status": "active"
-        },
-        {
-            "id": 2,
-            "name": "Midwest",
-            "location": "Illinois, Michigan, Ohio",
-            "investment_amount": 250000,
-            "current_value": 275000,
-            "roi_percentage": 10.0,
-            "franchises": 4,
-            "clients": 62,
-            "growth_rate": 8.2,
-            "status": "active"
-        },
-        {
-            "id": 3,
-            "name": "Northeast",
-            "location": "New York, Massachusetts, Connecticut",
-            "investment_amount": 150000,
-            "current_value": 165000,
-            "roi_percentage": 10.0,
-            "franchises": 3,
-            "clients": 45,
-            "growth_rate": 9.8,
-            "status": "active"
-        }
-    ]
-    
-    return regions
+    return load_regions(db, str(current_user.id))
 
 
 @router.get("/regions/{region_id}", response_model=dict)
@@ -292,50 +237,41 @@ async def get_commission_reports(
             detail="Access restricted to investor users"
         )
     
-    # This is a placeholder - in a real implementation, you would fetch commission data from the database
-    
-    # For now, we'll simulate commission report data
-    report = {
-        "time_period": time_period,
-        "start_date": start_date or "2025-04-01",
-        "end_date": end_date or "2025-04-30",
-        "total_commission": 15750.00,
-        "compared_to_previous": "+8.5%",
-        "commission_by_region": [
-            {"region_id": 1, "region_name": "West Coast", "amount": 7500.00, "percentage": 47.62},
-            {"region_id": 2, "region_name": "Midwest", "amount": 5250.00, "percentage": 33.33},
-            {"region_id": 3, "region_name": "Northeast", "amount": 3000.00, "percentage": 19.05}
-        ],
-        "commission_trend": [
-            {"date": "Week 1", "amount": 3750.00},
-            {"date": "Week 2", "amount": 4200.00},
-            {"date": "Week 3", "amount": 3900.00},
-            {"date": "Week 4", "amount": 3900.00}
-        ],
-        "commission_by_franchise_type": [
-            {"type": "Urban", "amount": 8500.00, "percentage": 53.97},
-            {"type": "Suburban", "amount": 5250.00, "percentage": 33.33},
-            {"type": "Rural", "amount": 2000.00, "percentage": 12.70}
-        ]
-    }
+    if time_period not in TIME_PERIODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid time period. Must be one of: {', '.join(TIME_PERIODS)}"
+        )
     
-    # Apply region filter if provided
-    if region_id:
-        if region_id not in [1, 2, 3]:
+    # A custom date range overrides the calendar period
+    if start_date or end_date:
+        try:
+            start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+            end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else datetime.utcnow().date()
+        except ValueError:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Region not found"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid date format. Use YYYY-MM-DD"
             )
-        
-        region_names = {1: "West Coast", 2: "Midwest", 3: "Northeast"}
-        region_amounts = {1: 7500.00, 2: 5250.00, 3: 3000.00}
-        
-        report["commission_by_region"] = [
-            {"region_id": region_id, "region_name": region_names[region_id], "amount": region_amounts[region_id], "percentage": 100.00}
-        ]
-        report["total_commission"] = region_amounts[region_id]
+        if start is None:
+            start = period_range(time_period, end)[0]
+        if start > end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start_date must not be after end_date"
+            )
+        period = None
+    else:
+        start, end = period_range(time_period, datetime.utcnow().date())
+        period = time_period
     
-    return report
+    if region_id and not commission_engine.holds_region(db, str(current_user.id), region_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Region not found"
+        )
+    
+    return commission_engine.report(db, str(current_user.id), start, end, region_id=region_id, time_period=period)
 
 
 @router.get("/reports/performance", response_model=dict)
@@ -455,57 +391,19 @@ async def get_investor_dashboard(
             detail="Access restricted to investor users"
         )
     
-    # This is a placeholder - in a real implementation, you would fetch dashboard data from the database
+    # Sections load concurrently; any that miss their deadline are reported in meta
+    investor_id = str(current_user.id)
+    dashboard = await dashboard_composer.compose(investor_id, investor_id=investor_id)
     
-    # For now, we'll simulate dashboard data
-    dashboard = {
-        "portfolio_summary": {
-            "total_invested": 750000,
-            "current_value": 825000,
-            "total_return": 75000,
-            "total_return_percentage": 10.0,
-            "monthly_income": 15750
-        },
-        "performance_overview": {
-            "daily_change": "+0.3%",
-            "weekly_change": "+1.2%",
-            "monthly_change": "+3.8%",
-            "yearly_change": "+8.5%"
-        },
-        "recent_activities": [
-            {
-                "date": "2025-04-14T10:30:00Z",
-                "activity": "Monthly commission payment received",
-                "amount": 15750
-            },
-            {
-                "date": "2025-04-10T14:15:00Z",
-                "activity": "New franchise added in West Coast region",
-                "region_id": 1
-            },
-            {
-                "date": "2025-04-03T09:45:00Z",
-                "activity": "Performance report for Q1 2025 available",
-                "report_id": "q1-2025"
-            }
-        ],
-        "alerts": [
-            {
-                "type": "opportunity",
-                "message": "Expansion opportunity in Northeast region - 25% projected growth",
-                "action": "View details"
-            },
-            {
-                "type": "info",
-                "message": "Quarterly investor meeting scheduled for April 30, 2025",
-                "action": "Add to calendar"
-            }
-        ],
-        "top_performing_franchises": [
-            {"id": 1, "name": "San Francisco Metro", "region_id": 1, "performance_index": 92},
-            {"id": 10, "name": "New York City", "region_id": 3, "performance_index": 91},
-            {"id": 4, "name": "Seattle Metro", "region_id": 1, "performance_index": 90}
-        ]
-    }
+    # Section values are shared with the cache, so the established keys are added to copies
+    summary = dashboard["portfolio_summary"]
+    dashboard["portfolio_summary"] = dict(
+        summary,
+        total_return_percentage=summary.get("roi_percentage"),
+        monthly_income=dashboard["performance_overview"].get("monthly_income")
+    )
+    # Not tracked yet; kept so existing clients keep working
+    dashboard["recent_activities"] = []
+    dashboard["alerts"] = []
     
     return dashboard
@@ -0,0 +1,35 @@
+"""
+Table definitions for the investor schema.
+
+These mirror the tables created by the Supabase migrations so the commission
+engine can build set-based statements with SQLAlchemy Core.
+"""
+from sqlalchemy import MetaData, Table, Column, Date, DateTime, Integer, Numeric, func
+from sqlalchemy.dialects.postgresql import UUID
+
+metadata = MetaData(schema="investor")
+
+holdings = Table(
+    "holdings", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("investor_id", UUID(as_uuid=False), nullable=False),
+    Column("region_id", Integer, nullable=False),
+    Column("commission_rate", Numeric(6, 4), nullable=False),
+    Column("start_date", Date, nullable=False),
+    Column("end_date", Date),
+    Column("investment_amount", Numeric(14, 2), nullable=False, default=0),
+    Column("current_value", Numeric(14, 2)),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+commission_daily = Table(
+    "commission_daily", metadata,
+    Column("investor_id", UUID(as_uuid=False), primary_key=True),
+    Column("day", Date, primary_key=True),
+    Column("region_id", Integer, primary_key=True),
+    Column("orders_count", Integer, nullable=False, default=0),
+    Column("order_amount", Numeric(14, 2), nullable=False, default=0),
+    Column("commission", Numeric(14, 2), nullable=False, default=0),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
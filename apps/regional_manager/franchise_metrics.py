@@ -0,0 +1,237 @@
+"""
+Franchise metrics cube.
+
+regional.franchise_metrics holds one row per (region, franchise, month) with the
+franchise's measures stored as additive sums and counts. Rates, growth and the
+performance index are generated columns with region/period-scoped indexes, so
+comparison reports filter and sort with a single indexed read instead of joining
+clients, orders, reviews and certifications per franchise.
+
+Source-derived measures are rebuilt by regional.rebuild_franchise_metrics: nightly
+for the current and previous month, and incrementally for the franchises queued
+by the source-table triggers. Measures without a source table (reviews, tasks,
+satisfaction) are recorded as deltas through FranchiseMetricsCube.record.
+"""
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+from sqlalchemy import literal, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from apps.regional_manager.tables import franchise_metrics, franchises
+
+logger = logging.getLogger(__name__)
+
+# Comparison sort keys mapped to indexed cube columns
+SORT_COLUMNS = {
+    "performance": franchise_metrics.c.performance_index,
+    "clients": franchise_metrics.c.clients_count,
+    "revenue": franchise_metrics.c.revenue,
+    "growth": franchise_metrics.c.growth_rate,
+}
+
+# Measures recorded incrementally by the application
+RECORDED_MEASURES = (
+    "tasks_total", "tasks_completed", "satisfaction_sum", "satisfaction_count",
+    "reviews", "rating_sum", "reviews_responded"
+)
+
+
+def period_start(moment: date) -> date:
+    """Get the first day of the month containing a date"""
+    return date(moment.year, moment.month, 1)
+
+
+def _number(value: Any) -> Optional[float]:
+    """Convert a numeric column value for JSON output"""
+    return float(value) if value is not None else None
+
+
+class FranchiseMetricsCube:
+    """
+    Reads and maintains the per-franchise monthly metrics cube.
+    """
+
+    def compare(
+        self,
+        db: Session,
+        region_id: int,
+        period: date,
+        status: Optional[str] = None,
+        sort_by: str = "performance",
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Compare a region's franchises for one month.
+
+        Args:
+            db: Database session
+            region_id: The ID of the region
+            period: Any date in the month
+            status: Optional franchise status filter (active, inactive, pending)
+            sort_by: Sort key (performance, clients, revenue, growth)
+            limit: Optional maximum number of franchises
+
+        Returns:
+            List[dict]: Franchise comparison entries, best first
+
+        Raises:
+            ValueError: If the sort key is unknown
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Invalid sort_by. Must be one of: {', '.join(SORT_COLUMNS)}")
+
+        query = (
+            select(
+                franchise_metrics,
+                franchises.c.name,
+                franchises.c.status,
+                franchises.c.established_date
+            )
+            .select_from(franchise_metrics.join(franchises, franchises.c.id == franchise_metrics.c.franchise_id))
+            .where(franchise_metrics.c.region_id == region_id)
+            .where(franchise_metrics.c.period == period_start(period))
+            .order_by(SORT_COLUMNS[sort_by].desc().nulls_last(), franchise_metrics.c.franchise_id)
+        )
+        if status:
+            query = query.where(franchises.c.status == status)
+        if limit:
+            query = query.limit(limit)
+
+        return [self.describe(row) for row in db.execute(query).all()]
+
+    def get(self, db: Session, franchise_id: int, period: date) -> Optional[Dict[str, Any]]:
+        """
+        Get one franchise's metrics for a month.
+
+        Args:
+            db: Database session
+            franchise_id: The ID of the franchise
+            period: Any date in the month
+
+        Returns:
+            dict or None if the franchise has no metrics for the month
+        """
+        row = db.execute(
+            select(franchise_metrics, franchises.c.name, franchises.c.status, franchises.c.established_date)
+            .select_from(franchise_metrics.join(franchises, franchises.c.id == franchise_metrics.c.franchise_id))
+            .where(franchise_metrics.c.franchise_id == franchise_id)
+            .where(franchise_metrics.c.period == period_start(period))
+        ).first()
+        return self.describe(row) if row is not None else None
+
+    def record(self, db: Session, franchise_id: int, occurred_at: Optional[datetime] = None, **deltas: Any) -> None:
+        """
+        Add measure deltas to a franchise's month (does not commit).
+
+        Args:
+            db: Database session
+            franchise_id: The ID of the franchise
+            occurred_at: When the recorded events happened (defaults to now)
+            **deltas: Increments for any of RECORDED_MEASURES
+
+        Raises:
+            ValueError: If a measure is not recorded incrementally
+        """
+        unknown = set(deltas) - set(RECORDED_MEASURES)
+        if unknown:
+            raise ValueError(f"Unknown measures: {', '.join(sorted(unknown))}")
+        if not deltas:
+            return
+
+        occurred_at = occurred_at or datetime.now(timezone.utc)
+        columns = sorted(deltas)
+        source = (
+            select(
+                franchises.c.region_id,
+                franchises.c.id,
+                literal(period_start(occurred_at.date())),
+                *(literal(deltas[column]) for column in columns)
+            )
+            .where(franchises.c.id == franchise_id)
+        )
+        statement = insert(franchise_metrics).from_select(["region_id", "franchise_id", "period", *columns], source)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["region_id", "franchise_id", "period"],
+            set_={
+                **{column: franchise_metrics.c[column] + statement.excluded[column] for column in columns},
+                "refreshed_at": datetime.now(timezone.utc)
+            }
+        ))
+
+    def rebuild(self, db: Session, period: date, franchise_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Rebuild the source-derived measures for a month (commits).
+
+        Args:
+            db: Database session
+            period: Any date in the month
+            franchise_ids: Optional franchises to rebuild (all when omitted)
+
+        Returns:
+            int: Number of cube rows written
+        """
+        rows = db.execute(
+            text("SELECT regional.rebuild_franchise_metrics(:period, :franchise_ids)"),
+            {"period": period_start(period), "franchise_ids": list(franchise_ids) if franchise_ids is not None else None}
+        ).scalar()
+        db.commit()
+        logger.info("Rebuilt %s franchise metric rows for %s", rows, period_start(period))
+        return rows or 0
+
+    def rebuild_pending(self, db: Session) -> int:
+        """
+        Rebuild the franchises queued by source changes (commits).
+
+        Args:
+            db: Database session
+
+        Returns:
+            int: Number of cube rows written
+        """
+        rows = db.execute(text("SELECT regional.rebuild_pending_franchise_metrics()")).scalar()
+        db.commit()
+        return rows or 0
+
+    def describe(self, row: Any) -> Dict[str, Any]:
+        """
+        Format a cube row joined with its franchise for API responses.
+
+        Args:
+            row: Cube row with name, status and established_date
+
+        Returns:
+            dict: Franchise metrics
+        """
+        return {
+            "id": row.franchise_id,
+            "name": row.name,
+            "status": row.status,
+            "established_date": row.established_date.isoformat() if row.established_date else None,
+            "period": row.period.strftime("%Y-%m"),
+            "performance_index": _number(row.performance_index),
+            "clients_count": row.clients_count,
+            "active_clients": row.active_clients,
+            "new_clients": row.new_clients,
+            "revenue": _number(row.revenue),
+            "growth_rate": _number(row.growth_rate),
+            "task_completion_rate": _number(row.task_completion_rate),
+            "client_satisfaction": _number(row.client_satisfaction),
+            "gmb_metrics": {
+                "average_rating": _number(row.average_rating),
+                "reviews": row.reviews,
+                "response_rate": _number(row.response_rate)
+            },
+            "education_metrics": {
+                "courses_enrolled": row.courses_enrolled,
+                "courses_completed": row.courses_completed,
+                "certification_rate": _number(row.certification_rate)
+            },
+            "refreshed_at": row.refreshed_at.isoformat() if row.refreshed_at else None
+        }
+
+
+# Shared cube instance
+franchise_metrics_cube = FranchiseMetricsCube()
@@ -0,0 +1,534 @@
+"""
+Region dashboard snapshots.
+
+The regional manager dashboard and the current month, quarter and year
+performance reports are precomposed into one document per region in
+regional.region_snapshots, so opening the dashboard is a single keyed read. A
+background job refreshes the regions queued by relevant writes (new clients,
+orders, franchise status changes and cube rebuilds) every few seconds, and every
+region on a longer schedule. Reports for other periods are built on demand from
+the franchise metrics cube.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import atexit
+import logging
+import threading
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from core.reporting import add_months, format_change, utc_today
+from apps.regional_manager.franchise_metrics import franchise_metrics_cube, period_start
+from apps.regional_manager.tables import (
+    franchise_metrics, franchises, region_snapshots, region_snapshots_pending, regions
+)
+
+logger = logging.getLogger(__name__)
+
+REPORT_PERIODS = ("month", "quarter", "year")
+
+# Franchise registrations listed as recent dashboard activity
+RECENT_ACTIVITY_DAYS = 30
+RECENT_ACTIVITY_LIMIT = 5
+
+# Measures summed over the months of a report; the others are month-end stock figures
+FLOW_MEASURES = (
+    "new_clients", "revenue", "tasks_total", "tasks_completed", "satisfaction_sum",
+    "satisfaction_count", "reviews", "rating_sum", "reviews_responded",
+    "courses_enrolled", "courses_completed"
+)
+STOCK_MEASURES = ("clients_count", "active_clients", "enrolled_users", "certified_users")
+
+
+
+
+def report_range(
+    time_period: str,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    quarter: Optional[int] = None,
+    today: Optional[date] = None
+) -> Tuple[date, date]:
+    """
+    Get the months covered by a report period.
+
+    Args:
+        time_period: month, quarter or year
+        year: Year of the report (defaults to the current year)
+        month: Month of a monthly report (defaults to the current month)
+        quarter: Quarter of a quarterly report (defaults to the current quarter)
+        today: Reference date for the defaults
+
+    Returns:
+        tuple: (first month, last month) as month start dates, inclusive
+
+    Raises:
+        ValueError: If the period or its month/quarter is invalid
+    """
+    today = today or utc_today()
+    year = year or today.year
+
+    if time_period == "month":
+        month = month or today.month
+        if not 1 <= month <= 12:
+            raise ValueError("Invalid month. Must be between 1 and 12")
+        first = date(year, month, 1)
+        return first, first
+    if time_period == "quarter":
+        quarter = quarter or (today.month - 1) // 3 + 1
+        if not 1 <= quarter <= 4:
+            raise ValueError("Invalid quarter. Must be between 1 and 4")
+        first = date(year, 3 * (quarter - 1) + 1, 1)
+        return first, add_months(first, 2)
+    if time_period == "year":
+        return date(year, 1, 1), date(year, 12, 1)
+    raise ValueError(f"Invalid time period. Must be one of: {', '.join(REPORT_PERIODS)}")
+
+
+def _rate(part: Any, whole: Any, scale: int = 100) -> Optional[float]:
+    """Ratio of two sums rounded to one decimal, or None when there is no base"""
+    return round(float(Decimal(part) * scale / Decimal(whole)), 1) if whole else None
+
+
+
+def _average_index(rows: List[Any]) -> Optional[float]:
+    """Average performance index of the franchises that have one"""
+    indexes = [row.performance_index for row in rows if row.performance_index is not None]
+    return round(float(sum(indexes) / len(indexes)), 1) if indexes else None
+
+
+def _summarize(rows: List[Any], last_month: date) -> Dict[str, Any]:
+    """Roll cube rows up into region totals for a range ending at last_month"""
+    totals: Dict[str, Any] = {measure: 0 for measure in FLOW_MEASURES + STOCK_MEASURES}
+    closing = [row for row in rows if row.period == last_month]
+    for row in rows:
+        for measure in FLOW_MEASURES:
+            totals[measure] += getattr(row, measure)
+    for row in closing:
+        for measure in STOCK_MEASURES:
+            totals[measure] += getattr(row, measure)
+    totals["performance_index"] = _average_index(closing)
+    return totals
+
+
+class RegionSnapshotStore:
+    """
+    Builds, stores and refreshes the per-region dashboard documents.
+    """
+
+    def __init__(self, poll_interval_seconds: float = 15.0, full_refresh_interval_seconds: float = 900.0):
+        """
+        Initialize the store
+
+        Args:
+            poll_interval_seconds: Seconds between refreshes of the queued regions
+            full_refresh_interval_seconds: Seconds between refreshes of every region
+        """
+        self.poll_interval_seconds = poll_interval_seconds
+        self.full_refresh_interval_seconds = full_refresh_interval_seconds
+
+        self._session_factory: Optional[Callable[[], Session]] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._exit_hook_registered = False
+
+    def get(self, db: Session, region_id: int) -> Tuple[Dict[str, Any], datetime]:
+        """
+        Read a region's snapshot, building it if the region has none yet.
+
+        Args:
+            db: Database session
+            region_id: The ID of the region
+
+        Returns:
+            tuple: (document, refreshed_at)
+        """
+        row = db.execute(
+            select(region_snapshots.c.document, region_snapshots.c.refreshed_at)
+            .where(region_snapshots.c.region_id == region_id)
+        ).first()
+        if row is not None:
+            return row.document, row.refreshed_at
+        return self.refresh(db, region_id)
+
+    def refresh(self, db: Session, region_id: int) -> Tuple[Dict[str, Any], datetime]:
+        """
+        Rebuild and store a region's snapshot (commits).
+
+        Args:
+            db: Database session
+            region_id: The ID of the region
+
+        Returns:
+            tuple: (document, refreshed_at)
+        """
+        document = self.build(db, region_id)
+        refreshed_at = datetime.now(timezone.utc)
+        statement = insert(region_snapshots).values(region_id=region_id, document=document, refreshed_at=refreshed_at)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["region_id"],
+            set_={"document": statement.excluded.document, "refreshed_at": statement.excluded.refreshed_at}
+        ))
+        db.commit()
+        return document, refreshed_at
+
+    def refresh_pending(self, db: Session) -> int:
+        """
+        Refresh the regions queued by writes (commits).
+
+        Pending cube rows are rebuilt first so the snapshots include the
+        changes that queued them.
+
+        Args:
+            db: Database session
+
+        Returns:
+            int: Number of regions refreshed
+        """
+        franchise_metrics_cube.rebuild_pending(db)
+
+        region_ids = db.execute(delete(region_snapshots_pending).returning(region_snapshots_pending.c.region_id)).scalars().all()
+        db.commit()
+
+        refreshed = 0
+        for region_id in region_ids:
+            try:
+                self.refresh(db, region_id)
+                refreshed += 1
+            except Exception:
+                db.rollback()
+                logger.exception("Failed to refresh snapshot for region %s", region_id)
+                self._requeue(db, region_id)
+        return refreshed
+
+    def refresh_all(self, db: Session) -> int:
+        """
+        Refresh every region's snapshot (commits).
+
+        A region that fails is queued for the next pending refresh instead of
+        stopping the regions after it.
+
+        Args:
+            db: Database session
+
+        Returns:
+            int: Number of regions refreshed
+        """
+        region_ids = db.execute(select(regions.c.id).order_by(regions.c.id)).scalars().all()
+        refreshed = 0
+        for region_id in region_ids:
+            try:
+                self.refresh(db, region_id)
+                refreshed += 1
+            except Exception:
+                db.rollback()
+                logger.exception("Failed to refresh snapshot for region %s", region_id)
+                self._requeue(db, region_id)
+        logger.info("Refreshed %s of %s region snapshots", refreshed, len(region_ids))
+        return refreshed
+
+    def build(self, db: Session, region_id: int, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Compose a region's snapshot document.
+
+        Args:
+            db: Database session
+            region_id: The ID of the region
+            today: Reference date (defaults to the current date)
+
+        Returns:
+            dict: The dashboard and the current month, quarter and year reports
+        """
+        today = today or utc_today()
+        reports = {
+            time_period: self.build_report(db, region_id, time_period, *report_range(time_period, today=today))
+            for time_period in REPORT_PERIODS
+        }
+        return {
+            "region_id": region_id,
+            "dashboard": self._build_dashboard(db, region_id, reports, today),
+            "reports": reports
+        }
+
+    def build_report(self, db: Session, region_id: int, time_period: str, first: date, last: date) -> Dict[str, Any]:
+        """
+        Build a performance report from the metrics cube.
+
+        Args:
+            db: Database session
+            region_id: The ID of the region
+            time_period: month, quarter or year
+            first: First month of the report
+            last: Last month of the report
+
+        Returns:
+            dict: Performance report
+        """
+        months = (last.year - first.year) * 12 + last.month - first.month + 1
+        previous_first = add_months(first, -months)
+
+        rows = db.execute(
+            select(franchise_metrics, franchises.c.name, franchises.c.established_date)
+            .select_from(franchise_metrics.join(franchises, franchises.c.id == franchise_metrics.c.franchise_id))
+            .where(franchise_metrics.c.region_id == region_id)
+            .where(franchise_metrics.c.period >= previous_first)
+            .where(franchise_metrics.c.period <= last)
+        ).all()
+        current = [row for row in rows if row.period >= first]
+        previous = [row for row in rows if row.period < first]
+        totals = _summarize(current, last)
+        previous_totals = _summarize(previous, add_months(first, -1))
+
+        rank, ranked = self._rank(db, region_id, last)
+        revenue_by_franchise: Dict[int, Decimal] = defaultdict(Decimal)
+        by_month: Dict[date, List[Any]] = defaultdict(list)
+        for row in current:
+            revenue_by_franchise[row.franchise_id] += row.revenue
+            by_month[row.period].append(row)
+
+        closing = sorted(
+            (row for row in current if row.period == last),
+            key=lambda row: row.performance_index if row.performance_index is not None else -1,
+            reverse=True
+        )
+        franchise_performance = [
+            {
+                "id": row.franchise_id,
+                "name": row.name,
+                "performance_index": float(row.performance_index) if row.performance_index is not None else None,
+                "clients": row.clients_count,
+                "revenue": float(revenue_by_franchise[row.franchise_id])
+            }
+            for row in closing
+        ]
+
+        monthly_trend = []
+        month = first
+        while month <= last:
+            month_rows = by_month.get(month, [])
+            monthly_trend.append({
+                "month": month.strftime("%b"),
+                "performance_index": _average_index(month_rows),
+                "revenue": float(sum((row.revenue for row in month_rows), Decimal(0)))
+            })
+            month = add_months(month, 1)
+
+        return {
+            "region_id": region_id,
+            "region_name": self._region_name(db, region_id),
+            "time_period": time_period,
+            "year": first.year,
+            "month": first.month if time_period == "month" else None,
+            "quarter": (first.month - 1) // 3 + 1 if time_period == "quarter" else None,
+            "overview": {
+                "performance_index": totals["performance_index"],
+                "rank_overall": f"{rank} of {ranked}" if rank else None,
+                "franchises_total": len({row.franchise_id for row in current}),
+                "franchises_new": len({
+                    row.franchise_id for row in current
+                    if row.established_date and first <= row.established_date < add_months(last, 1)
+                }),
+                "clients_total": totals["clients_count"],
+                "clients_active": totals["active_clients"],
+                "clients_new": totals["new_clients"],
+                "revenue": float(totals["revenue"]),
+                "revenue_change": format_change(totals["revenue"], previous_totals["revenue"])
+            },
+            "franchise_performance": franchise_performance,
+            "client_metrics": {
+                "average_gmb_rating": _rate(totals["rating_sum"], totals["reviews"], scale=1),
+                "reviews_new": totals["reviews"],
+                "response_rate": _rate(totals["reviews_responded"], totals["reviews"]),
+                "client_satisfaction": _rate(totals["satisfaction_sum"], totals["satisfaction_count"], scale=1)
+            },
+            "task_metrics": {
+                "tasks_total": totals["tasks_total"],
+                "tasks_completed": totals["tasks_completed"],
+                "completion_rate": _rate(totals["tasks_completed"], totals["tasks_total"])
+            },
+            "education_metrics": {
+                "courses_enrolled": totals["courses_enrolled"],
+                "courses_completed": totals["courses_completed"],
+                "certification_rate": _rate(totals["certified_users"], totals["enrolled_users"])
+            },
+            "monthly_trend": monthly_trend
+        }
+
+    def start(self, session_factory: Callable[[], Session]) -> None:
+        """
+        Start the background refresh thread
+
+        Args:
+            session_factory: Callable returning a new database session
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._session_factory = session_factory
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="region-snapshot-refresh", daemon=True)
+        self._thread.start()
+        if not self._exit_hook_registered:
+            atexit.register(self.stop)
+            self._exit_hook_registered = True
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval_seconds * 2)
+            self._thread = None
+
+    def _run(self) -> None:
+        """Background loop refreshing queued regions, and every region on the full interval"""
+        next_full_refresh = 0.0
+        elapsed = 0.0
+        while not self._stop_event.is_set():
+            if elapsed >= next_full_refresh:
+                self._with_new_session(self.refresh_all)
+                next_full_refresh = elapsed + self.full_refresh_interval_seconds
+            else:
+                self._with_new_session(self.refresh_pending)
+
+            if self._stop_event.wait(self.poll_interval_seconds):
+                break
+            elapsed += self.poll_interval_seconds
+
+    def _with_new_session(self, refresh: Callable[[Session], int]) -> None:
+        """Run a refresh with a fresh session, logging (not raising) failures"""
+        if self._session_factory is None:
+            return
+
+        db = self._session_factory()
+        try:
+            refresh(db)
+        except Exception:
+            db.rollback()
+            logger.exception("Region snapshot refresh failed")
+        finally:
+            db.close()
+
+    def _requeue(self, db: Session, region_id: int) -> None:
+        """Put a region back on the queue after a failed refresh"""
+        try:
+            db.execute(insert(region_snapshots_pending).values(region_id=region_id).on_conflict_do_nothing())
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to requeue snapshot for region %s", region_id)
+
+    def _build_dashboard(self, db: Session, region_id: int, reports: Dict[str, Dict[str, Any]], today: date) -> Dict[str, Any]:
+        """Compose the dashboard from the current period reports and the region's franchises"""
+        month_report = reports["month"]
+        this_month = period_start(today)
+
+        status_counts = dict(db.execute(
+            select(franchises.c.status, func.count())
+            .where(franchises.c.region_id == region_id)
+            .group_by(franchises.c.status)
+        ).all())
+
+        revenue = month_report["overview"]["revenue"]
+        distribution = [
+            {
+                "franchise": franchise["name"],
+                "amount": franchise["revenue"],
+                "percentage": round(franchise["revenue"] * 100 / revenue, 1) if revenue else 0.0
+            }
+            for franchise in sorted(month_report["franchise_performance"], key=lambda franchise: -franchise["revenue"])
+        ]
+
+        index = month_report["overview"]["performance_index"]
+        previous_index = self._performance_index(db, region_id, add_months(this_month, -1))
+
+        recent = db.execute(
+            select(franchises.c.id, franchises.c.name, franchises.c.created_at)
+            .where(franchises.c.region_id == region_id)
+            .where(franchises.c.created_at >= today - timedelta(days=RECENT_ACTIVITY_DAYS))
+            .order_by(franchises.c.created_at.desc())
+            .limit(RECENT_ACTIVITY_LIMIT)
+        ).all()
+
+        return {
+            "performance": {
+                "index": index,
+                "rank": self._rank(db, region_id, this_month)[0],
+                "trend": format_change(index, previous_index) if index is not None and previous_index else None,
+                "franchises_count": sum(status_counts.values()),
+                "active_franchises": status_counts.get("active", 0),
+                "pending_franchises": status_counts.get("pending", 0),
+                "clients_count": month_report["overview"]["clients_total"],
+                "active_clients": month_report["overview"]["clients_active"]
+            },
+            "revenue": {
+                "monthly": revenue,
+                "quarterly": reports["quarter"]["overview"]["revenue"],
+                "yearly": reports["year"]["overview"]["revenue"],
+                "trend": month_report["overview"]["revenue_change"],
+                "distribution": distribution
+            },
+            "engagement": {
+                "average_performance_index": index,
+                "tasks_completion_rate": month_report["task_metrics"]["completion_rate"],
+                "client_satisfaction": month_report["client_metrics"]["client_satisfaction"],
+                "certification_rate": month_report["education_metrics"]["certification_rate"]
+            },
+            "top_franchises": [
+                {
+                    "id": franchise["id"],
+                    "name": franchise["name"],
+                    "performance_index": franchise["performance_index"],
+                    "clients": franchise["clients"]
+                }
+                for franchise in month_report["franchise_performance"][:3]
+            ],
+            "recent_activities": [
+                {
+                    "date": row.created_at.date().isoformat(),
+                    "activity": f"New franchise registration: {row.name}",
+                    "franchise_id": row.id
+                }
+                for row in recent
+            ],
+            "gmb_metrics": {
+                "average_rating": reports["year"]["client_metrics"]["average_gmb_rating"],
+                "total_reviews": reports["year"]["client_metrics"]["reviews_new"],
+                "new_reviews_this_month": month_report["client_metrics"]["reviews_new"],
+                "response_rate": month_report["client_metrics"]["response_rate"]
+            }
+        }
+
+    def _performance_index(self, db: Session, region_id: int, month: date) -> Optional[float]:
+        """Average the region's franchise performance indexes for a month"""
+        average = db.execute(
+            select(func.avg(franchise_metrics.c.performance_index))
+            .where(franchise_metrics.c.region_id == region_id)
+            .where(franchise_metrics.c.period == month)
+        ).scalar()
+        return round(float(average), 1) if average is not None else None
+
+    def _rank(self, db: Session, region_id: int, month: date) -> Tuple[Optional[int], int]:
+        """Rank a region among all regions by average performance index for a month"""
+        averages = db.execute(
+            select(franchise_metrics.c.region_id, func.avg(franchise_metrics.c.performance_index).label("average"))
+            .where(franchise_metrics.c.period == month)
+            .where(franchise_metrics.c.performance_index.isnot(None))
+            .group_by(franchise_metrics.c.region_id)
+        ).all()
+        ordered = sorted(averages, key=lambda row: row.average, reverse=True)
+        for position, row in enumerate(ordered, start=1):
+            if row.region_id == region_id:
+                return position, len(ordered)
+        return None, len(ordered)
+
+    def _region_name(self, db: Session, region_id: int) -> Optional[str]:
+        """Look up a region's name"""
+        return db.execute(select(regions.c.name).where(regions.c.id == region_id)).scalar()
+
+
+# Shared snapshot store
+region_snapshot_store = RegionSnapshotStore()
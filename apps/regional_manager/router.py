@@ -1,16 +1,34 @@
 """
 Regional Manager API router for Local Lift application.
 """
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from typing import Any, AsyncIterator, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Path
+# The comparison report takes a `status` filter that shadows the module
+from fastapi import status as http_status
 from sqlalchemy.orm import Session
 
 from core.auth.router import get_current_active_user
 from core.auth.schemas import UserRead, UserCreate, UserUpdate
-from core.database.connection import get_db
+from core.database.connection import SessionLocal, get_db
+from core.reporting import utc_today
+from apps.regional_manager.franchise_metrics import franchise_metrics_cube, period_start
+from apps.regional_manager.region_snapshots import region_snapshot_store, report_range
 
-router = APIRouter()
+
+@asynccontextmanager
+async def region_snapshot_lifespan(app: Any) -> AsyncIterator[None]:
+    """Run the background refresh of region dashboard snapshots while the app is up."""
+    region_snapshot_store.start(SessionLocal)
+    try:
+        yield
+    finally:
+        region_snapshot_store.stop()
+
+
+router = APIRouter(lifespan=region_snapshot_lifespan)
 
 
 # Region Management
@@ -394,6 +412,14 @@ async def create_franchise(
 
 
 # Performance Management
+def _freshness(refreshed_at: datetime) -> dict:
+    """Describe how current a region snapshot is"""
+    return {
+        "refreshed_at": refreshed_at.isoformat(),
+        "age_seconds": int((datetime.now(timezone.utc) - refreshed_at).total_seconds())
+    }
+
+
 @router.get("/dashboard", response_model=dict)
 async def get_region_dashboard(
     current_user: UserRead = Depends(get_current_active_user),
@@ -402,12 +428,15 @@ async def get_region_dashboard(
     """
     Get region dashboard data.
     
+    Served from the region's snapshot, which is refreshed in the background
+    shortly after relevant writes and on a schedule.
+    
     Args:
         current_user: Current authenticated user
         db: Database session
         
     Returns:
-        dict: Dashboard data
+        dict: Dashboard data with its snapshot freshness
     """
     # Check if user is a regional manager
     if current_user.role != "regional_manager":
@@ -416,80 +445,23 @@ async def get_region_dashboard(
             detail="Access restricted to regional manager users"
         )
     
-    # This is a placeholder - in a real implementation, you would fetch dashboard data from the database
-    
-    # For now, we'll simulate dashboard data
-    dashboard = {
-        "performance": {
-            "index": 90,
-            "rank": 1,
-            "trend": "+5%",
-            "franchises_count": 5,
-            "active_franchises": 4,
-            "pending_franchises": 1,
-            "clients_count": 78,
-            "active_clients": 70
-        },
-        "revenue": {
-            "monthly": 75000,
-            "quarterly": 225000,
-            "yearly": 900000,
-            "trend": "+12%",
-            "distribution": [
-                {"franchise": "San Francisco Metro", "amount": 15000, "percentage": 20},
-                {"franchise": "Los Angeles County", "amount": 12000, "percentage": 16},
-                {"franchise": "Portland Area", "amount": 9000, "percentage": 12},
-                {"franchise": "Seattle Metro", "amount": 10500, "percentage": 14},
-                {"franchise": "San Diego County", "amount": 7500, "percentage": 10},
-                {"franchise": "Other", "amount": 21000, "percentage": 28}
-            ]
-        },
-        "engagement": {
-            "average_performance_index": 87.6,
-            "tasks_completion_rate": 92.4,
-            "client_satisfaction": 4.7,
-            "gmb_linked_percentage": 93,
-            "course_enrollment_rate": 78
-        },
-        "top_franchises": [
-            {"id": 1, "name": "San Francisco Metro", "performance_index": 92, "clients": 25},
-            {"id": 4, "name": "Seattle Metro", "performance_index": 90, "clients": 15},
-            {"id": 2, "name": "Los Angeles County", "performance_index": 88, "clients": 18}
-        ],
-        "recent_activities": [
-            {
-                "date": "2025-04-14",
-                "activity": "New franchise registration: San Diego County",
-                "franchise_id": 5
-            },
-            {
-                "date": "2025-04-12",
-                "activity": "Performance milestone: San Francisco Metro reached 90+ index",
-                "franchise_id": 1
-            },
-            {
-                "date": "2025-04-10",
-                "activity": "25 new clients added across region",
-                "client_count": 25
-            }
-        ],
-        "gmb_metrics": {
-            "average_rating": 4.6,
-            "total_reviews": 1250,
-            "new_reviews_this_month": 120,
-            "response_rate": 94.2
-        }
-    }
+    if current_user.region_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No region is assigned to this user"
+        )
+    
+    document, refreshed_at = region_snapshot_store.get(db, current_user.region_id)
     
-    return dashboard
+    return {**document["dashboard"], "freshness": _freshness(refreshed_at)}
 
 
 # Reports
 @router.get("/reports/performance", response_model=dict)
 async def get_region_performance_report(
     time_period: Optional[str] = "month",
-    year: Optional[int] = 2025,
-    month: Optional[int] = 4,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
     quarter: Optional[int] = None,
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -497,11 +469,14 @@ async def get_region_performance_report(
     """
     Get performance report for the region.
     
+    Reports for the current month, quarter and year are served from the
+    region's snapshot; other periods are built from the metrics cube.
+    
     Args:
         time_period: Time period for the report (month, quarter, year)
-        year: Year for the report
-        month: Month for the report (if time_period is month)
-        quarter: Quarter for the report (if time_period is quarter)
+        year: Year for the report (defaults to the current year)
+        month: Month for the report (if time_period is month, defaults to the current month)
+        quarter: Quarter for the report (if time_period is quarter, defaults to the current quarter)
         current_user: Current authenticated user
         db: Database session
         
@@ -515,69 +490,42 @@ async def get_region_performance_report(
             detail="Access restricted to regional manager users"
         )
     
-    # This is a placeholder - in a real implementation, you would fetch report data from the database
-    
-    # For now, we'll simulate report data
-    report = {
-        "region_id": 1,
-        "region_name": "West Coast",
-        "time_period": time_period,
-        "year": year,
-        "month": month if time_period == "month" else None,
-        "quarter": quarter if time_period == "quarter" else None,
-        "overview": {
-            "performance_index": 90,
-            "rank_overall": "1 of 3",
-            "franchises_total": 5,
-            "franchises_new": 1,
-            "clients_total": 78,
-            "clients_new": 12,
-            "revenue": 75000,
-            "revenue_change": "+12%"
-        },
-        "franchise_performance": [
-            {"id": 1, "name": "San Francisco Metro", "performance_index": 92, "clients": 25, "revenue": 15000},
-            {"id": 2, "name": "Los Angeles County", "performance_index": 88, "clients": 18, "revenue": 12000},
-            {"id": 3, "name": "Portland Area", "performance_index": 85, "clients": 12, "revenue": 9000},
-            {"id": 4, "name": "Seattle Metro", "performance_index": 90, "clients": 15, "revenue": 10500},
-            {"id": 5, "name": "San Diego County", "performance_index": 83, "clients": 8, "revenue": 7500}
-        ],
-        "client_metrics": {
-            "average_gmb_rating": 4.6,
-            "reviews_total": 1250,
-            "reviews_new": 120,
-            "response_rate": 94.2,
-            "average_response_time": "8 hours",
-            "client_satisfaction": 4.7
-        },
-        "task_metrics": {
-            "tasks_total": 625,
-            "tasks_completed": 578,
-            "completion_rate": 92.4,
-            "average_completion_time": "2.5 days",
-            "overdue_tasks": 12
-        },
-        "education_metrics": {
-            "courses_enrolled": 95,
-            "courses_completed": 68,
-            "certification_rate": 72,
-            "average_course_score": 88
-        },
-        "monthly_trend": [
-            {"month": "Jan", "performance_index": 84, "revenue": 65000},
-            {"month": "Feb", "performance_index": 86, "revenue": 68000},
-            {"month": "Mar", "performance_index": 88, "revenue": 72000},
-            {"month": "Apr", "performance_index": 90, "revenue": 75000}
-        ]
-    }
+    if current_user.region_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No region is assigned to this user"
+        )
     
-    return report
+    try:
+        first, last = report_range(time_period, year, month, quarter)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    if (first, last) == report_range(time_period):
+        document, refreshed_at = region_snapshot_store.get(db, current_user.region_id)
+        return {**document["reports"][time_period], "freshness": _freshness(refreshed_at)}
+    
+    return region_snapshot_store.build_report(db, current_user.region_id, time_period, first, last)
+
+
+def _parse_period(period: Optional[str]) -> date:
+    """Parse a YYYY-MM period, defaulting to the current month"""
+    if not period:
+        return period_start(utc_today())
+    try:
+        return datetime.strptime(period, "%Y-%m").date()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid period. Use YYYY-MM"
+        )
 
 
 @router.get("/reports/franchises", response_model=List[dict])
 async def get_franchise_comparison_report(
     status: Optional[str] = None,
     sort_by: Optional[str] = "performance",
+    period: Optional[str] = None,
     current_user: UserRead = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -587,6 +535,7 @@ async def get_franchise_comparison_report(
     Args:
         status: Filter by franchise status (active, inactive, pending)
         sort_by: Sort franchises by field (performance, clients, revenue, growth)
+        period: Month to compare (YYYY-MM, defaults to the current month)
         current_user: Current authenticated user
         db: Database session
         
@@ -596,136 +545,55 @@ async def get_franchise_comparison_report(
     # Check if user is a regional manager
     if current_user.role != "regional_manager":
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
+            status_code=http_status.HTTP_403_FORBIDDEN,
             detail="Access restricted to regional manager users"
         )
     
-    # This is a placeholder - in a real implementation, you would fetch franchise data from the database
+    if current_user.region_id is None:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail="No region is assigned to this user"
+        )
     
-    # For now, we'll simulate franchise comparison data
-    franchises = [
-        {
-            "id": 1,
-            "name": "San Francisco Metro",
-            "status": "active",
-            "established_date": "2024-01-15",
-            "performance_index": 92,
-            "clients_count": 25,
-            "revenue": 15000,
-            "growth_rate": 15.2,
-            "task_completion_rate": 94.4,
-            "client_satisfaction": 4.8,
-            "gmb_metrics": {
-                "average_rating": 4.7,
-                "reviews": 350,
-                "response_rate": 96.2
-            },
-            "education_metrics": {
-                "courses_completed": 18,
-                "certification_rate": 72
-            }
-        },
-        {
-            "id": 2,
-            "name": "Los Angeles County",
-            "status": "active",
-            "established_date": "2024-01-20",
-            "performance_index": 88,
-            "clients_count": 18,
-            "revenue": 12000,
-            "growth_rate": 12.8,
-            "task_completion_rate": 91.2,
-            "client_satisfaction": 4.6,
-            "gmb_metrics": {
-                "average_rating": 4.5,
-                "reviews": 280,
-                "response_rate": 92.5
-            },
-            "education_metrics": {
-                "courses_completed": 12,
-                "certification_rate": 66.7
-            }
-        },
-        {
-            "id": 3,
-            "name": "Portland Area",
-            "status": "active",
-            "established_date": "2024-02-01",
-            "performance_index": 85,
-            "clients_count": 12,
-            "revenue": 9000,
-            "growth_rate": 10.5,
-            "task_completion_rate": 88.5,
-            "client_satisfaction": 4.5,
-            "gmb_metrics": {
-                "average_rating": 4.4,
-                "reviews": 180,
-                "response_rate": 91.0
-            },
-            "education_metrics": {
-                "courses_completed": 8,
-                "certification_rate": 58.3
-            }
-        },
-        {
-            "id": 4,
-            "name": "Seattle Metro",
-            "status": "active",
-            "established_date": "2024-02-15",
-            "performance_index": 90,
-            "clients_count": 15,
-            "revenue": 10500,
-            "growth_rate": 14.2,
-            "task_completion_rate": 92.8,
-            "client_satisfaction": 4.7,
-            "gmb_metrics": {
-                "average_rating": 4.6,
-                "reviews": 210,
-                "response_rate": 95.0
-            },
-            "education_metrics": {
-                "courses_completed": 11,
-                "certification_rate": 73.3
-            }
-        },
-        {
-            "id": 5,
-            "name": "San Diego County",
-            "status": "pending",
-            "established_date": "2024-03-01",
-            "performance_index": 83,
-            "clients_count": 8,
-            "revenue": 7500,
-            "growth_rate": 8.5,
-            "task_completion_rate": 85.0,
-            "client_satisfaction": 4.4,
-            "gmb_metrics": {
-                "average_rating": 4.3,
-                "reviews": 95,
-                "response_rate": 90.0
-            },
-            "education_metrics": {
-                "courses_completed": 5,
-                "certification_rate": 50.0
-            }
-        }
-    ]
+    month = _parse_period(period)
     
-    # Apply status filter if provided
-    if status:
-        franchises = [franchise for franchise in franchises if franchise["status"] == status]
+    try:
+        return franchise_metrics_cube.compare(db, current_user.region_id, month, status=status, sort_by=sort_by)
+    except ValueError as e:
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/reports/franchises/rebuild", response_model=dict)
+async def rebuild_franchise_metrics(
+    period: Optional[str] = None,
+    current_user: UserRead = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Rebuild the franchise metrics cube for a month (admin only).
     
-    # Apply sorting
-    if sort_by == "performance":
-        franchises = sorted(franchises, key=lambda x: x["performance_index"], reverse=True)
-    elif sort_by == "clients":
-        franchises = sorted(franchises, key=lambda x: x["clients_count"], reverse=True)
-    elif sort_by == "revenue":
-        franchises = sorted(franchises, key=lambda x: x["revenue"], reverse=True)
-    elif sort_by == "growth":
-        franchises = sorted(franchises, key=lambda x: x["growth_rate"], reverse=True)
+    The cube is rebuilt nightly and incrementally by the database; this endpoint
+    forces a rebuild, e.g. after a backfill of source data.
     
-    return franchises
+    Args:
+        period: Month to rebuild (YYYY-MM, defaults to the current month)
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        dict: Number of franchise rows rebuilt
+    """
+    # Check admin permissions
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    month = _parse_period(period)
+    rows = franchise_metrics_cube.rebuild(db, month)
+    
+    return {"period": month.strftime("%Y-%m"), "franchises_rebuilt": rows}
 
 
 # Campaign Management
@@ -0,0 +1,93 @@
+"""
+Table definitions for the regional schema.
+
+These mirror the tables created by the Supabase migrations so the regional
+reporting code can build set-based statements with SQLAlchemy Core.
+"""
+from sqlalchemy import MetaData, Table, Column, BigInteger, Date, DateTime, Integer, Numeric, SmallInteger, String, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+metadata = MetaData(schema="regional")
+
+regions = Table(
+    "regions", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+franchises = Table(
+    "franchises", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("region_id", Integer, nullable=False),
+    Column("name", String(200), nullable=False),
+    Column("status", String(20), nullable=False, default="pending"),
+    Column("established_date", Date),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+# Rates and the performance index are generated columns; never write them
+franchise_metrics = Table(
+    "franchise_metrics", metadata,
+    Column("region_id", Integer, primary_key=True),
+    Column("franchise_id", Integer, primary_key=True),
+    Column("period", Date, primary_key=True),
+    Column("clients_count", Integer, nullable=False, default=0),
+    Column("active_clients", Integer, nullable=False, default=0),
+    Column("new_clients", Integer, nullable=False, default=0),
+    Column("revenue", Numeric(12, 2), nullable=False, default=0),
+    Column("previous_revenue", Numeric(12, 2), nullable=False, default=0),
+    Column("tasks_total", Integer, nullable=False, default=0),
+    Column("tasks_completed", Integer, nullable=False, default=0),
+    Column("satisfaction_sum", Numeric(10, 2), nullable=False, default=0),
+    Column("satisfaction_count", Integer, nullable=False, default=0),
+    Column("reviews", Integer, nullable=False, default=0),
+    Column("rating_sum", Integer, nullable=False, default=0),
+    Column("reviews_responded", Integer, nullable=False, default=0),
+    Column("courses_enrolled", Integer, nullable=False, default=0),
+    Column("courses_completed", Integer, nullable=False, default=0),
+    Column("enrolled_users", Integer, nullable=False, default=0),
+    Column("certified_users", Integer, nullable=False, default=0),
+    Column("growth_rate", Numeric(7, 1)),
+    Column("task_completion_rate", Numeric(5, 1)),
+    Column("client_satisfaction", Numeric(3, 1)),
+    Column("average_rating", Numeric(3, 1)),
+    Column("response_rate", Numeric(5, 1)),
+    Column("certification_rate", Numeric(5, 1)),
+    Column("performance_index", Numeric(5, 1)),
+    Column("refreshed_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+region_snapshots = Table(
+    "region_snapshots", metadata,
+    Column("region_id", Integer, primary_key=True),
+    Column("document", JSONB, nullable=False),
+    Column("refreshed_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+
+region_snapshots_pending = Table(
+    "region_snapshots_pending", metadata,
+    Column("region_id", Integer, primary_key=True),
+    Column("queued_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+
+# change_xid is stamped by a trigger with the writing transaction's ID
+franchise_tasks = Table(
+    "franchise_tasks", metadata,
+    Column("id", BigInteger, primary_key=True),
+    Column("franchise_id", Integer, nullable=False),
+    Column("client_id", UUID(as_uuid=False)),
+    Column("title", String, nullable=False),
+    Column("description", String),
+    Column("status", String(20), nullable=False, default="pending"),
+    Column("priority", SmallInteger, nullable=False, default=2),
+    Column("due_date", Date),
+    Column("assigned_to", UUID(as_uuid=False)),
+    Column("created_by", UUID(as_uuid=False)),
+    Column("completed_at", DateTime(timezone=True)),
+    Column("change_xid", BigInteger, nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
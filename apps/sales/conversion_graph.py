@@ -11,7 +11,7 @@ import uuid
 import json
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import func, and_, or_, desc
 
 from core.database.session import get_db
@@ -56,34 +56,16 @@ class SalesConversionGraphController:
         Returns:
             Dictionary with conversion data
         """
-        # Set default date range if not provided
-        if not end_date:
-            end_date = datetime.utcnow()
-        
-        if not start_date:
-            if time_period == DateRangeType.DAILY.value:
-                start_date = end_date - timedelta(days=7)
-            elif time_period == DateRangeType.WEEKLY.value:
-                start_date = end_date - timedelta(weeks=4)
-            elif time_period == DateRangeType.MONTHLY.value:
-                start_date = end_date - timedelta(days=90)
-            elif time_period == DateRangeType.QUARTERLY.value:
-                start_date = end_date - timedelta(days=365)
-            else:  # YEARLY
-                start_date = end_date - timedelta(days=730)
-        
-        # Build query filters
-        filters = [
-            ConversionData.date_range == time_period,
-            ConversionData.start_date >= start_date,
-            ConversionData.end_date <= end_date
-        ]
-        
-        if team_id:
-            filters.append(ConversionData.team_id == team_id)
+        start_date, end_date = self._resolve_date_range(time_period, start_date, end_date)
+        filters = self._build_filters(time_period, start_date, end_date, team_id)
             
-        # Get conversion data
-        conversion_data = self.db.query(ConversionData).filter(*filters).all()
+        # Get conversion data, loading every funnel stage in a single extra query
+        conversion_data = (
+            self.db.query(ConversionData)
+            .options(selectinload(ConversionData.funnel_stages))
+            .filter(*filters)
+            .all()
+        )
         
         # Get team IDs from results for further processing
         team_ids = [data.team_id for data in conversion_data]
@@ -120,11 +102,66 @@ class SalesConversionGraphController:
         Returns:
             List of funnel stages
         """
-        stages = self.db.query(SalesFunnelStage).filter(
-            SalesFunnelStage.conversion_data_id == conversion_data_id
-        ).order_by(SalesFunnelStage.id).all()
+        stages_by_id = self.get_funnel_stages_batch(conversion_data_ids=[conversion_data_id])
+        return stages_by_id.get(conversion_data_id, [])
+    
+    def get_funnel_stages_batch(
+        self,
+        conversion_data_ids: Optional[List[str]] = None,
+        time_period: str = "monthly",
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        team_id: Optional[str] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get funnel stages for many conversion data records at once
+        
+        Either an explicit list of conversion data IDs or the same filters
+        accepted by get_conversion_data can be given. Explicit IDs are resolved
+        with a single IN query; filters load the matching records and their
+        stages with selectin loading (two queries regardless of result size).
         
-        return [stage.to_dict() for stage in stages]
+        Args:
+            conversion_data_ids: Conversion data IDs to load stages for
+            time_period: Time period filter (used when no IDs are given)
+            start_date: Start date filter (used when no IDs are given)
+            end_date: End date filter (used when no IDs are given)
+            team_id: Team ID filter (used when no IDs are given)
+            
+        Returns:
+            Dictionary mapping conversion data ID to its list of funnel stages
+        """
+        if conversion_data_ids is not None:
+            unique_ids = list(dict.fromkeys(conversion_data_ids))
+            if not unique_ids:
+                return {}
+            
+            stages = self.db.query(SalesFunnelStage).filter(
+                SalesFunnelStage.conversion_data_id.in_(unique_ids)
+            ).order_by(SalesFunnelStage.conversion_data_id, SalesFunnelStage.id).all()
+            
+            result: Dict[str, List[Dict[str, Any]]] = {data_id: [] for data_id in unique_ids}
+            for stage in stages:
+                result[stage.conversion_data_id].append(stage.to_dict())
+            return result
+        
+        start_date, end_date = self._resolve_date_range(time_period, start_date, end_date)
+        filters = self._build_filters(time_period, start_date, end_date, team_id)
+        
+        conversion_data = (
+            self.db.query(ConversionData)
+            .options(selectinload(ConversionData.funnel_stages))
+            .filter(*filters)
+            .all()
+        )
+        
+        return {
+            data.id: [
+                stage.to_dict()
+                for stage in sorted(data.funnel_stages, key=lambda stage: stage.id)
+            ]
+            for data in conversion_data
+        }
     
     def get_conversion_trends(
         self,
@@ -163,14 +200,7 @@ class SalesConversionGraphController:
             date_format = "%Y"
         
         # Build query filters
-        filters = [
-            ConversionData.date_range == period_type,
-            ConversionData.start_date >= start_date,
-            ConversionData.end_date <= end_date
-        ]
-        
-        if team_id:
-            filters.append(ConversionData.team_id == team_id)
+        filters = self._build_filters(period_type, start_date, end_date, team_id)
         
         # Get conversion data
         conversion_data = self.db.query(ConversionData).filter(*filters).order_by(
@@ -203,6 +233,70 @@ class SalesConversionGraphController:
         
         return trends
     
+    def _resolve_date_range(
+        self,
+        time_period: str,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> Tuple[datetime, datetime]:
+        """
+        Fill in a default date range for the given time period
+        
+        Args:
+            time_period: Time period for data grouping
+            start_date: Optional start date
+            end_date: Optional end date
+            
+        Returns:
+            Tuple of (start_date, end_date)
+        """
+        if not end_date:
+            end_date = datetime.utcnow()
+        
+        if not start_date:
+            if time_period == DateRangeType.DAILY.value:
+                start_date = end_date - timedelta(days=7)
+            elif time_period == DateRangeType.WEEKLY.value:
+                start_date = end_date - timedelta(weeks=4)
+            elif time_period == DateRangeType.MONTHLY.value:
+                start_date = end_date - timedelta(days=90)
+            elif time_period == DateRangeType.QUARTERLY.value:
+                start_date = end_date - timedelta(days=365)
+            else:  # YEARLY
+                start_date = end_date - timedelta(days=730)
+        
+        return start_date, end_date
+    
+    def _build_filters(
+        self,
+        time_period: str,
+        start_date: datetime,
+        end_date: datetime,
+        team_id: Optional[str] = None
+    ) -> List[Any]:
+        """
+        Build the ConversionData query filters shared by the data and funnel endpoints
+        
+        Args:
+            time_period: Time period for data grouping
+            start_date: Start date for filtering
+            end_date: End date for filtering
+            team_id: Team ID for filtering
+            
+        Returns:
+            List of SQLAlchemy filter expressions
+        """
+        filters = [
+            ConversionData.date_range == time_period,
+            ConversionData.start_date >= start_date,
+            ConversionData.end_date <= end_date
+        ]
+        
+        if team_id:
+            filters.append(ConversionData.team_id == team_id)
+        
+        return filters
+    
     def _get_teams_info(self, team_ids: List[str]) -> Dict[str, Dict[str, Any]]:
         """
         Get team information for the specified team IDs
@@ -472,6 +566,38 @@ async def get_conversion_trends(
     return trends
 
 
+@router.get("/funnel-stages")
+async def get_funnel_stages(
+    ids: Optional[List[str]] = Query(None, description="Conversion data IDs to load stages for"),
+    time_period: str = Query("monthly", description="Time period for data (used when no IDs are given)"),
+    start_date: Optional[str] = Query(None, description="Start date (ISO format)"),
+    end_date: Optional[str] = Query(None, description="End date (ISO format)"),
+    team_id: Optional[str] = Query(None, description="Team ID for filtering"),
+    db: Session = Depends(get_db),
+    current_user: Any = Depends(get_current_user)
+):
+    """
+    Get funnel stages for many conversion data records in one call
+    """
+    # Parse dates if provided
+    start_date_obj = datetime.fromisoformat(start_date) if start_date else None
+    end_date_obj = datetime.fromisoformat(end_date) if end_date else None
+    
+    controller = SalesConversionGraphController(db)
+    stages = controller.get_funnel_stages_batch(
+        conversion_data_ids=ids,
+        time_period=time_period,
+        start_date=start_date_obj,
+        end_date=end_date_obj,
+        team_id=team_id
+    )
+    
+    return {
+        "count": len(stages),
+        "funnel_stages": stages
+    }
+
+
 @router.get("/chart-config")
 async def get_chart_config(
     time_period: str = Query("monthly", description="Time period for data"),
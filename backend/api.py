@@ -6,6 +6,7 @@ These endpoints are designed for general use cases and direct database access.
 """
 
 from fastapi import APIRouter, Query
+from core.cache import leaderboard_cache
 from core.supabase import supabase_admin_client
 from typing import Optional
 
@@ -32,11 +33,13 @@ def get_leaderboard():
     Returns:
         List of ranked clients with detailed badge statistics
     """
-    result = supabase_admin_client \
-        .rpc("get_badge_leaderboard") \
-        .execute()
+    def load():
+        return supabase_admin_client \
+            .rpc("get_badge_leaderboard") \
+            .execute() \
+            .data
 
-    return result.data
+    return leaderboard_cache.get("badge:default", load)
 
 @router.get("/api/simple-leaderboard")
 def get_simple_leaderboard():
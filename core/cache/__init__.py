@@ -0,0 +1,20 @@
+"""
+Caching utilities for Local Lift application.
+
+This package provides HTTP conditional-request helpers and shared caching
+primitives used by read-heavy API endpoints.
+"""
+
+from .etag import make_etag, etag_matches, conditional_json_response
+from .response_cache import (
+    CacheBackend, InMemoryCacheBackend, RedisCacheBackend, ResponseCache,
+    create_cache_backend, leaderboard_cache
+)
+
+__all__ = [
+    # HTTP conditional requests
+    'make_etag', 'etag_matches', 'conditional_json_response',
+    # Response caching
+    'CacheBackend', 'InMemoryCacheBackend', 'RedisCacheBackend', 'ResponseCache',
+    'create_cache_backend', 'leaderboard_cache'
+]
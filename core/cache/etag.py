@@ -0,0 +1,78 @@
+"""
+ETag helpers.
+
+This module builds strong ETags for JSON responses and answers conditional
+requests carrying If-None-Match with 304 Not Modified.
+"""
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a strong ETag from one or more version components.
+
+    Args:
+        *parts: Values that together identify the representation (versions, IDs, filters)
+
+    Returns:
+        str: Quoted ETag value
+    """
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check whether a request's If-None-Match header matches an ETag.
+
+    Args:
+        request: Incoming request
+        etag: Current ETag of the resource
+
+    Returns:
+        bool: True if the client already holds this representation
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    # Strong comparison: weak validators never match
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return etag in candidates
+
+
+def conditional_json_response(
+    request: Request,
+    content: Any,
+    etag: str,
+    cache_control: Optional[str] = "no-cache"
+) -> Response:
+    """
+    Return a JSON response with an ETag, or 304 if the client copy is current.
+
+    Args:
+        request: Incoming request
+        content: Response body
+        etag: ETag of the representation
+        cache_control: Cache-Control header value
+
+    Returns:
+        Response: 304 Not Modified or a JSONResponse carrying the ETag
+    """
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
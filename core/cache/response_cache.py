@@ -0,0 +1,357 @@
+"""
+Shared response cache.
+
+This module caches the results of expensive read computations (leaderboard
+RPCs and similar) with a short TTL. Concurrent misses for the same key are
+coalesced so only one caller computes the value while the others wait for it,
+and entries past their TTL are still served for a stale window while a single
+background refresh replaces them. Values are stored in a pluggable backend:
+in-process by default, or any Redis-compatible server when CACHE_REDIS_URL is
+set. Request coalescing is per process; the Redis backend shares the values.
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    """
+    A cached value with its freshness deadlines.
+    """
+
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value: Any, fresh_until: float, stale_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class CacheBackend(ABC):
+    """
+    Storage interface for the response cache.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Get an entry, or None if it is missing or expired"""
+
+    @abstractmethod
+    def set(self, key: str, entry: CacheEntry) -> None:
+        """Store an entry until its stale deadline"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove an entry"""
+
+    @abstractmethod
+    def clear(self, prefix: str = "") -> None:
+        """Remove every entry whose key starts with prefix"""
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Process-local LRU backend.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        """
+        Initialize the backend
+
+        Args:
+            max_entries: Number of entries kept before the least recently used is evicted
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.stale_until <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, prefix: str = "") -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Redis-compatible backend storing JSON-encoded values.
+
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, key_prefix: str = "locallift:cache:"):
+        """
+        Connect to the server
+
+        Args:
+            url: Redis URL (redis://host:port/db)
+            key_prefix: Prefix applied to every key
+        """
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis package is required for RedisCacheBackend (pip install redis)")
+
+        self.key_prefix = key_prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raw = self._client.get(self.key_prefix + key)
+        if raw is None:
+            return None
+        payload = json.loads(raw)
+        return CacheEntry(payload["value"], payload["fresh_until"], payload["stale_until"])
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        payload = json.dumps({
+            "value": entry.value,
+            "fresh_until": entry.fresh_until,
+            "stale_until": entry.stale_until
+        }, default=str)
+        ttl = max(1, int(entry.stale_until - time.time()))
+        self._client.set(self.key_prefix + key, payload, ex=ttl)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self.key_prefix + key)
+
+    def clear(self, prefix: str = "") -> None:
+        for key in self._client.scan_iter(match=self.key_prefix + prefix + "*"):
+            self._client.delete(key)
+
+
+def create_cache_backend(url: Optional[str] = None) -> CacheBackend:
+    """
+    Create the configured backend.
+
+    Args:
+        url: Redis URL; defaults to the CACHE_REDIS_URL environment variable
+
+    Returns:
+        CacheBackend: Redis backend when a URL is configured and reachable, in-process otherwise
+    """
+    url = url or os.getenv("CACHE_REDIS_URL")
+    if not url:
+        return InMemoryCacheBackend()
+
+    try:
+        return RedisCacheBackend(url)
+    except Exception as e:
+        logger.warning("Falling back to in-process response cache: %s", e)
+        return InMemoryCacheBackend()
+
+
+class ResponseCache:
+    """
+    TTL cache with single-flight loading and stale-while-revalidate.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        backend: Optional[CacheBackend] = None,
+        ttl_seconds: float = 30,
+        stale_seconds: float = 300,
+        wait_timeout_seconds: float = 30
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            namespace: Prefix for this cache's keys in the backend
+            backend: Storage backend (in-process when omitted)
+            ttl_seconds: Seconds a value is served without recomputation
+            stale_seconds: Further seconds a value is served while it is refreshed in the background
+            wait_timeout_seconds: Maximum time a coalesced caller waits for the computing caller
+        """
+        self.namespace = namespace
+        self.backend = backend or InMemoryCacheBackend()
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.wait_timeout_seconds = wait_timeout_seconds
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Get a value, computing it with loader on a miss.
+
+        Args:
+            key: Cache key within the namespace
+            loader: Blocking callable producing the value
+
+        Returns:
+            The cached or freshly computed value
+        """
+        key = self._key(key)
+        found, value = self._lookup(key, loader)
+        if found:
+            return value
+
+        future, leader = self._claim(key)
+        if not leader:
+            self._count("coalesced")
+            return future.result(timeout=self.wait_timeout_seconds)
+        return self._load(key, loader, future)
+
+    async def aget(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Get a value from async code, running a blocking loader in a worker thread.
+
+        Args:
+            key: Cache key within the namespace
+            loader: Blocking callable producing the value
+
+        Returns:
+            The cached or freshly computed value
+        """
+        key = self._key(key)
+        found, value = self._lookup(key, loader)
+        if found:
+            return value
+
+        future, leader = self._claim(key)
+        if not leader:
+            self._count("coalesced")
+            # Shielded so a waiter that times out or is cancelled does not cancel
+            # the shared future the leader and the other waiters depend on
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.wait_timeout_seconds)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._load, key, loader, future)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """
+        Drop one key, or every key in the namespace.
+
+        Args:
+            key: Cache key within the namespace (all keys when omitted)
+        """
+        if key is None:
+            self.backend.clear(self.namespace + ":")
+        else:
+            self.backend.delete(self._key(key))
+
+    def _key(self, key: str) -> str:
+        """Qualify a key with the namespace"""
+        return f"{self.namespace}:{key}"
+
+    def _lookup(self, key: str, loader: Callable[[], Any]) -> Tuple[bool, Any]:
+        """
+        Serve fresh entries, and stale ones while scheduling a refresh.
+
+        Returns:
+            tuple: (found, value)
+        """
+        try:
+            entry = self.backend.get(key)
+        except Exception:
+            logger.exception("Response cache read failed for %s", key)
+            entry = None
+
+        if entry is None:
+            self._count("misses")
+            return False, None
+
+        if time.time() < entry.fresh_until:
+            self._count("hits")
+            return True, entry.value
+
+        self._count("stale_hits")
+        future, leader = self._claim(key)
+        if leader:
+            self._background().submit(self._refresh, key, loader, future)
+        return True, entry.value
+
+    def _count(self, stat: str) -> None:
+        """Increment a stats counter (get() runs from many threads)"""
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _claim(self, key: str) -> Tuple[Future, bool]:
+        """
+        Join the in-flight computation for a key, or become its leader.
+
+        Returns:
+            tuple: (future for the value, whether the caller must compute it)
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _load(self, key: str, loader: Callable[[], Any], future: Future) -> Any:
+        """Compute a value as the leader, store it and release any waiting callers"""
+        try:
+            value = loader()
+            now = time.time()
+            entry = CacheEntry(value, now + self.ttl_seconds, now + self.ttl_seconds + self.stale_seconds)
+            try:
+                self.backend.set(key, entry)
+            except Exception:
+                logger.exception("Response cache write failed for %s", key)
+            if not future.done():
+                future.set_result(value)
+            return value
+        except Exception as e:
+            self._count("errors")
+            if not future.done():
+                future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh(self, key: str, loader: Callable[[], Any], future: Future) -> None:
+        """Background refresh of a stale entry; failures keep the stale value"""
+        try:
+            self._load(key, loader, future)
+        except Exception:
+            logger.exception("Background refresh failed for %s", key)
+
+    def _background(self) -> ThreadPoolExecutor:
+        """Get the executor used for stale refreshes"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+        return self._executor
+
+
+# Shared cache for leaderboard reads (badge leaderboards and admin views)
+leaderboard_cache = ResponseCache("leaderboard", backend=create_cache_backend(), ttl_seconds=30, stale_seconds=300)
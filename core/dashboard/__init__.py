@@ -0,0 +1,10 @@
+"""
+Dashboard composition for Local Lift application.
+
+This package assembles dashboards from independently loaded sections with
+per-section deadlines, caching and partial results.
+"""
+
+from .composer import DashboardComposer, DashboardSection
+
+__all__ = ['DashboardComposer', 'DashboardSection']
@@ -0,0 +1,178 @@
+"""
+Dashboard composition.
+
+A dashboard is declared as independent sections, each with its own loader,
+deadline and cache lifetime. compose() runs every section concurrently and
+returns whatever finished in time: a section that misses its deadline or fails
+is reported in the response metadata instead of failing the whole dashboard.
+Blocking loaders run in worker threads with their own database session (a
+Session must not be shared across threads), and cached sections go through a
+ResponseCache, so a slow section that misses its deadline keeps loading in the
+background and is served from the cache on the next request.
+"""
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+import asyncio
+import inspect
+import logging
+import time
+
+from core.cache.response_cache import CacheBackend, ResponseCache, create_cache_backend
+
+logger = logging.getLogger(__name__)
+
+
+def _consume_result(load: "asyncio.Future") -> None:
+    """Retrieve the outcome of a load nobody awaits any more so errors are not reported as unhandled"""
+    if not load.cancelled():
+        load.exception()
+
+
+class DashboardSection:
+    """
+    One independently loaded part of a dashboard.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[..., Any],
+        timeout_seconds: float = 2.0,
+        ttl_seconds: float = 0,
+        stale_seconds: float = 300,
+        default: Any = None
+    ):
+        """
+        Declare a section
+
+        Args:
+            name: Key of the section in the composed dashboard
+            loader: Blocking callable taking (db, **params), or coroutine function taking (**params)
+            timeout_seconds: Deadline for the section
+            ttl_seconds: Seconds a loaded value is reused (0 disables caching)
+            stale_seconds: Further seconds a cached value is served while it is refreshed
+            default: Value used when the section misses its deadline or fails
+        """
+        self.name = name
+        self.loader = loader
+        self.timeout_seconds = timeout_seconds
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.default = default
+        self.is_async = inspect.iscoroutinefunction(loader)
+
+
+class DashboardComposer:
+    """
+    Runs a dashboard's sections concurrently with per-section deadlines and caching.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        sections: Iterable[DashboardSection],
+        session_factory: Optional[Callable[[], Any]] = None,
+        backend: Optional[CacheBackend] = None
+    ):
+        """
+        Initialize the composer
+
+        Args:
+            name: Dashboard name, used to namespace cache keys
+            sections: Section declarations
+            session_factory: Callable returning a new database session for blocking loaders
+                (defaults to core.database.connection.SessionLocal)
+            backend: Cache backend shared by the section caches
+        """
+        self.name = name
+        self.sections = list(sections)
+        self._session_factory = session_factory
+        backend = backend or create_cache_backend()
+        self._caches: Dict[str, ResponseCache] = {
+            section.name: ResponseCache(
+                f"dashboard:{name}:{section.name}",
+                backend=backend,
+                ttl_seconds=section.ttl_seconds,
+                stale_seconds=section.stale_seconds
+            )
+            for section in self.sections
+            if section.ttl_seconds > 0 and not section.is_async
+        }
+
+    async def compose(self, cache_key: str = "", **params: Any) -> Dict[str, Any]:
+        """
+        Load every section concurrently.
+
+        Args:
+            cache_key: Key identifying the viewer/scope for cached sections (e.g. the user ID)
+            **params: Parameters passed to every loader
+
+        Returns:
+            dict: Section values by name, plus a "meta" entry with per-section status
+                (ok, timeout or error), timings and whether the result is partial
+        """
+        results = await asyncio.gather(*(self._run(section, cache_key, params) for section in self.sections))
+
+        dashboard: Dict[str, Any] = {}
+        statuses: Dict[str, Dict[str, Any]] = {}
+        for section, (value, section_status, elapsed) in zip(self.sections, results):
+            dashboard[section.name] = value
+            statuses[section.name] = {"status": section_status, "elapsed_ms": round(elapsed * 1000, 1)}
+
+        dashboard["meta"] = {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "partial": any(entry["status"] != "ok" for entry in statuses.values()),
+            "sections": statuses
+        }
+        return dashboard
+
+    def invalidate(self, cache_key: Optional[str] = None, section: Optional[str] = None) -> None:
+        """
+        Drop cached section values.
+
+        Args:
+            cache_key: Viewer/scope key to drop (all keys when omitted)
+            section: Section to drop (all sections when omitted)
+        """
+        for name, cache in self._caches.items():
+            if section is None or name == section:
+                cache.invalidate(cache_key)
+
+    async def _run(self, section: DashboardSection, cache_key: str, params: Dict[str, Any]):
+        """Load one section within its deadline; returns (value, status, elapsed seconds)"""
+        started = time.monotonic()
+        try:
+            if section.is_async:
+                value = await asyncio.wait_for(section.loader(**params), section.timeout_seconds)
+            elif section.name in self._caches:
+                loader = lambda: self._load_blocking(section, params)
+                # Shielded so missing the deadline leaves the load running to fill the cache
+                load = asyncio.ensure_future(self._caches[section.name].aget(cache_key, loader))
+                load.add_done_callback(_consume_result)
+                value = await asyncio.wait_for(asyncio.shield(load), section.timeout_seconds)
+            else:
+                loop = asyncio.get_running_loop()
+                value = await asyncio.wait_for(
+                    loop.run_in_executor(None, self._load_blocking, section, params),
+                    section.timeout_seconds
+                )
+            return value, "ok", time.monotonic() - started
+        except asyncio.TimeoutError:
+            logger.warning("Dashboard %s section %s missed its %.1fs deadline", self.name, section.name, section.timeout_seconds)
+            return section.default, "timeout", time.monotonic() - started
+        except Exception:
+            logger.exception("Dashboard %s section %s failed", self.name, section.name)
+            return section.default, "error", time.monotonic() - started
+
+    def _load_blocking(self, section: DashboardSection, params: Dict[str, Any]) -> Any:
+        """Run a blocking loader with its own database session"""
+        factory = self._session_factory
+        if factory is None:
+            from core.database.connection import SessionLocal
+            factory = SessionLocal
+
+        db = factory()
+        try:
+            return section.loader(db, **params)
+        finally:
+            db.close()
@@ -0,0 +1,10 @@
+"""
+Reporting helpers for Local Lift application.
+
+This package holds the date arithmetic and change formatting shared by the
+investor, franchise and regional reports.
+"""
+
+from .periods import add_months, format_change, utc_today
+
+__all__ = ['add_months', 'format_change', 'utc_today']
@@ -0,0 +1,25 @@
+"""
+Report periods and period-over-period changes.
+"""
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Optional
+
+
+def utc_today() -> date:
+    """Get the current UTC date"""
+    return datetime.now(timezone.utc).date()
+
+
+def add_months(month: date, months: int) -> date:
+    """Shift the first day of a month by a number of months"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def format_change(current: Any, previous: Any) -> Optional[str]:
+    """Format the change against the previous period as a signed percentage, or None without a base"""
+    if not previous:
+        return None
+    change = (Decimal(current) - Decimal(previous)) * 100 / Decimal(previous)
+    return f"{change:+.1f}%"
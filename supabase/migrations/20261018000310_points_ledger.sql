@@ -0,0 +1,67 @@
+-- Points Ledger Migration
+-- Turns gamification.user_points into an append-only ledger with idempotency keys
+-- and adds a per-user running balance that is materialized on every award
+
+-- Ledger columns
+ALTER TABLE gamification.user_points
+    ADD COLUMN IF NOT EXISTS action TEXT,
+    ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(200);
+
+-- A retried award with the same key is ignored instead of counted twice
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_points_idempotency_key
+    ON gamification.user_points(idempotency_key)
+    WHERE idempotency_key IS NOT NULL;
+
+-- Recent-activity lookups per user
+CREATE INDEX IF NOT EXISTS idx_user_points_user_awarded_at
+    ON gamification.user_points(user_id, awarded_at DESC);
+
+-- Ledger rows are never updated once written, and only deleted together with
+-- their user (the ON DELETE CASCADE from auth.users)
+CREATE OR REPLACE FUNCTION gamification.prevent_user_points_mutation()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' AND (
+        -- Fired from the foreign key's cascade trigger
+        pg_trigger_depth() > 1
+        -- Or the user row is already gone within this transaction
+        OR NOT EXISTS (SELECT 1 FROM auth.users WHERE id = OLD.user_id)
+    ) THEN
+        RETURN OLD;
+    END IF;
+    RAISE EXCEPTION 'gamification.user_points is append-only; record a correcting entry with a negative amount instead';
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_points_append_only ON gamification.user_points;
+CREATE TRIGGER user_points_append_only
+BEFORE UPDATE OR DELETE ON gamification.user_points
+FOR EACH ROW
+EXECUTE FUNCTION gamification.prevent_user_points_mutation();
+
+-- Running balance per user, updated in the same transaction as the ledger insert
+CREATE TABLE IF NOT EXISTS gamification.user_balances (
+    user_id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+    total_points BIGINT NOT NULL DEFAULT 0,
+    level INTEGER NOT NULL DEFAULT 1,
+    award_count INTEGER NOT NULL DEFAULT 0,
+    last_awarded_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Leaderboards rank users by balance
+CREATE INDEX IF NOT EXISTS idx_user_balances_total_points
+    ON gamification.user_balances(total_points DESC);
+
+-- Backfill balances from any existing ledger rows
+INSERT INTO gamification.user_balances (user_id, total_points, award_count, last_awarded_at)
+SELECT user_id, SUM(amount), COUNT(*), MAX(awarded_at)
+FROM gamification.user_points
+GROUP BY user_id
+ON CONFLICT (user_id) DO NOTHING;
+
+UPDATE gamification.user_balances b
+SET level = GREATEST(1, (
+    SELECT COUNT(*) FROM gamification.levels l WHERE l.min_points <= b.total_points
+));
@@ -0,0 +1,20 @@
+-- Level Table Versioning Migration
+-- Keeps gamification.levels.updated_at current so the application's level
+-- resolver can detect edits by checking COUNT(*) and MAX(updated_at)
+
+CREATE OR REPLACE FUNCTION gamification.touch_levels_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS levels_touch_updated_at ON gamification.levels;
+CREATE TRIGGER levels_touch_updated_at
+BEFORE UPDATE ON gamification.levels
+FOR EACH ROW
+EXECUTE FUNCTION gamification.touch_levels_updated_at();
+
+-- Level lookups read thresholds in ascending order
+CREATE INDEX IF NOT EXISTS idx_levels_min_points ON gamification.levels(min_points);
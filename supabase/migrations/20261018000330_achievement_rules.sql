@@ -0,0 +1,67 @@
+-- Achievement Rules Migration
+-- Declares gamification achievements as data (metric, aggregate, threshold, window)
+-- and adds per-user metric counters that the achievement rule engine evaluates
+
+-- Rule definition and display fields
+ALTER TABLE gamification.achievements
+    ADD COLUMN IF NOT EXISTS code VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS category VARCHAR(50),
+    ADD COLUMN IF NOT EXISTS difficulty VARCHAR(20),
+    ADD COLUMN IF NOT EXISTS rule JSONB;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_achievements_code
+    ON gamification.achievements(code)
+    WHERE code IS NOT NULL;
+
+-- Rule edits bump updated_at so the engine recompiles its index
+CREATE OR REPLACE FUNCTION gamification.touch_achievements_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS achievements_touch_updated_at ON gamification.achievements;
+CREATE TRIGGER achievements_touch_updated_at
+BEFORE UPDATE ON gamification.achievements
+FOR EACH ROW
+EXECUTE FUNCTION gamification.touch_achievements_updated_at();
+
+-- Daily metric buckets per user (feed windowed sums and streaks)
+CREATE TABLE IF NOT EXISTS gamification.user_metric_daily (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    metric VARCHAR(100) NOT NULL,
+    day DATE NOT NULL,
+    value BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, metric, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_metric_daily_metric_day
+    ON gamification.user_metric_daily(metric, day);
+
+-- All-time metric totals per user
+CREATE TABLE IF NOT EXISTS gamification.user_metric_totals (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    metric VARCHAR(100) NOT NULL,
+    total BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (user_id, metric)
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_metric_totals_metric_total
+    ON gamification.user_metric_totals(metric, total);
+
+-- Seed the standard achievements as rules
+INSERT INTO gamification.achievements (code, name, description, points, badge_url, category, difficulty, rule) VALUES
+('gmb_superstar', 'GMB Superstar', 'Complete 10 GMB tasks in a single week', 50, 'star.png', 'GMB', 'medium',
+ '{"metric": "gmb_task_completed", "aggregate": "sum", "threshold": 10, "window_days": 7}'),
+('first_certificate', 'First Certificate', 'Earn your first certification', 100, 'certificate.png', 'Education', 'easy',
+ '{"metric": "certification_earned", "aggregate": "sum", "threshold": 1}'),
+('perfect_attendance', 'Perfect Attendance', 'Log in every day for 30 consecutive days', 75, 'calendar.png', 'Engagement', 'hard',
+ '{"metric": "daily_login", "aggregate": "streak", "threshold": 30, "period_days": 1}'),
+('five_star_service', 'Five-Star Service', 'Maintain a 5-star GMB rating for 3 months', 150, 'stars.png', 'GMB', 'hard',
+ '{"metric": "five_star_rating_month", "aggregate": "streak", "threshold": 3, "period_days": 30}'),
+('speedy_response', 'Speedy Response', 'Respond to 20 reviews within 24 hours of posting', 75, 'clock.png', 'GMB', 'medium',
+ '{"metric": "fast_review_response", "aggregate": "sum", "threshold": 20}')
+ON CONFLICT (code) WHERE code IS NOT NULL DO NOTHING;
@@ -0,0 +1,44 @@
+-- Leaderboard Engine Migration
+-- Seeds one leaderboard type per (scope, timeframe), adds the participant
+-- directory used to build regional and franchise boards, and indexes the
+-- standings snapshots written to leaderboards.entries
+
+-- One type per scope and timeframe
+CREATE UNIQUE INDEX IF NOT EXISTS idx_leaderboard_types_scope_timeframe
+    ON leaderboards.leaderboard_types(scope, timeframe);
+
+INSERT INTO leaderboards.leaderboard_types (name, description, scope, timeframe) VALUES
+('Global Daily', 'Points earned today across all regions', 'global', 'day'),
+('Global Weekly', 'Points earned this week across all regions', 'global', 'week'),
+('Global Monthly', 'Points earned this month across all regions', 'global', 'month'),
+('Global All-Time', 'Total points across all regions', 'global', 'all_time'),
+('Regional Daily', 'Points earned today within a region', 'region', 'day'),
+('Regional Weekly', 'Points earned this week within a region', 'region', 'week'),
+('Regional Monthly', 'Points earned this month within a region', 'region', 'month'),
+('Regional All-Time', 'Total points within a region', 'region', 'all_time'),
+('Franchise Daily', 'Points earned today within a franchise', 'franchise', 'day'),
+('Franchise Weekly', 'Points earned this week within a franchise', 'franchise', 'week'),
+('Franchise Monthly', 'Points earned this month within a franchise', 'franchise', 'month'),
+('Franchise All-Time', 'Total points within a franchise', 'franchise', 'all_time')
+ON CONFLICT (scope, timeframe) DO NOTHING;
+
+-- Leaderboard participants and their region / franchise
+CREATE TABLE IF NOT EXISTS leaderboards.participants (
+    user_id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+    display_name VARCHAR(200),
+    role VARCHAR(50),
+    region_id INTEGER,
+    franchise_id INTEGER,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_participants_region ON leaderboards.participants(region_id);
+CREATE INDEX IF NOT EXISTS idx_participants_franchise ON leaderboards.participants(franchise_id);
+
+-- One standing per user, board and period; global rows have NULL region and franchise
+CREATE UNIQUE INDEX IF NOT EXISTS idx_entries_standing
+    ON leaderboards.entries(leaderboard_type_id, period_end, region_id, franchise_id, user_id)
+    NULLS NOT DISTINCT;
+
+CREATE INDEX IF NOT EXISTS idx_entries_type_period_end
+    ON leaderboards.entries(leaderboard_type_id, period_end DESC);
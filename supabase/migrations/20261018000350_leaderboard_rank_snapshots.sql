@@ -0,0 +1,13 @@
+-- Leaderboard Rank Snapshots Migration
+-- Stores each board's final standings for a period as one array of user IDs
+-- in rank order, so the previous snapshot is loaded as a single row per board
+
+CREATE TABLE IF NOT EXISTS leaderboards.rank_snapshots (
+    leaderboard_type_id INTEGER NOT NULL REFERENCES leaderboards.leaderboard_types(id),
+    scope_id INTEGER NOT NULL DEFAULT 0, -- Region or franchise ID, 0 for global boards
+    period_end TIMESTAMPTZ NOT NULL,
+    period_start TIMESTAMPTZ,
+    user_ids UUID[] NOT NULL DEFAULT '{}',
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (leaderboard_type_id, scope_id, period_end)
+);
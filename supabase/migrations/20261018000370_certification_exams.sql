@@ -0,0 +1,56 @@
+-- Certification Exams Migration
+-- Adds exam questions with their answer keys and graded exam attempts
+
+-- Exam settings per course
+ALTER TABLE certifications.courses
+    ADD COLUMN IF NOT EXISTS offers_certification BOOLEAN DEFAULT TRUE,
+    ADD COLUMN IF NOT EXISTS exam_pass_score DECIMAL(5,2) DEFAULT 70;
+
+-- Exam questions; correct_options holds the 0-based indexes of the correct options
+CREATE TABLE IF NOT EXISTS certifications.exam_questions (
+    id SERIAL PRIMARY KEY,
+    course_id INTEGER NOT NULL REFERENCES certifications.courses(id) ON DELETE CASCADE,
+    prompt TEXT NOT NULL,
+    options JSONB NOT NULL DEFAULT '[]',
+    correct_options INTEGER[] NOT NULL DEFAULT '{}',
+    weight DECIMAL(6,2) NOT NULL DEFAULT 1,
+    topic VARCHAR(100),
+    sequence_order INTEGER NOT NULL DEFAULT 0,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_exam_questions_course ON certifications.exam_questions(course_id, sequence_order);
+
+-- Answer key edits bump updated_at so compiled keys are rebuilt
+CREATE OR REPLACE FUNCTION certifications.touch_exam_questions_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS exam_questions_touch_updated_at ON certifications.exam_questions;
+CREATE TRIGGER exam_questions_touch_updated_at
+BEFORE UPDATE ON certifications.exam_questions
+FOR EACH ROW
+EXECUTE FUNCTION certifications.touch_exam_questions_updated_at();
+
+-- Graded exam attempts, kept with their answers so they can be regraded
+CREATE TABLE IF NOT EXISTS certifications.exam_attempts (
+    id SERIAL PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    course_id INTEGER NOT NULL REFERENCES certifications.courses(id) ON DELETE CASCADE,
+    answers JSONB NOT NULL DEFAULT '{}',
+    score DECIMAL(5,2) NOT NULL DEFAULT 0,
+    correct_count INTEGER NOT NULL DEFAULT 0,
+    passed BOOLEAN NOT NULL DEFAULT FALSE,
+    answer_key_version VARCHAR(32),
+    submitted_at TIMESTAMPTZ DEFAULT NOW(),
+    graded_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_exam_attempts_course_version ON certifications.exam_attempts(course_id, answer_key_version);
+CREATE INDEX IF NOT EXISTS idx_exam_attempts_user_course ON certifications.exam_attempts(user_id, course_id, submitted_at DESC);
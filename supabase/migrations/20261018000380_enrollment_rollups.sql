@@ -0,0 +1,44 @@
+-- Enrollment Rollups Migration
+-- Keeps per-enrollment progress totals next to the enrollment so course and
+-- franchise metrics read one row per enrollment instead of counting module rows
+
+-- Module settings used when recording completions
+ALTER TABLE certifications.modules
+    ADD COLUMN IF NOT EXISTS has_quiz BOOLEAN DEFAULT FALSE,
+    ADD COLUMN IF NOT EXISTS points_awarded INTEGER DEFAULT 0;
+
+-- Per-module results
+ALTER TABLE certifications.module_progress
+    ADD COLUMN IF NOT EXISTS score DECIMAL(5,2),
+    ADD COLUMN IF NOT EXISTS time_spent_seconds INTEGER;
+
+-- Enrollment-level rollup, maintained in the same transaction as module completions
+ALTER TABLE certifications.enrollments
+    ADD COLUMN IF NOT EXISTS modules_completed INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS total_modules INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS last_activity_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_enrollments_course ON certifications.enrollments(course_id);
+CREATE INDEX IF NOT EXISTS idx_modules_course ON certifications.modules(course_id, sequence_order);
+
+-- Backfill the rollups from existing module rows
+UPDATE certifications.enrollments e
+SET total_modules = totals.total_modules,
+    modules_completed = totals.modules_completed,
+    progress_percentage = CASE
+        WHEN totals.total_modules > 0
+        THEN LEAST(100, ROUND(totals.modules_completed * 100.0 / totals.total_modules, 2))
+        ELSE 0
+    END,
+    last_activity_at = totals.last_activity_at
+FROM (
+    SELECT e2.id,
+           (SELECT COUNT(*) FROM certifications.modules m
+            WHERE m.course_id = e2.course_id AND m.is_active) AS total_modules,
+           COUNT(mp.id) FILTER (WHERE mp.is_complete) AS modules_completed,
+           MAX(COALESCE(mp.completed_at, mp.started_at)) AS last_activity_at
+    FROM certifications.enrollments e2
+    LEFT JOIN certifications.module_progress mp ON mp.enrollment_id = e2.id
+    GROUP BY e2.id, e2.course_id
+) AS totals
+WHERE totals.id = e.id;
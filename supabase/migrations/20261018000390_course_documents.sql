@@ -0,0 +1,130 @@
+-- Course Documents Migration
+-- Denormalized read model for the certification catalog: one JSON document per
+-- course with its category and modules, rebuilt by triggers whenever a course,
+-- one of its modules or its category changes
+
+-- Prerequisite course IDs
+ALTER TABLE certifications.courses
+    ADD COLUMN IF NOT EXISTS prerequisites INTEGER[];
+
+CREATE TABLE IF NOT EXISTS certifications.course_documents (
+    course_id INTEGER PRIMARY KEY REFERENCES certifications.courses(id) ON DELETE CASCADE,
+    document JSONB NOT NULL,
+    version VARCHAR(32) NOT NULL,
+    built_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE INDEX IF NOT EXISTS idx_course_documents_built_at ON certifications.course_documents(built_at);
+
+-- Compose and store one course's document
+CREATE OR REPLACE FUNCTION certifications.build_course_document(p_course_id INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    v_document JSONB;
+BEGIN
+    SELECT jsonb_build_object(
+        'id', c.id,
+        'title', c.title,
+        'description', c.description,
+        'level', c.level,
+        'category', LOWER(cat.name),
+        'category_id', c.category_id,
+        'category_name', cat.name,
+        'category_icon_url', cat.icon_url,
+        'status', CASE WHEN c.is_active THEN 'active' ELSE 'archived' END,
+        'duration_minutes', c.duration_minutes,
+        'points', c.points_awarded,
+        'certification', COALESCE(c.offers_certification, FALSE),
+        'exam_pass_score', c.exam_pass_score,
+        'prerequisites', to_jsonb(c.prerequisites),
+        'created_at', c.created_at,
+        'updated_at', c.updated_at,
+        'modules', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'id', m.id,
+                'title', m.title,
+                'description', m.description,
+                'content_url', m.content_url,
+                'sequence_order', m.sequence_order,
+                'duration_minutes', m.duration_minutes,
+                'has_quiz', COALESCE(m.has_quiz, FALSE)
+            ) ORDER BY m.sequence_order, m.id)
+            FROM certifications.modules m
+            WHERE m.course_id = c.id AND m.is_active
+        ), '[]'::jsonb)
+    )
+    INTO v_document
+    FROM certifications.courses c
+    LEFT JOIN certifications.categories cat ON cat.id = c.category_id
+    WHERE c.id = p_course_id;
+
+    IF v_document IS NULL THEN
+        DELETE FROM certifications.course_documents WHERE course_id = p_course_id;
+        RETURN;
+    END IF;
+
+    INSERT INTO certifications.course_documents (course_id, document, version, built_at)
+    VALUES (p_course_id, v_document, md5(v_document::text), clock_timestamp())
+    ON CONFLICT (course_id) DO UPDATE
+    SET document = EXCLUDED.document,
+        version = EXCLUDED.version,
+        built_at = EXCLUDED.built_at
+    WHERE certifications.course_documents.version IS DISTINCT FROM EXCLUDED.version;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION certifications.rebuild_course_document_from_course()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM certifications.course_documents WHERE course_id = OLD.id;
+        RETURN OLD;
+    END IF;
+    PERFORM certifications.build_course_document(NEW.id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION certifications.rebuild_course_document_from_module()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM certifications.build_course_document(OLD.course_id);
+    END IF;
+    IF TG_OP <> 'DELETE' AND (TG_OP = 'INSERT' OR NEW.course_id IS DISTINCT FROM OLD.course_id) THEN
+        PERFORM certifications.build_course_document(NEW.course_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION certifications.rebuild_course_documents_from_category()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM certifications.build_course_document(c.id)
+    FROM certifications.courses c
+    WHERE c.category_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS courses_rebuild_document ON certifications.courses;
+CREATE TRIGGER courses_rebuild_document
+AFTER INSERT OR UPDATE OR DELETE ON certifications.courses
+FOR EACH ROW
+EXECUTE FUNCTION certifications.rebuild_course_document_from_course();
+
+DROP TRIGGER IF EXISTS modules_rebuild_document ON certifications.modules;
+CREATE TRIGGER modules_rebuild_document
+AFTER INSERT OR UPDATE OR DELETE ON certifications.modules
+FOR EACH ROW
+EXECUTE FUNCTION certifications.rebuild_course_document_from_module();
+
+DROP TRIGGER IF EXISTS categories_rebuild_documents ON certifications.categories;
+CREATE TRIGGER categories_rebuild_documents
+AFTER UPDATE ON certifications.categories
+FOR EACH ROW
+EXECUTE FUNCTION certifications.rebuild_course_documents_from_category();
+
+-- Build documents for existing courses
+SELECT certifications.build_course_document(id) FROM certifications.courses;
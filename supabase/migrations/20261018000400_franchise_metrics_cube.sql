@@ -0,0 +1,283 @@
+-- Franchise Metrics Cube Migration
+-- Per-franchise monthly metrics keyed by (region, franchise, period). Measures are
+-- stored as additive sums and counts; rates and the performance index are generated
+-- columns so comparison reports can sort on indexed columns without joining the
+-- client, order, review and certification tables per request.
+--
+-- Source-derived measures (clients, revenue, education) are rebuilt nightly for the
+-- current and previous month, and incrementally for franchises whose source rows
+-- changed since the last run. Review, task and satisfaction measures are recorded
+-- as deltas by the application as those events happen.
+
+CREATE SCHEMA IF NOT EXISTS regional;
+
+-- Franchise directory
+CREATE TABLE IF NOT EXISTS regional.franchises (
+    id SERIAL PRIMARY KEY,
+    region_id INTEGER NOT NULL,
+    name VARCHAR(200) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (status IN ('active', 'inactive', 'pending')),
+    established_date DATE,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_franchises_region ON regional.franchises(region_id, status);
+
+CREATE TABLE IF NOT EXISTS regional.franchise_metrics (
+    region_id INTEGER NOT NULL,
+    franchise_id INTEGER NOT NULL REFERENCES regional.franchises(id) ON DELETE CASCADE,
+    period DATE NOT NULL,
+    clients_count INTEGER NOT NULL DEFAULT 0,
+    active_clients INTEGER NOT NULL DEFAULT 0,
+    new_clients INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+    previous_revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+    tasks_total INTEGER NOT NULL DEFAULT 0,
+    tasks_completed INTEGER NOT NULL DEFAULT 0,
+    satisfaction_sum DECIMAL(10,2) NOT NULL DEFAULT 0,
+    satisfaction_count INTEGER NOT NULL DEFAULT 0,
+    reviews INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    reviews_responded INTEGER NOT NULL DEFAULT 0,
+    courses_enrolled INTEGER NOT NULL DEFAULT 0,
+    courses_completed INTEGER NOT NULL DEFAULT 0,
+    enrolled_users INTEGER NOT NULL DEFAULT 0,
+    certified_users INTEGER NOT NULL DEFAULT 0,
+    growth_rate DECIMAL(7,1) GENERATED ALWAYS AS (
+        CASE WHEN previous_revenue > 0 THEN ROUND((revenue - previous_revenue) * 100 / previous_revenue, 1) END
+    ) STORED,
+    task_completion_rate DECIMAL(5,1) GENERATED ALWAYS AS (
+        CASE WHEN tasks_total > 0 THEN ROUND(tasks_completed * 100.0 / tasks_total, 1) END
+    ) STORED,
+    client_satisfaction DECIMAL(3,1) GENERATED ALWAYS AS (
+        CASE WHEN satisfaction_count > 0 THEN ROUND(satisfaction_sum / satisfaction_count, 1) END
+    ) STORED,
+    average_rating DECIMAL(3,1) GENERATED ALWAYS AS (
+        CASE WHEN reviews > 0 THEN ROUND(rating_sum::NUMERIC / reviews, 1) END
+    ) STORED,
+    response_rate DECIMAL(5,1) GENERATED ALWAYS AS (
+        CASE WHEN reviews > 0 THEN ROUND(reviews_responded * 100.0 / reviews, 1) END
+    ) STORED,
+    certification_rate DECIMAL(5,1) GENERATED ALWAYS AS (
+        CASE WHEN enrolled_users > 0 THEN ROUND(certified_users * 100.0 / enrolled_users, 1) END
+    ) STORED,
+    -- Weighted blend of task completion (30%), review rating (25%), review responses (25%)
+    -- and certification (20%); components without data are left out of the weighting
+    performance_index DECIMAL(5,1) GENERATED ALWAYS AS (
+        CASE WHEN tasks_total + reviews + enrolled_users > 0 THEN ROUND(
+            (
+                CASE WHEN tasks_total > 0 THEN 30 * tasks_completed::NUMERIC / tasks_total ELSE 0 END
+                + CASE WHEN reviews > 0 THEN 25 * rating_sum::NUMERIC / (reviews * 5) ELSE 0 END
+                + CASE WHEN reviews > 0 THEN 25 * reviews_responded::NUMERIC / reviews ELSE 0 END
+                + CASE WHEN enrolled_users > 0 THEN 20 * certified_users::NUMERIC / enrolled_users ELSE 0 END
+            ) * 100 / (
+                CASE WHEN tasks_total > 0 THEN 30 ELSE 0 END
+                + CASE WHEN reviews > 0 THEN 50 ELSE 0 END
+                + CASE WHEN enrolled_users > 0 THEN 20 ELSE 0 END
+            ), 1) END
+    ) STORED,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (region_id, franchise_id, period)
+);
+
+-- Sort columns of the comparison report, scoped to a region and period
+CREATE INDEX IF NOT EXISTS idx_franchise_metrics_performance
+    ON regional.franchise_metrics(region_id, period, performance_index DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_franchise_metrics_clients
+    ON regional.franchise_metrics(region_id, period, clients_count DESC);
+CREATE INDEX IF NOT EXISTS idx_franchise_metrics_revenue
+    ON regional.franchise_metrics(region_id, period, revenue DESC);
+CREATE INDEX IF NOT EXISTS idx_franchise_metrics_growth
+    ON regional.franchise_metrics(region_id, period, growth_rate DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_franchise_metrics_franchise
+    ON regional.franchise_metrics(franchise_id, period);
+
+-- Franchises whose source rows changed since the last incremental run
+CREATE TABLE IF NOT EXISTS regional.franchise_metrics_pending (
+    franchise_id INTEGER NOT NULL,
+    period DATE NOT NULL,
+    queued_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (franchise_id, period)
+);
+
+-- Rebuild the source-derived measures of one month, for all or some franchises
+CREATE OR REPLACE FUNCTION regional.rebuild_franchise_metrics(p_period DATE, p_franchise_ids INTEGER[] DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    v_start DATE := date_trunc('month', p_period)::DATE;
+    v_end DATE := (date_trunc('month', p_period) + INTERVAL '1 month')::DATE;
+    v_previous DATE := (date_trunc('month', p_period) - INTERVAL '1 month')::DATE;
+    v_rows INTEGER;
+BEGIN
+    WITH scope AS (
+        SELECT f.id AS franchise_id, f.region_id
+        FROM regional.franchises f
+        WHERE p_franchise_ids IS NULL OR f.id = ANY(p_franchise_ids)
+    ),
+    client_totals AS (
+        SELECT p.franchise_id,
+               COUNT(*) FILTER (WHERE c.created_at < v_end) AS clients_count,
+               COUNT(*) FILTER (WHERE c.created_at < v_end AND c.status = 'active') AS active_clients,
+               COUNT(*) FILTER (WHERE c.created_at >= v_start AND c.created_at < v_end) AS new_clients
+        FROM public.customers c
+        JOIN leaderboards.participants p ON p.user_id = c.assigned_to
+        WHERE p.franchise_id IN (SELECT franchise_id FROM scope)
+        GROUP BY p.franchise_id
+    ),
+    revenue_totals AS (
+        SELECT p.franchise_id,
+               SUM(o.amount) FILTER (WHERE COALESCE(o.date, o.created_at::DATE) >= v_start) AS revenue,
+               SUM(o.amount) FILTER (WHERE COALESCE(o.date, o.created_at::DATE) < v_start) AS previous_revenue
+        FROM public.orders o
+        JOIN public.customers c ON c.id = o.customer_id
+        JOIN leaderboards.participants p ON p.user_id = c.assigned_to
+        WHERE p.franchise_id IN (SELECT franchise_id FROM scope)
+          AND o.status = 'completed'
+          AND COALESCE(o.date, o.created_at::DATE) >= v_previous
+          AND COALESCE(o.date, o.created_at::DATE) < v_end
+        GROUP BY p.franchise_id
+    ),
+    education_totals AS (
+        SELECT p.franchise_id,
+               COUNT(*) FILTER (WHERE e.enrolled_at < v_end) AS courses_enrolled,
+               COUNT(*) FILTER (WHERE e.completed_at < v_end) AS courses_completed,
+               COUNT(DISTINCT e.user_id) FILTER (WHERE e.enrolled_at < v_end) AS enrolled_users,
+               COUNT(DISTINCT e.user_id) FILTER (WHERE e.certification_issued_at < v_end) AS certified_users
+        FROM certifications.enrollments e
+        JOIN leaderboards.participants p ON p.user_id = e.user_id
+        WHERE p.franchise_id IN (SELECT franchise_id FROM scope)
+        GROUP BY p.franchise_id
+    )
+    INSERT INTO regional.franchise_metrics (
+        region_id, franchise_id, period,
+        clients_count, active_clients, new_clients, revenue, previous_revenue,
+        courses_enrolled, courses_completed, enrolled_users, certified_users, refreshed_at
+    )
+    SELECT s.region_id, s.franchise_id, v_start,
+           COALESCE(ct.clients_count, 0), COALESCE(ct.active_clients, 0), COALESCE(ct.new_clients, 0),
+           COALESCE(rt.revenue, 0), COALESCE(rt.previous_revenue, 0),
+           COALESCE(et.courses_enrolled, 0), COALESCE(et.courses_completed, 0),
+           COALESCE(et.enrolled_users, 0), COALESCE(et.certified_users, 0), NOW()
+    FROM scope s
+    LEFT JOIN client_totals ct ON ct.franchise_id = s.franchise_id
+    LEFT JOIN revenue_totals rt ON rt.franchise_id = s.franchise_id
+    LEFT JOIN education_totals et ON et.franchise_id = s.franchise_id
+    ON CONFLICT (region_id, franchise_id, period) DO UPDATE
+    SET clients_count = EXCLUDED.clients_count,
+        active_clients = EXCLUDED.active_clients,
+        new_clients = EXCLUDED.new_clients,
+        revenue = EXCLUDED.revenue,
+        previous_revenue = EXCLUDED.previous_revenue,
+        courses_enrolled = EXCLUDED.courses_enrolled,
+        courses_completed = EXCLUDED.courses_completed,
+        enrolled_users = EXCLUDED.enrolled_users,
+        certified_users = EXCLUDED.certified_users,
+        refreshed_at = EXCLUDED.refreshed_at;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rebuild the franchises queued by source changes
+CREATE OR REPLACE FUNCTION regional.rebuild_pending_franchise_metrics()
+RETURNS INTEGER AS $$
+DECLARE
+    v_batch RECORD;
+    v_rows INTEGER := 0;
+BEGIN
+    FOR v_batch IN
+        WITH claimed AS (
+            DELETE FROM regional.franchise_metrics_pending RETURNING franchise_id, period
+        )
+        SELECT period, array_agg(franchise_id) AS franchise_ids FROM claimed GROUP BY period
+    LOOP
+        v_rows := v_rows + regional.rebuild_franchise_metrics(v_batch.period, v_batch.franchise_ids);
+    END LOOP;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Queue the franchise of the user behind a changed source row for the current month
+CREATE OR REPLACE FUNCTION regional.queue_franchise_metrics(p_user_id UUID)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO regional.franchise_metrics_pending (franchise_id, period)
+    SELECT p.franchise_id, date_trunc('month', NOW())::DATE
+    FROM leaderboards.participants p
+    WHERE p.user_id = p_user_id AND p.franchise_id IS NOT NULL
+    ON CONFLICT DO NOTHING;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION regional.queue_franchise_metrics_from_customer()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM regional.queue_franchise_metrics(OLD.assigned_to);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM regional.queue_franchise_metrics(NEW.assigned_to);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION regional.queue_franchise_metrics_from_order()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM regional.queue_franchise_metrics(c.assigned_to)
+    FROM public.customers c
+    WHERE c.id = CASE WHEN TG_OP = 'DELETE' THEN OLD.customer_id ELSE NEW.customer_id END;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION regional.queue_franchise_metrics_from_enrollment()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM regional.queue_franchise_metrics(CASE WHEN TG_OP = 'DELETE' THEN OLD.user_id ELSE NEW.user_id END);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS customers_queue_franchise_metrics ON public.customers;
+CREATE TRIGGER customers_queue_franchise_metrics
+AFTER INSERT OR UPDATE OF status, assigned_to OR DELETE ON public.customers
+FOR EACH ROW
+EXECUTE FUNCTION regional.queue_franchise_metrics_from_customer();
+
+DROP TRIGGER IF EXISTS orders_queue_franchise_metrics ON public.orders;
+CREATE TRIGGER orders_queue_franchise_metrics
+AFTER INSERT OR UPDATE OF amount, status, date OR DELETE ON public.orders
+FOR EACH ROW
+EXECUTE FUNCTION regional.queue_franchise_metrics_from_order();
+
+DROP TRIGGER IF EXISTS enrollments_queue_franchise_metrics ON certifications.enrollments;
+CREATE TRIGGER enrollments_queue_franchise_metrics
+AFTER INSERT OR UPDATE OF completed_at, is_certified OR DELETE ON certifications.enrollments
+FOR EACH ROW
+EXECUTE FUNCTION regional.queue_franchise_metrics_from_enrollment();
+
+-- Nightly rebuild of the current and previous month, and incremental runs every
+-- five minutes, when pg_cron is available
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule(
+            'franchise-metrics-nightly',
+            '15 2 * * *',
+            $job$
+            SELECT regional.rebuild_franchise_metrics((date_trunc('month', NOW()) - INTERVAL '1 month')::DATE);
+            SELECT regional.rebuild_franchise_metrics(NOW()::DATE);
+            $job$
+        );
+        PERFORM cron.schedule(
+            'franchise-metrics-incremental',
+            '*/5 * * * *',
+            'SELECT regional.rebuild_pending_franchise_metrics()'
+        );
+    END IF;
+END;
+$$;
@@ -0,0 +1,117 @@
+-- Investor Commissions Migration
+-- Commissions are accrued per (investor, day, region) as orders land, so reports
+-- for any period or custom date range sum day buckets instead of scanning orders
+
+CREATE SCHEMA IF NOT EXISTS investor;
+
+-- Region directory
+CREATE TABLE IF NOT EXISTS regional.regions (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Regions an investor holds, with the commission rate on completed order revenue
+CREATE TABLE IF NOT EXISTS investor.holdings (
+    id SERIAL PRIMARY KEY,
+    investor_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    region_id INTEGER NOT NULL,
+    commission_rate DECIMAL(6,4) NOT NULL CHECK (commission_rate >= 0 AND commission_rate <= 1),
+    start_date DATE NOT NULL DEFAULT CURRENT_DATE,
+    end_date DATE,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_holdings_region ON investor.holdings(region_id, start_date);
+CREATE INDEX IF NOT EXISTS idx_holdings_investor ON investor.holdings(investor_id);
+
+-- Day buckets; the key order serves investor + date range scans
+CREATE TABLE IF NOT EXISTS investor.commission_daily (
+    investor_id UUID NOT NULL,
+    day DATE NOT NULL,
+    region_id INTEGER NOT NULL,
+    orders_count INTEGER NOT NULL DEFAULT 0,
+    order_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    commission DECIMAL(14,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (investor_id, day, region_id)
+);
+
+-- Add (or with p_sign = -1 remove) one order's contribution to the day buckets
+CREATE OR REPLACE FUNCTION investor.accrue_order(p_customer_id UUID, p_amount DECIMAL, p_day DATE, p_sign INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO investor.commission_daily AS d (investor_id, day, region_id, orders_count, order_amount, commission, updated_at)
+    SELECT h.investor_id, p_day, h.region_id, p_sign, p_sign * p_amount, p_sign * ROUND(p_amount * h.commission_rate, 2), NOW()
+    FROM public.customers c
+    JOIN leaderboards.participants p ON p.user_id = c.assigned_to
+    JOIN investor.holdings h ON h.region_id = p.region_id
+    WHERE c.id = p_customer_id
+      AND h.start_date <= p_day
+      AND (h.end_date IS NULL OR h.end_date >= p_day)
+    ON CONFLICT (investor_id, day, region_id) DO UPDATE
+    SET orders_count = d.orders_count + EXCLUDED.orders_count,
+        order_amount = d.order_amount + EXCLUDED.order_amount,
+        commission = d.commission + EXCLUDED.commission,
+        updated_at = EXCLUDED.updated_at;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Completed orders accrue commission; status changes, edits and deletes reverse it
+CREATE OR REPLACE FUNCTION investor.accrue_order_commission()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' AND OLD.status = 'completed' THEN
+        PERFORM investor.accrue_order(OLD.customer_id, OLD.amount, COALESCE(OLD.date, OLD.created_at::DATE), -1);
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.status = 'completed' THEN
+        PERFORM investor.accrue_order(NEW.customer_id, NEW.amount, COALESCE(NEW.date, NEW.created_at::DATE), 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS orders_accrue_commission ON public.orders;
+CREATE TRIGGER orders_accrue_commission
+AFTER INSERT OR UPDATE OF customer_id, amount, status, date OR DELETE ON public.orders
+FOR EACH ROW
+EXECUTE FUNCTION investor.accrue_order_commission();
+
+-- Recompute the day buckets of a date range from orders (after holding or rate changes)
+CREATE OR REPLACE FUNCTION investor.rebuild_commissions(p_start DATE, p_end DATE, p_investor_id UUID DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    v_rows INTEGER;
+BEGIN
+    DELETE FROM investor.commission_daily
+    WHERE day BETWEEN p_start AND p_end
+      AND (p_investor_id IS NULL OR investor_id = p_investor_id);
+
+    INSERT INTO investor.commission_daily (investor_id, day, region_id, orders_count, order_amount, commission, updated_at)
+    SELECT h.investor_id,
+           COALESCE(o.date, o.created_at::DATE) AS day,
+           h.region_id,
+           COUNT(*),
+           SUM(o.amount),
+           SUM(ROUND(o.amount * h.commission_rate, 2)),
+           NOW()
+    FROM public.orders o
+    JOIN public.customers c ON c.id = o.customer_id
+    JOIN leaderboards.participants p ON p.user_id = c.assigned_to
+    JOIN investor.holdings h ON h.region_id = p.region_id
+    WHERE o.status = 'completed'
+      AND COALESCE(o.date, o.created_at::DATE) BETWEEN p_start AND p_end
+      AND h.start_date <= COALESCE(o.date, o.created_at::DATE)
+      AND (h.end_date IS NULL OR h.end_date >= COALESCE(o.date, o.created_at::DATE))
+      AND (p_investor_id IS NULL OR h.investor_id = p_investor_id)
+    GROUP BY h.investor_id, COALESCE(o.date, o.created_at::DATE), h.region_id;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Accrue existing orders
+SELECT investor.rebuild_commissions('1970-01-01', CURRENT_DATE + 1);
@@ -0,0 +1,6 @@
+-- Investor Portfolio Migration
+-- Investment amounts per holding for the portfolio and dashboard views
+
+ALTER TABLE investor.holdings
+    ADD COLUMN IF NOT EXISTS investment_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS current_value DECIMAL(14,2);
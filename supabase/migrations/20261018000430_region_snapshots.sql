@@ -0,0 +1,92 @@
+-- Region Snapshots Migration
+-- One precomposed dashboard document per region, refreshed by a background job on
+-- a schedule and for the regions queued by relevant writes
+
+CREATE TABLE IF NOT EXISTS regional.region_snapshots (
+    region_id INTEGER PRIMARY KEY,
+    document JSONB NOT NULL,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Regions whose snapshot is out of date
+CREATE TABLE IF NOT EXISTS regional.region_snapshots_pending (
+    region_id INTEGER PRIMARY KEY,
+    queued_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION regional.queue_region_snapshot(p_region_id INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    IF p_region_id IS NOT NULL THEN
+        INSERT INTO regional.region_snapshots_pending (region_id)
+        VALUES (p_region_id)
+        ON CONFLICT DO NOTHING;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- New clients and orders queue the region of the user they are assigned to
+CREATE OR REPLACE FUNCTION regional.queue_region_snapshot_from_customer()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM regional.queue_region_snapshot(p.region_id)
+    FROM leaderboards.participants p
+    WHERE p.user_id = NEW.assigned_to;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION regional.queue_region_snapshot_from_order()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM regional.queue_region_snapshot(p.region_id)
+    FROM public.customers c
+    JOIN leaderboards.participants p ON p.user_id = c.assigned_to
+    WHERE c.id = NEW.customer_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION regional.queue_region_snapshot_from_franchise()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.region_id IS DISTINCT FROM NEW.region_id THEN
+        PERFORM regional.queue_region_snapshot(OLD.region_id);
+    END IF;
+    PERFORM regional.queue_region_snapshot(NEW.region_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Cube rows written by the metric rebuilds and recorded deltas
+CREATE OR REPLACE FUNCTION regional.queue_region_snapshot_from_metrics()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM regional.queue_region_snapshot(NEW.region_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS customers_queue_region_snapshot ON public.customers;
+CREATE TRIGGER customers_queue_region_snapshot
+AFTER INSERT OR UPDATE OF assigned_to, status ON public.customers
+FOR EACH ROW
+EXECUTE FUNCTION regional.queue_region_snapshot_from_customer();
+
+DROP TRIGGER IF EXISTS orders_queue_region_snapshot ON public.orders;
+CREATE TRIGGER orders_queue_region_snapshot
+AFTER INSERT OR UPDATE OF status, amount ON public.orders
+FOR EACH ROW
+EXECUTE FUNCTION regional.queue_region_snapshot_from_order();
+
+DROP TRIGGER IF EXISTS franchises_queue_region_snapshot ON regional.franchises;
+CREATE TRIGGER franchises_queue_region_snapshot
+AFTER INSERT OR UPDATE OF status, region_id, name ON regional.franchises
+FOR EACH ROW
+EXECUTE FUNCTION regional.queue_region_snapshot_from_franchise();
+
+DROP TRIGGER IF EXISTS franchise_metrics_queue_region_snapshot ON regional.franchise_metrics;
+CREATE TRIGGER franchise_metrics_queue_region_snapshot
+AFTER INSERT OR UPDATE ON regional.franchise_metrics
+FOR EACH ROW
+EXECUTE FUNCTION regional.queue_region_snapshot_from_metrics();
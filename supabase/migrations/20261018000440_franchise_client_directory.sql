@@ -0,0 +1,163 @@
+-- Franchise Client Directory Migration
+-- Denormalizes each client's franchise, last activity and badge state onto
+-- public.customers so the franchise portal can list clients with keyset
+-- pagination over composite indexes, and adds trigram indexes for name/email search
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE public.customers
+    ADD COLUMN IF NOT EXISTS franchise_id INTEGER REFERENCES regional.franchises(id) ON DELETE SET NULL,
+    ADD COLUMN IF NOT EXISTS last_activity_at TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS badge_earned BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Backfill from the assigned user's franchise and the client's orders and interactions
+UPDATE public.customers c
+SET franchise_id = p.franchise_id
+FROM leaderboards.participants p
+WHERE p.user_id = c.assigned_to
+  AND c.franchise_id IS DISTINCT FROM p.franchise_id;
+
+UPDATE public.customers SET created_at = NOW() WHERE created_at IS NULL;
+
+UPDATE public.customers c
+SET last_activity_at = GREATEST(
+    c.created_at,
+    (SELECT MAX(o.created_at) FROM public.orders o WHERE o.customer_id = c.id),
+    (SELECT MAX(i.created_at) FROM public.customer_interactions i WHERE i.customer_id = c.id)
+);
+
+ALTER TABLE public.customers
+    ALTER COLUMN created_at SET NOT NULL,
+    ALTER COLUMN last_activity_at SET DEFAULT NOW(),
+    ALTER COLUMN last_activity_at SET NOT NULL;
+
+-- Keyset orders for each listing sort, led by the franchise (and the indexed filters)
+CREATE INDEX IF NOT EXISTS idx_customers_franchise_created
+    ON public.customers(franchise_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_customers_franchise_status_created
+    ON public.customers(franchise_id, status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_customers_franchise_badge_created
+    ON public.customers(franchise_id, badge_earned, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_customers_franchise_activity
+    ON public.customers(franchise_id, last_activity_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_customers_franchise_name
+    ON public.customers(franchise_id, name, id);
+
+-- Substring search on name and email
+CREATE INDEX IF NOT EXISTS idx_customers_name_trgm
+    ON public.customers USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_customers_email_trgm
+    ON public.customers USING GIN (email gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_orders_customer
+    ON public.orders(customer_id, status);
+
+-- Keep the franchise in step with the assigned user
+CREATE OR REPLACE FUNCTION public.set_customer_franchise()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.assigned_to IS DISTINCT FROM OLD.assigned_to THEN
+        NEW.franchise_id := (
+            SELECT p.franchise_id FROM leaderboards.participants p WHERE p.user_id = NEW.assigned_to
+        );
+    END IF;
+    NEW.last_activity_at := COALESCE(NEW.last_activity_at, NEW.created_at, NOW());
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS customers_set_franchise ON public.customers;
+CREATE TRIGGER customers_set_franchise
+BEFORE INSERT OR UPDATE OF assigned_to ON public.customers
+FOR EACH ROW
+EXECUTE FUNCTION public.set_customer_franchise();
+
+CREATE OR REPLACE FUNCTION public.move_participant_customers()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE public.customers
+    SET franchise_id = NEW.franchise_id
+    WHERE assigned_to = NEW.user_id
+      AND franchise_id IS DISTINCT FROM NEW.franchise_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS participants_move_customers ON leaderboards.participants;
+CREATE TRIGGER participants_move_customers
+AFTER INSERT OR UPDATE OF franchise_id ON leaderboards.participants
+FOR EACH ROW
+EXECUTE FUNCTION public.move_participant_customers();
+
+-- Orders and interactions count as client activity
+CREATE OR REPLACE FUNCTION public.touch_customer_activity()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE public.customers
+    SET last_activity_at = NOW()
+    WHERE id = NEW.customer_id
+      AND last_activity_at < NOW();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS orders_touch_customer_activity ON public.orders;
+CREATE TRIGGER orders_touch_customer_activity
+AFTER INSERT ON public.orders
+FOR EACH ROW
+EXECUTE FUNCTION public.touch_customer_activity();
+
+DROP TRIGGER IF EXISTS interactions_touch_customer_activity ON public.customer_interactions;
+CREATE TRIGGER interactions_touch_customer_activity
+AFTER INSERT ON public.customer_interactions
+FOR EACH ROW
+EXECUTE FUNCTION public.touch_customer_activity();
+
+-- The badge state is the client's most recent week in badge_history.
+-- badge_history.client_id references clients(id); a client's CRM record in
+-- public.customers shares that id, which is what the trigger and backfill
+-- match on. The customer foreign key below enforces it for new badge rows
+-- (NOT VALID, so history of clients without a customer record is left as is).
+CREATE OR REPLACE FUNCTION public.sync_customer_badge()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE public.customers c
+    SET badge_earned = NEW.earned
+    WHERE c.id = NEW.client_id
+      AND c.badge_earned IS DISTINCT FROM NEW.earned
+      AND NOT EXISTS (
+          SELECT 1 FROM badge_history b
+          WHERE b.client_id = NEW.client_id AND b.week_id > NEW.week_id
+      );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF to_regclass('public.badge_history') IS NOT NULL THEN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint WHERE conname = 'badge_history_customer_fkey'
+        ) THEN
+            ALTER TABLE badge_history
+                ADD CONSTRAINT badge_history_customer_fkey
+                FOREIGN KEY (client_id) REFERENCES public.customers(id) ON DELETE CASCADE
+                NOT VALID;
+        END IF;
+
+        UPDATE public.customers c
+        SET badge_earned = latest.earned
+        FROM (
+            SELECT DISTINCT ON (client_id) client_id, earned
+            FROM badge_history
+            ORDER BY client_id, week_id DESC
+        ) latest
+        WHERE latest.client_id = c.id;
+
+        DROP TRIGGER IF EXISTS badge_history_sync_customer ON badge_history;
+        CREATE TRIGGER badge_history_sync_customer
+        AFTER INSERT OR UPDATE OF earned ON badge_history
+        FOR EACH ROW
+        EXECUTE FUNCTION public.sync_customer_badge();
+    END IF;
+END $$;
@@ -0,0 +1,67 @@
+-- Franchise Tasks Migration
+-- Task store for the franchise portal. Priorities are stored as 1 (high) to 3
+-- (low) so the queue indexes sort by them directly. Every write stamps the row
+-- with its transaction ID, which orders the change feed the portal polls.
+
+CREATE TABLE IF NOT EXISTS regional.franchise_tasks (
+    id BIGSERIAL PRIMARY KEY,
+    franchise_id INTEGER NOT NULL REFERENCES regional.franchises(id) ON DELETE CASCADE,
+    client_id UUID REFERENCES public.customers(id) ON DELETE SET NULL,
+    title TEXT NOT NULL,
+    description TEXT,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'assigned', 'completed', 'cancelled')),
+    priority SMALLINT NOT NULL DEFAULT 2 CHECK (priority BETWEEN 1 AND 3),
+    due_date DATE,
+    assigned_to UUID,
+    created_by UUID,
+    completed_at TIMESTAMPTZ,
+    change_xid BIGINT NOT NULL DEFAULT pg_current_xact_id()::TEXT::BIGINT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Filtered listings: franchise, status, then queue order
+CREATE INDEX IF NOT EXISTS idx_franchise_tasks_queue
+    ON regional.franchise_tasks(franchise_id, status, priority, due_date, id);
+
+-- Next actionable tasks across both open statuses in one ordered index scan
+CREATE INDEX IF NOT EXISTS idx_franchise_tasks_actionable
+    ON regional.franchise_tasks(franchise_id, priority, due_date, id)
+    WHERE status IN ('pending', 'assigned');
+
+CREATE INDEX IF NOT EXISTS idx_franchise_tasks_changes
+    ON regional.franchise_tasks(franchise_id, change_xid, id);
+
+CREATE INDEX IF NOT EXISTS idx_franchise_tasks_client
+    ON regional.franchise_tasks(client_id);
+
+CREATE OR REPLACE FUNCTION regional.stamp_franchise_task()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.change_xid := pg_current_xact_id()::TEXT::BIGINT;
+    IF TG_OP = 'UPDATE' THEN
+        NEW.updated_at := NOW();
+        IF NEW.status = 'completed' AND OLD.status <> 'completed' THEN
+            NEW.completed_at := COALESCE(NEW.completed_at, NOW());
+        ELSIF NEW.status <> 'completed' THEN
+            NEW.completed_at := NULL;
+        END IF;
+    ELSIF NEW.status = 'completed' THEN
+        NEW.completed_at := COALESCE(NEW.completed_at, NOW());
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS franchise_tasks_stamp ON regional.franchise_tasks;
+CREATE TRIGGER franchise_tasks_stamp
+BEFORE INSERT OR UPDATE ON regional.franchise_tasks
+FOR EACH ROW
+EXECUTE FUNCTION regional.stamp_franchise_task();
+
+-- Oldest transaction still in progress; feed rows below it can no longer be
+-- overtaken by a concurrent commit
+CREATE OR REPLACE FUNCTION regional.task_feed_horizon()
+RETURNS BIGINT AS $$
+    SELECT pg_snapshot_xmin(pg_current_snapshot())::TEXT::BIGINT;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,73 @@
+-- Engagement Rules Migration
+-- Declares the insights and recommendations of weekly engagement reports as data.
+-- Rules are reloaded by the report generator when this table changes, so they can
+-- be edited without a deploy.
+
+CREATE TABLE IF NOT EXISTS public.engagement_rules (
+    id SERIAL PRIMARY KEY,
+    code VARCHAR(100) NOT NULL UNIQUE,
+    kind VARCHAR(20) NOT NULL CHECK (kind IN ('insight', 'recommendation')),
+    position INTEGER NOT NULL DEFAULT 0,
+    metric VARCHAR(100),
+    conditions JSONB NOT NULL DEFAULT '[]',
+    type VARCHAR(20) CHECK (type IN ('positive', 'negative', 'neutral')),
+    category VARCHAR(50) NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    actions JSONB NOT NULL DEFAULT '[]',
+    active BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Rule edits bump updated_at so the generator recompiles its plan
+CREATE OR REPLACE FUNCTION public.touch_engagement_rules_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS engagement_rules_touch_updated_at ON public.engagement_rules;
+CREATE TRIGGER engagement_rules_touch_updated_at
+BEFORE UPDATE ON public.engagement_rules
+FOR EACH ROW
+EXECUTE FUNCTION public.touch_engagement_rules_updated_at();
+
+-- The rules previously hard-coded in the report controller
+INSERT INTO public.engagement_rules (code, kind, position, metric, conditions, type, category, title, description, actions)
+VALUES
+    ('views_strong_increase', 'insight', 10, 'views',
+     '[{"metric": "views", "field": "direction", "op": "==", "value": "up"},
+       {"metric": "views", "field": "change_percentage", "op": ">", "value": 20}]',
+     'positive', 'visibility', 'Strong increase in profile views',
+     'Your profile views increased by {change_percentage}% compared to last week.', '[]'),
+    ('views_significant_drop', 'insight', 20, 'views',
+     '[{"metric": "views", "field": "direction", "op": "==", "value": "down"},
+       {"metric": "views", "field": "change_percentage", "op": "<", "value": -20}]',
+     'negative', 'visibility', 'Significant drop in profile views',
+     'Your profile views decreased by {abs_change_percentage}% compared to last week.', '[]'),
+    ('engagement_improved', 'insight', 30, 'engagement_rate',
+     '[{"metric": "engagement_rate", "field": "direction", "op": "==", "value": "up"}]',
+     'positive', 'engagement', 'Improved customer engagement',
+     'Your engagement rate increased to {current}%, up from {previous}% last week.', '[]'),
+    ('conversion_improved', 'insight', 40, 'conversion_rate',
+     '[{"metric": "conversion_rate", "field": "direction", "op": "==", "value": "up"}]',
+     'positive', 'conversion', 'Higher conversion rate',
+     'Your conversion rate improved to {current}%, generating more business from existing traffic.', '[]'),
+    ('conversion_declined', 'insight', 50, 'conversion_rate',
+     '[{"metric": "conversion_rate", "field": "direction", "op": "==", "value": "down"}]',
+     'negative', 'conversion', 'Declining conversion rate',
+     'Your conversion rate dropped to {current}% from {previous}% last week.', '[]'),
+    ('improve_visibility', 'recommendation', 10, NULL,
+     '[{"insight": {"type": "negative", "category": "visibility"}}]',
+     NULL, 'visibility', 'Improve your online visibility',
+     'Schedule more posts and update your business information to increase visibility.',
+     '["Schedule at least 3 posts for next week", "Update your business hours and information", "Add recent photos of your products or services"]'),
+    ('boost_engagement', 'recommendation', 20, 'engagement_rate',
+     '[{"metric": "engagement_rate", "field": "current", "op": "<", "value": 3.0}]',
+     NULL, 'engagement', 'Boost customer engagement',
+     'Encourage more interactions with your online presence.',
+     '["Respond to all customer questions within 2 hours", "Create interactive posts that ask questions", "Run a limited-time promotion to drive engagement"]')
+ON CONFLICT (code) DO NOTHING;
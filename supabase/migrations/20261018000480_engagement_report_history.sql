@@ -0,0 +1,28 @@
+-- Engagement Report History Migration
+-- Report history listings read a small summary column through a (client, year,
+-- week) index instead of the report body. New reports store insights and
+-- recommendations as references to public.engagement_rules templates; rows
+-- written before keep their full text and are returned as stored.
+
+ALTER TABLE public.engagement_records
+    ADD COLUMN IF NOT EXISTS summary JSONB NOT NULL DEFAULT '{}';
+
+-- Key metrics and trend directions of existing reports
+UPDATE public.engagement_records
+SET summary = jsonb_build_object(
+    'key_metrics', jsonb_build_object(
+        'views', COALESCE(metrics->'views', '0'),
+        'engagement_rate', COALESCE(metrics->'engagement_rate', '0'),
+        'conversion_rate', COALESCE(metrics->'conversion_rate', '0')
+    ),
+    'trends', jsonb_build_object(
+        'views', COALESCE(trends->'views'->>'direction', 'stable'),
+        'engagement', COALESCE(trends->'engagement_rate'->>'direction', 'stable'),
+        'conversion', COALESCE(trends->'conversion_rate'->>'direction', 'stable')
+    )
+)
+WHERE summary = '{}';
+
+-- Keyset pagination of a client's history, newest week first
+CREATE INDEX IF NOT EXISTS idx_engagement_records_history
+    ON public.engagement_records(client_id, year DESC, week_number DESC, id DESC);
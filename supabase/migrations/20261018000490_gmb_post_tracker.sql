@@ -0,0 +1,14 @@
+-- GMB Post Tracker Migration
+-- Indexes for the post tracker widget: latest published posts, upcoming
+-- scheduled posts and the weekly compliance window of one client.
+
+CREATE INDEX IF NOT EXISTS idx_gmb_post_client_published
+    ON public.gmb_post(client_id, status, published_date DESC);
+
+CREATE INDEX IF NOT EXISTS idx_gmb_post_client_scheduled
+    ON public.gmb_post(client_id, status, scheduled_date);
+
+-- Compliance window: published posts by publish date, failed ones by schedule date
+CREATE INDEX IF NOT EXISTS idx_gmb_post_client_compliance
+    ON public.gmb_post(client_id, (COALESCE(published_date, scheduled_date)))
+    WHERE status IN ('published', 'failed');
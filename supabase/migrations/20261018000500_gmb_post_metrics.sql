@@ -0,0 +1,36 @@
+-- GMB Post Metrics Migration
+-- Latest metrics snapshot per GMB post, upserted in multi-row batches by the
+-- metrics ingester, which then copies them onto gmb_post.metrics.
+
+CREATE TABLE IF NOT EXISTS public.gmb_post_metrics (
+    post_id TEXT PRIMARY KEY,
+    metrics JSONB NOT NULL,
+    captured_at TIMESTAMP NOT NULL,
+    ingested_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Snapshots that arrived before their post was synced
+CREATE OR REPLACE FUNCTION public.apply_gmb_post_metrics()
+RETURNS TRIGGER AS $$
+DECLARE
+    snapshot RECORD;
+BEGIN
+    IF NEW.post_id IS NOT NULL AND NEW.metrics IS NULL THEN
+        SELECT metrics, captured_at INTO snapshot
+        FROM public.gmb_post_metrics
+        WHERE post_id = NEW.post_id;
+
+        IF FOUND THEN
+            NEW.metrics := snapshot.metrics;
+            NEW.last_updated := snapshot.captured_at;
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS gmb_post_apply_metrics ON public.gmb_post;
+CREATE TRIGGER gmb_post_apply_metrics
+BEFORE INSERT ON public.gmb_post
+FOR EACH ROW
+EXECUTE FUNCTION public.apply_gmb_post_metrics();
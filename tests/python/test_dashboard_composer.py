@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+# Add parent directory to path to import the module to test
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to test
+from core.cache.response_cache import InMemoryCacheBackend
+from core.dashboard import DashboardComposer, DashboardSection
+
+
+class FakeSession:
+    """Stand-in for a database session handed to blocking loaders."""
+
+    def close(self):
+        pass
+
+
+class TestDashboardComposerDeadlines(unittest.TestCase):
+    """Unit tests for cached sections that miss their deadline."""
+
+    def setUp(self):
+        self.calls = 0
+
+        def slow_loader(db, investor_id):
+            self.calls += 1
+            time.sleep(0.3)
+            return {"investor_id": investor_id}
+
+        self.section = DashboardSection("summary", slow_loader, timeout_seconds=1.0, ttl_seconds=60, default={})
+        self.composer = DashboardComposer(
+            "test", [self.section], session_factory=FakeSession, backend=InMemoryCacheBackend()
+        )
+
+    def test_concurrent_load_timing_out_does_not_fail_the_other(self):
+        """Two concurrent loads of the same section where the later one times out."""
+
+        async def late_impatient_load():
+            await asyncio.sleep(0.1)
+            self.section.timeout_seconds = 0.05
+            try:
+                return await self.composer.compose("investor-1", investor_id="investor-1")
+            finally:
+                self.section.timeout_seconds = 1.0
+
+        async def scenario():
+            return await asyncio.gather(
+                self.composer.compose("investor-1", investor_id="investor-1"),
+                late_impatient_load()
+            )
+
+        first, second = asyncio.run(scenario())
+
+        self.assertEqual(first["meta"]["sections"]["summary"]["status"], "ok")
+        self.assertEqual(first["summary"], {"investor_id": "investor-1"})
+        self.assertEqual(second["meta"]["sections"]["summary"]["status"], "timeout")
+        self.assertEqual(second["summary"], {})
+        self.assertEqual(self.calls, 1)
+
+    def test_load_missing_deadline_fills_cache(self):
+        """A load that misses its deadline keeps running and serves the next request."""
+        self.section.timeout_seconds = 0.05
+
+        async def scenario():
+            missed = await self.composer.compose("investor-1", investor_id="investor-1")
+            await asyncio.sleep(0.4)
+            self.section.timeout_seconds = 1.0
+            served = await self.composer.compose("investor-1", investor_id="investor-1")
+            return missed, served
+
+        missed, served = asyncio.run(scenario())
+
+        self.assertEqual(missed["meta"]["sections"]["summary"]["status"], "timeout")
+        self.assertEqual(served["meta"]["sections"]["summary"]["status"], "ok")
+        self.assertEqual(served["summary"], {"investor_id": "investor-1"})
+        self.assertEqual(self.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
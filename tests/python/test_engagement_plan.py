@@ -0,0 +1,138 @@
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+# Add parent directory to path to import the module to test
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to test
+from apps.client.engagement_plan import EvaluationPlan
+
+
+def rule(code, kind, conditions, metric=None, type=None, category="visibility",
+         title="Title", description="Description", actions=None):
+    """Build an engagement rule row."""
+    return SimpleNamespace(
+        code=code, kind=kind, conditions=conditions, metric=metric, type=type, category=category,
+        title=title, description=description, actions=actions or []
+    )
+
+
+class TestEvaluationPlan(unittest.TestCase):
+    """Unit tests for column-wise engagement rule evaluation."""
+
+    def evaluate(self, rows, metrics, previous=None, trends=None):
+        plan = EvaluationPlan(rows)
+        count = len(metrics)
+        return plan.evaluate(metrics, previous or [{}] * count, trends or [{}] * count)
+
+    def test_rules_fire_per_client(self):
+        """Each client gets the rules whose clauses all match its own values."""
+        rows = [
+            rule("views_high", "insight", [
+                {"metric": "views", "op": ">=", "value": 100},
+                {"metric": "clicks", "op": ">", "value": 5}
+            ], type="positive"),
+            rule("views_low", "insight", [{"metric": "views", "op": "<", "value": 100}], type="negative"),
+        ]
+        metrics = [{"views": 150, "clicks": 10}, {"views": 150, "clicks": 2}, {"views": 20, "clicks": 9}]
+
+        insights, recommendations = self.evaluate(rows, metrics)
+
+        self.assertEqual(insights, [[{"rule": "views_high"}], [], [{"rule": "views_low"}]])
+        self.assertEqual(recommendations, [[], [], []])
+
+    def test_missing_and_incomparable_values_do_not_match(self):
+        """Clauses over missing or incomparable values never match."""
+        rows = [rule("views_low", "insight", [{"metric": "views", "op": "<", "value": 100}])]
+        metrics = [{}, {"views": None}, {"views": "n/a"}, {"views": 3}]
+
+        insights, _ = self.evaluate(rows, metrics)
+
+        self.assertEqual(insights, [[], [], [], [{"rule": "views_low"}]])
+
+    def test_trend_fields_and_template_params(self):
+        """Trend fields are tested and references keep only the template's values."""
+        rows = [rule(
+            "views_up", "insight",
+            [{"metric": "views", "field": "change_percentage", "op": ">", "value": 10}],
+            metric="views", type="positive",
+            title="Views up {abs_change_percentage}%", description="{current} views, {previous} before"
+        )]
+        metrics = [{"views": 120}, {"views": 100}]
+        previous = [{"views": 100}, {"views": 100}]
+        trends = [{"views": {"change_percentage": 20.0, "change_value": 20}}, {"views": {"change_percentage": 0.0}}]
+
+        insights, _ = self.evaluate(rows, metrics, previous, trends)
+
+        self.assertEqual(insights, [
+            [{"rule": "views_up", "params": {"abs_change_percentage": 20.0, "current": 120, "previous": 100}}],
+            []
+        ])
+
+    def test_recommendations_depend_on_insights(self):
+        """A recommendation with an insight condition fires only where a matching insight fired."""
+        rows = [
+            rule("views_low", "insight", [{"metric": "views", "op": "<", "value": 100}], type="negative"),
+            rule("clicks_low", "insight", [{"metric": "clicks", "op": "<", "value": 5}], type="negative",
+                 category="engagement"),
+            rule("post_more", "recommendation", [
+                {"insight": {"type": "negative", "category": "visibility"}},
+                {"metric": "posts_published", "op": "<", "value": 3}
+            ]),
+        ]
+        metrics = [
+            {"views": 50, "clicks": 10, "posts_published": 1},
+            {"views": 500, "clicks": 1, "posts_published": 1},
+            {"views": 50, "clicks": 10, "posts_published": 4},
+        ]
+
+        insights, recommendations = self.evaluate(rows, metrics)
+
+        self.assertEqual(insights, [[{"rule": "views_low"}], [{"rule": "clicks_low"}], [{"rule": "views_low"}]])
+        self.assertEqual(recommendations, [[{"rule": "post_more"}], [], []])
+
+    def test_shared_clauses_and_invalid_rules(self):
+        """Identical clauses are compiled once and invalid rules are skipped."""
+        clause = {"metric": "views", "op": ">", "value": 0}
+        rows = [
+            rule("a", "insight", [clause]),
+            rule("b", "recommendation", [clause]),
+            rule("bad_op", "insight", [{"metric": "views", "op": "~", "value": 0}]),
+            rule("bad_kind", "summary", [clause]),
+            rule("insight_on_insight", "insight", [{"insight": {"type": "negative"}}]),
+        ]
+
+        plan = EvaluationPlan(rows)
+
+        self.assertEqual(len(plan.clauses), 1)
+        self.assertEqual([r.code for r in plan.insights], ["a"])
+        self.assertEqual([r.code for r in plan.recommendations], ["b"])
+
+    def test_batches_wider_than_a_machine_word(self):
+        """Masks keep client positions for batches of more than 64 clients."""
+        rows = [rule("even", "insight", [{"metric": "views", "op": "==", "value": 0}])]
+        metrics = [{"views": 0 if client % 2 == 0 else 1} for client in range(130)]
+
+        insights, _ = self.evaluate(rows, metrics)
+
+        fired = [client for client, items in enumerate(insights) if items]
+        self.assertEqual(fired, list(range(0, 130, 2)))
+
+    def test_render_keeps_unknown_placeholders(self):
+        """Rendering fills known values and leaves the rest of the template as is."""
+        plan = EvaluationPlan([rule(
+            "tip", "recommendation", [{"metric": "views", "op": ">", "value": 0}],
+            title="Reach {current} people", description="Keep {unknown}", actions=["Post"]
+        )])
+
+        rendered = plan.templates["tip"].render({"current": 5})
+
+        self.assertEqual(rendered["title"], "Reach 5 people")
+        self.assertEqual(rendered["description"], "Keep {unknown}")
+        self.assertEqual(rendered["actions"], ["Post"])
+
+
+if __name__ == '__main__':
+    unittest.main()
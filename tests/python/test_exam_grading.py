@@ -0,0 +1,109 @@
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+# Add parent directory to path to import the module to test
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to test
+from addons.certifications.grading import CompiledAnswerKey, option_mask
+
+
+def question(question_id, correct_options, weight=1.0, topic=None):
+    """Build an exam_questions row."""
+    return SimpleNamespace(id=question_id, correct_options=correct_options, weight=weight, topic=topic)
+
+
+class TestOptionMask(unittest.TestCase):
+    """Unit tests for option bitmask encoding."""
+
+    def test_single_and_multiple_options(self):
+        """Single indexes and lists encode to the same bits in any order."""
+        self.assertEqual(option_mask(None), 0)
+        self.assertEqual(option_mask(2), 0b100)
+        self.assertEqual(option_mask([0, 3]), option_mask([3, 0]))
+        self.assertEqual(option_mask([0, 3]), 0b1001)
+
+    def test_invalid_options_rejected(self):
+        """Out-of-range, boolean and non-integer options are rejected."""
+        for selected in (-1, 64, True, "1", [1, 2.0]):
+            with self.assertRaises(ValueError):
+                option_mask(selected)
+
+
+class TestCompiledAnswerKey(unittest.TestCase):
+    """Unit tests for grading against a compiled answer key."""
+
+    def setUp(self):
+        self.key = CompiledAnswerKey(7, [
+            question(1, [0], weight=1.0, topic="reviews"),
+            question(2, [1, 2], weight=2.0, topic="citations"),
+            question(3, [3], weight=1.0, topic="reviews"),
+            question(4, [0], weight=1.0, topic=None)
+        ], pass_score=60)
+
+    def test_perfect_score(self):
+        """All answers correct scores 100 and passes."""
+        result = self.key.grade({1: 0, 2: [2, 1], 3: [3], 4: 0})
+
+        self.assertEqual(result["score"], 100.0)
+        self.assertEqual(result["correct_answers"], 4)
+        self.assertEqual(result["total_questions"], 4)
+        self.assertTrue(result["passed"])
+        self.assertEqual(result["areas_for_improvement"], [])
+
+    def test_weighted_score_and_topics(self):
+        """Scores are weighted and missed topics are ordered by weight lost."""
+        result = self.key.grade({"1": 1, "2": [1, 2], "4": 0})
+
+        self.assertEqual(result["score"], 60.0)
+        self.assertEqual(result["correct_answers"], 2)
+        self.assertTrue(result["passed"])
+        self.assertEqual(result["areas_for_improvement"], ["reviews"])
+
+        failed = self.key.grade({1: 0, 2: [1], 3: 3})
+        self.assertEqual(failed["score"], 40.0)
+        self.assertFalse(failed["passed"])
+        self.assertEqual(failed["areas_for_improvement"], ["citations"])
+
+    def test_partial_multi_select_is_wrong(self):
+        """A multi-select question only counts when exactly the right options are chosen."""
+        self.assertEqual(self.key.grade({2: [1]})["correct_answers"], 0)
+        self.assertEqual(self.key.grade({2: [0, 1, 2]})["correct_answers"], 0)
+
+    def test_unknown_question_rejected(self):
+        """Answers to questions outside the key are rejected."""
+        for answers in ({99: 0}, {"abc": 0}):
+            with self.assertRaises(ValueError):
+                self.key.grade(answers)
+
+    def test_version_tracks_key_contents(self):
+        """The version changes with the key and is stable otherwise."""
+        same = CompiledAnswerKey(7, [
+            question(1, [0], weight=1.0, topic="reviews"),
+            question(2, [1, 2], weight=2.0, topic="citations"),
+            question(3, [3], weight=1.0, topic="reviews"),
+            question(4, [0], weight=1.0)
+        ], pass_score=60)
+        changed = CompiledAnswerKey(7, [
+            question(1, [1], weight=1.0, topic="reviews"),
+            question(2, [1, 2], weight=2.0, topic="citations"),
+            question(3, [3], weight=1.0, topic="reviews"),
+            question(4, [0], weight=1.0)
+        ], pass_score=60)
+
+        self.assertEqual(same.version, self.key.version)
+        self.assertNotEqual(changed.version, self.key.version)
+        self.assertEqual(self.key.grade({})["answer_key_version"], self.key.version)
+
+    def test_empty_key(self):
+        """A key without questions scores 0 rather than dividing by zero."""
+        result = CompiledAnswerKey(8, [], pass_score=50).grade({})
+
+        self.assertEqual(result["score"], 0.0)
+        self.assertFalse(result["passed"])
+
+
+if __name__ == '__main__':
+    unittest.main()
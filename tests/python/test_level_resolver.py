@@ -0,0 +1,118 @@
+import os
+import random
+import sys
+import unittest
+from types import SimpleNamespace
+
+# Add parent directory to path to import the module to test
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to test
+from addons.gamification.levels import LevelResolver
+
+
+class FakeResult:
+    """Result of a fake query."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def one(self):
+        return self.rows[0]
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Answers the level table version query, then the level rows query."""
+
+    def __init__(self, rows, version=(0, None)):
+        self.rows = rows
+        self.version = version
+        self.row_reads = 0
+
+    def execute(self, statement):
+        if statement._order_by_clauses:
+            self.row_reads += 1
+            return FakeResult(self.rows)
+        return FakeResult([self.version])
+
+
+def level_row(name, min_points, max_points=None):
+    """Build a gamification.levels row."""
+    return SimpleNamespace(name=name, description=None, min_points=min_points, max_points=max_points, icon_url=None)
+
+
+class TestLevelResolver(unittest.TestCase):
+    """Unit tests for binary-search level resolution."""
+
+    def setUp(self):
+        self.resolver = LevelResolver()
+        self.db = FakeSession([])
+
+    def test_default_levels_when_table_is_empty(self):
+        """An empty level table falls back to the default levels."""
+        levels = self.resolver.get_levels(self.db)
+
+        self.assertEqual(len(levels), 10)
+        self.assertEqual(levels[0]["min_points"], 0)
+
+    def test_resolve_progress(self):
+        """A total resolves to its level, the points still needed and the progress."""
+        start = self.resolver.resolve(self.db, 0)
+        self.assertEqual(start["current_level"]["level"], 1)
+        self.assertEqual(start["next_level_points"], 100)
+        self.assertEqual(start["progress_percentage"], 0.0)
+
+        middle = self.resolver.resolve(self.db, 175)
+        self.assertEqual(middle["current_level"]["level"], 2)
+        self.assertEqual(middle["next_level"]["level"], 3)
+        self.assertEqual(middle["next_level_points"], 75)
+        self.assertEqual(middle["progress_percentage"], 50.0)
+
+        top = self.resolver.resolve(self.db, 9000)
+        self.assertEqual(top["current_level"]["level"], 10)
+        self.assertIsNone(top["next_level"])
+        self.assertEqual(top["progress_percentage"], 100.0)
+
+    def test_thresholds_and_negative_totals(self):
+        """Thresholds belong to the level they start; totals below zero stay at level 1."""
+        self.assertEqual(
+            self.resolver.level_numbers(self.db, [99, 100, 249, 250, -20]),
+            [1, 2, 2, 3, 1]
+        )
+
+    def test_sorted_and_unsorted_pages_agree(self):
+        """Descending leaderboard pages and unsorted input resolve like single lookups."""
+        rng = random.Random(3)
+        totals = [rng.randrange(-50, 5000) for _ in range(200)]
+        single = [self.resolver.level_numbers(self.db, [total])[0] for total in totals]
+
+        self.assertEqual(self.resolver.level_numbers(self.db, totals), single)
+        descending = sorted(totals, reverse=True)
+        self.assertEqual(
+            self.resolver.level_numbers(self.db, descending),
+            [single[totals.index(total)] for total in descending]
+        )
+        resolved = self.resolver.resolve_many(self.db, descending)
+        self.assertEqual([item["total_points"] for item in resolved], descending)
+
+    def test_table_reloaded_only_when_it_changes(self):
+        """Rows are re-read when the table version changes, not on every check."""
+        resolver = LevelResolver(check_interval_seconds=0)
+        db = FakeSession([level_row("Bronze", 0), level_row("Silver", 10), level_row("Gold", 50)], version=(3, "t1"))
+
+        self.assertEqual(resolver.level_numbers(db, [0, 10, 49, 50]), [1, 2, 2, 3])
+        resolver.level_numbers(db, [5])
+        self.assertEqual(db.row_reads, 1)
+
+        db.rows = [level_row("Bronze", 0), level_row("Gold", 20)]
+        db.version = (2, "t2")
+        self.assertEqual(resolver.level_numbers(db, [25]), [2])
+        self.assertEqual(resolver.get_levels(db)[1]["name"], "Gold")
+        self.assertEqual(db.row_reads, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import bisect
+import os
+import random
+import sys
+import unittest
+
+# Add parent directory to path to import the module to test
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to test
+from addons.leaderboards.ranked_set import RankedSet
+
+
+class TestRankedSet(unittest.TestCase):
+    """Unit tests for the indexable skip list behind leaderboards."""
+
+    def test_standings_order(self):
+        """(-score, user_id) keys rank the highest score first and break ties by user ID."""
+        standings = RankedSet([(-50, "carol"), (-120, "bob"), (-120, "alice"), (-10, "dave")])
+
+        self.assertEqual(list(standings), [(-120, "alice"), (-120, "bob"), (-50, "carol"), (-10, "dave")])
+        self.assertEqual(standings.rank((-50, "carol")), 2)
+        self.assertEqual(standings[0], (-120, "alice"))
+        self.assertEqual(standings[-1], (-10, "dave"))
+        self.assertEqual(standings.slice(1, 3), [(-120, "bob"), (-50, "carol")])
+
+    def test_score_change_moves_key(self):
+        """A score change is a discard of the old key and an add of the new one."""
+        standings = RankedSet([(-50, "carol"), (-120, "bob"), (-10, "dave")])
+
+        self.assertTrue(standings.discard((-10, "dave")))
+        standings.add((-200, "dave"))
+
+        self.assertEqual(standings.rank((-200, "dave")), 0)
+        self.assertEqual(standings.rank((-50, "carol")), 2)
+        self.assertEqual(len(standings), 3)
+
+    def test_missing_keys_and_bounds(self):
+        """Missing keys and out-of-range positions are reported."""
+        standings = RankedSet([1, 2, 3])
+
+        self.assertFalse(standings.discard(4))
+        self.assertNotIn(4, standings)
+        self.assertIn(2, standings)
+        with self.assertRaises(KeyError):
+            standings.rank(4)
+        with self.assertRaises(IndexError):
+            standings[3]
+        self.assertEqual(standings.slice(-5, 2), [1, 2])
+        self.assertEqual(standings.slice(2, 99), [3])
+        self.assertEqual(standings.slice(3, 5), [])
+        self.assertEqual(RankedSet().slice(0, 10), [])
+
+    def test_matches_sorted_list_under_random_operations(self):
+        """Positions stay consistent with a sorted list through random adds and discards."""
+        rng = random.Random(7)
+        random.seed(7)
+        standings = RankedSet()
+        expected = []
+
+        for _ in range(3000):
+            key = rng.randrange(500)
+            if key in standings:
+                self.assertTrue(standings.discard(key))
+                expected.remove(key)
+            else:
+                standings.add(key)
+                bisect.insort(expected, key)
+
+        self.assertEqual(list(standings), expected)
+        self.assertEqual(len(standings), len(expected))
+        for position, key in enumerate(expected):
+            self.assertEqual(standings.rank(key), position)
+            self.assertEqual(standings[position], key)
+        self.assertEqual(standings.slice(10, 40), expected[10:40])
+
+
+if __name__ == '__main__':
+    unittest.main()
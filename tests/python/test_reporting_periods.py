@@ -0,0 +1,33 @@
+import os
+import sys
+import unittest
+from datetime import date
+from decimal import Decimal
+
+# Add parent directory to path to import the module to test
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to test
+from core.reporting import add_months, format_change
+
+
+class TestReportingPeriods(unittest.TestCase):
+    """Unit tests for the shared report period helpers."""
+
+    def test_add_months_across_years(self):
+        """Months are shifted across year boundaries in both directions."""
+        self.assertEqual(add_months(date(2026, 11, 1), 2), date(2027, 1, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(add_months(date(2026, 3, 1), -15), date(2024, 12, 1))
+        self.assertEqual(add_months(date(2026, 5, 1), 0), date(2026, 5, 1))
+
+    def test_format_change(self):
+        """Changes are signed percentages with one decimal."""
+        self.assertEqual(format_change(Decimal("110"), Decimal("100")), "+10.0%")
+        self.assertEqual(format_change(75, 100), "-25.0%")
+        self.assertEqual(format_change(0, 0), None)
+        self.assertEqual(format_change(5, None), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+# Add parent directory to path to import the module to test
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# Import the module to test
+from core.cache.response_cache import ResponseCache
+
+
+class TestResponseCacheCoalescing(unittest.TestCase):
+    """Unit tests for request coalescing in ResponseCache."""
+
+    def test_waiter_timeout_does_not_fail_leader(self):
+        """A waiter timing out while the leader loads leaves the shared load intact."""
+        cache = ResponseCache("test", ttl_seconds=30, wait_timeout_seconds=5)
+        started = threading.Event()
+
+        def slow_loader():
+            started.set()
+            time.sleep(0.3)
+            return {"value": 42}
+
+        async def impatient_waiter():
+            await asyncio.get_running_loop().run_in_executor(None, started.wait)
+            cache.wait_timeout_seconds = 0.05
+            try:
+                return await cache.aget("key", slow_loader)
+            finally:
+                cache.wait_timeout_seconds = 5
+
+        async def patient_waiter():
+            await asyncio.get_running_loop().run_in_executor(None, started.wait)
+            await asyncio.sleep(0.1)
+            return await cache.aget("key", slow_loader)
+
+        async def scenario():
+            return await asyncio.gather(
+                cache.aget("key", slow_loader),
+                impatient_waiter(),
+                patient_waiter(),
+                return_exceptions=True
+            )
+
+        leader, impatient, patient = asyncio.run(scenario())
+
+        self.assertEqual(leader, {"value": 42})
+        self.assertIsInstance(impatient, asyncio.TimeoutError)
+        self.assertEqual(patient, {"value": 42})
+        self.assertEqual(cache.get("key", lambda: {"value": 0}), {"value": 42})
+        self.assertEqual(cache.stats["errors"], 0)
+        self.assertEqual(cache.stats["coalesced"], 2)
+
+    def test_failed_load_reaches_waiters(self):
+        """A loader error is raised to the leader and the coalesced waiters."""
+        cache = ResponseCache("test")
+        started = threading.Event()
+
+        def failing_loader():
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError("boom")
+
+        async def waiter():
+            await asyncio.get_running_loop().run_in_executor(None, started.wait)
+            return await cache.aget("key", failing_loader)
+
+        async def scenario():
+            return await asyncio.gather(cache.aget("key", failing_loader), waiter(), return_exceptions=True)
+
+        leader, follower = asyncio.run(scenario())
+
+        self.assertIsInstance(leader, RuntimeError)
+        self.assertIsInstance(follower, RuntimeError)
+        self.assertEqual(cache.stats["errors"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
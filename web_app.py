@@ -201,6 +201,7 @@ from apps.client.api.badge_leaderboard_api import router as badge_leaderboard_ro
 from apps.client.api.achievement_api import router as achievement_api_router
 from apps.client.api.recent_posts_api import router as recent_posts_router
 from apps.client.api.mock_posts_api import router as mock_posts_router
+from apps.client.api.post_metrics_api import router as post_metrics_router
 from backend.api import router as backend_api_router
 from apps.admin.badge_dashboard_admin import router as badge_admin_router
 from apps.admin.api.badge_admin_api import router as badge_admin_api_router
@@ -212,6 +213,7 @@ app.include_router(badge_leaderboard_router)
 app.include_router(achievement_api_router)
 app.include_router(recent_posts_router)
 app.include_router(mock_posts_router)
+app.include_router(post_metrics_router)
 app.include_router(backend_api_router)
 app.include_router(badge_admin_router)
 app.include_router(badge_admin_api_router)